@@ -99,6 +99,7 @@ DJANGO_APPS = [
     "django.contrib.sites",
     "django.contrib.flatpages",
     "django.contrib.gis",
+    "django.contrib.postgres",
     "django.contrib.humanize",
 ]
 
@@ -353,6 +354,11 @@ NOTIFY_EMAIL = env("NOTIFY_EMAIL", default="notif@example.com")
 BREVO_CL_SIGNUP_BUYER_ID = env.int("BREVO_CL_SIGNUP_BUYER_ID", 10)
 BREVO_CL_SIGNUP_SIAE_ID = env.int("BREVO_CL_SIGNUP_SIAE_ID", 27)
 BREVO_CL_BUYER_SEARCH_SIAE_LIST_ID = env.int("BREVO_CL_BUYER_SEARCH_SIAE_LIST_ID", 12)
+# requests per second, shared by all the threads of a process (0: no limit)
+BREVO_API_RATE_LIMIT = env.float("BREVO_API_RATE_LIMIT", 10)
+BREVO_API_CONNECTION_POOL_SIZE = env.int("BREVO_API_CONNECTION_POOL_SIZE", 10)
+# number of threads of the CRM sync commands (crm_brevo_sync_*)
+BREVO_SYNC_MAX_WORKERS = env.int("BREVO_SYNC_MAX_WORKERS", 4)
 
 INBOUND_PARSING_DOMAIN_EMAIL = env.str("INBOUND_PARSING_DOMAIN_EMAIL", "reply.staging.lemarche.inclusion.beta.gouv.fr")
 
@@ -472,6 +478,20 @@ SIAE_CLIENT_REFERENCE_LOGO_FOLDER_NAME = "client_reference_logo"
 LABEL_LOGO_FOLDER_NAME = "label_logo"
 USER_IMAGE_FOLDER_NAME = "user_image"
 SIAE_EXPORT_FOLDER_NAME = "siae_export"
+# bigger exports are generated in the background & stored on S3 (cached for SIAE_EXPORT_CACHE_TIMEOUT)
+SIAE_EXPORT_ASYNC_THRESHOLD = env.int("SIAE_EXPORT_ASYNC_THRESHOLD", 5_000)
+SIAE_EXPORT_CACHE_TIMEOUT = 60 * 60 * 6  # in seconds
+# an export in progress (identical requests wait for it), released at the end of the task
+SIAE_EXPORT_PENDING_TIMEOUT = 60 * 30  # in seconds
+# search facets (sectors, networks, labels): invalidated on change (see lemarche/utils/facets.py)
+SEARCH_FACETS_CACHE_TIMEOUT = 60 * 60 * 24  # in seconds
+# inclusive potential aggregates: invalidated on Siae changes (but not on bulk updates)
+INCLUSIVE_POTENTIAL_CACHE_TIMEOUT = 60 * 60  # in seconds
+# transactional templates (by code): invalidated on change (but not on bulk updates)
+TEMPLATE_TRANSACTIONAL_CACHE_TIMEOUT = 60 * 60  # in seconds
+# API conditional GET (ETag), see lemarche/api/caching.py
+API_MODEL_VERSION_TIMEOUT = 60 * 60  # in seconds
+API_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24  # in seconds
 STAT_EXPORT_FOLDER_NAME = "stat_export"
 
 STORAGE_UPLOAD_KINDS = {
@@ -506,12 +526,30 @@ STORAGE_UPLOAD_KINDS = {
 
 API_PERIMETER_AUTOCOMPLETE_MAX_RESULTS = 20
 
+# shared HTTP client of the APIs (see lemarche.utils.apis.http_client)
+API_HTTP_TIMEOUT = env.int("API_HTTP_TIMEOUT", 10)
+# connections kept alive per host
+API_HTTP_POOL_SIZE = env.int("API_HTTP_POOL_SIZE", 10)
+# seconds, cache of the idempotent lookups (SIREN / SIRET details)
+API_HTTP_CACHE_TIMEOUT = env.int("API_HTTP_CACHE_TIMEOUT", 60 * 60 * 24)
+
 # Base Adresse Nationale (BAN).
 # https://geoservices.ign.fr/documentation/services/services-geoplateforme/geocodage
 API_GEOPF_BASE_URL = "https://data.geopf.fr"
+API_GEOPF_TIMEOUT = env.int("API_GEOPF_TIMEOUT", 5)
+# the CSV endpoint (batch geocoding of the imports) is much slower
+API_GEOPF_CSV_TIMEOUT = env.int("API_GEOPF_CSV_TIMEOUT", 120)
+# "api" or "local" (no HTTP call: the coords of the city of the post code, see lemarche.utils.apis.geocoding)
+GEOCODING_BACKEND = env.str("GEOCODING_BACKEND", "api")
 # https://api.gouv.fr/api/api-geo.html#doc_tech
 API_GEO_BASE_URL = "https://geo.api.gouv.fr"
 
+# DECP (Données Essentielles de la Commande Publique), on the tabular API of data.gouv.fr.
+# requests per second, shared by all the threads of a process (0: no limit)
+DECP_API_RATE_LIMIT = env.float("DECP_API_RATE_LIMIT", 20)
+# number of threads of the sync commands (sync_siaes_decp*)
+DECP_SYNC_MAX_WORKERS = env.int("DECP_SYNC_MAX_WORKERS", 4)
+
 # API Entreprise.
 # https://dashboard.entreprise.api.gouv.fr/login (login is done through auth.api.gouv.fr)
 # https://doc.entreprise.api.gouv.fr/
@@ -783,6 +821,7 @@ INACTIVE_USER_TIMEOUT_IN_MONTHS = 3 * 12
 INACTIVE_USER_WARNING_DELAY_IN_DAYS = 30
 TENDER_DELETION_TIMEOUT_IN_MONTHS = 12
 TRACKER_DELETION_TIMEOUT_IN_MONTHS = 12
+TRACKER_PARTITIONS_AHEAD_IN_MONTHS = 3
 
 # Wagtail
 # ------------------------------------------------------------------------------
@@ -901,8 +940,19 @@ NEXUS_METABASE_DB_PASSWORD = os.getenv("NEXUS_METABASE_DB_PASSWORD")
 
 NEXUS_API_BASE_URL = os.getenv("NEXUS_API_BASE_URL")
 NEXUS_API_TOKEN = os.getenv("NEXUS_API_TOKEN")
+# seconds between a change and its sync (the changes in the meantime are sent together, see lemarche.nexus.outbox)
+NEXUS_SYNC_DEBOUNCE_DELAY = env.int("NEXUS_SYNC_DEBOUNCE_DELAY", 10)
+# failures of an outbox batch before its objects are isolated (a rejected object must not block the others)
+NEXUS_SYNC_OUTBOX_MAX_RETRIES = env.int("NEXUS_SYNC_OUTBOX_MAX_RETRIES", 3)
+# chunks sent concurrently by the nexus_full_sync command
+NEXUS_FULL_SYNC_MAX_WORKERS = env.int("NEXUS_FULL_SYNC_MAX_WORKERS", 4)
 
 # Stats
 # ------------------------------------------------------------------------------
 
 TRACKER_ENABLED = os.getenv("TRACKER_ENABLED", "False") == "True"
+# trackers are buffered in-process and saved in batches by a background thread
+TRACKER_BUFFER_ENABLED = env.bool("TRACKER_BUFFER_ENABLED", True)
+TRACKER_BUFFER_MAX_SIZE = env.int("TRACKER_BUFFER_MAX_SIZE", 10_000)
+TRACKER_BUFFER_BATCH_SIZE = env.int("TRACKER_BUFFER_BATCH_SIZE", 500)
+TRACKER_BUFFER_FLUSH_INTERVAL = env.int("TRACKER_BUFFER_FLUSH_INTERVAL", 5)  # seconds
@@ -52,6 +52,19 @@ CACHES = {
     }
 }
 
+# save the trackers synchronously
+TRACKER_BUFFER_ENABLED = False
+
+# Brevo: no rate limit, and the CRM sync commands run in the test thread (test transaction)
+BREVO_API_RATE_LIMIT = 0
+BREVO_SYNC_MAX_WORKERS = 1
+# same for the DECP sync commands
+DECP_API_RATE_LIMIT = 0
+DECP_SYNC_MAX_WORKERS = 1
+
+# geocoding: no call to the API
+GEOCODING_BACKEND = "local"
+
 
 # Nexus metabase db
 # ---------------------------------------
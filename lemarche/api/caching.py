@@ -0,0 +1,84 @@
+# Conditional GET for the public API: partners poll the reference lists (sectors, kinds...)
+# that rarely change. The responses get an ETag, derived from the versions of the models they serve
+# (bumped by their post_save/post_delete receivers, see lemarche/utils/cache_versions.py),
+# and a matching If-None-Match header gets a 304 Not Modified (without serializing anything).
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import mixins, status
+from rest_framework.response import Response
+
+from lemarche.utils.cache_versions import get_api_model_versions
+
+
+API_RESPONSE_CACHE_KEY = "api_response:{etag}"
+
+
+class ConditionalResponseMixin:
+    """
+    etag_models: the models served by the viewset.
+    Without etag_models (static choices), the ETag is derived from the choices themselves (get_queryset()).
+    cache_responses: the response data is also kept in the shared cache, keyed by the ETag.
+    """
+
+    etag_models = []
+    cache_responses = False
+
+    def get_etag(self, request):
+        if self.etag_models:
+            versions = get_api_model_versions(self.etag_models)
+        else:
+            versions = [repr(self.get_queryset())]
+        etag_key = "|".join(
+            str(value)
+            for value in [
+                self.__class__.__name__,
+                request.get_full_path(),
+                request.user.is_authenticated,
+                request.accepted_renderer.format,
+                *versions,
+            ]
+        )
+        return hashlib.md5(etag_key.encode(), usedforsecurity=False).hexdigest()
+
+    def is_not_modified(self, request, etag):
+        # weak comparison (the GZip middleware & proxies weaken the ETags)
+        if_none_match = [value.removeprefix("W/") for value in parse_etags(request.headers.get("If-None-Match", ""))]
+        return "*" in if_none_match or quote_etag(etag) in if_none_match
+
+    def get_conditional_response(self, request, get_response, *args, **kwargs):
+        etag = self.get_etag(request)
+        if self.is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif self.cache_responses:
+            cache_key = API_RESPONSE_CACHE_KEY.format(etag=etag)
+            data = cache.get(cache_key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = get_response(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(cache_key, response.data, settings.API_RESPONSE_CACHE_TIMEOUT)
+        else:
+            response = get_response(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = quote_etag(etag)
+            # the clients can keep the response, but must revalidate it (If-None-Match)
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+
+class ConditionalListModelMixin(ConditionalResponseMixin, mixins.ListModelMixin):
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(request, super().list, *args, **kwargs)
+
+
+class ConditionalRetrieveModelMixin(ConditionalResponseMixin, mixins.RetrieveModelMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(request, super().retrieve, *args, **kwargs)
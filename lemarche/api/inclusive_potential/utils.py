@@ -1,5 +1,11 @@
+import logging
 from dataclasses import dataclass
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, FloatField, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+
 from lemarche.api.inclusive_potential.constants import (
     LIMIT_FOR_CLAUSE,
     LIMIT_FOR_ECO_DEPENDENCY,
@@ -10,6 +16,12 @@ from lemarche.api.inclusive_potential.constants import (
 )
 from lemarche.siaes.constants import KIND_HANDICAP_LIST, KIND_INSERTION_LIST
 from lemarche.siaes.models import Siae
+from lemarche.utils.cache_versions import INCLUSIVE_POTENTIAL_VERSION_CACHE_KEY, get_cache_version
+
+
+logger = logging.getLogger(__name__)
+
+INCLUSIVE_POTENTIAL_CACHE_KEY = "inclusive_potential:{version}:{sector_id}:{perimeter_id}:{presta_mode}"
 
 
 @dataclass
@@ -24,11 +36,9 @@ class PotentialData:
     employees_permanent_average: int
 
 
-def set_analysis_data(siaes, siaes_count, budget, analysis_data):
-    # Get all valid CA values from siaes and calculate the average manually to avoid to many fat queries
-    ca_values = [siae.ca or siae.api_entreprise_ca for siae in siaes if siae.ca or siae.api_entreprise_ca]
-    if ca_values:
-        analysis_data["ca_average"] = round(sum(ca_values) / len(ca_values))
+def set_analysis_data(ca_average, siaes_count, budget, analysis_data):
+    if ca_average:
+        analysis_data["ca_average"] = round(ca_average)
         analysis_data["eco_dependency"] = round(budget / analysis_data["ca_average"] * 100)
 
     if siaes_count > LIMIT_FOR_RESERVATION:
@@ -56,64 +66,115 @@ def set_analysis_data(siaes, siaes_count, budget, analysis_data):
     analysis_data["recommendation"] = recommendation
 
 
-def get_inclusive_potential_data(
-    sector: str, perimeter: str, budget: int, presta_mode: str | None = None
-) -> tuple[PotentialData, dict]:
+def get_inclusive_potential_aggregates(sector, perimeter, presta_mode: str | None = None) -> dict:
     """
-    Get the potential data for a given sector and perimeter.
-    Budget is optional and is used to calculate the eco-dependency.
-    presta_mode filters structures by their economic model (service vs. mise à disposition).
-    When None (API default), all structure kinds are included.
+    Count the siaes by kind, badges... and sum their employees in a single query.
+    The result is cached (invalidated when a Siae or SiaeActivity changes).
     """
-    qs = Siae.objects.filter_with_potential_through_activities(sector, perimeter)
+    if presta_mode not in PRESTA_MODE_TO_SIAE_KINDS:
+        presta_mode = None
+    version = get_cache_version(INCLUSIVE_POTENTIAL_VERSION_CACHE_KEY)
+    cache_key = INCLUSIVE_POTENTIAL_CACHE_KEY.format(
+        version=version, sector_id=sector.id, perimeter_id=perimeter.id if perimeter else None, presta_mode=presta_mode
+    )
+    aggregates = cache.get(cache_key)
+    if aggregates is not None:
+        return aggregates
 
-    if presta_mode and presta_mode in PRESTA_MODE_TO_SIAE_KINDS:
+    # Get all siaes with potential through activities, filtered by presta_mode
+    qs = Siae.objects.filter_with_potential_through_activities(sector, perimeter)
+    if presta_mode:
         qs = qs.filter(kind__in=PRESTA_MODE_TO_SIAE_KINDS[presta_mode])
 
-    # Get all siaes with potential through activities, filtered by presta_mode
-    siaes = qs.with_is_local(perimeter)
-
-    # Calculate the number of siaes by kind and the number of employees
-    # Prefer to loop over siaes rather than using querysets to avoid lots of big queries
-    siaes_count = 0
-    insertion_siaes = 0
-    handicap_siaes = 0
-    local_siaes = 0
-    siaes_with_super_badge = 0
-    siaes_with_won_contract = 0
-    employees_insertion_count = 0
-    employees_permanent_count = 0
-    for siae in siaes:
-        siaes_count += 1
-        if siae.kind in KIND_INSERTION_LIST:
-            insertion_siaes += 1
-            employees_insertion_count += siae.c2_etp_count or siae.employees_insertion_count or 0
-        elif siae.kind in KIND_HANDICAP_LIST:
-            handicap_siaes += 1
-            employees_insertion_count += siae.employees_insertion_count or 0
-
-        if siae.is_local:
-            local_siaes += 1
-
-        siaes_with_super_badge += 1 if siae.super_badge else 0
-        siaes_with_won_contract += 1 if siae.has_won_contract_last_3_years else 0
-
-        employees_permanent_count += siae.employees_permanent_count or 0
+    is_insertion = Q(kind__in=KIND_INSERTION_LIST)
+    is_handicap = Q(kind__in=KIND_HANDICAP_LIST)
+    aggregates = qs.with_is_local(perimeter).aggregate(
+        siaes_count=Count("id"),
+        insertion_siaes=Count("id", filter=is_insertion),
+        handicap_siaes=Count("id", filter=is_handicap),
+        local_siaes=Count("id", filter=Q(is_local=True)),
+        siaes_with_super_badge=Count("id", filter=Q(super_badge=True)),
+        siaes_with_won_contract=Count("id", filter=Q(has_won_contract_last_3_years=True)),
+        # insertion: c2_etp_count first, otherwise employees_insertion_count
+        employees_insertion_count=Sum(
+            Case(
+                When(
+                    is_insertion,
+                    then=Coalesce(
+                        NullIf("c2_etp_count", Value(0.0)),
+                        Cast(NullIf("employees_insertion_count", Value(0)), FloatField()),
+                        Value(0.0),
+                    ),
+                ),
+                When(is_handicap, then=Cast(Coalesce("employees_insertion_count", Value(0)), FloatField())),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        ),
+        employees_permanent_count=Sum(Coalesce("employees_permanent_count", Value(0))),
+        # "ca" field first, otherwise "api_entreprise_ca" (empty values are ignored by the average)
+        ca_average=Avg(
+            Coalesce(NullIf("ca", Value(0)), NullIf("api_entreprise_ca", Value(0)), output_field=IntegerField())
+        ),
+    )
+    cache.set(cache_key, aggregates, settings.INCLUSIVE_POTENTIAL_CACHE_TIMEOUT)
+    return aggregates
+
+
+def build_inclusive_potential_data(aggregates: dict, budget: int) -> tuple[PotentialData, dict]:
+    siaes_count = aggregates["siaes_count"]
 
     analysis_data = {}
     if budget:
-        set_analysis_data(siaes, siaes_count, budget, analysis_data)
+        set_analysis_data(aggregates["ca_average"], siaes_count, budget, analysis_data)
 
     return (
         PotentialData(
             potential_siaes=siaes_count,
-            insertion_siaes=insertion_siaes,
-            handicap_siaes=handicap_siaes,
-            local_siaes=local_siaes,
-            siaes_with_super_badge=siaes_with_super_badge,
-            siaes_with_won_contract=siaes_with_won_contract,
-            employees_insertion_average=round(employees_insertion_count / siaes_count, 2) if siaes_count else 0,
-            employees_permanent_average=round(employees_permanent_count / siaes_count, 2) if siaes_count else 0,
+            insertion_siaes=aggregates["insertion_siaes"],
+            handicap_siaes=aggregates["handicap_siaes"],
+            local_siaes=aggregates["local_siaes"],
+            siaes_with_super_badge=aggregates["siaes_with_super_badge"],
+            siaes_with_won_contract=aggregates["siaes_with_won_contract"],
+            employees_insertion_average=(
+                round(aggregates["employees_insertion_count"] / siaes_count, 2) if siaes_count else 0
+            ),
+            employees_permanent_average=(
+                round(aggregates["employees_permanent_count"] / siaes_count, 2) if siaes_count else 0
+            ),
         ),
         analysis_data,
     )
+
+
+def get_inclusive_potential_data(
+    sector: str, perimeter: str, budget: int, presta_mode: str | None = None
+) -> tuple[PotentialData, dict]:
+    """
+    Get the potential data for a given sector and perimeter.
+    Budget is optional and is used to calculate the eco-dependency.
+    presta_mode filters structures by their economic model (service vs. mise à disposition).
+    When None (API default), all structure kinds are included.
+    """
+    aggregates = get_inclusive_potential_aggregates(sector, perimeter, presta_mode)
+    return build_inclusive_potential_data(aggregates, budget)
+
+
+def get_inclusive_potential_data_list(projects: list, presta_mode: str | None = None) -> list:
+    """
+    Batch version of get_inclusive_potential_data, for a list of (sector, perimeter, budget).
+    The aggregates are computed only once per (sector, perimeter).
+    Returns a list of (PotentialData, analysis_data), with None if the analysis of a project failed.
+    """
+    aggregates_by_key = dict()
+    results = []
+    for sector, perimeter, budget in projects:
+        key = (sector.id, perimeter.id if perimeter else None)
+        try:
+            if key not in aggregates_by_key:
+                aggregates_by_key[key] = get_inclusive_potential_aggregates(sector, perimeter, presta_mode)
+            results.append(build_inclusive_potential_data(aggregates_by_key[key], budget))
+        except Exception:
+            logger.exception("Erreur lors de l'analyse du potentiel inclusif (%s, %s)", sector, perimeter)
+            results.append(None)
+    return results
@@ -1,13 +1,16 @@
 from drf_spectacular.utils import extend_schema
-from rest_framework import mixins, viewsets
+from rest_framework import viewsets
 
+from lemarche.api.caching import ConditionalListModelMixin
 from lemarche.api.networks.serializers import NetworkSerializer
 from lemarche.networks.models import Network
 
 
-class NetworkViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class NetworkViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     queryset = Network.objects.all()
     serializer_class = NetworkSerializer
+    etag_models = [Network]
+    cache_responses = True
 
     @extend_schema(summary="Lister tous les réseaux", tags=[Network._meta.verbose_name_plural])
     def list(self, request, *args, **kwargs):
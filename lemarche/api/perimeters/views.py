@@ -1,16 +1,21 @@
 from django.conf import settings
 from drf_spectacular.utils import extend_schema
 from rest_framework import mixins, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
+from lemarche.api.caching import ConditionalListModelMixin
 from lemarche.api.perimeters.filters import PerimeterAutocompleteFilter, PerimeterFilter
 from lemarche.api.perimeters.serializers import PerimeterChoiceSerializer, PerimeterSimpleSerializer
+from lemarche.perimeters.autocomplete import get_perimeter_autocomplete_index
 from lemarche.perimeters.models import Perimeter
 
 
-class PerimeterViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class PerimeterViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     queryset = Perimeter.objects.all()
     serializer_class = PerimeterSimpleSerializer
     filterset_class = PerimeterFilter
+    etag_models = [Perimeter]
 
     @extend_schema(summary="Lister tous les périmètres", tags=[Perimeter._meta.verbose_name_plural])
     def list(self, request, *args, **kwargs):
@@ -25,14 +30,6 @@ class PerimeterAutocompleteViewSet(mixins.ListModelMixin, viewsets.GenericViewSe
     pagination_class = None
     http_method_names = ["get"]
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        """
-        Limiter le nombre de réponses renvoyées
-        """
-        if response.status_code == 200:
-            response.data = response.data[: settings.API_PERIMETER_AUTOCOMPLETE_MAX_RESULTS]
-        return super().finalize_response(request, response, *args, **kwargs)
-
     @extend_schema(
         summary="Recherche de périmètres par auto-complétion",
         tags=[Perimeter._meta.verbose_name_plural],
@@ -41,18 +38,28 @@ class PerimeterAutocompleteViewSet(mixins.ListModelMixin, viewsets.GenericViewSe
         """
         Maximum 20 résultats renvoyés
         """
-        return super().list(request, args, kwargs)
+        # the filters are only validated: the search is done with the in-memory index (no database query)
+        filterset = self.filterset_class(request.query_params, queryset=Perimeter.objects.none(), request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
 
-    def get_queryset(self):
-        kind = self.request.query_params.get("kind", None)
-        if kind and kind in [id for (id, name) in Perimeter.KIND_CHOICES]:
-            return Perimeter.objects.filter(kind=kind)
-        return self.queryset
+        limit = settings.API_PERIMETER_AUTOCOMPLETE_MAX_RESULTS
+        if filterset.form.cleaned_data.get("results"):
+            limit = max(1, min(int(filterset.form.cleaned_data["results"]), limit))
+        kind = request.query_params.get("kind", None)
+        if kind not in [id for (id, name) in Perimeter.KIND_CHOICES]:
+            kind = None
+
+        perimeters = get_perimeter_autocomplete_index().search(
+            filterset.form.cleaned_data["q"], kind=kind, limit=limit
+        )
+        return Response(perimeters)
 
 
-class PerimeterKindViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class PerimeterKindViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     serializer_class = PerimeterChoiceSerializer
     queryset = Perimeter.objects.none()
+    cache_responses = True
 
     def get_queryset(self):
         siae_kinds = [{"id": id, "name": name} for (id, name) in Perimeter.KIND_CHOICES]
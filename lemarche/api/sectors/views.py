@@ -1,13 +1,16 @@
 from drf_spectacular.utils import extend_schema
-from rest_framework import mixins, viewsets
+from rest_framework import viewsets
 
+from lemarche.api.caching import ConditionalListModelMixin
 from lemarche.api.sectors.serializers import SectorSerializer
-from lemarche.sectors.models import Sector
+from lemarche.sectors.models import Sector, SectorGroup
 
 
-class SectorViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
-    queryset = Sector.objects.all()
+class SectorViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
+    queryset = Sector.objects.select_related("group")
     serializer_class = SectorSerializer
+    etag_models = [Sector, SectorGroup]
+    cache_responses = True
 
     @extend_schema(summary="Lister tous les secteurs d'activité", tags=[Sector._meta.verbose_name_plural])
     def list(self, request, *args, **kwargs):
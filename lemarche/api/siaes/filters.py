@@ -32,6 +32,11 @@ class SiaeFilter(django_filters.FilterSet):
         label="Date de dernière mise à jour",
         field_name="c1_last_sync_date",
     )
+    updated_since = django_filters.IsoDateTimeFilter(
+        label="Modifiées depuis (date ISO 8601)<br /><br /><i>Pour une synchronisation incrémentale</i>",
+        field_name="updated_at",
+        lookup_expr="gte",
+    )
 
     class Meta:
         model = Siae
@@ -0,0 +1,107 @@
+# Keyset (cursor) pagination of the siaes, on (updated_at, id).
+# Unlike the offset pagination, the cost of a page does not grow with its position
+# (see the siaes_siae_updated_at_id_idx index), and the pages are stable
+# when siaes are created or updated during the mirroring of the directory.
+
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+KEYSET_ORDERING = ["updated_at", "id"]
+
+
+def encode_cursor(siae):
+    position = f"{siae.updated_at.isoformat()}|{siae.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Return the (updated_at, id) position of the cursor, or None (empty cursor: first page)
+    """
+    if not cursor:
+        return None
+    try:
+        updated_at, siae_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        updated_at = parse_datetime(updated_at)
+        siae_id = int(siae_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        updated_at = None
+    if updated_at is None:
+        raise NotFound("Curseur invalide")
+    return updated_at, siae_id
+
+
+def filter_after_position(queryset, position):
+    """
+    The siaes strictly after the (updated_at, id) position, in the keyset order
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if position is None:
+        return queryset
+    updated_at, siae_id = position
+    return queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=siae_id))
+
+
+def iter_keyset_chunks(queryset, chunk_size):
+    """
+    Iterate over the whole queryset, chunk by chunk (a keyset page per query).
+    The prefetch_related of the queryset are done chunk by chunk.
+    """
+    position = None
+    while True:
+        chunk = list(filter_after_position(queryset, position)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        position = (chunk[-1].updated_at, chunk[-1].id)
+
+
+class SiaeKeysetPagination(BasePagination):
+    """
+    Used instead of the default (limit/offset) pagination when the `cursor` parameter is passed
+    (empty for the first page).
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = 100
+    max_page_size = 1000
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = decode_cursor(request.query_params.get(self.cursor_query_param))
+
+        page = list(filter_after_position(queryset, position)[: self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[: self.page_size]
+        self.next_cursor = encode_cursor(page[-1]) if (self.has_next and page) else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -1,17 +1,36 @@
-from django.http import HttpResponseBadRequest
+from django.db.models import Prefetch
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema
-from rest_framework import mixins, viewsets
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from lemarche.api.caching import ConditionalListModelMixin, ConditionalRetrieveModelMixin
 from lemarche.api.siaes.filters import SiaeFilter
+from lemarche.api.siaes.pagination import SiaeKeysetPagination, iter_keyset_chunks
 from lemarche.api.siaes.serializers import SiaeDetailSerializer
 from lemarche.api.utils import BasicChoiceSerializer, BasicChoiceWithParentSerializer
+from lemarche.networks.models import Network
+from lemarche.sectors.models import Sector
 from lemarche.siaes import constants as siae_constants
-from lemarche.siaes.models import Siae
+from lemarche.siaes.models import Siae, SiaeActivity
 
 
-class SiaeViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+CURSOR_PARAMETER = OpenApiParameter(
+    name=SiaeKeysetPagination.cursor_query_param,
+    type=OpenApiTypes.STR,
+    description=(
+        "Pagination par curseur (triée par date de modification) : "
+        "passer un curseur vide pour la première page, puis suivre le lien <code>next</code>"
+    ),
+)
+
+
+class SiaeViewSet(ConditionalListModelMixin, ConditionalRetrieveModelMixin, viewsets.GenericViewSet):
     """
     Données d'une structure d'insertion par l'activité économique (SIAE).
     """
@@ -19,28 +38,78 @@ class SiaeViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Gen
     queryset = Siae.objects.api_query_set()
     serializer_class = SiaeDetailSerializer
     filterset_class = SiaeFilter
+    # the activities, offers, client references... changes also bump the Siae version
+    etag_models = [Siae, Sector, Network]
+
+    stream_chunk_size = 500
 
     def get_queryset(self):
         return (
             super()
             .get_queryset()
             .prefetch_related(
-                "activities", "activities__sector", "networks", "offers", "client_references", "labels_old"
+                Prefetch("activities", queryset=SiaeActivity.objects.select_related("sector")),
+                "networks",
+                "offers",
+                "client_references",
+                "labels_old",
             )
         )
 
+    @property
+    def paginator(self):
+        """
+        Keyset pagination if the `cursor` parameter is passed, else the default (limit/offset) pagination
+        """
+        if not hasattr(self, "_paginator"):
+            if SiaeKeysetPagination.is_requested(self.request):
+                self._paginator = SiaeKeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     @extend_schema(
         summary="Lister toutes les structures",
         tags=[Siae._meta.verbose_name_plural],
+        parameters=[CURSOR_PARAMETER],
     )
     def list(self, request, format=None):
         """
         Liste exhaustive des structures d'insertion par l'activité économique (SIAE).
 
+        Pour parcourir tout l'annuaire, préférer la pagination par curseur (paramètre <code>cursor</code>)
+        et le filtre <code>updated_since</code>, ou l'export <code>/api/siae/stream/</code>.<br /><br />
         <i>Un <strong>token</strong> est nécessaire pour l'accès complet à cette ressource.</i>
         """
         return super().list(request, format)
 
+    @extend_schema(
+        summary="Exporter les structures (NDJSON)",
+        tags=[Siae._meta.verbose_name_plural],
+        responses={(200, "application/x-ndjson"): OpenApiResponse(response=SiaeDetailSerializer)},
+    )
+    @action(detail=False, url_path="stream")
+    def stream(self, request, format=None):
+        """
+        Export de toutes les structures (mêmes filtres que la liste), une structure JSON par ligne,
+        triées par date de modification.<br /><br />
+        Pour une synchronisation incrémentale, passer en <code>updated_since</code> la valeur de l'en-tête
+        <code>X-Next-Updated-Since</code> de l'export précédent.<br /><br />
+        <i>Un <strong>token</strong> est nécessaire pour l'accès complet à cette ressource.</i>
+        """
+        # read before the export: the siaes updated during the export will be in the next one
+        next_updated_since = timezone.now()
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(self._stream_lines(queryset), content_type="application/x-ndjson")
+        response["X-Next-Updated-Since"] = next_updated_since.isoformat()
+        return response
+
+    def _stream_lines(self, queryset):
+        renderer = JSONRenderer()
+        for chunk in iter_keyset_chunks(queryset, self.stream_chunk_size):
+            for siae in chunk:
+                yield renderer.render(SiaeDetailSerializer(siae).data) + b"\n"
+
     @extend_schema(
         summary="Détail d'une structure (par son id)",
         tags=[Siae._meta.verbose_name_plural],
@@ -69,6 +138,7 @@ class SiaeViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Gen
         summary="Détail d'une structure (par son siren)",
         tags=[Siae._meta.verbose_name_plural],
         responses=SiaeDetailSerializer,
+        parameters=[CURSOR_PARAMETER],
     )
     def retrieve_by_siren(self, request, siren=None, format=None):
         """
@@ -84,6 +154,7 @@ class SiaeViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Gen
         summary="Détail d'une structure (par son siret)",
         tags=[Siae._meta.verbose_name_plural],
         responses=SiaeDetailSerializer,
+        parameters=[CURSOR_PARAMETER],
     )
     def retrieve_by_siret(self, request, siret=None, format=None):
         """
@@ -103,6 +174,11 @@ class SiaeViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Gen
         return Response(serializer.data)
 
     def _list_return(self, request, queryset, format):
+        # plain list by default (backward compatibility), paginated if the cursor is passed
+        if SiaeKeysetPagination.is_requested(request):
+            page = self.paginate_queryset(queryset)
+            serializer = SiaeDetailSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = SiaeDetailSerializer(
             queryset,
             many=True,
@@ -110,9 +186,10 @@ class SiaeViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Gen
         return Response(serializer.data)
 
 
-class SiaeKindViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class SiaeKindViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     serializer_class = BasicChoiceWithParentSerializer
     queryset = Siae.objects.none()
+    cache_responses = True
 
     def get_queryset(self):
         siae_kind_insertion = [
@@ -131,9 +208,10 @@ class SiaeKindViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         return super().list(request, args, kwargs)
 
 
-class SiaePrestaTypeViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class SiaePrestaTypeViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     serializer_class = BasicChoiceSerializer
     queryset = Siae.objects.none()
+    cache_responses = True
 
     def get_queryset(self):
         siae_kinds = [{"id": id, "name": name} for (id, name) in siae_constants.PRESTA_CHOICES]
@@ -6,6 +6,7 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import mixins, viewsets
 from rest_framework.permissions import IsAuthenticated
 
+from lemarche.api.caching import ConditionalListModelMixin
 from lemarche.api.tenders.serializers import TenderSerializer
 from lemarche.api.utils import BasicChoiceSerializer
 from lemarche.tenders import constants as tender_constants
@@ -102,9 +103,10 @@ class TenderViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         add_to_contact_list(user=user, contact_type="signup", tender=tender)
 
 
-class TenderKindViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class TenderKindViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     serializer_class = BasicChoiceSerializer
     queryset = Tender.objects.none()
+    cache_responses = True
 
     def get_queryset(self):
         tender_kinds = [{"id": id, "name": name} for (id, name) in tender_constants.KIND_CHOICES]
@@ -115,9 +117,10 @@ class TenderKindViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         return super().list(request, args, kwargs)
 
 
-class TenderAmountViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class TenderAmountViewSet(ConditionalListModelMixin, viewsets.GenericViewSet):
     serializer_class = BasicChoiceSerializer
     queryset = Tender.objects.none()
+    cache_responses = True
 
     def get_queryset(self):
         tender_amounts = [{"id": id, "name": name} for (id, name) in tender_constants.AMOUNT_RANGE_CHOICES]
@@ -3,19 +3,30 @@ from uuid import uuid4
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.validators import ValidationError
 from django.db import IntegrityError, models
 from django.db.models import Count, Func, IntegerField, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.text import slugify
 from django_extensions.db.fields import ShortUUIDField
 from shortuuid import uuid
 
-from lemarche.conversations.tasks import send_transactional_email
+from lemarche.conversations.tasks import send_transactional_email, send_transactional_emails
 from lemarche.users import constants as user_constants
+from lemarche.utils.cache_versions import (
+    TEMPLATE_TRANSACTIONAL_VERSION_CACHE_KEY,
+    get_cache_version,
+    invalidate_template_transactionals,
+)
 from lemarche.utils.data import add_validation_error
 
 
+TEMPLATE_TRANSACTIONAL_CACHE_KEY = "template_transactional:{version}:{code}"
+
+
 class ConversationQuerySet(models.QuerySet):
     def has_answer(self):
         return self.exclude(data=[])
@@ -215,6 +226,11 @@ class EmailGroup(models.Model):
     def disabled_for_email(self, email):
         return DisabledEmail.objects.filter(user__email=email, group=self).exists()
 
+    def disabled_emails(self, email_list) -> set:
+        return set(
+            DisabledEmail.objects.filter(user__email__in=email_list, group=self).values_list("user__email", flat=True)
+        )
+
 
 class TemplateTransactionalQuerySet(models.QuerySet):
     def with_stats(self):
@@ -222,6 +238,19 @@ class TemplateTransactionalQuerySet(models.QuerySet):
             send_log_count=Count("send_logs"),
         )
 
+    def get_by_code(self, code):
+        """
+        Same as .get(code=code) (with the group), but cached: the templates are fetched for every email sent.
+        The cache is invalidated when a template or an email group changes.
+        """
+        version = get_cache_version(TEMPLATE_TRANSACTIONAL_VERSION_CACHE_KEY)
+        cache_key = TEMPLATE_TRANSACTIONAL_CACHE_KEY.format(version=version, code=code)
+        template = cache.get(cache_key)
+        if template is None:
+            template = self.select_related("group").get(code=code)
+            cache.set(cache_key, template, settings.TEMPLATE_TRANSACTIONAL_CACHE_TIMEOUT)
+        return template
+
 
 class TemplateTransactional(models.Model):
     name = models.CharField(verbose_name="Nom", max_length=255)
@@ -331,6 +360,76 @@ class TemplateTransactional(models.Model):
             # send email with async task
             send_transactional_email(args)
 
+    def send_transactional_emails(
+        self,
+        recipients,
+        subject=None,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        from_name=settings.DEFAULT_FROM_NAME,
+    ):
+        """Send a transactional email to many recipients using Brevo with the template (batch send).
+        Args:
+            recipients (list): list of dict with the keys "recipient_email", "recipient_name", "variables",
+                and optionally "recipient_content_object" & "parent_content_object" (see send_transactional_email)
+            subject (str): Subject of the email.
+            from_email (str): Email address of the sender.
+            from_name (str): Name of the sender.
+
+        Returns:
+            list: the recipients to whom the email is sent
+        """
+        if not self.is_active or not recipients:
+            return []
+
+        # check if recipient emails don't associated to a user or associated user doesn't disable email group
+        if self.group:
+            disabled_emails = self.group.disabled_emails([recipient["recipient_email"] for recipient in recipients])
+            recipients = [recipient for recipient in recipients if recipient["recipient_email"] not in disabled_emails]
+        if not len(recipients):
+            return []
+
+        args = {
+            "template_id": self.get_template_id,
+            "recipients": [
+                {
+                    "recipient_email": recipient["recipient_email"],
+                    "recipient_name": recipient["recipient_name"],
+                    "variables": recipient["variables"],
+                }
+                for recipient in recipients
+            ],
+            "subject": subject,
+            "from_email": from_email,
+            "from_name": from_name,
+        }
+
+        # create logs (same args as send_transactional_email, for each recipient)
+        TemplateTransactionalSendLog.objects.bulk_create(
+            [
+                TemplateTransactionalSendLog(
+                    template_transactional=self,
+                    recipient_content_object=recipient.get("recipient_content_object"),
+                    parent_content_object=recipient.get("parent_content_object"),
+                    extra_data={
+                        "source": "BREVO",
+                        "args": {
+                            "template_id": args["template_id"],
+                            **recipient_args,
+                            "subject": subject,
+                            "from_email": from_email,
+                            "from_name": from_name,
+                        },
+                    },
+                )
+                for recipient, recipient_args in zip(recipients, args["recipients"])
+            ]
+        )
+
+        # send emails with a single async task
+        send_transactional_emails(args)
+
+        return recipients
+
 
 class TemplateTransactionalSendLog(models.Model):
     template_transactional = models.ForeignKey(
@@ -374,3 +473,10 @@ class DisabledEmail(models.Model):
         constraints = [
             models.UniqueConstraint("user", "group", name="unique_group_per_user"),
         ]
+
+
+@receiver([post_save, post_delete], sender=TemplateTransactional)
+@receiver([post_save, post_delete], sender=EmailGroup)
+def template_transactional_post_save_or_delete(sender, instance, **kwargs):
+    """The templates are cached (see TemplateTransactionalQuerySet.get_by_code)."""
+    invalidate_template_transactionals()
@@ -9,3 +9,11 @@ def send_transactional_email(args):
 
     brevo_email_client = api_brevo.BrevoTransactionalEmailApiClient()
     brevo_email_client.send_transactional_email_with_template(**args)
+
+
+@task()
+def send_transactional_emails(args):
+    """Send a transactional email to many recipients using Brevo API (batch send)."""
+
+    brevo_email_client = api_brevo.BrevoTransactionalEmailApiClient()
+    brevo_email_client.send_transactional_emails_with_template(**args)
@@ -1,5 +1,7 @@
+import threading
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 from sentry_sdk.crons import monitor
 
@@ -7,6 +9,7 @@ from lemarche.companies.models import Company
 from lemarche.siaes.models import Siae
 from lemarche.utils.apis import api_brevo
 from lemarche.utils.commands import BaseCommand
+from lemarche.utils.concurrency import run_concurrently
 
 
 class Command(BaseCommand):
@@ -17,11 +20,14 @@ class Command(BaseCommand):
     - Complete or partial synchronization (recently modified companies)
     - Supports both SIAE and buyer Company synchronization
     - Tracks statistics over 90 days for Brevo (SIAE only)
+    - Only sends the companies whose Brevo payload changed since their last sync (fingerprint in extra_data)
     - Robust error handling and recovery mechanism
     - Progress display
+    - Companies sent concurrently (--max-workers threads), within the Brevo rate limit (see BrevoRateLimiter)
 
     Usage:
     python manage.py crm_brevo_sync_companies --recently-updated
+    python manage.py crm_brevo_sync_companies --max-workers=8
     python manage.py crm_brevo_sync_companies --batch-size=50 --dry-run
     python manage.py crm_brevo_sync_companies
     """
@@ -36,6 +42,7 @@ class Command(BaseCommand):
             "extra_data_updated": 0,
             "total": 0,
         }
+        self.stats_lock = threading.Lock()
         self.brevo_company_client = api_brevo.BrevoCompanyApiClient()
 
     def add_arguments(self, parser):
@@ -74,6 +81,13 @@ class Command(BaseCommand):
             default="all",
             help="Type of companies to synchronize: siae, buyer, or all",
         )
+        parser.add_argument(
+            "--max-workers",
+            dest="max_workers",
+            type=int,
+            default=settings.BREVO_SYNC_MAX_WORKERS,
+            help="Number of companies sent to Brevo concurrently",
+        )
         parser.add_argument("--dry-run", dest="dry_run", action="store_true", help="Simulation mode (no changes)")
 
     @monitor(monitor_slug="crm_brevo_sync_companies")
@@ -84,6 +98,7 @@ class Command(BaseCommand):
         company_type: str = "all",
         dry_run: bool = False,
         recently_updated_from_weeks: int = 2,
+        max_workers: int = settings.BREVO_SYNC_MAX_WORKERS,
         **options,
     ):
         self.stdout_info("-" * 80)
@@ -96,6 +111,7 @@ class Command(BaseCommand):
         self.max_retries = max_retries
         self.retry_delay = 5  # milliseconds
         self.recently_updated_from_weeks = recently_updated_from_weeks
+        self.max_workers = max_workers
 
         if dry_run:
             self.stdout_info("Simulation mode enabled - no changes will be made")
@@ -136,23 +152,31 @@ class Command(BaseCommand):
             self.stats["total"] = siaes_qs.count()
             self.stdout_info(f"Recently modified SIAEs: {self.stats['total']}")
 
-        return siaes_qs.with_tender_stats(since_days=90)  # type: ignore
+        return siaes_qs.with_recent_tender_stats(since_days=90)  # type: ignore
+
+    def _increment_stat(self, name: str):
+        """The companies are processed in several threads"""
+        with self.stats_lock:
+            self.stats[name] += 1
 
     def _process_siaes(self, siaes_qs, dry_run: bool) -> None:
-        """Process each SIAE individually."""
-        # use .iterator to optimize the chunk processing of large querysets
-        for siae in siaes_qs.iterator():
+        """Process each SIAE individually (concurrently)."""
+
+        def process_siae(siae):
             try:
                 self._process_single_siae(siae, dry_run)
             except Exception as e:
-                self.stats["errors"] += 1
+                self._increment_stat("errors")
                 self.stdout_error(f"Error processing SIAE {siae.id}: {str(e)}")
 
+        # use .iterator to optimize the chunk processing of large querysets
+        run_concurrently(process_siae, siaes_qs.iterator(), max_workers=self.max_workers)
+
     def _process_single_siae(self, siae, dry_run: bool):
         """Process a single SIAE."""
         new_extra_data = self._prepare_siae_extra_data(siae)
-        extra_data_changed = self._update_siae_extra_data_if_needed(siae, new_extra_data, dry_run)
-        self._sync_siae_with_brevo_if_needed(siae, extra_data_changed, dry_run, self.max_retries)
+        self._update_siae_extra_data_if_needed(siae, new_extra_data, dry_run)
+        self._sync_siae_with_brevo_if_needed(siae, dry_run, self.max_retries)
 
     def _prepare_siae_extra_data(self, siae) -> dict:
         """Prepare new extra_data for SIAE."""
@@ -168,22 +192,22 @@ class Command(BaseCommand):
             siae.extra_data.update({"brevo_company_data": new_extra_data})
             if not dry_run:
                 siae.save(update_fields=["extra_data"])
-            self.stats["extra_data_updated"] += 1
+            self._increment_stat("extra_data_updated")
             return True
         return False
 
-    def _sync_siae_with_brevo_if_needed(self, siae, extra_data_changed: bool, dry_run: bool, max_retries: int):
-        """Synchronize SIAE with Brevo if needed."""
-        if not siae.brevo_company_id or extra_data_changed:
+    def _sync_siae_with_brevo_if_needed(self, siae, dry_run: bool, max_retries: int):
+        """Synchronize SIAE with Brevo if its payload changed since its last synchronization."""
+        if api_brevo.has_company_body_changed(siae, api_brevo.get_siae_company_body(siae)):
             if not dry_run:
                 self.brevo_company_client.create_or_update_company(siae)
 
             if siae.brevo_company_id:
-                self.stats["updated"] += 1
+                self._increment_stat("updated")
             else:
-                self.stats["created"] += 1
+                self._increment_stat("created")
         else:
-            self.stats["skipped"] += 1
+            self._increment_stat("skipped")
 
     def _sync_buyer_companies(self, recently_updated: bool, max_retries: int, dry_run: bool):
         """Synchronize buyer companies with Brevo CRM"""
@@ -209,19 +233,22 @@ class Command(BaseCommand):
         return companies_qs.with_user_stats()  # type: ignore
 
     def _process_buyer_companies(self, companies_qs, dry_run: bool, max_retries: int):
-        """Process each buyer company individually."""
-        for company in companies_qs.iterator():
+        """Process each buyer company individually (concurrently)."""
+
+        def process_buyer_company(company):
             try:
                 self._process_single_buyer_company(company, dry_run, max_retries)
             except Exception as e:
-                self.stats["errors"] += 1
+                self._increment_stat("errors")
                 self.stdout_error(f"Error processing buyer company {company.id}: {str(e)}")
 
+        run_concurrently(process_buyer_company, companies_qs.iterator(), max_workers=self.max_workers)
+
     def _process_single_buyer_company(self, company, dry_run: bool, max_retries: int):
         """Process a single buyer company."""
         new_extra_data = self._prepare_buyer_company_extra_data(company)
-        extra_data_changed = self._update_buyer_company_extra_data_if_needed(company, new_extra_data, dry_run)
-        self._sync_buyer_company_with_brevo_if_needed(company, extra_data_changed, dry_run, max_retries)
+        self._update_buyer_company_extra_data_if_needed(company, new_extra_data, dry_run)
+        self._sync_buyer_company_with_brevo_if_needed(company, dry_run, max_retries)
 
     def _prepare_buyer_company_extra_data(self, company) -> dict:
         """Prepare new extra_data for buyer company."""
@@ -236,24 +263,22 @@ class Command(BaseCommand):
             company.extra_data.update({"brevo_company_data": new_extra_data})
             if not dry_run:
                 company.save(update_fields=["extra_data"])
-            self.stats["extra_data_updated"] += 1
+            self._increment_stat("extra_data_updated")
             return True
         return False
 
-    def _sync_buyer_company_with_brevo_if_needed(
-        self, company, extra_data_changed: bool, dry_run: bool, max_retries: int
-    ):
-        """Synchronize buyer company with Brevo if needed."""
-        if not company.brevo_company_id or extra_data_changed:
+    def _sync_buyer_company_with_brevo_if_needed(self, company, dry_run: bool, max_retries: int):
+        """Synchronize buyer company with Brevo if its payload changed since its last synchronization."""
+        if api_brevo.has_company_body_changed(company, api_brevo.get_buyer_company_body(company)):
             if not dry_run:
                 self.brevo_company_client.create_or_update_buyer_company(company)
 
             if company.brevo_company_id:
-                self.stats["updated"] += 1
+                self._increment_stat("updated")
             else:
-                self.stats["created"] += 1
+                self._increment_stat("created")
         else:
-            self.stats["skipped"] += 1
+            self._increment_stat("skipped")
 
     def _display_final_report(self):
         """Display final synchronization report."""
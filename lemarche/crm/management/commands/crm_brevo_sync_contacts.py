@@ -1,4 +1,5 @@
 import logging
+import threading
 from datetime import timedelta
 
 from django.conf import settings
@@ -8,6 +9,7 @@ from sentry_sdk.crons import monitor
 from lemarche.users.models import User
 from lemarche.utils.apis import api_brevo
 from lemarche.utils.commands import BaseCommand
+from lemarche.utils.concurrency import run_concurrently
 
 
 logger = logging.getLogger(__name__)
@@ -21,11 +23,13 @@ class Command(BaseCommand):
     - Synchronizes users of a specific type with Brevo
     - Can check existing contacts before creating new ones
     - Automatic error handling and retries
+    - Users sent concurrently (--max-workers threads), within the Brevo rate limit (see BrevoRateLimiter)
 
     Usage:
     python manage.py crm_brevo_sync_contacts --kind-users=BUYER --brevo-list-id=10 --with-existing-contacts --dry-run
     python manage.py crm_brevo_sync_contacts --kind-users=SIAE
     python manage.py crm_brevo_sync_contacts --recently-updated --brevo-list-id=23
+    python manage.py crm_brevo_sync_contacts --kind-users=SIAE --max-workers=8
     """
 
     kind_users = None  # Type of users to filter (e.g., BUYER, SIAE)
@@ -33,6 +37,7 @@ class Command(BaseCommand):
     brevo_list_id = None  # Brevo list ID to synchronize with
     with_existing_contacts = False  # Whether to check for existing contacts in Brevo
     dry_run = True  # Whether to run in dry run mode (no changes made)
+    max_workers = 1  # Number of users processed concurrently
 
     def __init__(self):
         super().__init__()
@@ -43,6 +48,7 @@ class Command(BaseCommand):
             "errors": 0,
             "total": 0,
         }
+        self.stats_lock = threading.Lock()
         self.brevo_client = api_brevo.BrevoContactsApiClient()
 
     def add_arguments(self, parser):
@@ -66,6 +72,13 @@ class Command(BaseCommand):
             action="store_true",
             help="Synchronize only recently updated users",
         )
+        parser.add_argument(
+            "--max-workers",
+            dest="max_workers",
+            type=int,
+            default=settings.BREVO_SYNC_MAX_WORKERS,
+            help="Number of users sent to Brevo concurrently",
+        )
         parser.add_argument("--dry-run", dest="dry_run", action="store_true", help="Simulation mode (no changes)")
 
     def _fetch_existing_contacts(self, brevo_list_id):
@@ -115,13 +128,18 @@ class Command(BaseCommand):
 
         return users_qs
 
+    def _increment_stat(self, name):
+        """The users are processed in several threads"""
+        with self.stats_lock:
+            self.stats[name] += 1
+
     def _process_single_user(self, user, existing_contacts):
         """Process a single user and update stats directly."""
         try:
             # Check if user should be skipped
             if self._should_skip_user(user, existing_contacts):
                 self.stdout_info(f"Contact {user.pk} already up to date in Brevo")
-                self.stats["skipped"] += 1
+                self._increment_stat("skipped")
                 return
 
             self.stdout_info(f"Processing user {user.pk}")
@@ -133,7 +151,7 @@ class Command(BaseCommand):
                 user.brevo_contact_id = brevo_contact_id
                 if not self.dry_run:
                     user.save(update_fields=["brevo_contact_id"])
-                self.stats["updated"] += 1
+                self._increment_stat("updated")
             # Otherwise, create a new contact in Brevo
             else:
                 self.stdout_info(f"Creating a new contact for {user.pk}")
@@ -142,16 +160,16 @@ class Command(BaseCommand):
                     try:
                         self.brevo_client.create_contact(user=user, list_id=current_list_id)
                         self.stdout_info(f"Brevo contact created: {user.pk}")
-                        self.stats["created"] += 1
+                        self._increment_stat("created")
                     except api_brevo.BrevoApiError as e:
                         self.stdout_error(f"Failed to create contact for {user.pk}: {e}")
-                        self.stats["errors"] += 1
+                        self._increment_stat("errors")
                 else:
                     # dry_run case
-                    self.stats["created"] += 1
+                    self._increment_stat("created")
         except Exception as e:
             self.stdout_error(f"Error processing {user.pk}: {str(e)}")
-            self.stats["errors"] += 1
+            self._increment_stat("errors")
 
     def _display_final_report(self):
         """Display final synchronization report."""
@@ -172,6 +190,7 @@ class Command(BaseCommand):
         brevo_list_id: int = None,
         with_existing_contacts: bool = False,
         recently_updated: bool = False,
+        max_workers: int = settings.BREVO_SYNC_MAX_WORKERS,
         **options,
     ):
         self.stdout_info("-" * 80)
@@ -183,6 +202,7 @@ class Command(BaseCommand):
         self.kind_users = kind_users
         self.recently_updated = recently_updated
         self.brevo_list_id = brevo_list_id
+        self.max_workers = max_workers
 
         # Build the user filtering query
         users_qs = self._build_users_queryset()
@@ -201,8 +221,11 @@ class Command(BaseCommand):
         self.stats["total"] = total_users
 
         # use .iterator to optimize the chunk processing of large querysets
-        for user in users_qs.iterator():
-            self._process_single_user(user, existing_contacts)
+        run_concurrently(
+            lambda user: self._process_single_user(user, existing_contacts),
+            users_qs.iterator(),
+            max_workers=self.max_workers,
+        )
 
         # Final report
         self._display_final_report()
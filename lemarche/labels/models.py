@@ -1,8 +1,12 @@
 from django.db import models
 from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 
+from lemarche.utils.facets import invalidate_search_facets
+
 
 class LabelQuerySet(models.QuerySet):
     def with_siae_stats(self):
@@ -48,3 +52,9 @@ class Label(models.Model):
     @property
     def has_logo(self):
         return len(self.logo_url) > 0
+
+
+@receiver([post_save, post_delete], sender=Label)
+def label_post_save_or_delete(sender, instance, **kwargs):
+    """The labels are search facets (see SiaeFilterForm)."""
+    invalidate_search_facets()
@@ -1,8 +1,13 @@
 from django.db import models
 from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 
+from lemarche.utils.cache_versions import invalidate_api_model_version
+from lemarche.utils.facets import invalidate_search_facets
+
 
 class NetworkQuerySet(models.QuerySet):
     def with_siae_stats(self):
@@ -42,3 +47,10 @@ class Network(models.Model):
         """Generate the slug field before saving."""
         self.set_slug()
         super().save(*args, **kwargs)
+
+
+@receiver([post_save, post_delete], sender=Network)
+def network_post_save_or_delete(sender, instance, **kwargs):
+    """The networks are search facets (see SiaeFilterForm), and are served by the API."""
+    invalidate_search_facets()
+    invalidate_api_model_version(sender)
@@ -0,0 +1,15 @@
+from lemarche.nexus import outbox
+from lemarche.utils.commands import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Send to Nexus the changes left in the sync outbox (normally drained by the async_drain_sync_outbox task)
+
+    Usage:
+    python manage.py nexus_drain_sync_outbox
+    """
+
+    def handle(self, *args, **options):
+        object_count = outbox.drain()
+        self.stdout_success(f"Nexus: {object_count} object(s) synchronized")
@@ -1,15 +1,63 @@
+import logging
+import threading
+from functools import partial
+from itertools import batched
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from itoutils.django.nexus.api import NexusAPIClient, NexusAPIException
 from itoutils.django.nexus.management.base_full_sync import BaseNexusFullSyncCommand
 
-from lemarche.nexus.sync import serialize_membership, serialize_siae, serialize_user
+from lemarche.nexus.sync import (
+    SIAE_SERIALIZED_FIELDS,
+    SIAEUSER_SERIALIZED_FIELDS,
+    USER_SERIALIZED_FIELDS,
+    serialize_membership_values,
+    serialize_siae_values,
+    serialize_user_values,
+)
 from lemarche.siaes.models import Siae, SiaeUser
 from lemarche.users import constants as user_constants
 from lemarche.users.models import User
+from lemarche.utils.concurrency import run_concurrently
+from lemarche.utils.urls import get_domain_url
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_CACHE_KEY = "nexus_full_sync_checkpoint"
+CHECKPOINT_TIMEOUT = 60 * 60 * 24 * 7
 
 
 class Command(BaseNexusFullSyncCommand):
-    structure_serializer = staticmethod(serialize_siae)
-    user_serializer = staticmethod(serialize_user)
-    membership_serializer = staticmethod(serialize_membership)
+    """
+    Send all the siaes, users & memberships to Nexus (Nexus then deletes the objects that were not sent).
+
+    - the objects are streamed ordered by pk (server-side cursor), as values() projections
+    - the chunks are sent concurrently (--max-workers threads, they do not access the database)
+    - the progress (last pk sent of each kind) is saved in the cache: a failed sync can be resumed (--resume)
+
+    Usage:
+    python manage.py nexus_full_sync
+    python manage.py nexus_full_sync --max-workers=8
+    python manage.py nexus_full_sync --resume
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-workers",
+            dest="max_workers",
+            type=int,
+            default=settings.NEXUS_FULL_SYNC_MAX_WORKERS,
+            help="Number of chunks sent to Nexus concurrently",
+        )
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="Resume the last failed sync (instead of starting a new one)",
+        )
 
     def get_structures_queryset(self):
         return Siae.objects.is_live().exclude(siret="").order_by("pk")
@@ -28,3 +76,90 @@ class Command(BaseNexusFullSyncCommand):
             siae__is_active=True,
             siae__is_delisted=False,
         ).order_by("pk")
+
+    def sync_structures(self):
+        serializer = partial(serialize_siae_values, domain_url=get_domain_url())
+        self.sync_objects(
+            "structures",
+            self.get_structures_queryset(),
+            SIAE_SERIALIZED_FIELDS,
+            serializer,
+            self.client.send_structures,
+        )
+
+    def sync_users(self):
+        self.sync_objects(
+            "users", self.get_users_queryset(), USER_SERIALIZED_FIELDS, serialize_user_values, self.client.send_users
+        )
+
+    def sync_memberships(self):
+        self.sync_objects(
+            "memberships",
+            self.get_memberships_queryset(),
+            SIAEUSER_SERIALIZED_FIELDS,
+            serialize_membership_values,
+            self.client.send_memberships,
+        )
+
+    def sync_objects(self, kind, queryset, fields, serializer, send):
+        """
+        The chunks are serialized in the current thread (the cursor is not shared), and sent by the workers.
+        The checkpoint only moves forward when all the previous chunks have been sent.
+        """
+        if last_pk := self.checkpoint.get(kind):
+            queryset = queryset.filter(pk__gt=last_pk)
+        pending_chunk_last_pks = []  # in the order of the chunks
+        sent_chunk_last_pks = set()
+        lock = threading.Lock()
+        failed = False
+
+        def chunks():
+            for rows in batched(queryset.values(*fields).iterator(chunk_size=self.CHUNK_SIZE), self.CHUNK_SIZE):
+                with lock:
+                    pending_chunk_last_pks.append(rows[-1]["id"])
+                yield rows[-1]["id"], [serializer(row) for row in rows]
+
+        def send_chunk(chunk):
+            nonlocal failed
+            chunk_last_pk, data = chunk
+            try:
+                send(data)
+            except NexusAPIException:
+                failed = True  # The client already logged the error
+                return
+            except Exception:
+                failed = True
+                logger.exception(f"Nexus: failed to send {kind} (up to pk {chunk_last_pk})")
+                return
+            with lock:
+                sent_chunk_last_pks.add(chunk_last_pk)
+                while pending_chunk_last_pks and pending_chunk_last_pks[0] in sent_chunk_last_pks:
+                    self.checkpoint[kind] = pending_chunk_last_pks.pop(0)
+                self.save_checkpoint()
+
+        run_concurrently(send_chunk, chunks(), max_workers=self.max_workers)
+
+        if failed:
+            raise CommandError(f"Nexus full sync failed while sending the {kind}: run it again with --resume")
+
+    def save_checkpoint(self):
+        cache.set(CHECKPOINT_CACHE_KEY, self.checkpoint, CHECKPOINT_TIMEOUT)
+
+    def handle(self, *args, max_workers=1, resume=False, **options):
+        if not settings.NEXUS_API_BASE_URL:
+            logger.warning("Nexus full sync is disabled")
+            return
+        self.client = NexusAPIClient()
+        self.max_workers = max_workers
+
+        self.checkpoint = cache.get(CHECKPOINT_CACHE_KEY) if resume else None
+        if self.checkpoint is None:
+            # the objects not sent since started_at are deleted by Nexus at the end of the sync
+            self.checkpoint = {"started_at": self.client.init_full_sync()}
+            self.save_checkpoint()
+
+        self.sync_structures()
+        self.sync_users()
+        self.sync_memberships()
+        self.client.complete_full_sync(self.checkpoint["started_at"])
+        cache.delete(CHECKPOINT_CACHE_KEY)
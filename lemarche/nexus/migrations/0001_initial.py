@@ -0,0 +1,36 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="NexusSyncOutbox",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("user", "Utilisateur"), ("siae", "Structure"), ("siaeuser", "Gestionnaire")],
+                        max_length=20,
+                        verbose_name="Type d'objet",
+                    ),
+                ),
+                ("object_id", models.IntegerField(verbose_name="ID de l'objet")),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date de création"),
+                ),
+            ],
+            options={
+                "db_table": "nexus_sync_outbox",
+                "constraints": [
+                    models.UniqueConstraint(fields=("kind", "object_id"), name="nexus_sync_outbox_unique")
+                ],
+            },
+        ),
+    ]
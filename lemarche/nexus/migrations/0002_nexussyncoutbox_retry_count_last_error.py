@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nexus", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="nexussyncoutbox",
+            name="retry_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Nombre d'échecs de l'envoi"),
+        ),
+        migrations.AddField(
+            model_name="nexussyncoutbox",
+            name="last_error",
+            field=models.TextField(blank=True, verbose_name="Dernière erreur"),
+        ),
+    ]
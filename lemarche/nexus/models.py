@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class NexusSyncOutboxQuerySet(models.QuerySet):
+    def record(self, kind, object_ids):
+        """
+        The objects already waiting in the outbox are not recorded twice
+        """
+        return self.bulk_create(
+            [self.model(kind=kind, object_id=object_id) for object_id in set(object_ids)], ignore_conflicts=True
+        )
+
+
+class NexusSyncOutbox(models.Model):
+    """
+    The objects (users, siaes & memberships) changed since the last sync with Nexus (see lemarche.nexus.outbox)
+    """
+
+    KIND_USER = "user"
+    KIND_SIAE = "siae"
+    KIND_SIAEUSER = "siaeuser"
+    KIND_CHOICES = (
+        (KIND_USER, "Utilisateur"),
+        (KIND_SIAE, "Structure"),
+        (KIND_SIAEUSER, "Gestionnaire"),
+    )
+
+    kind = models.CharField(verbose_name="Type d'objet", max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField(verbose_name="ID de l'objet")
+    created_at = models.DateTimeField(verbose_name="Date de création", default=timezone.now)
+    retry_count = models.PositiveIntegerField(verbose_name="Nombre d'échecs de l'envoi", default=0)
+    last_error = models.TextField(verbose_name="Dernière erreur", blank=True)
+
+    objects = models.Manager.from_queryset(NexusSyncOutboxQuerySet)()
+
+    class Meta:
+        db_table = "nexus_sync_outbox"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="nexus_sync_outbox_unique"),
+        ]
@@ -0,0 +1,158 @@
+# Coalescing outbox of the Nexus sync.
+# The NexusModelMixin / NexusQuerySetMixin of the users, siaes & memberships only record the ids of the changed
+# (or deleted) objects. A single drain task is pending at a time (debounced): it loads the recorded objects in bulk,
+# and sends their current state to Nexus (one call per batch), whatever the number of saves in the meantime.
+# The objects leave the outbox only once sent: if Nexus fails, they are sent by the next drain. The objects that keep
+# failing (e.g. rejected by Nexus) are isolated, so that they do not block the other ones (see drain_batch).
+# The nexus_drain_sync_outbox command (cron) drains the leftovers.
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from lemarche.nexus import sync
+from lemarche.nexus.models import NexusSyncOutbox
+
+
+logger = logging.getLogger(__name__)
+
+DRAIN_SCHEDULED_CACHE_KEY = "nexus_sync_outbox_drain_scheduled"
+DRAIN_BATCH_SIZE = 1000
+
+
+def record(kind, objs):
+    """
+    objs: instances or pks (the sync or the delete is decided when the outbox is drained)
+    """
+    if settings.NEXUS_API_BASE_URL and objs:
+        NexusSyncOutbox.objects.record(kind, [getattr(obj, "pk", obj) for obj in objs])
+        schedule_drain()
+
+
+def record_users(users):
+    record(NexusSyncOutbox.KIND_USER, users)
+
+
+def record_siaes(siaes):
+    record(NexusSyncOutbox.KIND_SIAE, siaes)
+
+
+def record_siaeusers(siaeusers):
+    record(NexusSyncOutbox.KIND_SIAEUSER, siaeusers)
+
+
+def schedule_drain():
+    from lemarche.nexus.tasks import async_drain_sync_outbox
+
+    # immediate mode (dev & tests): the scheduled tasks are never run, drain now
+    if settings.HUEY["immediate"] or not settings.NEXUS_SYNC_DEBOUNCE_DELAY:
+        async_drain_sync_outbox()
+    # debounce: the changes recorded until the drain are sent by the same task
+    elif cache.add(DRAIN_SCHEDULED_CACHE_KEY, True, settings.NEXUS_SYNC_DEBOUNCE_DELAY):
+        async_drain_sync_outbox.schedule(delay=settings.NEXUS_SYNC_DEBOUNCE_DELAY)
+
+
+def get_sync_config():
+    """
+    {kind: (queryset, sync function, delete function)}
+    in the order of the sync: the users & siaes before their memberships
+    """
+    from lemarche.siaes.models import Siae, SiaeUser
+    from lemarche.users.models import User
+
+    return {
+        NexusSyncOutbox.KIND_USER: (User.objects.all(), sync.sync_users, sync.delete_users),
+        NexusSyncOutbox.KIND_SIAE: (Siae.objects.all(), sync.sync_siaes, sync.delete_siaes),
+        NexusSyncOutbox.KIND_SIAEUSER: (
+            SiaeUser.objects.select_related("siae", "user"),
+            sync.sync_siaeusers,
+            sync.delete_siaeusers,
+        ),
+    }
+
+
+class NexusSyncOutboxError(Exception):
+    pass
+
+
+def send_objects(kind, object_ids):
+    """
+    Send the current state of the objects to Nexus: the objects that should be synced are sent,
+    the other ones (including the deleted ones) are deleted from Nexus. Raise if Nexus fails.
+    """
+    queryset, sync_objects, delete_objects = get_sync_config()[kind]
+    objs_to_sync = [obj for obj in queryset.filter(pk__in=object_ids) if obj.should_sync_to_nexus()]
+    synced_object_ids = {obj.pk for obj in objs_to_sync}
+    object_ids_to_delete = [object_id for object_id in object_ids if object_id not in synced_object_ids]
+    if objs_to_sync:
+        sync_objects(objs_to_sync, fail_silently=False)
+    if object_ids_to_delete:
+        delete_objects(object_ids_to_delete, fail_silently=False)
+
+
+def send_entries(kind, entries, isolate=False):
+    """
+    Send the objects of the outbox entries, then remove the entries (savepoint: kept if Nexus fails).
+    isolate: if Nexus fails, the entries are split in two halves sent separately (down to single entries),
+    so that the objects rejected by Nexus do not hold back the other ones.
+    Return the entries that failed, with their error.
+    """
+    try:
+        with transaction.atomic():
+            send_objects(kind, [entry.object_id for entry in entries])
+            NexusSyncOutbox.objects.filter(id__in=[entry.id for entry in entries]).delete()
+    except Exception as e:
+        if not isolate or len(entries) == 1:
+            return [(entry, e) for entry in entries]
+        middle = len(entries) // 2
+        return send_entries(kind, entries[:middle], isolate=True) + send_entries(kind, entries[middle:], isolate=True)
+    return []
+
+
+def drain_batch(kind, batch_size=DRAIN_BATCH_SIZE):
+    """
+    Send (at most batch_size) objects of this kind to Nexus, then remove them from the outbox.
+    The outbox rows stay locked until the objects are sent (skip_locked: concurrent drains do not wait for
+    each other, nor sync the same objects).
+    If Nexus fails, the objects stay in the outbox (retry_count & last_error are updated) and
+    NexusSyncOutboxError is raised. The entries that already failed come last, and once they failed
+    NEXUS_SYNC_OUTBOX_MAX_RETRIES times they are isolated (see send_entries).
+    Return the number of objects sent.
+    """
+    with transaction.atomic():
+        entries = list(
+            NexusSyncOutbox.objects.filter(kind=kind)
+            .select_for_update(skip_locked=True)
+            .order_by("retry_count", "id")[:batch_size]
+        )
+        isolate = any(entry.retry_count >= settings.NEXUS_SYNC_OUTBOX_MAX_RETRIES for entry in entries)
+        failures = send_entries(kind, entries, isolate=isolate)
+        for entry, error in failures:
+            entry.retry_count += 1
+            entry.last_error = repr(error)
+        NexusSyncOutbox.objects.bulk_update([entry for (entry, _) in failures], ["retry_count", "last_error"])
+    if failures:
+        raise NexusSyncOutboxError(f"{len(failures)}/{len(entries)} {kind} object(s) not sent to Nexus") from failures[
+            0
+        ][1]
+    return len(entries)
+
+
+def drain(batch_size=DRAIN_BATCH_SIZE):
+    """
+    Send the objects of the outbox to Nexus (see send_objects)
+    """
+    # the changes recorded from now on need a new drain
+    cache.delete(DRAIN_SCHEDULED_CACHE_KEY)
+
+    object_count = 0
+    for kind in get_sync_config():
+        try:
+            while sent_count := drain_batch(kind, batch_size):
+                object_count += sent_count
+        except Exception:
+            # the objects stay in the outbox (the nexus_drain_sync_outbox cron sends them later)
+            logger.exception("Nexus: failed to drain the %s outbox", kind)
+    return object_count
@@ -1,9 +1,10 @@
 import logging
 
 from django.conf import settings
+from django.urls import reverse
 from itoutils.django.nexus.api import NexusAPIClient, NexusAPIException
 
-from lemarche.utils.urls import get_object_share_url
+from lemarche.utils.urls import get_domain_url
 
 
 logger = logging.getLogger(__name__)
@@ -20,37 +21,60 @@ USER_TRACKED_FIELDS = [
 ]
 
 
+# the serializers also accept values() projections of these fields (nexus_full_sync)
+USER_SERIALIZED_FIELDS = [
+    "id",
+    "kind",
+    "first_name",
+    "last_name",
+    "email",
+    "last_login",
+]
+
+
 def serialize_user(user):
+    return serialize_user_values({field: getattr(user, field) for field in USER_SERIALIZED_FIELDS})
+
+
+def serialize_user_values(user_values):
     return {
-        "id": str(user.pk),
-        "kind": user.kind,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "email": user.email,
+        "id": str(user_values["id"]),
+        "kind": user_values["kind"],
+        "first_name": user_values["first_name"],
+        "last_name": user_values["last_name"],
+        "email": user_values["email"],
         "phone": "",
-        "last_login": user.last_login.isoformat() if user.last_login else None,
+        "last_login": user_values["last_login"].isoformat() if user_values["last_login"] else None,
         "auth": "DJANGO",
     }
 
 
-def sync_users(users):
+def sync_users(users, fail_silently=True):
     if settings.NEXUS_API_BASE_URL:
         try:
             NexusAPIClient().send_users([serialize_user(user) for user in users])
         except NexusAPIException:
-            pass  # The client already logged the error, we don't want to crash if we can't connect to Nexus
+            # The client already logged the error: by default we don't want to crash if we can't connect to Nexus
+            if not fail_silently:
+                raise
         except Exception:
             logger.exception("Nexus: failed to sync users")
+            if not fail_silently:
+                raise
 
 
-def delete_users(user_pks):
+def delete_users(user_pks, fail_silently=True):
     if settings.NEXUS_API_BASE_URL:
         try:
             NexusAPIClient().delete_users(user_pks)
         except NexusAPIException:
-            pass  # The client already logged the error, we don't want to crash if we can't connect to Nexus
+            # The client already logged the error: by default we don't want to crash if we can't connect to Nexus
+            if not fail_silently:
+                raise
         except Exception:
             logger.exception("Nexus: failed to delete users")
+            if not fail_silently:
+                raise
 
 
 SIAE_TRACKED_FIELDS = [
@@ -71,45 +95,80 @@ SIAE_TRACKED_FIELDS = [
 ]
 
 
+SIAE_SERIALIZED_FIELDS = [
+    "id",
+    "kind",
+    "siret",
+    "name",
+    "brand",
+    "slug",
+    "phone",
+    "email",
+    "address",
+    "post_code",
+    "city",
+    "department",
+    "website",
+    "description",
+]
+
+
 def serialize_siae(siae):
+    return serialize_siae_values({field: getattr(siae, field) for field in SIAE_SERIALIZED_FIELDS})
+
+
+def serialize_siae_values(siae_values, domain_url=None):
+    """
+    domain_url: to avoid looking it up for each siae
+    """
+    # same as Siae.name_display & get_object_share_url(siae)
+    source_link = reverse("siae:detail", kwargs={"slug": siae_values["slug"]})
     return {
-        "id": str(siae.pk),
-        "kind": siae.kind,
-        "siret": siae.siret,
-        "name": siae.name_display,
-        "phone": siae.phone,
-        "email": siae.email,
-        "address_line_1": siae.address,
+        "id": str(siae_values["id"]),
+        "kind": siae_values["kind"],
+        "siret": siae_values["siret"],
+        "name": siae_values["brand"] or siae_values["name"],
+        "phone": siae_values["phone"],
+        "email": siae_values["email"],
+        "address_line_1": siae_values["address"],
         "address_line_2": "",
-        "post_code": siae.post_code,
-        "city": siae.city,
-        "department": siae.department,
-        "website": siae.website,
+        "post_code": siae_values["post_code"],
+        "city": siae_values["city"],
+        "department": siae_values["department"],
+        "website": siae_values["website"],
         "opening_hours": "",
         "accessibility": "",
-        "description": siae.description,
-        "source_link": get_object_share_url(siae),
+        "description": siae_values["description"],
+        "source_link": f"https://{domain_url or get_domain_url()}{source_link}",
     }
 
 
-def sync_siaes(siaes):
+def sync_siaes(siaes, fail_silently=True):
     if settings.NEXUS_API_BASE_URL:
         try:
             NexusAPIClient().send_structures([serialize_siae(siae) for siae in siaes])
         except NexusAPIException:
-            pass  # The client already logged the error, we don't want to crash if we can't connect to Nexus
+            # The client already logged the error: by default we don't want to crash if we can't connect to Nexus
+            if not fail_silently:
+                raise
         except Exception:
             logger.exception("Nexus: failed to sync siaes")
+            if not fail_silently:
+                raise
 
 
-def delete_siaes(siae_pks):
+def delete_siaes(siae_pks, fail_silently=True):
     if settings.NEXUS_API_BASE_URL:
         try:
             NexusAPIClient().delete_structures(siae_pks)
         except NexusAPIException:
-            pass  # The client already logged the error, we don't want to crash if we can't connect to Nexus
+            # The client already logged the error: by default we don't want to crash if we can't connect to Nexus
+            if not fail_silently:
+                raise
         except Exception:
             logger.exception("Nexus: failed to delete siaes")
+            if not fail_silently:
+                raise
 
 
 SIAEUSER_TRACKED_FIELDS = [
@@ -118,30 +177,49 @@ SIAEUSER_TRACKED_FIELDS = [
 ]
 
 
+SIAEUSER_SERIALIZED_FIELDS = [
+    "id",
+    "user_id",
+    "siae_id",
+]
+
+
 def serialize_membership(siaeuser):
+    return serialize_membership_values({field: getattr(siaeuser, field) for field in SIAEUSER_SERIALIZED_FIELDS})
+
+
+def serialize_membership_values(siaeuser_values):
     return {
-        "id": str(siaeuser.pk),
-        "user_id": str(siaeuser.user_id),
-        "structure_id": str(siaeuser.siae_id),
+        "id": str(siaeuser_values["id"]),
+        "user_id": str(siaeuser_values["user_id"]),
+        "structure_id": str(siaeuser_values["siae_id"]),
         "role": "ADMINISTRATOR",
     }
 
 
-def sync_siaeusers(siaeusers):
+def sync_siaeusers(siaeusers, fail_silently=True):
     if settings.NEXUS_API_BASE_URL:
         try:
             NexusAPIClient().send_memberships([serialize_membership(siaeuser) for siaeuser in siaeusers])
         except NexusAPIException:
-            pass  # The client already logged the error, we don't want to crash if we can't connect to Nexus
+            # The client already logged the error: by default we don't want to crash if we can't connect to Nexus
+            if not fail_silently:
+                raise
         except Exception:
             logger.exception("Nexus: failed to sync siaeusers")
+            if not fail_silently:
+                raise
 
 
-def delete_siaeusers(siaeuser_pks):
+def delete_siaeusers(siaeuser_pks, fail_silently=True):
     if settings.NEXUS_API_BASE_URL:
         try:
             NexusAPIClient().delete_memberships(siaeuser_pks)
         except NexusAPIException:
-            pass  # The client already logged the error, we don't want to crash if we can't connect to Nexus
+            # The client already logged the error: by default we don't want to crash if we can't connect to Nexus
+            if not fail_silently:
+                raise
         except Exception:
             logger.exception("Nexus: failed to delete siaeusers")
+            if not fail_silently:
+                raise
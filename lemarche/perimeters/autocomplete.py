@@ -0,0 +1,148 @@
+# In-memory autocomplete engine for the perimeters (~35k communes, departments & regions).
+# The perimeters endpoint is hit on every keystroke: instead of a trigram scan in Postgres,
+# each process keeps a compact index of the perimeter names (accent-folded) and post codes.
+# The index is built lazily, and rebuilt when the perimeters change (versioned, see lemarche/utils/cache_versions.py).
+
+import heapq
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from lemarche.perimeters.models import Perimeter
+from lemarche.utils.cache_versions import PERIMETER_AUTOCOMPLETE_VERSION_CACHE_KEY, get_cache_version
+from lemarche.utils.trigrams import TrigramIndex, normalize
+
+
+# same fields as PerimeterSimpleSerializer
+PERIMETER_AUTOCOMPLETE_FIELDS = [
+    "id",
+    "name",
+    "slug",
+    "kind",
+    "insee_code",
+    "post_codes",
+    "department_code",
+    "region_code",
+]
+# same threshold as PerimeterQuerySet.name_search()
+NAME_SIMILARITY_THRESHOLD = 0.1
+
+
+class PerimeterAutocompleteIndex:
+    def __init__(self, perimeters):
+        """
+        perimeters: list of dicts (PERIMETER_AUTOCOMPLETE_FIELDS + population)
+        """
+        self.perimeters = []
+        self.populations = []
+        self.names = []
+        self.name_trigram_index = TrigramIndex()
+        self.post_code_index = defaultdict(list)  # {post_code: [position, ...]}
+        self.insee_code_index = dict()  # {insee_code: position}
+
+        for position, perimeter in enumerate(perimeters):
+            population = perimeter.pop("population", None) or 0
+            name = normalize(perimeter["name"])
+            self.perimeters.append(perimeter)
+            self.populations.append(population)
+            self.names.append(name)
+            self.name_trigram_index.add(name)
+            for post_code in perimeter["post_codes"]:
+                self.post_code_index[post_code].append(position)
+            self.insee_code_index[perimeter["insee_code"]] = position
+
+        # sorted lists, for the prefix lookups (bisect)
+        self.sorted_names = sorted((name, position) for position, name in enumerate(self.names))
+        self.sorted_first_post_codes = sorted(
+            (perimeter["post_codes"][0], position)
+            for position, perimeter in enumerate(self.perimeters)
+            if perimeter["post_codes"]
+        )
+
+    @classmethod
+    def build(cls):
+        return cls(Perimeter.objects.values(*PERIMETER_AUTOCOMPLETE_FIELDS, "population").iterator(chunk_size=5000))
+
+    def __len__(self):
+        return len(self.perimeters)
+
+    def _prefix_positions(self, sorted_values, prefix):
+        for index in range(bisect_left(sorted_values, (prefix,)), len(sorted_values)):
+            value, position = sorted_values[index]
+            if not value.startswith(prefix):
+                break
+            yield position
+
+    def name_search(self, value, kind=None, limit=20):
+        """
+        Fuzzy (trigram similarity) + prefix search on the names.
+        The names starting with the value come first, then by similarity, then by population.
+        """
+        query = normalize(value)
+        similarities = self.name_trigram_index.get_similarities(query)
+        prefix_positions = set(self._prefix_positions(self.sorted_names, query)) if query else set()
+
+        candidates = (
+            (position in prefix_positions, similarities.get(position, 0), self.populations[position], position)
+            for position in prefix_positions.union(similarities)
+            if not kind or self.perimeters[position]["kind"] == kind
+        )
+        return [
+            self.perimeters[position]
+            for (is_prefix, similarity, _, position) in heapq.nlargest(limit, candidates)
+            if is_prefix or similarity > NAME_SIMILARITY_THRESHOLD
+        ]
+
+    def similar_names(self, value, threshold=0, limit=5):
+        """
+        Return the [(perimeter, similarity), ...] with the most similar names
+        """
+        return [
+            (self.perimeters[position], similarity)
+            for (similarity, position) in self.name_trigram_index.search(normalize(value), threshold, limit)
+        ]
+
+    def post_code_search(self, value, kind=None, limit=20):
+        """
+        Same rules as PerimeterQuerySet.post_code_search(): ordered by insee_code
+        """
+        # city post_code
+        if len(value) == 5:
+            positions = set(self.post_code_index.get(value, ()))
+        # department code or beginning of city post_code
+        elif len(value) == 2:
+            positions = set(self._prefix_positions(self.sorted_first_post_codes, value))
+            if value in self.insee_code_index:
+                positions.add(self.insee_code_index[value])
+        # beginning of city post_code
+        else:
+            positions = set(self._prefix_positions(self.sorted_first_post_codes, value))
+
+        if kind:
+            positions = (position for position in positions if self.perimeters[position]["kind"] == kind)
+        positions = heapq.nsmallest(limit, positions, key=lambda position: self.perimeters[position]["insee_code"])
+        return [self.perimeters[position] for position in positions]
+
+    def search(self, value, kind=None, limit=20):
+        value = value.strip()
+        if not value:
+            return []
+        if value.isnumeric():
+            return self.post_code_search(value, kind=kind, limit=limit)
+        return self.name_search(value, kind=kind, limit=limit)
+
+
+_index = None  # (version, PerimeterAutocompleteIndex)
+_index_lock = threading.Lock()
+
+
+def get_perimeter_autocomplete_index():
+    global _index
+
+    version = get_cache_version(PERIMETER_AUTOCOMPLETE_VERSION_CACHE_KEY)
+    if _index is None or _index[0] != version:
+        with _index_lock:
+            # another thread may have built it in the meantime
+            if _index is None or _index[0] != version:
+                _index = (version, PerimeterAutocompleteIndex.build())
+    return _index[1]
@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("perimeters", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodedAddress",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.TextField(unique=True, verbose_name="Adresse normalisée & code postal")),
+                ("feature", models.JSONField(null=True, verbose_name="Résultat du géocodage")),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date de création"),
+                ),
+            ],
+            options={
+                "verbose_name": "Adresse géocodée",
+                "verbose_name_plural": "Adresses géocodées",
+            },
+        ),
+    ]
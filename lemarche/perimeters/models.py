@@ -6,9 +6,12 @@ from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import TrigramSimilarity
 from django.db import models
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 
+from lemarche.utils.cache_versions import invalidate_api_model_version, invalidate_perimeter_autocomplete
 from lemarche.utils.constants import DEPARTMENTS_PRETTY, REGIONS
 from lemarche.utils.fields import ChoiceArrayField
 
@@ -139,3 +142,28 @@ class Perimeter(models.Model):
         if self.coords:
             return self.coords.x
         return None
+
+
+@receiver([post_save, post_delete], sender=Perimeter)
+def perimeter_post_save_or_delete(sender, instance, **kwargs):
+    """The perimeters autocomplete index must be rebuilt (see lemarche/perimeters/autocomplete.py)."""
+    invalidate_perimeter_autocomplete()
+    invalidate_api_model_version(sender)
+
+
+class GeocodedAddress(models.Model):
+    """
+    Persistent cache of the geocoding API results (see lemarche.utils.apis.geocoding)
+    """
+
+    key = models.TextField(verbose_name="Adresse normalisée & code postal", unique=True)
+    feature = models.JSONField(verbose_name="Résultat du géocodage", null=True)
+
+    created_at = models.DateTimeField(verbose_name="Date de création", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Adresse géocodée"
+        verbose_name_plural = "Adresses géocodées"
+
+    def __str__(self):
+        return self.key
@@ -1,9 +1,14 @@
 from django.db import models
 from django.db.models import Count, Value
 from django.db.models.functions import Left, NullIf
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 
+from lemarche.utils.cache_versions import invalidate_api_model_version
+from lemarche.utils.facets import invalidate_search_facets
+
 
 class SectorGroupQuerySet(models.QuerySet):
     def with_sector_stats(self):
@@ -97,3 +102,17 @@ class Sector(models.Model):
         """Generate the slug field before saving."""
         self.set_slug()
         super().save(*args, **kwargs)
+
+
+@receiver([post_save, post_delete], sender=SectorGroup)
+def sector_group_post_save_or_delete(sender, instance, **kwargs):
+    """The sector groups are search facets (see SiaeFilterForm), and are served by the API."""
+    invalidate_search_facets()
+    invalidate_api_model_version(sender)
+
+
+@receiver([post_save, post_delete], sender=Sector)
+def sector_post_save_or_delete(sender, instance, **kwargs):
+    """The sectors are search facets (see SiaeFilterForm), and are served by the API."""
+    invalidate_search_facets()
+    invalidate_api_model_version(sender)
@@ -7,7 +7,7 @@ from django.db.models import Q
 from django.utils import timezone
 
 from lemarche.siaes.models import Siae
-from lemarche.utils.apis import api_slack
+from lemarche.utils.apis import api_slack, http_client
 from lemarche.utils.commands import BaseCommand
 
 
@@ -18,7 +18,6 @@ class UpdateAPICommand(BaseCommand):
 
     API_NAME: str = None
     FIELDS_TO_BULK_UPDATE = []
-    CLIENT = None
 
     def __init__(self, stdout=None, stderr=None, no_color=False):
         super().__init__(stdout, stderr, no_color)
@@ -42,7 +41,7 @@ class UpdateAPICommand(BaseCommand):
         raise NotImplementedError
 
     @staticmethod
-    def is_in_target(latitude, longitude, client):
+    def is_in_target(latitude, longitude):
         raise NotImplementedError
 
     def get_query_set(self, **options):
@@ -78,7 +77,6 @@ class UpdateAPICommand(BaseCommand):
                 # but requests send error code 429 "Unknown Status Code"
                 self.stdout_error("exceeded the requests limit for today (5000/per day)")
         finally:
-            self.CLIENT.close()
             # we still save siaes target status
             Siae.objects.bulk_update(
                 siaes_to_update, self.FIELDS_TO_BULK_UPDATE, batch_size=settings.BATCH_SIZE_BULK_UPDATE
@@ -89,6 +87,6 @@ class UpdateAPICommand(BaseCommand):
                 f"Done! Processed {len(siaes_to_update)}/{len(siae_list)} siaes",
                 f"success count: {self.success_count['etablissement']}/{len(siaes_to_update)}",
                 f"True count: {self.success_count['etablissement_target']}/{len(siaes_to_update)}",
-            ]
+            ] + http_client.get_stats_messages()
             self.stdout_messages_success(msg_success)
             api_slack.send_message_to_channel("\n".join(msg_success))
@@ -10,7 +10,7 @@ from lemarche.sectors.models import Sector
 from lemarche.siaes import constants as siae_constants
 from lemarche.siaes.models import Siae
 from lemarche.utils.apis.api_entreprise import etablissement_get_or_error  # exercice_get_or_error
-from lemarche.utils.apis.geocoding import get_geocoding_data
+from lemarche.utils.apis.geocoding import geocode_addresses, get_geocoding_data
 from lemarche.utils.constants import department_from_postcode
 from lemarche.utils.data import rename_dict_key, reset_app_sql_sequences
 
@@ -127,6 +127,11 @@ class Command(BaseCommand):
         # extract_domaine_set(esat_list)
         # extract_duplicates(esat_list)
 
+        # geocode all the addresses with a few calls to the API (the import_esat calls then use the cache)
+        geocode_addresses(
+            [(esat["Adresse"] + " " + esat["Ville"], esat["Code Postal"].replace(" ", "")) for esat in esat_list]
+        )
+
         print("Importing GESAT...")
         progress = 0
         for index, esat in enumerate(esat_list):
@@ -7,7 +7,7 @@ from django.core.management.base import BaseCommand
 from lemarche.sectors.models import Sector
 from lemarche.siaes import constants as siae_constants
 from lemarche.siaes.models import Siae
-from lemarche.utils.apis.geocoding import get_geocoding_data
+from lemarche.utils.apis.geocoding import geocode_addresses, get_geocoding_data
 from lemarche.utils.constants import DEPARTMENT_TO_REGION, department_from_postcode
 from lemarche.utils.data import rename_dict_key, reset_app_sql_sequences
 from lemarche.utils.validators import validate_siret
@@ -69,6 +69,7 @@ class Command(BaseCommand):
 
         print("Importing SEP...")
         siae_list = read_csv(SEP_FILE_PATH)
+        geocode_addresses([(siae["Adresse"] + " " + siae["Ville"], siae["Code Postal"]) for siae in siae_list])
         progress = 0
         for index, siae in enumerate(siae_list):
             progress += 1
@@ -78,6 +79,7 @@ class Command(BaseCommand):
 
         print("Importing SEP Externe...")
         siae_list = read_csv(SEP_EXTERNE_FILE_PATH)
+        geocode_addresses([(siae["Adresse"] + " " + siae["Ville"], siae["Code Postal"]) for siae in siae_list])
         progress = 0
         for index, siae in enumerate(siae_list):
             progress += 1
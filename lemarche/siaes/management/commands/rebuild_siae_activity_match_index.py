@@ -0,0 +1,45 @@
+from itertools import batched
+
+from lemarche.siaes.models import SiaeActivity, SiaeActivityMatch
+from lemarche.utils.commands import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Goal: (re)build the SiaeActivityMatch index used to match the tenders with the SiaeActivity
+
+    Note: the index is maintained by the SiaeActivity & Siae signals,
+    but activities created with bulk_create() (imports) are not indexed until this command is run
+
+    Usage:
+    python manage.py rebuild_siae_activity_match_index
+    python manage.py rebuild_siae_activity_match_index --siae-id 1
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--siae-id", type=int, default=None, help="Indiquer l'ID d'une structure")
+
+    def handle(self, *args, **options):
+        self.stdout_messages_info("Rebuilding the SiaeActivityMatch index...")
+
+        activity_queryset = SiaeActivity.objects.all()
+        if options["siae_id"]:
+            activity_queryset = activity_queryset.filter(siae_id=options["siae_id"])
+        activity_ids = list(activity_queryset.order_by("id").values_list("id", flat=True))
+        total = len(activity_ids)
+        self.stdout_messages_info(f"Found {total} activities")
+
+        match_count = 0
+        batch_count = 0
+        BATCH_SIZE = 1_000
+        for batch in batched(activity_ids, BATCH_SIZE):
+            match_count += SiaeActivityMatch.objects.rebuild(SiaeActivity.objects.filter(id__in=batch))
+            batch_count += 1
+            self.stdout_info(f"{min(total, batch_count * BATCH_SIZE)} ...")
+
+        msg_success = [
+            "----- SiaeActivityMatch index -----",
+            f"Done! Processed {total} activities",
+            f"Matches created: {match_count}",
+        ]
+        self.stdout_messages_success(msg_success)
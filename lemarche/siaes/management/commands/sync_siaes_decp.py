@@ -3,12 +3,21 @@ Synchronise les champs DECP des SIAEs (has_won_contract_last_3_years,
 decp_contracts_count_last_3_years, decp_last_sync_date) depuis l'API
 publique data.gouv.fr (Données Essentielles de la Commande Publique).
 
-Traite uniquement les SIAEs actives avec un SIRET valide.
+Traite uniquement les SIAEs actives avec un SIRET valide, en commençant par
+les plus anciennes synchronisations. Pour reprendre un run interrompu, --max-age-hours
+ignore les SIAEs synchronisées depuis moins de N heures (par défaut : aucune n'est ignorée,
+le cron quotidien doit toutes les traiter).
+
+Les SIRET sont interrogés en parallèle (--max-workers threads, dans la limite de
+settings.DECP_API_RATE_LIMIT requêtes par seconde), par lots de BATCH_SIZE SIAEs,
+enregistrés au fur et à mesure.
 
 Usage:
     python manage.py sync_siaes_decp
     python manage.py sync_siaes_decp --siret 12345678901234
     python manage.py sync_siaes_decp --limit 100
+    python manage.py sync_siaes_decp --max-workers 8
+    python manage.py sync_siaes_decp --max-age-hours 12
     python manage.py sync_siaes_decp --wet-run
 """
 
@@ -17,12 +26,15 @@ from datetime import timedelta
 from itertools import batched
 
 import requests
+from django.conf import settings
+from django.db.models import F, Q
 from django.utils import timezone
 from sentry_sdk.crons import monitor
 
 from lemarche.siaes.models import Siae
-from lemarche.utils.apis import api_decp, api_slack
+from lemarche.utils.apis import api_decp, api_slack, http_client
 from lemarche.utils.commands import BaseCommand
+from lemarche.utils.concurrency import run_concurrently
 
 
 logger = logging.getLogger(__name__)
@@ -37,16 +49,39 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--siret", type=str, default=None, help="Traiter un SIRET spécifique")
         parser.add_argument("--limit", type=int, default=None, help="Limiter le nombre de structures à traiter")
+        parser.add_argument(
+            "--max-age-hours",
+            type=int,
+            default=0,
+            help="Ignorer les structures synchronisées depuis moins de N heures (0 : aucune)",
+        )
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=settings.DECP_SYNC_MAX_WORKERS,
+            help="Nombre de requêtes envoyées en parallèle",
+        )
         parser.add_argument("--wet-run", action="store_true", help="Appliquer les changements en base de données")
 
     @monitor(monitor_slug="sync_siaes_decp")
     def handle(self, *args, **options):
-        date_limit = (timezone.now() - timedelta(days=3 * 365)).strftime("%Y-%m-%d")
+        now = timezone.now()
+        date_limit = (now - timedelta(days=3 * 365)).strftime("%Y-%m-%d")
 
         if options["siret"]:
             siaes_qs = Siae.objects.filter(siret=options["siret"])
         else:
-            siaes_qs = Siae.objects.is_live().filter(siret_is_valid=True).exclude(siret="").order_by("id")
+            siaes_qs = (
+                Siae.objects.is_live()
+                .filter(siret_is_valid=True)
+                .exclude(siret="")
+                .order_by(F("decp_last_sync_date").asc(nulls_first=True), "id")
+            )
+            if options["max_age_hours"]:
+                siaes_qs = siaes_qs.filter(
+                    Q(decp_last_sync_date__isnull=True)
+                    | Q(decp_last_sync_date__lt=now - timedelta(hours=options["max_age_hours"]))
+                )
 
         if options["limit"]:
             siaes_qs = siaes_qs[: options["limit"]]
@@ -63,44 +98,48 @@ class Command(BaseCommand):
             ]
         )
 
-        siaes_to_update = []
         success_count = 0
         won_count = 0
         error_count = 0
-        now = timezone.now()
-
-        for i, siae in enumerate(siaes, 1):
-            try:
-                count = api_decp.fetch_contracts_count(siae.siret, date_limit)
+        processed_count = 0
+
+        for batch in batched(siaes, BATCH_SIZE):
+            siaes_to_update = []  # list.append is thread-safe
+            errors = []
+
+            def fetch_contracts_count(siae):
+                try:
+                    count = api_decp.fetch_contracts_count(siae.siret, date_limit)
+                except requests.exceptions.RequestException as e:
+                    logger.error("Erreur DECP SIRET %s : %s", siae.siret, e)
+                    errors.append(siae)
+                    return
                 siae.decp_contracts_count_last_3_years = count
                 siae.has_won_contract_last_3_years = count > 0
                 siae.decp_last_sync_date = now
                 siaes_to_update.append(siae)
-                success_count += 1
-                if count > 0:
-                    won_count += 1
-            except requests.exceptions.RequestException as e:
-                logger.error("Erreur DECP SIRET %s : %s", siae.siret, e)
-                error_count += 1
 
-            if i % 100 == 0:
-                self.stdout_info(f"{i}/{total}...")
+            run_concurrently(fetch_contracts_count, batch, max_workers=options["max_workers"])
 
-        if options["wet_run"]:
-            for batch in batched(siaes_to_update, BATCH_SIZE):
-                objects = list(batch)
+            if options["wet_run"]:
                 Siae.objects.bulk_update(
-                    objects,
+                    siaes_to_update,
                     ["has_won_contract_last_3_years", "decp_contracts_count_last_3_years", "decp_last_sync_date"],
                 )
 
+            success_count += len(siaes_to_update)
+            won_count += sum(siae.has_won_contract_last_3_years for siae in siaes_to_update)
+            error_count += len(errors)
+            processed_count += len(batch)
+            self.stdout_info(f"{processed_count}/{total}...")
+
         msg_success = [
             "----- Synchronisation DECP -----",
             f"Traitées : {success_count}/{total}",
             f"Ont remporté un marché ces 3 ans : {won_count}",
             f"Erreurs : {error_count}",
             "Mode : " + ("wet-run (changements appliqués)" if options["wet_run"] else "dry-run (aucun changement)"),
-        ]
+        ] + http_client.get_stats_messages()
         self.stdout_messages_success(msg_success)
         if options["wet_run"]:
             api_slack.send_message_to_channel("\n".join(msg_success))
@@ -10,35 +10,41 @@ Les SIAEs sont traitées par ordre de decp_details_last_sync_date ASC NULLS FIRS
 ce qui garantit que les jamais-synchronisées passent en premier. Combiné avec
 --limit, plusieurs crons de nuit couvrent progressivement toutes les SIAEs.
 
+Les SIRET sont interrogés en parallèle (--max-workers threads, dans la limite de
+settings.DECP_API_RATE_LIMIT requêtes par seconde), par lots de SIAE_BATCH_SIZE SIAEs,
+enregistrés au fur et à mesure : un run interrompu reprend là où il s'est arrêté.
+
 Doit être lancée après sync_siaes_decp.
 
 Usage:
     python manage.py sync_siaes_decp_details
     python manage.py sync_siaes_decp_details --siret 12345678901234
     python manage.py sync_siaes_decp_details --limit 500
+    python manage.py sync_siaes_decp_details --max-workers 8
     python manage.py sync_siaes_decp_details --wet-run
 """
 
 import logging
-import time
 from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
 from itertools import batched
 
 import requests
+from django.conf import settings
 from django.db.models import F
 from django.utils import timezone
 from sentry_sdk.crons import monitor
 
 from lemarche.siaes.models import Siae, SiaePublicMarket
-from lemarche.utils.apis import api_decp, api_slack
+from lemarche.utils.apis import api_decp, api_slack, http_client
 from lemarche.utils.commands import BaseCommand
+from lemarche.utils.concurrency import run_concurrently
 
 
 logger = logging.getLogger(__name__)
 
 MAX_MARKETS_PER_SIAE = 3
-SLEEP_BETWEEN_REQUESTS = 0.05  # 50 ms → ~20 req/s
+SIAE_BATCH_SIZE = 500
 UPSERT_BATCH_SIZE = 500
 
 
@@ -86,6 +92,12 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--siret", type=str, default=None, help="Traiter un SIRET spécifique")
         parser.add_argument("--limit", type=int, default=None, help="Limiter le nombre de structures à traiter")
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=settings.DECP_SYNC_MAX_WORKERS,
+            help="Nombre de requêtes envoyées en parallèle",
+        )
         parser.add_argument("--wet-run", action="store_true", help="Appliquer les changements en base de données")
 
     @monitor(monitor_slug="sync_siaes_decp_details")
@@ -121,85 +133,39 @@ class Command(BaseCommand):
 
         success_count = 0
         error_count = 0
-        processed_siaes: list[Siae] = []
-        markets_to_upsert: list[SiaePublicMarket] = []
-
-        for i, siae in enumerate(siaes, 1):
-            try:
-                rows = api_decp.fetch_recent_contracts(siae.siret, date_limit)
-                markets = _select_unique_markets(rows)
-
-                for row in markets:
-                    date_notification = _parse_date(row.get("dateNotification"))
-                    date_publication = _parse_date(row.get("datePublicationDonnees"))
-
-                    if date_notification:
-                        award_date = date_notification
-                        source_date_type = SiaePublicMarket.SOURCE_DATE_NOTIFICATION
-                    else:
-                        award_date = date_publication
-                        source_date_type = SiaePublicMarket.SOURCE_DATE_PUBLICATION
-
-                    obj = SiaePublicMarket(
-                        siae=siae,
-                        market_uid=row.get("uid", ""),
-                        buyer_name=(row.get("acheteur_nom") or "")[:500],
-                        market_object=row.get("objet") or "",
-                        amount=_parse_amount(row.get("montant")),
-                        award_date=award_date,
-                        source_date_type=source_date_type,
-                        cpv_code=(row.get("codeCPV") or "")[:20],
-                        procedure_type=(row.get("procedure") or "")[:100],
-                        lieu_execution=(row.get("lieuExecution_nom") or "")[:200],
-                    )
-                    # bypass auto_now : updated_at sert à détecter les marchés obsolètes après l'upsert
-                    obj.updated_at = sync_start
-                    markets_to_upsert.append(obj)
-
-                processed_siaes.append(siae)
-                success_count += 1
-            except requests.exceptions.RequestException as e:
-                logger.error("Erreur DECP détails SIRET %s : %s", siae.siret, e)
-                error_count += 1
-
-            time.sleep(SLEEP_BETWEEN_REQUESTS)
-
-            if i % 100 == 0:
-                self.stdout_info(f"{i}/{total}...")
-
         upserted_count = 0
         deleted_count = 0
+        processed_count = 0
 
-        if options["wet_run"] and processed_siaes:
-            for batch in batched(markets_to_upsert, UPSERT_BATCH_SIZE):
-                results = SiaePublicMarket.objects.bulk_create(
-                    list(batch),
-                    update_conflicts=True,
-                    update_fields=[
-                        "buyer_name",
-                        "market_object",
-                        "amount",
-                        "award_date",
-                        "source_date_type",
-                        "cpv_code",
-                        "procedure_type",
-                        "lieu_execution",
-                        "updated_at",
-                    ],
-                    unique_fields=["siae", "market_uid"],
-                )
-                upserted_count += len(results)
+        for batch in batched(siaes, SIAE_BATCH_SIZE):
+            rows_by_siae = []  # list.append is thread-safe
+            errors = []
 
-            processed_siae_ids = [s.id for s in processed_siaes]
+            def fetch_recent_contracts(siae):
+                try:
+                    rows_by_siae.append((siae, api_decp.fetch_recent_contracts(siae.siret, date_limit)))
+                except requests.exceptions.RequestException as e:
+                    logger.error("Erreur DECP détails SIRET %s : %s", siae.siret, e)
+                    errors.append(siae)
 
-            deleted_count, _ = SiaePublicMarket.objects.filter(
-                siae_id__in=processed_siae_ids,
-                updated_at__lt=sync_start,
-            ).delete()
+            run_concurrently(fetch_recent_contracts, batch, max_workers=options["max_workers"])
 
-            for siae in processed_siaes:
-                siae.decp_details_last_sync_date = sync_start
-            Siae.objects.bulk_update(processed_siaes, ["decp_details_last_sync_date"])
+            processed_siaes = [siae for (siae, _) in rows_by_siae]
+            markets_to_upsert = [
+                market for (siae, rows) in rows_by_siae for market in self.build_markets(siae, rows, sync_start)
+            ]
+
+            if options["wet_run"] and processed_siaes:
+                batch_upserted_count, batch_deleted_count = self.save_markets(
+                    processed_siaes, markets_to_upsert, sync_start
+                )
+                upserted_count += batch_upserted_count
+                deleted_count += batch_deleted_count
+
+            success_count += len(processed_siaes)
+            error_count += len(errors)
+            processed_count += len(batch)
+            self.stdout_info(f"{processed_count}/{total}...")
 
         msg_success = [
             "----- Synchronisation détails DECP -----",
@@ -208,7 +174,71 @@ class Command(BaseCommand):
             f"Marchés obsolètes supprimés : {deleted_count}",
             f"Erreurs : {error_count}",
             "Mode : " + ("wet-run (changements appliqués)" if options["wet_run"] else "dry-run (aucun changement)"),
-        ]
+        ] + http_client.get_stats_messages()
         self.stdout_messages_success(msg_success)
         if options["wet_run"]:
             api_slack.send_message_to_channel("\n".join(msg_success))
+
+    def build_markets(self, siae, rows, sync_start) -> list[SiaePublicMarket]:
+        markets = []
+        for row in _select_unique_markets(rows):
+            date_notification = _parse_date(row.get("dateNotification"))
+            date_publication = _parse_date(row.get("datePublicationDonnees"))
+
+            if date_notification:
+                award_date = date_notification
+                source_date_type = SiaePublicMarket.SOURCE_DATE_NOTIFICATION
+            else:
+                award_date = date_publication
+                source_date_type = SiaePublicMarket.SOURCE_DATE_PUBLICATION
+
+            obj = SiaePublicMarket(
+                siae=siae,
+                market_uid=row.get("uid", ""),
+                buyer_name=(row.get("acheteur_nom") or "")[:500],
+                market_object=row.get("objet") or "",
+                amount=_parse_amount(row.get("montant")),
+                award_date=award_date,
+                source_date_type=source_date_type,
+                cpv_code=(row.get("codeCPV") or "")[:20],
+                procedure_type=(row.get("procedure") or "")[:100],
+                lieu_execution=(row.get("lieuExecution_nom") or "")[:200],
+            )
+            # bypass auto_now : updated_at sert à détecter les marchés obsolètes après l'upsert
+            obj.updated_at = sync_start
+            markets.append(obj)
+        return markets
+
+    def save_markets(self, processed_siaes, markets_to_upsert, sync_start):
+        upserted_count = 0
+        for batch in batched(markets_to_upsert, UPSERT_BATCH_SIZE):
+            results = SiaePublicMarket.objects.bulk_create(
+                list(batch),
+                update_conflicts=True,
+                update_fields=[
+                    "buyer_name",
+                    "market_object",
+                    "amount",
+                    "award_date",
+                    "source_date_type",
+                    "cpv_code",
+                    "procedure_type",
+                    "lieu_execution",
+                    "updated_at",
+                ],
+                unique_fields=["siae", "market_uid"],
+            )
+            upserted_count += len(results)
+
+        processed_siae_ids = [s.id for s in processed_siaes]
+
+        deleted_count, _ = SiaePublicMarket.objects.filter(
+            siae_id__in=processed_siae_ids,
+            updated_at__lt=sync_start,
+        ).delete()
+
+        for siae in processed_siaes:
+            siae.decp_details_last_sync_date = sync_start
+        Siae.objects.bulk_update(processed_siaes, ["decp_details_last_sync_date"])
+
+        return upserted_count, deleted_count
@@ -1,6 +1,7 @@
 import logging
 import os
 import re
+from itertools import batched
 
 from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry
@@ -11,8 +12,8 @@ from sentry_sdk.crons import monitor
 from stdnum.fr import siret
 
 from lemarche.siaes import constants as siae_constants
-from lemarche.siaes.models import Siae
-from lemarche.utils.apis import api_emplois_inclusion, api_slack
+from lemarche.siaes.models import Siae, SiaeActivity, SiaeActivityMatch
+from lemarche.utils.apis import api_emplois_inclusion, api_slack, http_client
 from lemarche.utils.commands import BaseCommand
 from lemarche.utils.constants import DEPARTMENT_TO_REGION
 from lemarche.utils.data import rename_dict_key
@@ -136,7 +137,7 @@ class Command(BaseCommand):
             f"Siae updated: {updated_count}",
             f"Siae active: before {siae_active_before} / after {siae_active_after}",
             f"Siae inactive: before {siae_total_before - siae_active_before} / after {siae_total_after - siae_active_after}",  # noqa
-        ]
+        ] + http_client.get_stats_messages()
         self.stdout_messages_success(msg_success)
         api_slack.send_message_to_channel("\n".join(msg_success), service_id=settings.SLACK_WEBHOOK_C4_SUPPORT_CHANNEL)
 
@@ -242,6 +243,12 @@ class Command(BaseCommand):
             for siae in new_siaes:
                 self.stdout_info(f"New Siae created / {siae.id} / {siae.name} / {siae.siret}")
             Siae.objects.bulk_update(siae_to_update, fields=UPDATE_FIELDS + UPDATE_FIELDS_IF_EMPTY)
+            # bulk_create & bulk_update don't send the post_save signal
+            siae_ids = [siae.id for siae in new_siaes] + [siae.id for siae in siae_to_update]
+            Siae.objects.filter(id__in=siae_ids).update_search_vector()
+            # the matches depend on the address of the siae (post_code, department, region)
+            for siae_ids_batch in batched(siae_ids, 1_000):
+                SiaeActivityMatch.objects.rebuild(SiaeActivity.objects.filter(siae_id__in=siae_ids_batch))
 
     def c4_create_siae(self, c1_siae):
         """
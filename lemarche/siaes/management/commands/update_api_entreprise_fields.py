@@ -8,7 +8,7 @@ from sentry_sdk.crons import monitor
 
 from lemarche.siaes.constants import SIAE_LEGAL_FORM_CHOICE_LIST
 from lemarche.siaes.models import Siae
-from lemarche.utils.apis import api_slack
+from lemarche.utils.apis import api_slack, http_client
 from lemarche.utils.apis.api_recherche_entreprises import (
     RechercheEntreprisesAPIException,
     recherche_entreprises_get_or_error,
@@ -94,7 +94,7 @@ class Command(BaseCommand):
             f"Done! Processed {total_count} siae",
             f"success count: {results['success']}/{total_count}",
             f"error count: {results['error']}/{total_count} (voir les logs)",
-        ]
+        ] + http_client.get_stats_messages()
         self.stdout_messages_success(msg_success)
         api_slack.send_message_to_channel("\n".join(msg_success))
 
@@ -2,7 +2,7 @@ from django.db.models import Q
 from django.utils import timezone
 
 from lemarche.siaes.management.base_update_api import UpdateAPICommand
-from lemarche.utils.apis.api_qpv import IS_QPV_KEY, QPV_CODE_KEY, QPV_NAME_KEY, get_default_client, is_in_qpv
+from lemarche.utils.apis.api_qpv import IS_QPV_KEY, QPV_CODE_KEY, QPV_NAME_KEY, is_in_qpv
 
 
 class Command(UpdateAPICommand):
@@ -19,19 +19,18 @@ class Command(UpdateAPICommand):
 
     API_NAME = "QPV"
     FIELDS_TO_BULK_UPDATE = ["is_qpv", "api_qpv_last_sync_date", "qpv_code", "qpv_name"]
-    CLIENT = get_default_client()
 
     @staticmethod
     def get_filter_query(date_limit) -> Q:
         return Q(api_qpv_last_sync_date__lte=date_limit) | Q(api_qpv_last_sync_date__isnull=True)
 
     @staticmethod
-    def is_in_target(latitude, longitude, client):
-        return is_in_qpv(latitude, longitude, client=client)
+    def is_in_target(latitude, longitude):
+        return is_in_qpv(latitude, longitude)
 
     def update_siae(self, siae):
         # call api is in qpv
-        result_is_in_qpv = self.is_in_target(siae.latitude, siae.longitude, client=self.CLIENT)
+        result_is_in_qpv = self.is_in_target(siae.latitude, siae.longitude)
         self.success_count["etablissement"] += 1
         siae.is_qpv = result_is_in_qpv[IS_QPV_KEY]
         siae.api_qpv_last_sync_date = timezone.now()
@@ -2,7 +2,7 @@ from django.db.models import Q
 from django.utils import timezone
 
 from lemarche.siaes.management.base_update_api import UpdateAPICommand
-from lemarche.utils.apis.api_zrr import IS_ZRR_KEY, ZRR_CODE_KEY, ZRR_NAME_KEY, get_default_client, is_in_zrr
+from lemarche.utils.apis.api_zrr import IS_ZRR_KEY, ZRR_CODE_KEY, ZRR_NAME_KEY, is_in_zrr
 
 
 class Command(UpdateAPICommand):
@@ -19,19 +19,18 @@ class Command(UpdateAPICommand):
 
     API_NAME = "ZRR"
     FIELDS_TO_BULK_UPDATE = ["is_zrr", "api_zrr_last_sync_date", "zrr_code", "zrr_name"]
-    CLIENT = get_default_client()
 
     @staticmethod
     def get_filter_query(date_limit) -> Q:
         return Q(api_zrr_last_sync_date__lte=date_limit) | Q(api_zrr_last_sync_date__isnull=True)
 
     @staticmethod
-    def is_in_target(latitude, longitude, client):
-        return is_in_zrr(latitude, longitude, client=client)
+    def is_in_target(latitude, longitude):
+        return is_in_zrr(latitude, longitude)
 
     def update_siae(self, siae):
         # call api is in zrr
-        result_is_in_zrr = self.is_in_target(siae.latitude, siae.longitude, client=self.CLIENT)
+        result_is_in_zrr = self.is_in_target(siae.latitude, siae.longitude)
         self.success_count["etablissement"] += 1
         siae.is_zrr = result_is_in_zrr[IS_ZRR_KEY]
         siae.api_zrr_last_sync_date = timezone.now()
@@ -2,18 +2,27 @@ from itertools import batched
 
 from sentry_sdk.crons import monitor
 
-from lemarche.siaes import utils as siae_utils
+from lemarche.siaes import constants as siae_constants, utils as siae_utils
 from lemarche.siaes.models import Siae
 from lemarche.utils.apis import api_slack
 from lemarche.utils.commands import BaseCommand
 
 
+# see siae_utils.get_related_counts()
+SIAE_RELATED_COUNT_FIELDS = [
+    field for field in Siae.FIELDS_STATS_COUNT if field not in ["etablissement_count", "completion_rate"]
+]
+
+
 class Command(BaseCommand):
     """
     Goal: update the '_count' fields of each Siae
 
     Note: some of these fields are updated on each Siae save()
 
+    The counts are computed with a few grouped aggregate queries (one per relation) for all the siaes,
+    and only the siaes with changed values are saved (bulk_update).
+
     Usage:
     python manage.py update_siae_count_fields
     python manage.py update_siae_count_fields --id 1
@@ -32,13 +41,15 @@ class Command(BaseCommand):
         self.stdout_messages_info("Updating Siae count fields...")
 
         # Step 1a: build the queryset
-        siae_queryset = (
-            Siae.objects.prefetch_many_to_many()
-            .prefetch_many_to_one()
-            .prefetch_related("users", "groups", "labels")
-            .with_tender_stats()
-            .all()
-        )
+        # only the fields needed to compute the counts & the completion rate (and the ones read in Siae.__init__)
+        siae_queryset = Siae.objects.only(
+            "id",
+            "is_active",
+            "siret",
+            *Siae.FIELDS_STATS_COUNT,
+            *siae_constants.SIAE_COMPLETION_SCORE_GRID,
+            *Siae.TRACK_UPDATE_FIELDS,
+        ).order_by("id")
         if options["id"]:
             siae_queryset = siae_queryset.filter(id=options["id"])
         total = siae_queryset.count()
@@ -48,41 +59,33 @@ class Command(BaseCommand):
         update_fields = options["fields"] if options["fields"] else Siae.FIELDS_STATS_COUNT
         self.stdout_messages_info(f"Fields to update: {update_fields}")
 
-        batch_count = 0
+        # Step 2: compute the counts of all the siaes at once (grouped aggregate queries)
+        related_counts = siae_utils.get_related_counts(siae_ids=[options["id"]] if options["id"] else None)
+        etablissement_counts = siae_utils.get_etablissement_counts()
+
+        # Step 3: merge them by id, and only save the siaes with changed values
+        updated_count = 0
         BATCH_SIZE = 1_000
-        for batch in batched(siae_queryset, BATCH_SIZE):
-            siaes = list(batch)
-            for siae in siaes:
-                # M2M
-                siae.user_count = siae.users.count()
-                siae.sector_count = siae.activities.values_list("sector__group").distinct().count()
-                siae.network_count = siae.networks.count()
-                siae.group_count = siae.groups.count()
-                # FK
-                siae.offer_count = siae.offers.count()
-                siae.client_reference_count = siae.client_references.count()
-                siae.label_count = siae.labels_old.count()
-                siae.image_count = siae.images.count()
-                # etablissement_count
+        for batch_index, batch in enumerate(batched(siae_queryset.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE)):
+            siaes_to_update = []
+            for siae in batch:
+                initial_values = [getattr(siae, field) for field in update_fields]
+                siae_related_counts = related_counts.get(siae.id, {})
+                for field in SIAE_RELATED_COUNT_FIELDS:
+                    setattr(siae, field, siae_related_counts.get(field, 0))
                 if siae.is_active and siae.siren:
-                    siae.etablissement_count = siae_utils.calculate_etablissement_count(siae)
-                # completion_rate
+                    siae.etablissement_count = etablissement_counts.get(siae.siren, 0)
                 siae.completion_rate = siae.completion_rate_calculated
-                # tenders
-                siae.tender_count = siae.tender_count_annotated
-                siae.tender_email_send_count = siae.tender_email_send_count_annotated
-                siae.tender_email_link_click_count = siae.tender_email_link_click_count_annotated
-                siae.tender_detail_display_count = siae.tender_detail_display_count_annotated
-                siae.tender_detail_contact_click_count = siae.tender_detail_contact_click_count_annotated
-                siae.tender_detail_not_interested_count = siae.tender_detail_not_interested_count_annotated
-
-            Siae.objects.bulk_update(siaes, update_fields)
-            batch_count += 1
-            self.stdout_info(f"{min(total, batch_count * BATCH_SIZE)} ...")
+                if [getattr(siae, field) for field in update_fields] != initial_values:
+                    siaes_to_update.append(siae)
+
+            Siae.objects.bulk_update(siaes_to_update, update_fields)
+            updated_count += len(siaes_to_update)
+            self.stdout_info(f"{min(total, (batch_index + 1) * BATCH_SIZE)} ...")
 
         msg_success = [
             "----- Siae count fields -----",
-            f"Done! Processed {siae_queryset.count()} siaes",
+            f"Done! Processed {total} siaes ({updated_count} updated)",
             f"Fields updated: {update_fields}",
         ]
         self.stdout_messages_success(msg_success)
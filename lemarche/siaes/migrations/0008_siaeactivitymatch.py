@@ -0,0 +1,111 @@
+from itertools import batched
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1_000
+
+
+def get_siae_activity_match_perimeter_codes(activity, locations):
+    """
+    Copie de lemarche.siaes.models.get_siae_activity_match_perimeter_codes à la date de la migration
+    """
+    perimeter_codes = ["all"]
+    if activity.geo_range == "COUNTRY":
+        perimeter_codes.append("country")
+        return perimeter_codes
+    if activity.geo_range == "ZONES":
+        for location in locations:
+            perimeter_codes.append(f"zone:{location.kind}:{location.insee_code}")
+    if activity.siae.post_code:
+        perimeter_codes.append(f"post_code:{activity.siae.post_code}")
+    if activity.siae.department:
+        perimeter_codes.append(f"department:{activity.siae.department}")
+    if activity.siae.region:
+        perimeter_codes.append(f"region:{activity.siae.region}")
+    return perimeter_codes
+
+
+def build_siae_activity_match_index(apps, schema_editor):
+    """
+    Initialise l'index SiaeActivityMatch à partir des activités existantes
+    (même calcul que SiaeActivityMatchQuerySet.rebuild, sur les modèles historiques).
+    """
+    SiaeActivity = apps.get_model("siaes", "SiaeActivity")
+    SiaeActivityMatch = apps.get_model("siaes", "SiaeActivityMatch")
+
+    qs = SiaeActivity.objects.select_related("siae").prefetch_related("locations").order_by("id")
+    for batch in batched(qs.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+        SiaeActivityMatch.objects.bulk_create(
+            [
+                SiaeActivityMatch(
+                    activity_id=activity.id,
+                    siae_id=activity.siae_id,
+                    sector_id=activity.sector_id,
+                    presta_type=presta_type,
+                    perimeter_code=perimeter_code,
+                )
+                for activity in batch
+                for perimeter_code in get_siae_activity_match_perimeter_codes(activity, activity.locations.all())
+                for presta_type in (activity.presta_type or [""])
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sectors", "0001_initial"),
+        ("siaes", "0007_siae_tender_detail_not_interested_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SiaeActivityMatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "presta_type",
+                    models.CharField(blank=True, max_length=20, verbose_name="Type de prestation"),
+                ),
+                ("perimeter_code", models.CharField(max_length=255, verbose_name="Code du périmètre")),
+                (
+                    "activity",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to="siaes.siaeactivity",
+                        verbose_name="Activité",
+                    ),
+                ),
+                (
+                    "sector",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="siae_activity_matches",
+                        to="sectors.sector",
+                        verbose_name="Secteur d'activité",
+                    ),
+                ),
+                (
+                    "siae",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_matches",
+                        to="siaes.siae",
+                        verbose_name="Structure",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Index de correspondance des activités",
+                "verbose_name_plural": "Index de correspondance des activités",
+                "indexes": [
+                    models.Index(
+                        fields=["perimeter_code", "sector", "presta_type", "siae"], name="siaes_activitymatch_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_siae_activity_match_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+from itertools import batched
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+BATCH_SIZE = 1_000
+
+
+def update_siae_search_vector(apps, schema_editor):
+    """
+    Initialise le search_vector des structures existantes (calcul de get_siae_search_vector à la date de la
+    migration, recopié ici avec les modèles historiques).
+    """
+    Siae = apps.get_model("siaes", "Siae")
+    SiaeActivity = apps.get_model("siaes", "SiaeActivity")
+    SiaeOffer = apps.get_model("siaes", "SiaeOffer")
+
+    sector_names = (
+        SiaeActivity.objects.filter(siae=OuterRef("pk"))
+        .order_by()
+        .values("siae")
+        .annotate(names=StringAgg("sector__name", delimiter=" ", distinct=True))
+        .values("names")
+    )
+    offer_names = (
+        SiaeOffer.objects.filter(siae=OuterRef("pk"))
+        .order_by()
+        .values("siae")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    search_vector = (
+        SearchVector("name", "brand", weight="A", config="french")
+        + SearchVector(Subquery(sector_names), Subquery(offer_names), weight="B", config="french")
+        + SearchVector("city", "description", weight="C", config="french")
+    )
+
+    siae_ids = Siae.objects.order_by("id").values_list("id", flat=True)
+    for batch in batched(siae_ids.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+        Siae.objects.filter(id__in=batch).update(search_vector=search_vector)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("siaes", "0008_siaeactivitymatch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="siae",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="siae",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="siaes_siae_search_vector_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="siae",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="siaes_siae_name_gin_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="siae",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["brand"], name="siaes_siae_brand_gin_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.RunPython(update_siae_search_vector, migrations.RunPython.noop),
+    ]
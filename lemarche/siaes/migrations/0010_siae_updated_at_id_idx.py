@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("siaes", "0009_siae_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="siae",
+            index=models.Index(fields=["updated_at", "id"], name="siaes_siae_updated_at_id_idx"),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import timedelta
+from functools import partial
 from uuid import uuid4
 
 from django.conf import settings
@@ -7,10 +9,12 @@ from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.gis.db import models as gis_models
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.measure import D
-from django.contrib.postgres.search import TrigramSimilarity  # SearchVector
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField, TrigramSimilarity
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
-from django.db import IntegrityError, models, transaction
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, models, transaction
 from django.db.models import (
     BooleanField,
     Case,
@@ -40,12 +44,13 @@ from simple_history.models import HistoricalRecords
 
 from lemarche.companies.models import CompanySiaeClientReferenceMatch
 from lemarche.networks.models import Network
-from lemarche.nexus import sync, tasks
+from lemarche.nexus import outbox, sync
 from lemarche.perimeters.models import Perimeter
 from lemarche.siaes import constants as siae_constants
 from lemarche.siaes.tasks import set_siae_coords
-from lemarche.stats.models import Tracker
+from lemarche.stats.models import SiaeViewStat
 from lemarche.users.models import User
+from lemarche.utils.cache_versions import invalidate_api_model_version, invalidate_inclusive_potential
 from lemarche.utils.constants import DEPARTMENTS_PRETTY, RECALCULATED_FIELD_HELP_TEXT, REGIONS_PRETTY
 from lemarche.utils.data import choice_array_to_values, phone_number_display, round_by_base
 from lemarche.utils.fields import ChoiceArrayField
@@ -86,6 +91,127 @@ def count_field(field_name, date_limit):
     )
 
 
+def tender_has_distance_location(tender):
+    """
+    The tender is made for a distance around a city (see SiaeActivityQuerySet.filter_with_tender)
+    """
+    return bool(
+        tender.location
+        and tender.location.kind == Perimeter.KIND_CITY
+        and tender.distance_location
+        and tender.distance_location > 0
+    )
+
+
+def get_zone_match_perimeter_code(kind, insee_code):
+    return f"zone:{kind}:{insee_code}"
+
+
+def get_siae_activity_match_perimeter_codes(activity, locations):
+    """
+    Perimeter codes indexed for a SiaeActivity (see SiaeActivityMatch)
+    - every activity: "all" (used by tenders without perimeters)
+    - GEO_RANGE_COUNTRY: "country" (these activities never match on perimeters)
+    - GEO_RANGE_ZONES: one code per location (its kind and insee_code)
+    - every other activity: the Siae post_code, department & region (direct match of the Siae address)
+    """
+    perimeter_codes = [SiaeActivityMatch.PERIMETER_CODE_ALL]
+    if activity.geo_range == siae_constants.GEO_RANGE_COUNTRY:
+        perimeter_codes.append(SiaeActivityMatch.PERIMETER_CODE_COUNTRY)
+        return perimeter_codes
+    if activity.geo_range == siae_constants.GEO_RANGE_ZONES:
+        for location in locations:
+            perimeter_codes.append(get_zone_match_perimeter_code(location.kind, location.insee_code))
+    if activity.siae.post_code:
+        perimeter_codes.append(f"post_code:{activity.siae.post_code}")
+    if activity.siae.department:
+        perimeter_codes.append(f"department:{activity.siae.department}")
+    if activity.siae.region:
+        perimeter_codes.append(f"region:{activity.siae.region}")
+    return perimeter_codes
+
+
+def get_tender_match_perimeter_codes(tender, perimeters):
+    """
+    Perimeter codes to look for in the SiaeActivityMatch index.
+    Same rules as SiaeActivityQuerySet.filter_with_tender() & geo_range_in_perimeter_list(),
+    except the GEO_RANGE_CUSTOM distance, which can't be precomputed.
+    """
+    if tender.is_country_area:
+        return [SiaeActivityMatch.PERIMETER_CODE_COUNTRY]
+    if not len(perimeters):
+        if tender.include_country_area:
+            return [SiaeActivityMatch.PERIMETER_CODE_COUNTRY]
+        return [SiaeActivityMatch.PERIMETER_CODE_ALL]
+
+    perimeter_codes = [SiaeActivityMatch.PERIMETER_CODE_COUNTRY] if tender.include_country_area else []
+    for perimeter in perimeters:
+        perimeter_codes.append(get_zone_match_perimeter_code(perimeter.kind, perimeter.insee_code))
+        match perimeter.kind:
+            case Perimeter.KIND_CITY:
+                perimeter_codes.append(
+                    get_zone_match_perimeter_code(Perimeter.KIND_DEPARTMENT, perimeter.department_code)
+                )
+                perimeter_codes.append(
+                    get_zone_match_perimeter_code(Perimeter.KIND_REGION, f"R{perimeter.region_code}")
+                )
+                perimeter_codes += [f"post_code:{post_code}" for post_code in perimeter.post_codes]
+            case Perimeter.KIND_DEPARTMENT:
+                perimeter_codes.append(
+                    get_zone_match_perimeter_code(Perimeter.KIND_REGION, f"R{perimeter.region_code}")
+                )
+                perimeter_codes.append(f"department:{perimeter.insee_code}")
+            case Perimeter.KIND_REGION:
+                perimeter_codes.append(f"region:{perimeter.name}")
+    return perimeter_codes
+
+
+# minimum trigram similarity of the name/brand matches (see SiaeQuerySet.filter_full_text)
+FULL_TEXT_SIMILARITY_THRESHOLD = 0.2
+
+
+@contextmanager
+def full_text_similarity_threshold(using=DEFAULT_DB_ALIAS):
+    """
+    The trigram_similar (%) lookups of filter_full_text use pg_trgm.similarity_threshold (0.3 by default):
+    set it to FULL_TEXT_SIMILARITY_THRESHOLD for the queries run in the block (SET LOCAL, in a transaction)
+    """
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(FULL_TEXT_SIMILARITY_THRESHOLD)]
+            )
+        yield
+
+
+def get_siae_search_vector():
+    """
+    The Siae full text search document:
+    - A: name, brand
+    - B: sectors (of its activities), offers
+    - C: city, description
+    """
+    sector_names = (
+        SiaeActivity.objects.filter(siae=OuterRef("pk"))
+        .order_by()
+        .values("siae")
+        .annotate(names=StringAgg("sector__name", delimiter=" ", distinct=True))
+        .values("names")
+    )
+    offer_names = (
+        SiaeOffer.objects.filter(siae=OuterRef("pk"))
+        .order_by()
+        .values("siae")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    return (
+        SearchVector("name", "brand", weight="A", config="french")
+        + SearchVector(Subquery(sector_names), Subquery(offer_names), weight="B", config="french")
+        + SearchVector("city", "description", weight="C", config="french")
+    )
+
+
 class SiaeGroupQuerySet(models.QuerySet):
     def with_siae_stats(self):
         return self.annotate(siae_count_annotated=Count("siaes", distinct=True))
@@ -227,16 +353,40 @@ class SiaeQuerySet(NexusQuerySetMixin, models.QuerySet):
         return self.filter(siret__startswith=siret)
 
     def filter_full_text(self, full_text_string):
-        # Simple method 1: SearchVectors
-        #     return self.annotate(
-        #         search=SearchVector("name", config="french") + SearchVector("brand", config="french")
-        #     ).filter(Q(search=full_text_string) | Q(siret__startswith=full_text_string))
-        # Simple method 2: TrigramSimilarity
-        return self.annotate(
-            similarity=Greatest(
-                TrigramSimilarity("name", full_text_string), TrigramSimilarity("brand", full_text_string)
+        """
+        Index-backed search (see the Siae Meta indexes):
+        - search_vector (name, brand, sectors, offers, city, description): GIN index
+        - name/brand similarity (typos, partial words): trigram_similar (%), GIN trigram indexes. The threshold is
+          pg_trgm.similarity_threshold: run the query in full_text_similarity_threshold() to apply
+          FULL_TEXT_SIMILARITY_THRESHOLD. TrigramSimilarity is only used to rank the results.
+        - siret/siren prefix: the varchar_pattern_ops ("_like") index created by django for siret (db_index)
+        """
+        search_query = SearchQuery(full_text_string, config="french", search_type="websearch")
+        return (
+            self.annotate(
+                name_similarity_annotated=TrigramSimilarity("name", full_text_string),
+                brand_similarity_annotated=TrigramSimilarity("brand", full_text_string),
+            )
+            .annotate(
+                similarity=Greatest(
+                    "name_similarity_annotated",
+                    "brand_similarity_annotated",
+                    SearchRank("search_vector", search_query),
+                )
+            )
+            .filter(
+                Q(search_vector=search_query)
+                | Q(name__trigram_similar=full_text_string)
+                | Q(brand__trigram_similar=full_text_string)
+                | Q(siret__startswith=full_text_string)
             )
-        ).filter(Q(similarity__gt=0.2) | Q(siret__startswith=full_text_string))
+        )
+
+    def update_search_vector(self):
+        """
+        (Re)compute the search_vector of the Siae with a single UPDATE (also used after the bulk imports)
+        """
+        return self.update(search_vector=get_siae_search_vector())
 
     def filter_networks(self, networks):
         return self.filter(networks__in=networks)
@@ -365,19 +515,38 @@ class SiaeQuerySet(NexusQuerySetMixin, models.QuerySet):
             qs = qs.filter(tendersiae__tender=tender, tendersiae__email_send_date__isnull=False)
             qs = qs.order_by("-tendersiae__email_send_date")
 
-        # Subquery to filter SiaeActivity by presta_type, sector and perimeter
-        siae_ids = list(
-            qs.values_list("pk", flat=True)
-        )  # force the list of siae to limit the SiaeActivity we'll filter in filter_with_tender
-        qs = qs.filter(
-            Exists(
-                SiaeActivity.objects.filter(siae_id__in=siae_ids)
-                .filter(siae=OuterRef("pk"))
-                .filter_with_tender(tender)
-            )
-        )
+        # filter by presta_type, sector and perimeter through the SiaeActivityMatch index
+        return qs.filter_with_tender_activity_matches(tender)
 
-        return qs
+    def filter_with_tender_activity_matches(self, tender):
+        """
+        Filter Siaes that have at least one SiaeActivity matching the tender.
+        The presta_type, sectors and perimeters are resolved with indexed lookups on SiaeActivityMatch:
+        - the tender perimeters are translated into perimeter codes (see get_tender_match_perimeter_codes)
+        - SiaeActivity with a custom distance depend on the Siae coords: they are filtered separately
+        - if the tender is made for a distance around a city, we fallback to SiaeActivity.filter_with_tender()
+        """
+        if not tender.is_country_area and tender_has_distance_location(tender):
+            return self.filter(Exists(SiaeActivity.objects.filter(siae=OuterRef("pk")).filter_with_tender(tender)))
+
+        sector_ids = list(tender.sectors.values_list("id", flat=True))
+        perimeters = [] if tender.is_country_area else list(tender.perimeters.all())
+
+        matches = SiaeActivityMatch.objects.filter(
+            perimeter_code__in=get_tender_match_perimeter_codes(tender, perimeters)
+        )
+        custom_distance_activities = SiaeActivity.objects.custom_geo_range_in_perimeter_list(perimeters)
+        if len(tender.presta_type):
+            matches = matches.filter(presta_type__in=tender.presta_type)
+            custom_distance_activities = custom_distance_activities.filter(presta_type__overlap=tender.presta_type)
+        if len(sector_ids):
+            matches = matches.filter(sector_id__in=sector_ids)
+            custom_distance_activities = custom_distance_activities.filter(sector_id__in=sector_ids)
+
+        conditions = Q(pk__in=matches.values("siae_id"))
+        if any(perimeter.kind == Perimeter.KIND_CITY and perimeter.coords for perimeter in perimeters):
+            conditions |= Q(pk__in=custom_distance_activities.values("siae_id"))
+        return self.filter(conditions)
 
     def filter_with_potential_through_activities(self, sector, perimeter=None):
         """
@@ -435,6 +604,22 @@ class SiaeQuerySet(NexusQuerySetMixin, models.QuerySet):
             tender_detail_not_interested_count_annotated=count_field("detail_not_interested_click_date", date_limit),
         )
 
+    def with_recent_tender_stats(self, since_days):
+        """
+        Lighter version of with_tender_stats(), with only the stats sent to Brevo (crm_brevo_sync_companies):
+        a single join on TenderSiae.
+        """
+        date_limit = timezone.now() - timedelta(days=since_days)
+
+        return self.annotate(
+            tender_email_send_count_annotated=Count(
+                "tendersiae", filter=Q(tendersiae__email_send_date__gte=date_limit)
+            ),
+            tender_detail_contact_click_count_annotated=Count(
+                "tendersiae", filter=Q(tendersiae__detail_contact_click_date__gte=date_limit)
+            ),
+        )
+
     def with_brand_or_name(self, with_order_by=False):
         """
         We usually want to display the brand by default
@@ -565,8 +750,8 @@ class SiaeQuerySet(NexusQuerySetMixin, models.QuerySet):
 
 class Siae(NexusModelMixin, models.Model):
     nexus_tracked_fields = sync.SIAE_TRACKED_FIELDS
-    nexus_sync = staticmethod(tasks.async_sync_siaes)
-    nexus_delete = staticmethod(tasks.async_delete_siaes)
+    nexus_sync = staticmethod(outbox.record_siaes)
+    nexus_delete = staticmethod(outbox.record_siaes)
 
     FIELDS_FROM_C1 = [
         "name",
@@ -653,6 +838,15 @@ class Siae(NexusModelMixin, models.Model):
     TRACK_UPDATE_FIELDS = [
         # update coords
         "address",
+        # update the SiaeActivityMatch index
+        "post_code",
+        "department",
+        "region",
+        # update the search_vector
+        "name",
+        "brand",
+        "description",
+        "city",
         # set last_updated fields
         "super_badge",
         "employees_insertion_count",
@@ -919,7 +1113,10 @@ class Siae(NexusModelMixin, models.Model):
     extra_data = models.JSONField(verbose_name="Données complémentaires", editable=False, default=dict)
     import_raw_object = models.JSONField(verbose_name="Donnée JSON brute", editable=False, null=True)
 
-    history = HistoricalRecords()
+    # full text search document (see get_siae_search_vector)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    history = HistoricalRecords(excluded_fields=["search_vector"])
 
     created_at = models.DateTimeField(verbose_name="Date de création", default=timezone.now)
     updated_at = models.DateTimeField(verbose_name="Date de mise à jour", auto_now=True)
@@ -930,6 +1127,13 @@ class Siae(NexusModelMixin, models.Model):
         verbose_name = "Structure"
         verbose_name_plural = "Structures"
         ordering = ["name"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="siaes_siae_search_vector_gin"),
+            GinIndex(fields=["name"], name="siaes_siae_name_gin_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["brand"], name="siaes_siae_brand_gin_trgm", opclasses=["gin_trgm_ops"]),
+            # API keyset pagination (see lemarche/api/siaes/pagination.py)
+            models.Index(fields=["updated_at", "id"], name="siaes_siae_updated_at_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -1256,9 +1460,11 @@ class Siae(NexusModelMixin, models.Model):
     def is_in_the_hosmoz_network(self):
         return self.networks.filter(slug="hosmoz").exists()
 
-    def sector_groups_list_string(self, display_max=3):
+    def sector_groups_list_string(self, display_max=3, sectors_name_list=None):
         # Retrieve sectors from activities instead of directly from the sectors field
-        sectors_name_list = list(set(self.activities.values_list("sector__group__name", flat=True)))
+        # (can be precomputed for many siaes, see SiaeActivityQuerySet.sector_group_names_by_siae)
+        if sectors_name_list is None:
+            sectors_name_list = list(set(self.activities.values_list("sector__group__name", flat=True)))
         if display_max and len(sectors_name_list) > display_max:
             sectors_name_list = sectors_name_list[:display_max]
             sectors_name_list.append("…")
@@ -1268,25 +1474,27 @@ class Siae(NexusModelMixin, models.Model):
         return self.sector_groups_list_string(display_max=None)
 
     @cached_property
-    def stat_view_count_last_3_months(self):
+    def stat_view_counts_last_3_months(self):
+        # a single query on the daily rollup (see update_siae_view_stats)
         try:
-            return Tracker.objects.siae_views_last_3_months(self.slug).count()
+            return SiaeViewStat.objects.filter(siae_id=self.id).last_3_months().view_counts()
         except:  # noqa
-            return "-"
+            return {"view_count": "-", "buyer_view_count": "-", "partner_view_count": "-"}
 
-    @cached_property
+    @property
+    def stat_view_count_last_3_months(self):
+        return self.stat_view_counts_last_3_months["view_count"]
+
+    @property
     def stat_buyer_view_count_last_3_months(self):
-        try:
-            return Tracker.objects.siae_buyer_views_last_3_months(self.slug).count()
-        except:  # noqa
-            return "-"
+        return self.stat_view_counts_last_3_months["buyer_view_count"]
 
-    @cached_property
+    @property
     def stat_partner_view_count_last_3_months(self):
-        try:
-            return Tracker.objects.siae_partner_views_last_3_months(self.slug).count()
-        except:  # noqa
-            return "-"
+        return self.stat_view_counts_last_3_months["partner_view_count"]
+
+    def rebuild_activity_matches(self):
+        return SiaeActivityMatch.objects.rebuild(self.activities.all())
 
     def siae_user_requests_pending_count(self):
         # TODO: optimize + filter on assignee
@@ -1330,11 +1538,27 @@ class Siae(NexusModelMixin, models.Model):
 
 
 @receiver(post_save, sender=Siae)
-def siae_post_save(sender, instance, **kwargs):
+def siae_post_save(sender, instance, created, **kwargs):
     field_name = "address"
     previous_field_name = f"__previous_{field_name}"
     if getattr(instance, field_name) and getattr(instance, field_name) != getattr(instance, previous_field_name):
-        set_siae_coords(sender, instance)
+        # geocoding (external API) after the commit, in a task: the save does not wait for it
+        transaction.on_commit(partial(set_siae_coords, sender, instance.id))
+    # the Siae address is part of the SiaeActivityMatch index
+    if not created and any(
+        getattr(instance, field_name) != getattr(instance, f"__previous_{field_name}")
+        for field_name in ["post_code", "department", "region"]
+    ):
+        instance.rebuild_activity_matches()
+    # the Siae name, brand, description & city are part of its search_vector
+    if created or any(
+        getattr(instance, field_name) != getattr(instance, f"__previous_{field_name}")
+        for field_name in ["name", "brand", "description", "city"]
+    ):
+        Siae.objects.filter(id=instance.id).update_search_vector()
+    # the cached inclusive potential aggregates & API responses are outdated
+    invalidate_inclusive_potential()
+    invalidate_api_model_version(Siae)
 
 
 @receiver(m2m_changed, sender=Siae.users.through)
@@ -1381,8 +1605,8 @@ class SiaeUser(NexusModelMixin, models.Model):
     """A membership"""
 
     nexus_tracked_fields = sync.SIAEUSER_TRACKED_FIELDS
-    nexus_sync = staticmethod(tasks.async_sync_siaeusers)
-    nexus_delete = staticmethod(tasks.async_delete_siaeusers)
+    nexus_sync = staticmethod(outbox.record_siaeusers)
+    nexus_delete = staticmethod(outbox.record_siaeusers)
 
     siae = models.ForeignKey("siaes.Siae", verbose_name="Structure", on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name="Utilisateur", on_delete=models.CASCADE)
@@ -1582,6 +1806,18 @@ class SiaeActivityQuerySet(models.QuerySet):
             conditions = Q(geo_range=siae_constants.GEO_RANGE_COUNTRY) | conditions
         return self.filter(conditions)
 
+    def custom_geo_range_in_perimeter_list(self, perimeters):
+        """
+        Filter the Siae Activities with a geo_range equal to GEO_RANGE_CUSTOM and the distance between the Siae
+        address and one of the city perimeters less than the geo_range_custom_distance
+        (see geo_range_in_perimeter_list)
+        """
+        conditions = Q()
+        for perimeter in perimeters:
+            if perimeter.kind == Perimeter.KIND_CITY and perimeter.coords:
+                conditions |= Q(geo_range_custom_distance__gte=Distance("siae__coords", perimeter.coords) / 1000)
+        return self.filter(geo_range=siae_constants.GEO_RANGE_CUSTOM).filter(conditions)
+
     def with_country_geo_range(self):
         return self.filter(geo_range=siae_constants.GEO_RANGE_COUNTRY)
 
@@ -1684,6 +1920,15 @@ class SiaeActivityQuerySet(models.QuerySet):
         )
         return qs
 
+    def sector_group_names_by_siae(self) -> dict:
+        """
+        Return the sector group names of the activities, grouped by siae_id (in a single query)
+        """
+        sector_group_names = defaultdict(set)
+        for siae_id, sector_group_name in self.values_list("siae_id", "sector__group__name"):
+            sector_group_names[siae_id].add(sector_group_name)
+        return sector_group_names
+
     def get_related_locations(self):
         """
         Return a queryset of perimeters associated with SiaeActivities
@@ -1765,11 +2010,101 @@ class SiaeOffer(models.Model):
 @receiver(post_save, sender=SiaeActivity)
 @receiver(post_delete, sender=SiaeActivity)
 def siae_activity_post_save(sender, instance, **kwargs):
-    """Update sector_count when SiaeActivity is created or updated."""
+    """
+    Update sector_count when SiaeActivity is created or updated.
+    Also update the SiaeActivityMatch index (on delete, the matches are removed by cascade).
+    """
+    if kwargs["signal"] == post_save:
+        SiaeActivityMatch.objects.rebuild(SiaeActivity.objects.filter(id=instance.id))
+    # the sectors are part of the Siae search_vector
+    Siae.objects.filter(id=instance.siae_id).update_search_vector()
     instance.siae.sector_count = instance.siae.activities.values("sector__group").distinct().count()
     instance.siae.save()
 
 
+@receiver(post_save, sender=SiaeOffer)
+@receiver(post_delete, sender=SiaeOffer)
+def siae_offer_post_save(sender, instance, **kwargs):
+    """
+    The offers are part of the Siae search_vector (and of the Siae API data)
+    """
+    Siae.objects.filter(id=instance.siae_id).update_search_vector()
+    invalidate_api_model_version(Siae)
+
+
+@receiver(m2m_changed, sender=SiaeActivity.locations.through)
+def siae_activity_locations_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        if isinstance(instance, SiaeActivity):
+            SiaeActivityMatch.objects.rebuild(SiaeActivity.objects.filter(id=instance.id))
+        elif kwargs["pk_set"]:
+            # perimeter.siae_activities.add(activity)
+            SiaeActivityMatch.objects.rebuild(SiaeActivity.objects.filter(id__in=kwargs["pk_set"]))
+        invalidate_inclusive_potential()
+
+
+class SiaeActivityMatchQuerySet(models.QuerySet):
+    def rebuild(self, activities: models.QuerySet):
+        """
+        (Re)compute the index rows of the given SiaeActivity queryset.
+        """
+        activities = list(activities.select_related("siae").prefetch_related("locations"))
+        matches = [
+            SiaeActivityMatch(
+                activity=activity,
+                siae_id=activity.siae_id,
+                sector_id=activity.sector_id,
+                presta_type=presta_type,
+                perimeter_code=perimeter_code,
+            )
+            for activity in activities
+            for perimeter_code in get_siae_activity_match_perimeter_codes(activity, activity.locations.all())
+            for presta_type in (activity.presta_type or [""])
+        ]
+        with transaction.atomic():
+            self.filter(activity__in=activities).delete()
+            self.bulk_create(matches)
+        return len(matches)
+
+
+class SiaeActivityMatch(models.Model):
+    """
+    Precomputed index used to match the tenders with the SiaeActivity (see filter_with_tender_activity_matches).
+    One row per SiaeActivity x presta_type x perimeter code (see get_siae_activity_match_perimeter_codes).
+
+    Maintained by the SiaeActivity & Siae signals.
+    Activities created with bulk_create() need a rebuild: see rebuild_siae_activity_match_index
+    """
+
+    PERIMETER_CODE_ALL = "all"
+    PERIMETER_CODE_COUNTRY = "country"
+
+    activity = models.ForeignKey(
+        "siaes.SiaeActivity", verbose_name="Activité", related_name="matches", on_delete=models.CASCADE
+    )
+    # denormalized from the activity
+    siae = models.ForeignKey(
+        "siaes.Siae", verbose_name="Structure", related_name="activity_matches", on_delete=models.CASCADE
+    )
+    sector = models.ForeignKey(
+        "sectors.Sector",
+        verbose_name="Secteur d'activité",
+        related_name="siae_activity_matches",
+        on_delete=models.CASCADE,
+    )
+    presta_type = models.CharField(verbose_name="Type de prestation", max_length=20, blank=True)
+    perimeter_code = models.CharField(verbose_name="Code du périmètre", max_length=255)
+
+    objects = models.Manager.from_queryset(SiaeActivityMatchQuerySet)()
+
+    class Meta:
+        verbose_name = "Index de correspondance des activités"
+        verbose_name_plural = "Index de correspondance des activités"
+        indexes = [
+            models.Index(fields=["perimeter_code", "sector", "presta_type", "siae"], name="siaes_activitymatch_idx"),
+        ]
+
+
 class SiaeClientReference(models.Model):
     name = models.CharField(verbose_name="Nom", max_length=255, blank=True)
     description = models.TextField(verbose_name="Description", blank=True)
@@ -1830,6 +2165,14 @@ class SiaeLabelOld(models.Model):
         return self.name
 
 
+@receiver(post_delete, sender=Siae)
+@receiver([post_save, post_delete], sender=SiaeClientReference)
+@receiver([post_save, post_delete], sender=SiaeLabelOld)
+def siae_api_data_post_save_or_delete(sender, instance, **kwargs):
+    """The Siae (with its client references & labels) are served by the API (see SiaeViewSet)."""
+    invalidate_api_model_version(Siae)
+
+
 class SiaeImage(models.Model):
     name = models.CharField(verbose_name="Nom", max_length=255, blank=True)
     description = models.TextField(verbose_name="Description", blank=True)
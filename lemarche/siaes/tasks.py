@@ -2,17 +2,20 @@ from django.urls import reverse_lazy
 from huey.contrib.djhuey import task
 
 from lemarche.conversations.models import TemplateTransactional
-from lemarche.users.models import User
 from lemarche.utils.apis.geocoding import get_geocoding_data
 from lemarche.utils.emails import whitelist_recipient_list
 from lemarche.utils.urls import get_domain_url, get_object_share_url
 
 
 @task()
-def set_siae_coords(model, siae):
+def set_siae_coords(model, siae_id):
     """
+    Run after the commit of the transaction (see siae_post_save): the siae is loaded again (latest address)
     Why do we use filter+update here? To avoid calling Siae.post_save signal again (recursion)
     """
+    siae = model.objects.filter(id=siae_id).first()
+    if not siae or not siae.address:
+        return
     geocoding_data = get_geocoding_data(siae.address + " " + siae.city, post_code=siae.post_code)
     if geocoding_data:
         if siae.post_code != geocoding_data["post_code"]:
@@ -21,6 +24,9 @@ def set_siae_coords(model, siae):
                 model.objects.filter(id=siae.id).update(
                     coords=geocoding_data["coords"], post_code=geocoding_data["post_code"]
                 )
+                # the post_code is part of the SiaeActivityMatch index
+                siae.post_code = geocoding_data["post_code"]
+                siae.rebuild_activity_matches()
             else:
                 print(
                     f"Geocoding found a different place,{siae.name},{siae.post_code},{geocoding_data['post_code']}"  # noqa
@@ -33,12 +39,13 @@ def set_siae_coords(model, siae):
 
 
 def send_completion_reminder_email_to_siae(siae):
-    email_template = TemplateTransactional.objects.get(code="SIAE_COMPLETION_REMINDER")
-    siae_user_emails = list(siae.users.values_list("email", flat=True))
-    recipient_list = whitelist_recipient_list(siae_user_emails)
+    email_template = TemplateTransactional.objects.get_by_code("SIAE_COMPLETION_REMINDER")
+    siae_users = {siae_user.email: siae_user for siae_user in siae.users.all()}
+    recipient_list = whitelist_recipient_list(list(siae_users))
     if len(recipient_list):
+        recipients = []
         for recipient_email in recipient_list:
-            siae_user = User.objects.get(email=recipient_email)
+            siae_user = siae_users[recipient_email]
             recipient_name = siae_user.full_name
 
             variables = {
@@ -52,18 +59,22 @@ def send_completion_reminder_email_to_siae(siae):
                 "SIAE_EDIT_URL": f"https://{get_domain_url()}{reverse_lazy('dashboard_siaes:siae_edit_contact', args=[siae.slug])}",  # noqa
             }
 
-            email_template.send_transactional_email(
-                recipient_email=recipient_email,
-                recipient_name=recipient_name,
-                variables=variables,
-                recipient_content_object=siae_user,
-                parent_content_object=siae,
+            recipients.append(
+                {
+                    "recipient_email": recipient_email,
+                    "recipient_name": recipient_name,
+                    "variables": variables,
+                    "recipient_content_object": siae_user,
+                    "parent_content_object": siae,
+                }
             )
 
+        email_template.send_transactional_emails(recipients)
+
 
 @task()
 def send_reminder_email_to_siae(siae, message, tender_url):
-    email_template = TemplateTransactional.objects.get(code="SIAE_REMINDER")
+    email_template = TemplateTransactional.objects.get_by_code("SIAE_REMINDER")
 
     variables = {
         "MESSAGE": message,
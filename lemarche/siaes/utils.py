@@ -1,7 +1,80 @@
-from lemarche.siaes.models import Siae
+from collections import defaultdict
+
+from django.db.models import Count, Q
+from django.db.models.functions import Left
+
+from lemarche.siaes.models import (
+    Siae,
+    SiaeActivity,
+    SiaeClientReference,
+    SiaeImage,
+    SiaeLabelOld,
+    SiaeOffer,
+    SiaeUser,
+)
+from lemarche.tenders.models import TenderSiae
 
 
 def calculate_etablissement_count(siae: Siae):
     if siae.siren:
         return Siae.objects.filter(is_active=True, siret__startswith=siae.siren).count()
     return 0
+
+
+def get_etablissement_counts():
+    """
+    Number of active siaes per siren (see calculate_etablissement_count), with a single grouped query
+    """
+    return dict(
+        Siae.objects.filter(is_active=True)
+        .exclude(siret="")
+        .annotate(siren_annotated=Left("siret", 9))
+        .values("siren_annotated")
+        .annotate(count=Count("id"))
+        .values_list("siren_annotated", "count")
+        .order_by()
+    )
+
+
+def get_related_counts(siae_ids=None):
+    """
+    Count fields of the siaes (see update_siae_count_fields), with one grouped aggregate query per relation
+    (instead of a few queries per siae).
+    Return {siae_id: {field: count}}: the siaes without related objects are missing (their counts are 0).
+    """
+    counts = defaultdict(dict)
+
+    def add_counts(queryset, **aggregates):
+        if siae_ids is not None:
+            queryset = queryset.filter(siae_id__in=siae_ids)
+        for row in queryset.values("siae_id").annotate(**aggregates).order_by():
+            counts[row.pop("siae_id")].update(row)
+
+    # M2M
+    add_counts(SiaeUser.objects, user_count=Count("id"))
+    add_counts(Siae.networks.through.objects, network_count=Count("id"))
+    add_counts(Siae.groups.through.objects, group_count=Count("id"))
+    # FK
+    add_counts(SiaeOffer.objects, offer_count=Count("id"))
+    add_counts(SiaeClientReference.objects, client_reference_count=Count("id"))
+    add_counts(SiaeLabelOld.objects, label_count=Count("id"))
+    add_counts(SiaeImage.objects, image_count=Count("id"))
+    # tenders
+    add_counts(
+        TenderSiae.objects,
+        tender_count=Count("tender_id", distinct=True),
+        tender_email_send_count=Count("id", filter=Q(email_send_date__isnull=False)),
+        tender_email_link_click_count=Count("id", filter=Q(email_link_click_date__isnull=False)),
+        tender_detail_display_count=Count("id", filter=Q(detail_display_date__isnull=False)),
+        tender_detail_contact_click_count=Count("id", filter=Q(detail_contact_click_date__isnull=False)),
+        tender_detail_not_interested_count=Count("id", filter=Q(detail_not_interested_click_date__isnull=False)),
+    )
+
+    # sector groups: the distinct (siae, sector group) pairs (an activity without sector group counts as one)
+    activities = SiaeActivity.objects.all()
+    if siae_ids is not None:
+        activities = activities.filter(siae_id__in=siae_ids)
+    for siae_id, _ in activities.values_list("siae_id", "sector__group").distinct().order_by():
+        counts[siae_id]["sector_count"] = counts[siae_id].get("sector_count", 0) + 1
+
+    return counts
@@ -1,13 +1,30 @@
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
 from lemarche.stats.models import Tracker
+from lemarche.stats.partitions import (
+    create_tracker_partition,
+    drop_tracker_partition,
+    get_tracker_partition_name,
+    get_tracker_partitions,
+    get_tracker_partitions_to_create,
+)
 from lemarche.utils.db import secure_delete
 
 
 class Command(BaseCommand):
+    """
+    Manage the (monthly) partitions of the trackers table:
+    - create the partitions of the next months
+    - drop the expired partitions (O(1), instead of deleting the trackers one by one)
+    - delete the remaining expired trackers (partition partially expired)
+
+    Usage: python manage.py delete_old_trackers [--dry-run]
+    """
+
     def add_arguments(self, parser):
         parser.add_argument(
             "--dry-run",
@@ -17,9 +34,34 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        expiry_date = timezone.now() - relativedelta(months=settings.TRACKER_DELETION_TIMEOUT_IN_MONTHS)
+        now = timezone.now()
+        expiry_date = now - relativedelta(months=settings.TRACKER_DELETION_TIMEOUT_IN_MONTHS)
+
+        # create the next partitions
+        month_starts = get_tracker_partitions_to_create(now, months_ahead=settings.TRACKER_PARTITIONS_AHEAD_IN_MONTHS)
+        partition_names = [get_tracker_partition_name(month_start) for month_start in month_starts]
+        if options["dry_run"]:
+            self.stdout.write(f"Dry-run: création des partitions des trackers: {partition_names}")
+        else:
+            with transaction.atomic(using=Tracker.objects.db):
+                for month_start in month_starts:
+                    create_tracker_partition(month_start)
+            self.stdout.write(f"Création des partitions des trackers: {partition_names}")
+
+        # drop the expired partitions
+        expired_partition_names = [
+            partition.name
+            for partition in get_tracker_partitions()
+            if partition.upper_bound and partition.upper_bound <= expiry_date
+        ]
+        if options["dry_run"]:
+            self.stdout.write(f"Dry-run: suppression des partitions des trackers: {expired_partition_names}")
+        else:
+            for partition_name in expired_partition_names:
+                drop_tracker_partition(partition_name)
+            self.stdout.write(f"Suppression des partitions des trackers: {expired_partition_names}")
 
-        # retrieve old trackers to delete
+        # retrieve old trackers to delete (in the partially expired partition)
         trackers_qs = Tracker.objects.filter(date_created__lte=expiry_date)
 
         if options["dry_run"]:
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from lemarche.stats.models import SiaeViewStat
+from lemarche.utils.commands import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Goal: update the daily rollup of the siae detail page views (used for the Siae stat_*_view_count_last_3_months)
+    The days are recomputed from the trackers (idempotent): by default today & yesterday
+
+    Note: run via a CRON (every hour)
+    To initialize the rollup: python manage.py update_siae_view_stats --days 90
+
+    Usage: python manage.py update_siae_view_stats
+    Usage: python manage.py update_siae_view_stats --days 90
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=2, help="Nombre de jours à recalculer (jusqu'à aujourd'hui inclus)"
+        )
+
+    def handle(self, *args, **options):
+        date_to = timezone.localdate()
+        date_from = date_to - timedelta(days=options["days"] - 1)
+        self.stdout_messages_info(f"Update siae view stats from {date_from} to {date_to}")
+
+        stat_count = SiaeViewStat.objects.rebuild(date_from, date_to)
+
+        self.stdout_messages_success(f"Done! {stat_count} siae view stats")
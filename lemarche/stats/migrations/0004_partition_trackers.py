@@ -0,0 +1,92 @@
+from datetime import UTC, datetime
+
+from django.db import migrations, transaction
+
+
+# The trackers table becomes a partitioned table (monthly range partitions on date_created)
+# - the existing table is kept as a partition ("trackers_legacy"), up to the end of its last month
+# - the primary key of a partitioned table must include the partition key: (id_internal, date_created)
+# - a default partition catches the trackers outside of the existing partitions. It must stay empty:
+#   a later `CREATE TABLE ... PARTITION OF trackers` fails if the default partition has rows in its range
+# - the next partitions are created (and the expired ones dropped) by the delete_old_trackers command
+#
+# ATTACH PARTITION scans the whole legacy table to check the bound, unless a validated CHECK constraint
+# already proves it: the constraint is validated first, outside of the swap transaction (VALIDATE CONSTRAINT
+# only takes a SHARE UPDATE EXCLUSIVE lock, the trackers are still written meanwhile), so that the swap
+# (ACCESS EXCLUSIVE lock) does not scan the table.
+BOUND_CHECK_NAME = "trackers_legacy_bound_check"
+
+
+def add_months(month_start, months):
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=UTC)
+
+
+def sql_datetime(value):
+    return f"'{value.isoformat()}'"
+
+
+def partition_trackers(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT date_trunc('month', coalesce(max(date_created), now()), 'UTC') + interval '1 month' FROM trackers"
+        )
+        [upper_bound] = cursor.fetchone()
+        upper_bound = upper_bound.astimezone(UTC)
+
+        cursor.execute(
+            f"ALTER TABLE trackers ADD CONSTRAINT {BOUND_CHECK_NAME} "
+            f"CHECK (date_created IS NOT NULL AND date_created < {sql_datetime(upper_bound)}) NOT VALID"
+        )
+        cursor.execute(f"ALTER TABLE trackers VALIDATE CONSTRAINT {BOUND_CHECK_NAME}")
+
+        with transaction.atomic(using=schema_editor.connection.alias):
+            cursor.execute("LOCK TABLE trackers IN ACCESS EXCLUSIVE MODE")
+            cursor.execute("SELECT coalesce(max(id_internal), 0) + 1 FROM trackers")
+            [next_id] = cursor.fetchone()
+
+            cursor.execute("ALTER TABLE trackers RENAME TO trackers_legacy")
+            cursor.execute("ALTER TABLE trackers_legacy RENAME CONSTRAINT trackers_pkey TO trackers_legacy_pkey")
+            cursor.execute("ALTER TABLE trackers_legacy ALTER COLUMN id_internal DROP IDENTITY IF EXISTS")
+            cursor.execute("ALTER TABLE trackers_legacy ALTER COLUMN id_internal DROP DEFAULT")
+            cursor.execute("DROP SEQUENCE IF EXISTS trackers_id_internal_seq")
+            cursor.execute(f"CREATE SEQUENCE trackers_id_internal_seq START WITH {int(next_id)}")
+
+            cursor.execute(
+                "CREATE TABLE trackers (LIKE trackers_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                "PARTITION BY RANGE (date_created)"
+            )
+            # copied from the legacy table, it would apply to all the partitions
+            cursor.execute(f"ALTER TABLE trackers DROP CONSTRAINT {BOUND_CHECK_NAME}")
+            cursor.execute(
+                "ALTER TABLE trackers ALTER COLUMN id_internal SET DEFAULT nextval('trackers_id_internal_seq')"
+            )
+            cursor.execute("ALTER SEQUENCE trackers_id_internal_seq OWNED BY trackers.id_internal")
+            cursor.execute("ALTER TABLE trackers ADD PRIMARY KEY (id_internal, date_created)")
+
+            # no scan: implied by the validated constraint
+            cursor.execute(
+                "ALTER TABLE trackers ATTACH PARTITION trackers_legacy "
+                f"FOR VALUES FROM (MINVALUE) TO ({sql_datetime(upper_bound)})"
+            )
+            cursor.execute(f"ALTER TABLE trackers_legacy DROP CONSTRAINT {BOUND_CHECK_NAME}")
+            for i in range(3):
+                partition_start, partition_end = add_months(upper_bound, i), add_months(upper_bound, i + 1)
+                cursor.execute(
+                    f"CREATE TABLE trackers_p{partition_start:%Y%m} PARTITION OF trackers "
+                    f"FOR VALUES FROM ({sql_datetime(partition_start)}) TO ({sql_datetime(partition_end)})"
+                )
+            cursor.execute("CREATE TABLE trackers_default PARTITION OF trackers DEFAULT")
+
+
+class Migration(migrations.Migration):
+    # the bound constraint is validated in its own transaction (see above)
+    atomic = False
+
+    dependencies = [
+        ("stats", "0003_drop_statsuser_table"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_trackers),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stats", "0004_partition_trackers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SiaeViewStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("siae_id", models.IntegerField()),
+                ("date", models.DateField(verbose_name="Jour")),
+                (
+                    "user_kind",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("SIAE", "Structure"),
+                            ("BUYER", "Acheteur"),
+                            ("PARTNER", "Partenaire"),
+                            ("INDIVIDUAL", "Particulier"),
+                            ("ADMIN", "Administrateur"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("view_count", models.PositiveIntegerField(default=0, verbose_name="Nombre de vues")),
+            ],
+            options={
+                "db_table": "stats_siae_view",
+                "constraints": [
+                    models.UniqueConstraint(fields=("siae_id", "date", "user_kind"), name="stats_siae_view_unique")
+                ],
+            },
+        ),
+    ]
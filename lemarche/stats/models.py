@@ -1,6 +1,8 @@
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 
 from lemarche.siaes import constants as siae_constants
@@ -14,18 +16,9 @@ class TrackerQuerySet(models.QuerySet):
     def by_user_kind(self, user_kind):
         return self.filter(user_kind=user_kind)
 
-    def siae_views_last_3_months(self, siae_slug):
-        return self.env_prod().filter(
-            action="load",
-            page=f"/prestataires/{siae_slug}/",
-            date_created__gte=timezone.now() - timedelta(days=90),
-        )
-
-    def siae_buyer_views_last_3_months(self, siae_slug):
-        return self.env_prod().siae_views_last_3_months(siae_slug).by_user_kind(user_constants.KIND_BUYER)
-
-    def siae_partner_views_last_3_months(self, siae_slug):
-        return self.env_prod().siae_views_last_3_months(siae_slug).by_user_kind(user_constants.KIND_PARTNER)
+    def siae_views(self):
+        # siae detail page: /prestataires/<slug>/
+        return self.env_prod().filter(action="load", page__regex=r"^/prestataires/[^/]+/$", siae_id__isnull=False)
 
 
 class Tracker(models.Model):
@@ -51,4 +44,54 @@ class Tracker(models.Model):
     objects = models.Manager.from_queryset(TrackerQuerySet)()
 
     class Meta:
+        # partitioned by month on date_created (see lemarche/stats/partitions.py)
         db_table = "trackers"
+
+
+class SiaeViewStatQuerySet(models.QuerySet):
+    def last_3_months(self):
+        return self.filter(date__gt=timezone.localdate() - timedelta(days=90))
+
+    def view_counts(self):
+        return self.aggregate(
+            view_count=Sum("view_count", default=0),
+            buyer_view_count=Sum("view_count", filter=Q(user_kind=user_constants.KIND_BUYER), default=0),
+            partner_view_count=Sum("view_count", filter=Q(user_kind=user_constants.KIND_PARTNER), default=0),
+        )
+
+    def rebuild(self, date_from, date_to):
+        """
+        (Re)compute the daily siae views from the trackers, between date_from & date_to (included)
+        """
+        datetime_from = timezone.make_aware(datetime.combine(date_from, time.min))
+        datetime_to = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        siae_view_stats = (
+            Tracker.objects.siae_views()
+            .filter(date_created__gte=datetime_from, date_created__lt=datetime_to)
+            .annotate(date=TruncDate("date_created"))
+            .values("siae_id", "date", "user_kind")
+            .annotate(view_count=Count("id_internal"))
+            .order_by()
+        )
+        with transaction.atomic(using=self.db):
+            self.filter(date__gte=date_from, date__lte=date_to).delete()
+            return len(self.bulk_create([SiaeViewStat(**siae_view_stat) for siae_view_stat in siae_view_stats]))
+
+
+class SiaeViewStat(models.Model):
+    """
+    Daily rollup of the trackers of the siae detail pages (see update_siae_view_stats)
+    """
+
+    siae_id = models.IntegerField()
+    date = models.DateField(verbose_name="Jour")
+    user_kind = models.CharField(max_length=20, choices=user_constants.KIND_CHOICES_WITH_ADMIN, blank=True)
+    view_count = models.PositiveIntegerField(verbose_name="Nombre de vues", default=0)
+
+    objects = models.Manager.from_queryset(SiaeViewStatQuerySet)()
+
+    class Meta:
+        db_table = "stats_siae_view"
+        constraints = [
+            models.UniqueConstraint(fields=["siae_id", "date", "user_kind"], name="stats_siae_view_unique"),
+        ]
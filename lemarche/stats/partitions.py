@@ -0,0 +1,92 @@
+"""
+The trackers table is partitioned by month (range partitions on date_created), see migration 0004.
+- trackers_pYYYYMM: the monthly partitions
+- trackers_legacy: the trackers before the partitioning (from MINVALUE)
+- trackers_default: the default partition
+"""
+
+import datetime
+import re
+from dataclasses import dataclass
+
+from dateutil import parser
+from dateutil.relativedelta import relativedelta
+from django.db import connections, router
+
+from lemarche.stats.models import Tracker
+
+
+PARTITION_BOUND_TO_REGEX = re.compile(r"TO \('(?P<upper_bound>[^']+)'\)")
+
+
+@dataclass
+class TrackerPartition:
+    name: str
+    upper_bound: datetime.datetime | None  # None for the default partition
+
+
+def get_tracker_connection():
+    return connections[router.db_for_write(Tracker)]
+
+
+def get_tracker_partition_name(month_start: datetime.datetime) -> str:
+    return f"{Tracker._meta.db_table}_p{month_start:%Y%m}"
+
+
+def get_month_start(date: datetime.datetime) -> datetime.datetime:
+    return date.astimezone(datetime.UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_tracker_partitions() -> list[TrackerPartition]:
+    with get_tracker_connection().cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [Tracker._meta.db_table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = PARTITION_BOUND_TO_REGEX.search(bound)
+        partitions.append(TrackerPartition(name, parser.parse(match["upper_bound"]) if match else None))
+    return partitions
+
+
+def get_tracker_partitions_to_create(now: datetime.datetime, months_ahead: int) -> list[datetime.datetime]:
+    """
+    The months (start) without partition, after the last partition, up to `months_ahead` months after now
+    """
+    upper_bounds = [partition.upper_bound for partition in get_tracker_partitions() if partition.upper_bound]
+    month_start = get_month_start(max(upper_bounds, default=now))
+    last_month_start = get_month_start(now) + relativedelta(months=months_ahead)
+    month_starts = []
+    while month_start <= last_month_start:
+        month_starts.append(month_start)
+        month_start += relativedelta(months=1)
+    return month_starts
+
+
+def create_tracker_partition(month_start: datetime.datetime) -> str:
+    partition_name = get_tracker_partition_name(month_start)
+    with get_tracker_connection().cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE "{partition_name}" PARTITION OF "{Tracker._meta.db_table}" FOR VALUES FROM (%s) TO (%s)',
+            [month_start, month_start + relativedelta(months=1)],
+        )
+    return partition_name
+
+
+def drop_tracker_partition(partition_name: str):
+    """
+    Detach then drop the partition: O(1), instead of deleting its trackers one by one
+    """
+    with get_tracker_connection().cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{Tracker._meta.db_table}" DETACH PARTITION "{partition_name}"')
+        cursor.execute(f'DROP TABLE "{partition_name}"')
@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from sentry_sdk.crons import monitor
 
 from lemarche.tenders.models import Tender
-from lemarche.www.tenders.tasks import send_validated_sent_batch_tender, send_validated_tender
+from lemarche.www.tenders.tasks import send_validated_sent_batch_tender_task, send_validated_tender_task
 
 
 class Command(BaseCommand):
@@ -15,6 +15,10 @@ class Command(BaseCommand):
     - why 8am and not 9am? because the server has UTC time
     - why 3pm and not 5pm? because UTC + will run until 15h55 included
 
+    Each tender send is enqueued as an independent huey task (see send_validated_tender_task):
+    tenders are sent concurrently by the workers, with a lock per tender,
+    and an interrupted send is resumed at the next run (the TenderSiae already emailed are skipped)
+
     Usage: python manage.py send_validated_tenders
     """
 
@@ -24,8 +28,8 @@ class Command(BaseCommand):
         validated_tenders_to_send = Tender.objects.validated_but_not_sent().is_not_outdated()
         if validated_tenders_to_send.count():
             self.stdout.write(f"Found {validated_tenders_to_send.count()} validated tender(s) to send")
-            for tender in validated_tenders_to_send:
-                send_validated_tender(tender)
+            for tender_id in validated_tenders_to_send.values_list("id", flat=True):
+                send_validated_tender_task(tender_id)
 
         # Then look at already sent tenders (batch mode)
         validated_sent_tenders_batch_to_send = Tender.objects.validated_sent_batch().is_not_outdated()
@@ -33,5 +37,5 @@ class Command(BaseCommand):
             self.stdout.write(
                 f"Found {validated_sent_tenders_batch_to_send.count()} validated sent tender(s) to batch"
             )
-            for tender in validated_sent_tenders_batch_to_send:
-                send_validated_sent_batch_tender(tender)
+            for tender_id in validated_sent_tenders_batch_to_send.values_list("id", flat=True):
+                send_validated_sent_batch_tender_task(tender_id)
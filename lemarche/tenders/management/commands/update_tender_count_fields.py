@@ -4,7 +4,7 @@ from datetime import timedelta
 from django.utils import timezone
 from sentry_sdk.crons import monitor
 
-from lemarche.tenders.models import Tender
+from lemarche.tenders.models import Tender, TenderSiae
 from lemarche.utils.apis import api_slack
 from lemarche.utils.commands import BaseCommand
 
@@ -14,7 +14,10 @@ logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
     """
-    Goal: update the '_count' fields of each Tender
+    Goal: verify (& repair) the '_count' fields of each Tender
+
+    The counters are incremented when the TenderSiae funnel dates are set (see TenderSiaeQuerySet.set_funnel_date):
+    this periodic pass recounts them with a single grouped query, and only saves the tenders with a mismatch.
 
     Usage:
     python manage.py update_tender_count_fields
@@ -35,53 +38,43 @@ class Command(BaseCommand):
 
         # Step 1a: build the queryset
         one_month_ago = timezone.now() - timedelta(days=30)
-        tender_queryset = Tender.objects.is_not_outdated(one_month_ago).with_siae_stats().all()
+        tender_queryset = Tender.objects.is_not_outdated(one_month_ago)
         if options["id"]:
             tender_queryset = tender_queryset.filter(id=options["id"])
-        self.stdout_messages_info(f"Found {tender_queryset.count()} tenders")
+        tenders = list(tender_queryset.only("id", *Tender.FIELDS_STATS_COUNT, *Tender.TRACK_UPDATE_FIELDS))
+        self.stdout_messages_info(f"Found {len(tenders)} tenders")
 
         # Step 1b: init fields to update
         update_fields = options["fields"] if options["fields"] else Tender.FIELDS_STATS_COUNT
         self.stdout_messages_info(f"Fields to update: {update_fields}")
 
-        # Step 2: loop on each Tender
-        progress = 0
-        for index, tender in enumerate(tender_queryset):
-            # M2M
-
-            # raise warning log if a field is not up to date (signal failed ?)
-            for field in Tender.FIELDS_STATS_COUNT:
-                annotated_field = f"{field}_annotated"
-                if getattr(tender, field) != getattr(tender, annotated_field):
+        # Step 2: recount (single grouped query)
+        stats_by_tender_id = {
+            stats.pop("tender_id"): stats
+            for stats in TenderSiae.objects.filter(tender__in=tender_queryset).stats_by_tender()
+        }
+
+        # Step 3: repair the counters that drifted
+        tenders_to_update = []
+        for tender in tenders:
+            tender_stats = stats_by_tender_id.get(tender.id, {})
+            tender_changed = False
+            for field in update_fields:
+                count = tender_stats.get(field, 0)
+                if getattr(tender, field) != count:
+                    # the counters are incremented with each TenderSiae funnel date (set_funnel_date)
                     logger.warning(
-                        "Tender %s has a mismatch between %s and %s: %s != %s",
-                        tender.id,
-                        field,
-                        annotated_field,
-                        getattr(tender, field),
-                        getattr(tender, annotated_field),
+                        "Tender %s has a mismatch on %s: %s != %s", tender.id, field, getattr(tender, field), count
                     )
-
-            tender.siae_count = tender.siae_count_annotated
-            tender.siae_email_send_count = tender.siae_email_send_count_annotated
-            tender.siae_email_link_click_count = tender.siae_email_link_click_count_annotated
-            tender.siae_detail_display_count = tender.siae_detail_display_count_annotated
-            tender.siae_email_link_click_or_detail_display_count = (
-                tender.siae_email_link_click_or_detail_display_count_annotated
-            )
-            tender.siae_detail_contact_click_count = tender.siae_detail_contact_click_count_annotated
-            tender.siae_detail_not_interested_click_count = tender.siae_detail_not_interested_click_count_annotated
-
-            # Step 3: update count fields
-            tender.save(update_fields=update_fields)
-
-            progress += 1
-            if (progress % 500) == 0:
-                self.stdout_info(f"{progress}...")
+                    setattr(tender, field, count)
+                    tender_changed = True
+            if tender_changed:
+                tenders_to_update.append(tender)
+        Tender.objects.bulk_update(tenders_to_update, update_fields, batch_size=1_000)
 
         msg_success = [
             "----- Tender count fields -----",
-            f"Done! Processed {tender_queryset.count()} tenders",
+            f"Done! Processed {len(tenders)} tenders ({len(tenders_to_update)} repaired)",
             f"Fields updated: {update_fields}",
         ]
         self.stdout_messages_success(msg_success)
@@ -1,9 +1,10 @@
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django.db.models import (
     BooleanField,
     Case,
@@ -843,8 +844,15 @@ class Tender(models.Model):
         - update the object stats
         - update the object content_fill_dates
         - generate the slug field
+        - do not overwrite the stats counters (incremented in the database, see TenderSiaeQuerySet.set_funnel_date)
         """
         self.set_last_updated_fields()
+        if not self._state.adding and not args and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.FIELDS_STATS_COUNT
+            ]
         try:
             self.set_slug()
             super().save(*args, **kwargs)
@@ -1156,6 +1164,62 @@ class TenderSiaeQuerySet(models.QuerySet):
             detail_contact_click_date__lt=lt_days_ago
         )
 
+    def set_funnel_date(self, field_name, date=None, **extra_fields):
+        """
+        Set the funnel date `field_name` (e.g. "detail_display_date") of the TenderSiae where it is not set yet
+        (along with extra_fields), and increment the Tender counters accordingly (F() expressions, no recount).
+        Return the number of TenderSiae updated.
+        """
+        date = date or timezone.now()
+        count_field_name = self.model.FUNNEL_DATE_TENDER_COUNT_FIELDS[field_name]
+        with transaction.atomic():
+            tendersiaes = list(
+                self.filter(**{f"{field_name}__isnull": True})
+                .select_for_update(of=("self",))
+                .values("id", "tender_id", "email_link_click_date", "detail_display_date")
+            )
+            if not tendersiaes:
+                return 0
+            self.model.objects.filter(id__in=[tendersiae["id"] for tendersiae in tendersiaes]).update(
+                **{field_name: date}, updated_at=date, **extra_fields
+            )
+
+            tender_counts = defaultdict(Counter)
+            for tendersiae in tendersiaes:
+                tender_counts[tendersiae["tender_id"]][count_field_name] += 1
+                if field_name in ["email_link_click_date", "detail_display_date"] and not (
+                    tendersiae["email_link_click_date"] or tendersiae["detail_display_date"]
+                ):
+                    tender_counts[tendersiae["tender_id"]]["siae_email_link_click_or_detail_display_count"] += 1
+            for tender_id, counts in tender_counts.items():
+                Tender.objects.filter(id=tender_id).update(
+                    **{count_field: F(count_field) + count for count_field, count in counts.items()}
+                )
+        return len(tendersiaes)
+
+    def stats_by_tender(self):
+        """
+        The Tender.FIELDS_STATS_COUNT of each tender, with a single grouped query
+        (see update_tender_count_fields)
+        """
+        return (
+            self.values("tender_id")
+            .annotate(
+                siae_count=Count("siae_id", distinct=True),
+                siae_email_send_count=Count("id", filter=Q(email_send_date__isnull=False)),
+                siae_email_link_click_count=Count("id", filter=Q(email_link_click_date__isnull=False)),
+                siae_detail_display_count=Count("id", filter=Q(detail_display_date__isnull=False)),
+                siae_email_link_click_or_detail_display_count=Count(
+                    "id", filter=Q(email_link_click_date__isnull=False) | Q(detail_display_date__isnull=False)
+                ),
+                siae_detail_contact_click_count=Count("id", filter=Q(detail_contact_click_date__isnull=False)),
+                siae_detail_not_interested_click_count=Count(
+                    "id", filter=Q(detail_not_interested_click_date__isnull=False)
+                ),
+            )
+            .order_by()
+        )
+
 
 class TenderSiae(models.Model):
     """Link between a Tender and a Siae."""
@@ -1182,6 +1246,14 @@ class TenderSiae(models.Model):
         "updated_at",
     ]
     READONLY_FIELDS = FIELDS_RELATION + FIELDS_SURVEY_TRANSACTIONED + FIELDS_STATS_TIMESTAMPS
+    # the Tender counter incremented when the funnel date is first set (see TenderSiaeQuerySet.set_funnel_date)
+    FUNNEL_DATE_TENDER_COUNT_FIELDS = {
+        "email_send_date": "siae_email_send_count",
+        "email_link_click_date": "siae_email_link_click_count",
+        "detail_display_date": "siae_detail_display_count",
+        "detail_contact_click_date": "siae_detail_contact_click_count",
+        "detail_not_interested_click_date": "siae_detail_not_interested_click_count",
+    }
 
     uuid = models.UUIDField(default=uuid4, editable=False)
 
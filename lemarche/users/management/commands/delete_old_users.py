@@ -58,7 +58,7 @@ class Command(BaseCommand):
     def notify_inactive_users(self, dry_run: bool):
         """Send an email to warn inactive users their account will soon be deleted."""
 
-        email_template = TemplateTransactional.objects.get(code="USER_DELETION_WARNING")
+        email_template = TemplateTransactional.objects.get_by_code("USER_DELETION_WARNING")
         expiry_date = timezone.now() - relativedelta(months=settings.INACTIVE_USER_TIMEOUT_IN_MONTHS)
         warning_date = expiry_date + datetime.timedelta(days=settings.INACTIVE_USER_WARNING_DELAY_IN_DAYS)
 
@@ -72,15 +72,19 @@ class Command(BaseCommand):
             self.stdout.write(f"Dry-run: avertissement des utilisateurs: {users_to_warn.count()} auraient été avertis")
             return  # exit before sending emails
 
-        # send an email to warn users
+        # send an email to warn users (single batch)
         now = timezone.now()
-        for user in users_to_warn:
-            email_template.send_transactional_email(
-                recipient_email=user.email,
-                recipient_name=user.full_name,
-                variables=None,
-                recipient_content_object=user,
-            )
+        email_template.send_transactional_emails(
+            [
+                {
+                    "recipient_email": user.email,
+                    "recipient_name": user.full_name,
+                    "variables": None,
+                    "recipient_content_object": user,
+                }
+                for user in users_to_warn
+            ]
+        )
 
         # update users with the date they were notified of the pending deletion of their account
         updated = users_to_warn.update(pending_deletion_notice_date=now)
@@ -11,7 +11,7 @@ from django.utils import timezone
 from itoutils.django.nexus.models import NexusModelMixin, NexusQuerySetMixin
 from phonenumber_field.modelfields import PhoneNumberField
 
-from lemarche.nexus import sync, tasks
+from lemarche.nexus import outbox, sync
 from lemarche.users import constants as user_constants
 from lemarche.users.tasks import notify_user_onboarded
 from lemarche.utils.data import phone_number_display
@@ -128,8 +128,8 @@ class UserManager(BaseUserManager):
 
 class User(NexusModelMixin, AbstractUser):
     nexus_tracked_fields = sync.USER_TRACKED_FIELDS
-    nexus_sync = staticmethod(tasks.async_sync_users)
-    nexus_delete = staticmethod(tasks.async_delete_users)
+    nexus_sync = staticmethod(outbox.record_users)
+    nexus_delete = staticmethod(outbox.record_users)
 
     objects = UserManager()
 
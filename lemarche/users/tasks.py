@@ -9,7 +9,7 @@ def notify_user_onboarded(user):
         if user.source != user_constants.SOURCE_TALLY_FORM
         else "TALLY_USER_ONBOARDING_CONFIRMED"
     )
-    email_template = TemplateTransactional.objects.get(code=code_template_email)
+    email_template = TemplateTransactional.objects.get_by_code(code_template_email)
     variables = {"PRENOM": user.first_name}
 
     email_template.send_transactional_email(
@@ -1,8 +1,11 @@
+import hashlib
 import json
 import logging
+import threading
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from itertools import batched
 
 import brevo_python
 from brevo_python.rest import ApiException
@@ -11,6 +14,7 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 from lemarche.tenders.enums import TenderSourcesChoices
 from lemarche.utils.apis.brevo_attributes import BUYER_COMPANY_ATTRIBUTES, CONTACT_ATTRIBUTES, SIAE_COMPANY_ATTRIBUTES
+from lemarche.utils.concurrency import RateLimiter
 from lemarche.utils.constants import EMAIL_SUBJECT_PREFIX
 from lemarche.utils.data import sanitize_to_send_by_email
 from lemarche.utils.urls import get_object_admin_url, get_object_share_url
@@ -20,6 +24,9 @@ logger = logging.getLogger(__name__)
 
 ENV_NOT_ALLOWED = ("dev", "test", "review_app")
 
+# extra_data key of the fingerprint of the last company payload sent to Brevo (see get_company_body_fingerprint)
+BREVO_COMPANY_FINGERPRINT_KEY = "brevo_company_fingerprint"
+
 
 def get_valid_number_for_brevo(phone_number: PhoneNumberField):
     """
@@ -46,6 +53,9 @@ class BrevoConfig:
     default_page_limit: int = 500
     contacts_default_since_days: int = 30
 
+    # Batch send configuration (Brevo accepts up to 1000 messageVersions per call)
+    transactional_email_batch_size: int = 1000
+
 
 class BrevoApiError(Exception):
     """Exception raised when contacts fetching fails after all retries"""
@@ -56,9 +66,39 @@ class BrevoApiError(Exception):
         super().__init__(self.message)
 
 
+class BrevoRateLimiter(RateLimiter):
+    """
+    Shared by all the Brevo clients: when Brevo answers 429, the bucket is paused (see handle_api_retry),
+    so that the other threads wait instead of hitting the limit in turn.
+    """
+
+
+_api_client = None
+_api_client_lock = threading.Lock()
+
+
+def get_brevo_api_client() -> brevo_python.ApiClient:
+    """
+    The brevo_python.ApiClient of the process, shared by all the clients (and threads):
+    its urllib3 pool keeps the connections to Brevo open between the calls.
+    """
+    global _api_client
+
+    if _api_client is None:
+        with _api_client_lock:
+            if _api_client is None:
+                config = brevo_python.Configuration()
+                config.api_key["api-key"] = settings.BREVO_API_KEY
+                config.connection_pool_maxsize = settings.BREVO_API_CONNECTION_POOL_SIZE
+                _api_client = brevo_python.ApiClient(config)
+    return _api_client
+
+
 class BrevoBaseApiClient:
     api_client: brevo_python.ApiClient
     is_production_env = settings.BITOUBI_ENV not in ENV_NOT_ALLOWED
+    # shared by all the instances
+    rate_limiter = BrevoRateLimiter(settings.BREVO_API_RATE_LIMIT)
 
     def __init__(self, config: BrevoConfig = BrevoConfig()):
         """
@@ -72,9 +112,7 @@ class BrevoBaseApiClient:
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def set_api_client(self):
-        config = brevo_python.Configuration()
-        config.api_key["api-key"] = settings.BREVO_API_KEY
-        self.api_client = brevo_python.ApiClient(config)
+        self.api_client = get_brevo_api_client()
 
     def handle_api_retry(self, exception: ApiException, attempt, operation_name):
         """
@@ -92,7 +130,13 @@ class BrevoBaseApiClient:
         retry_delay = self.config.retry_delay
 
         if exception.status == 429:  # Rate limiting
-            wait_time = retry_delay * (attempt + 1) * self.config.rate_limit_backoff_multiplier
+            # seconds before the reset of the quota, if returned by Brevo
+            rate_limit_reset = (exception.headers or {}).get("x-sib-ratelimit-reset")
+            if rate_limit_reset and rate_limit_reset.isdigit():
+                wait_time = max(int(rate_limit_reset), 1)
+            else:
+                wait_time = retry_delay * (attempt + 1) * self.config.rate_limit_backoff_multiplier
+            self.rate_limiter.pause(wait_time)
             self.logger.warning(f"Rate limit reached while {operation_name}, waiting {wait_time}s")
             return True, wait_time
 
@@ -125,6 +169,7 @@ class BrevoBaseApiClient:
 
                 for attempt in range(max_retries + 1):
                     try:
+                        self.rate_limiter.acquire()
                         return operation_func(self, *args, **kwargs)
                     except ApiException as e:
                         should_retry, wait_time = self.handle_api_retry(e, attempt, operation_name)
@@ -613,6 +658,102 @@ class BrevoContactsApiClient(BrevoBaseApiClient):
         return True
 
 
+def build_buyer_company_attributes(company):
+    """
+    Build buyer company attributes dictionary for Brevo
+
+    Args:
+        company: Company object to extract attributes from
+
+    Returns:
+        dict: Dictionary of attributes for Brevo company
+    """
+    return {
+        # Default attributes
+        BUYER_COMPANY_ATTRIBUTES["domain"]: company.website,
+        BUYER_COMPANY_ATTRIBUTES["phone_number"]: "",  # Company model doesn't have phone
+        # Custom attributes
+        BUYER_COMPANY_ATTRIBUTES["app_id"]: company.id,
+        BUYER_COMPANY_ATTRIBUTES["siae"]: False,  # This is a buyer company, not SIAE
+        BUYER_COMPANY_ATTRIBUTES["description"]: company.description,
+        BUYER_COMPANY_ATTRIBUTES["kind"]: "BUYER",  # Distinguish from SIAE
+        BUYER_COMPANY_ATTRIBUTES["siret"]: company.siret,
+        BUYER_COMPANY_ATTRIBUTES["app_admin_url"]: get_object_admin_url(company),
+        BUYER_COMPANY_ATTRIBUTES["nombre_d_utilisateurs"]: (
+            company.extra_data.get("brevo_company_data", {}).get("user_count")
+        ),
+        BUYER_COMPANY_ATTRIBUTES["nombre_besoins"]: (
+            company.extra_data.get("brevo_company_data", {}).get("user_tender_count")
+        ),
+        BUYER_COMPANY_ATTRIBUTES["domaines_email"]: (
+            ",".join(company.email_domain_list) if company.email_domain_list else ""
+        ),
+    }
+
+
+def build_siae_company_attributes(siae):
+    """
+    Build SIAE company attributes dictionary for Brevo
+
+    Args:
+        siae: SIAE object to extract attributes from
+
+    Returns:
+        dict: Dictionary of attributes for Brevo company
+    """
+    return {
+        # Default attributes
+        SIAE_COMPANY_ATTRIBUTES["domain"]: siae.website,
+        SIAE_COMPANY_ATTRIBUTES["phone_number"]: get_valid_number_for_brevo(siae.contact_phone),
+        # Custom attributes
+        SIAE_COMPANY_ATTRIBUTES["app_id"]: siae.id,
+        SIAE_COMPANY_ATTRIBUTES["siae"]: True,
+        SIAE_COMPANY_ATTRIBUTES["active"]: siae.is_active,
+        SIAE_COMPANY_ATTRIBUTES["description"]: siae.description,
+        SIAE_COMPANY_ATTRIBUTES["kind"]: siae.kind,
+        SIAE_COMPANY_ATTRIBUTES["address_street"]: siae.address,
+        SIAE_COMPANY_ATTRIBUTES["postal_code"]: siae.post_code,
+        SIAE_COMPANY_ATTRIBUTES["address_city"]: siae.city,
+        SIAE_COMPANY_ATTRIBUTES["contact_email"]: siae.contact_email,
+        SIAE_COMPANY_ATTRIBUTES["logo_url"]: siae.logo_url,
+        SIAE_COMPANY_ATTRIBUTES["app_url"]: get_object_share_url(siae),
+        SIAE_COMPANY_ATTRIBUTES["app_admin_url"]: get_object_admin_url(siae),
+        SIAE_COMPANY_ATTRIBUTES["taux_de_completion"]: (
+            siae.extra_data.get("brevo_company_data", {}).get("completion_rate")
+        ),
+        SIAE_COMPANY_ATTRIBUTES["nombre_de_besoins_recus"]: (
+            siae.extra_data.get("brevo_company_data", {}).get("tender_received")
+        ),
+        SIAE_COMPANY_ATTRIBUTES["nombre_de_besoins_interesses"]: (
+            siae.extra_data.get("brevo_company_data", {}).get("tender_interest")
+        ),
+    }
+
+
+def get_company_body_fingerprint(company_body: brevo_python.Body7) -> str:
+    """
+    Hash of the payload sent to Brevo (stored in the company extra_data after a successful sync),
+    to only send the companies again when their payload changed.
+    """
+    payload = json.dumps(company_body.to_dict(), sort_keys=True, default=str)
+    return hashlib.md5(payload.encode(), usedforsecurity=False).hexdigest()
+
+
+def get_siae_company_body(siae) -> brevo_python.Body7:
+    return brevo_python.Body7(name=siae.name, attributes=build_siae_company_attributes(siae))
+
+
+def get_buyer_company_body(company) -> brevo_python.Body7:
+    return brevo_python.Body7(name=company.name, attributes=build_buyer_company_attributes(company))
+
+
+def has_company_body_changed(company, company_body: brevo_python.Body7) -> bool:
+    """Whether the company (Siae or buyer Company) must be sent to Brevo"""
+    return not company.brevo_company_id or (
+        company.extra_data.get(BREVO_COMPANY_FINGERPRINT_KEY) != get_company_body_fingerprint(company_body)
+    )
+
+
 class BrevoCompanyApiClient(BrevoBaseApiClient):
     """
     Client for Brevo Companies API operations.
@@ -654,9 +795,9 @@ class BrevoCompanyApiClient(BrevoBaseApiClient):
         if not self.is_production_env:
             return
 
-        siae_brevo_company_body = brevo_python.Body7(name=siae.name, attributes=self._build_siae_attributes(siae))
+        siae_brevo_company_body = get_siae_company_body(siae)
 
-        sync_log = self._create_sync_log(siae)
+        sync_log = self._create_sync_log(siae, siae_brevo_company_body)
         is_update = bool(siae.brevo_company_id)
 
         try:
@@ -696,12 +837,9 @@ class BrevoCompanyApiClient(BrevoBaseApiClient):
         if not self.is_production_env:
             return False
 
-        company_brevo_body = brevo_python.Body7(
-            name=company.name,
-            attributes=self._build_buyer_attributes(company),
-        )
+        company_brevo_body = get_buyer_company_body(company)
 
-        sync_log = self._create_sync_log(company)
+        sync_log = self._create_sync_log(company, company_brevo_body)
         is_update = bool(company.brevo_company_id)
 
         try:
@@ -753,6 +891,7 @@ class BrevoCompanyApiClient(BrevoBaseApiClient):
             # link company with contact_list
             if len(contact_list):
                 body_link_company_contact = brevo_python.Body8(link_contact_ids=contact_list)
+                self.rate_limiter.acquire()
                 self.api_instance.companies_link_unlink_id_patch(brevo_company_id, body_link_company_contact)
         except ApiException as e:
             self.logger.exception(f"Exception when calling Brevo->DealApi->companies_link_unlink_id_patch \n {e}")
@@ -761,12 +900,15 @@ class BrevoCompanyApiClient(BrevoBaseApiClient):
     # PRIVATE METHODS - COMMON COMPANY SUPPORT
     # =============================================================================
 
-    def _create_sync_log(self, company):
+    def _create_sync_log(self, company, company_body=None):
         """Create a sync log entry for a company operation"""
-        return {
+        sync_log = {
             "date": datetime.now().isoformat(),
             "operation": "update" if company.brevo_company_id else "create",
         }
+        if company_body is not None:
+            sync_log["fingerprint"] = get_company_body_fingerprint(company_body)
+        return sync_log
 
     def _handle_company_error(self, company, sync_log, error):
         """Handle error in company operation by logging and saving"""
@@ -794,11 +936,15 @@ class BrevoCompanyApiClient(BrevoBaseApiClient):
 
         sync_log["status"] = "success"
         company.logs.append({"brevo_sync": sync_log})
+        update_fields = ["logs"]
+        if "fingerprint" in sync_log:
+            company.extra_data[BREVO_COMPANY_FINGERPRINT_KEY] = sync_log["fingerprint"]
+            update_fields.append("extra_data")
 
         if is_update:
-            company.save(update_fields=["logs"])
+            company.save(update_fields=update_fields)
         else:
-            company.save(update_fields=["brevo_company_id", "logs"])
+            company.save(update_fields=["brevo_company_id", *update_fields])
             # Link contacts after creation
             try:
                 self.link_company_with_contact_list(
@@ -814,76 +960,6 @@ class BrevoCompanyApiClient(BrevoBaseApiClient):
         """Clean up contact list by removing None values"""
         return [contact_id for contact_id in contact_list if contact_id is not None]
 
-    def _build_buyer_attributes(self, company):
-        """
-        Build buyer company attributes dictionary for Brevo
-
-        Args:
-            company: Company object to extract attributes from
-
-        Returns:
-            dict: Dictionary of attributes for Brevo company
-        """
-        return {
-            # Default attributes
-            BUYER_COMPANY_ATTRIBUTES["domain"]: company.website,
-            BUYER_COMPANY_ATTRIBUTES["phone_number"]: "",  # Company model doesn't have phone
-            # Custom attributes
-            BUYER_COMPANY_ATTRIBUTES["app_id"]: company.id,
-            BUYER_COMPANY_ATTRIBUTES["siae"]: False,  # This is a buyer company, not SIAE
-            BUYER_COMPANY_ATTRIBUTES["description"]: company.description,
-            BUYER_COMPANY_ATTRIBUTES["kind"]: "BUYER",  # Distinguish from SIAE
-            BUYER_COMPANY_ATTRIBUTES["siret"]: company.siret,
-            BUYER_COMPANY_ATTRIBUTES["app_admin_url"]: get_object_admin_url(company),
-            BUYER_COMPANY_ATTRIBUTES["nombre_d_utilisateurs"]: (
-                company.extra_data.get("brevo_company_data", {}).get("user_count")
-            ),
-            BUYER_COMPANY_ATTRIBUTES["nombre_besoins"]: (
-                company.extra_data.get("brevo_company_data", {}).get("user_tender_count")
-            ),
-            BUYER_COMPANY_ATTRIBUTES["domaines_email"]: (
-                ",".join(company.email_domain_list) if company.email_domain_list else ""
-            ),
-        }
-
-    def _build_siae_attributes(self, siae):
-        """
-        Build SIAE company attributes dictionary for Brevo
-
-        Args:
-            siae: SIAE object to extract attributes from
-
-        Returns:
-            dict: Dictionary of attributes for Brevo company
-        """
-        return {
-            # Default attributes
-            SIAE_COMPANY_ATTRIBUTES["domain"]: siae.website,
-            SIAE_COMPANY_ATTRIBUTES["phone_number"]: get_valid_number_for_brevo(siae.contact_phone),
-            # Custom attributes
-            SIAE_COMPANY_ATTRIBUTES["app_id"]: siae.id,
-            SIAE_COMPANY_ATTRIBUTES["siae"]: True,
-            SIAE_COMPANY_ATTRIBUTES["active"]: siae.is_active,
-            SIAE_COMPANY_ATTRIBUTES["description"]: siae.description,
-            SIAE_COMPANY_ATTRIBUTES["kind"]: siae.kind,
-            SIAE_COMPANY_ATTRIBUTES["address_street"]: siae.address,
-            SIAE_COMPANY_ATTRIBUTES["postal_code"]: siae.post_code,
-            SIAE_COMPANY_ATTRIBUTES["address_city"]: siae.city,
-            SIAE_COMPANY_ATTRIBUTES["contact_email"]: siae.contact_email,
-            SIAE_COMPANY_ATTRIBUTES["logo_url"]: siae.logo_url,
-            SIAE_COMPANY_ATTRIBUTES["app_url"]: get_object_share_url(siae),
-            SIAE_COMPANY_ATTRIBUTES["app_admin_url"]: get_object_admin_url(siae),
-            SIAE_COMPANY_ATTRIBUTES["taux_de_completion"]: (
-                siae.extra_data.get("brevo_company_data", {}).get("completion_rate")
-            ),
-            SIAE_COMPANY_ATTRIBUTES["nombre_de_besoins_recus"]: (
-                siae.extra_data.get("brevo_company_data", {}).get("tender_received")
-            ),
-            SIAE_COMPANY_ATTRIBUTES["nombre_de_besoins_interesses"]: (
-                siae.extra_data.get("brevo_company_data", {}).get("tender_interest")
-            ),
-        }
-
 
 class BrevoTransactionalEmailApiClient(BrevoBaseApiClient):
     def __init__(self, config: BrevoConfig = BrevoConfig()):
@@ -944,6 +1020,56 @@ class BrevoTransactionalEmailApiClient(BrevoBaseApiClient):
 
         return self._send_email_with_retry(data)
 
+    def send_transactional_emails_with_template(
+        self,
+        template_id: int,
+        recipients: list[dict],
+        subject=None,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        from_name=settings.DEFAULT_FROM_NAME,
+    ):
+        """
+        Send the same Brevo template to many recipients, with their own variables,
+        using Brevo's "messageVersions" (one API call per batch of recipients)
+
+        Args:
+            template_id (int): The Brevo template ID
+            recipients (list): list of dict with the keys "recipient_email", "recipient_name" & "variables"
+            subject (str, optional): Custom subject line
+            from_email (str): Sender email address
+            from_name (str): Sender name
+
+        Returns:
+            list: API responses (one per batch) if successful
+
+        Raises:
+            BrevoApiError: When email sending fails after all retries
+        """
+
+        if not self.is_production_env:
+            self.logger.info("Brevo: emails not sent (DEV or TEST environment detected)")
+            return [{"message": "Emails not sent in development/test environment"}]
+
+        responses = []
+        for batch in batched(recipients, self.config.transactional_email_batch_size):
+            data = {
+                "sender": {"email": from_email, "name": from_name},
+                "template_id": template_id,
+                "message_versions": [
+                    {
+                        "to": [{"email": recipient["recipient_email"], "name": recipient["recipient_name"]}],
+                        "params": recipient["variables"],
+                    }
+                    for recipient in batch
+                ],
+            }
+            # if subject empty, defaults to Brevo's template subject
+            if subject:
+                data["subject"] = EMAIL_SUBJECT_PREFIX + subject
+
+            responses.append(self._send_email_with_retry(data))
+        return responses
+
     @BrevoBaseApiClient.execute_with_retry_method(operation_name="sending transactional email")
     def _send_email_with_retry(self, data):
         """Execute the send email operation with retry logic"""
@@ -1,14 +1,43 @@
+import logging
+import time
+
 import requests
+from django.conf import settings
+
+from lemarche.utils.apis import http_client
+from lemarche.utils.concurrency import RateLimiter
+
 
+logger = logging.getLogger(__name__)
 
 DECP_API_URL = "https://tabular-api.data.gouv.fr/api/resources/22847056-61df-452d-837d-8b8ceadbfc52/data/"
 DECP_API_TIMEOUT = 10
+DECP_API_MAX_RETRIES = 3
+DECP_API_RETRY_DELAY = 2  # secondes, doublé à chaque nouvel essai
+
+# partagé par tous les threads des commandes de synchronisation
+rate_limiter = RateLimiter(settings.DECP_API_RATE_LIMIT)
 
 
 def _get(params: dict) -> dict:
-    response = requests.get(DECP_API_URL, params=params, timeout=DECP_API_TIMEOUT)
-    response.raise_for_status()
-    return response.json()
+    """
+    Réessaie (avec backoff exponentiel) en cas d'erreur réseau, de 429 ou d'erreur serveur.
+    Lève requests.exceptions.RequestException après le dernier essai, ou directement pour les autres erreurs HTTP.
+    """
+    for attempt in range(DECP_API_MAX_RETRIES + 1):
+        rate_limiter.acquire()
+        try:
+            return http_client.get_json(DECP_API_URL, params=params, timeout=DECP_API_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            status_code = e.response.status_code if e.response is not None else None
+            if attempt == DECP_API_MAX_RETRIES or (status_code and status_code != 429 and status_code < 500):
+                raise
+            wait_time = DECP_API_RETRY_DELAY * 2**attempt
+            if status_code == 429:
+                # les autres threads attendent aussi
+                rate_limiter.pause(wait_time)
+            logger.warning("Erreur DECP (%s), nouvel essai dans %ss", e, wait_time)
+            time.sleep(wait_time)
 
 
 def fetch_contracts_count(siret: str, date_limit: str) -> int:
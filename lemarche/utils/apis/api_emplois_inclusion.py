@@ -1,9 +1,10 @@
 import logging
 import time
 
-import requests
 from django.conf import settings
 
+from lemarche.utils.apis import http_client
+
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +22,7 @@ def get_siae_list():
     while True:
         API_URL = f"{API_ENDPOINT}?page={pagination}&page_size={1000}"
         logger.info(API_URL)
-        response = requests.get(API_URL, headers=API_HEADERS)
-        data = response.json()
+        data = http_client.get_json(API_URL, headers=API_HEADERS)
         if data["results"]:
             for siae in data["results"]:
                 siae_list.append(siae)
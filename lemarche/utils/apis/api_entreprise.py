@@ -9,6 +9,7 @@ from django.utils import timezone
 from django.utils.http import urlencode
 
 from lemarche.siaes.models import Siae
+from lemarche.utils.apis import http_client
 
 
 logger = logging.getLogger(__name__)
@@ -42,9 +43,7 @@ def entreprise_get_or_error(siren, reason="Inscription au marché de l'inclusion
     headers = {"Authorization": f"Bearer {settings.API_ENTREPRISE_TOKEN}"}
 
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
+        data = http_client.get_json(url, headers=headers, cache_timeout=settings.API_HTTP_CACHE_TIMEOUT)
     except requests.exceptions.HTTPError as e:
         status_code = e.response.status_code
 
@@ -56,7 +55,7 @@ def entreprise_get_or_error(siren, reason="Inscription au marché de l'inclusion
             # logger.error("Error while fetching `%s`: %s", url, e)
             error = "Problème de connexion à la base Sirene. Essayez ultérieurement."
         return None, error
-    except requests.ReadTimeout as e:  # noqa
+    except requests.Timeout as e:  # noqa
         # logger.error("Error while fetching `%s`: %s", url, e)
         error = "The read operation timed out"
         return None, error
@@ -126,9 +125,7 @@ def etablissement_get_or_error(siret, reason="Inscription au marché de l'inclus
     headers = {"Authorization": f"Bearer {settings.API_ENTREPRISE_TOKEN}"}
 
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
+        data = http_client.get_json(url, headers=headers, cache_timeout=settings.API_HTTP_CACHE_TIMEOUT)
     except requests.exceptions.HTTPError as e:
         status_code = e.response.status_code
 
@@ -140,7 +137,7 @@ def etablissement_get_or_error(siret, reason="Inscription au marché de l'inclus
             # logger.error("Error while fetching `%s`: %s", url, e)
             error = "Problème de connexion à la base Sirene. Essayez ultérieurement."
         return None, error
-    except requests.ReadTimeout as e:  # noqa
+    except requests.Timeout as e:  # noqa
         # logger.error("Error while fetching `%s`: %s", url, e)
         error = "The read operation timed out"
         return None, error
@@ -228,9 +225,7 @@ def exercice_get_or_error(siret, reason="Inscription au marché de l'inclusion")
     headers = {"Authorization": f"Bearer {settings.API_ENTREPRISE_TOKEN}"}
 
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
+        data = http_client.get_json(url, headers=headers, cache_timeout=settings.API_HTTP_CACHE_TIMEOUT)
     except requests.exceptions.HTTPError as e:
         status_code = e.response.status_code
 
@@ -240,7 +235,7 @@ def exercice_get_or_error(siret, reason="Inscription au marché de l'inclusion")
             # logger.error("Error while fetching `%s`: %s", url, e)
             error = "Problème de connexion à la base Sirene. Essayez ultérieurement."
         return None, error
-    except requests.ReadTimeout as e:  # noqa
+    except requests.Timeout as e:  # noqa
         # logger.error("Error while fetching `%s`: %s", url, e)
         error = "The read operation timed out"
         return None, error
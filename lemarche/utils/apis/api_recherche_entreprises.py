@@ -1,9 +1,10 @@
 from dataclasses import dataclass
 from datetime import date
 
-import requests
 from django.conf import settings
 
+from lemarche.utils.apis import http_client
+
 
 # https://sirene.fr/static-resources/htm/v_sommaire_311.htm#27
 TRANCHES_EFFECTIF_SALARIE_MAPPING = {
@@ -47,9 +48,9 @@ class RechercheEntreprisesAPIException(Exception):
 
 def fetch_api_recherche_entreprises(siret):
     # Doc : https://recherche-entreprises.api.gouv.fr/docs/
-    url = f"{settings.API_RECHERCHE_ENTREPRISES_BASE_URL}/search?q={siret}"
+    url = f"{settings.API_RECHERCHE_ENTREPRISES_BASE_URL}/search"
     try:
-        return requests.get(url).raise_for_status().json()
+        return http_client.get_json(url, params={"q": siret}, cache_timeout=settings.API_HTTP_CACHE_TIMEOUT)
     except Exception as e:
         raise RechercheEntreprisesAPIException(f"Error while fetching `{url}`: {e}")
 
@@ -2,6 +2,8 @@ import logging
 
 import requests
 
+from lemarche.utils.apis import http_client
+
 
 logger = logging.getLogger(__name__)
 
@@ -23,25 +25,13 @@ def get_default_params():
     return {"dataset": DATASET_ZRR, "refine.zrr_2017": "Classée"}
 
 
-def get_default_client(params={}):
-    params |= get_default_params()
-    client = requests.Session()
-    client.params = params
-    return client
-
-
-def is_in_zrr(latitude, longitude, distance=DISTANCE_TO_VALIDATE_ZRR, client=None):
+def is_in_zrr(latitude, longitude, distance=DISTANCE_TO_VALIDATE_ZRR):
     # API is limited to 5000 calls per day
-    # we pass the client to manage the case of many requests
-    # client provide default params
-    params = {"geofilter.distance": f"{latitude},{longitude},{distance}"}
-
-    if not client:
-        client = get_default_client()
+    # the calls share the pooled session of the host (http_client)
+    params = get_default_params() | {"geofilter.distance": f"{latitude},{longitude},{distance}"}
 
     try:
-        r = client.get(BASE_URL, params=params)
-        r.raise_for_status()
+        r = http_client.request("GET", BASE_URL, params=params)
         data = r.json()
         records = data["records"]
         if records:
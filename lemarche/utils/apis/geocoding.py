@@ -1,18 +1,48 @@
 # https://github.com/betagouv/itou/blob/master/itou/utils/apis/geocoding.py
 
-import json
+import csv
+import io
 import logging
+import re
+import unicodedata
+from itertools import batched
 
 import requests
 from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry
 from django.utils.http import urlencode
 
+from lemarche.perimeters.models import GeocodedAddress, Perimeter
+from lemarche.utils.apis import http_client
+
 
 logger = logging.getLogger(__name__)
 
+GEOCODING_BACKEND_API = "api"
+GEOCODING_BACKEND_LOCAL = "local"
+
+# the CSV endpoint accepts files up to 50 Mo
+GEOCODING_CSV_CHUNK_SIZE = 5_000
+
+
+class GeocodingError(Exception):
+    pass
+
+
+def get_geocoding_cache_key(address, post_code=None):
+    """
+    The address normalized (lowercase, without accents nor punctuation) & the post code
+    """
+    address = unicodedata.normalize("NFKD", address or "").encode("ascii", "ignore").decode().lower()
+    address = " ".join(re.sub(r"[^a-z0-9]+", " ", address).split())
+    return f"{address}|{post_code or ''}"
+
 
 def call_ban_geocoding_api(address, post_code=None, limit=1):
+    """
+    Return the first feature found, or None.
+    Raise GeocodingError if the API call failed (the result should not be cached).
+    """
     api_url = f"{settings.API_GEOPF_BASE_URL}/geocodage/search/"
 
     args = {"q": address, "limit": limit}
@@ -25,25 +55,133 @@ def call_ban_geocoding_api(address, post_code=None, limit=1):
     url = f"{api_url}?{query_string}"
 
     try:
-        r = requests.get(url)
-    except requests.RequestError as e:
-        logger.info("Error while fetching `%s`: %s", url, e)
+        features = http_client.get_json(url, timeout=settings.API_GEOPF_TIMEOUT)["features"]
+    except requests.RequestException as e:
+        raise GeocodingError(f"Error while fetching `{url}`: {e}") from e
+    except KeyError as e:
+        raise GeocodingError(f"Error key missing for `{url}`: {e}") from e
+
+    if features:
+        return features[0]
+    # try again without the post_code, sometimes it's a strange CEDEX
+    if post_code:
+        return call_ban_geocoding_api(address, limit=limit)
+    logger.info("Geocoding error, no result found for `%s`", url)
+    return None
+
+
+def call_ban_geocoding_api_csv(rows):
+    """
+    Geocode many addresses with a single call to the CSV endpoint of the API.
+    rows: list of (key, address, post_code)
+    Return {key: feature} (only the addresses found)
+    """
+    data = io.StringIO()
+    writer = csv.writer(data)
+    writer.writerow(["key", "q", "postcode"])
+    writer.writerows(rows)
+
+    try:
+        r = http_client.request(
+            "POST",
+            f"{settings.API_GEOPF_BASE_URL}/geocodage/search/csv",
+            files={"data": ("addresses.csv", data.getvalue().encode())},
+            data={"columns": "q", "postcode": "postcode"},
+            timeout=settings.API_GEOPF_CSV_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise GeocodingError(f"Error while geocoding {len(rows)} addresses: {e}") from e
+
+    features = dict()
+    for row in csv.DictReader(io.StringIO(r.content.decode("utf-8-sig"))):
+        if row.get("result_status") == "ok" and row.get("latitude") and row.get("longitude"):
+            # same format as the search endpoint
+            features[row["key"]] = {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [float(row["longitude"]), float(row["latitude"])]},
+                "properties": {
+                    "label": row["result_label"],
+                    "score": float(row["result_score"]),
+                    "name": row["result_name"],
+                    "housenumber": row["result_housenumber"] or None,
+                    "street": row["result_street"] or None,
+                    "postcode": row["result_postcode"],
+                    "citycode": row["result_citycode"],
+                    "city": row["result_city"],
+                },
+            }
+    return features
+
+
+def call_local_geocoding(address, post_code=None):
+    """
+    Stand-in of the API (GEOCODING_BACKEND = "local", e.g. in tests & dev): no HTTP call,
+    the address is located at the coords of the city (Perimeter) of its post code.
+    """
+    if not post_code:
         return None
+    city = Perimeter.objects.cities().filter(post_codes__contains=[post_code], coords__isnull=False).first()
+    if not city:
+        return None
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [city.coords.x, city.coords.y]},
+        "properties": {
+            "score": 1,
+            "name": address,
+            "postcode": post_code,
+            "citycode": city.insee_code,
+            "city": city.name,
+        },
+    }
+
+
+def get_geocoding_feature(address, post_code=None, limit=1):
+    """
+    The geocoding API result, from the cache if the address was already geocoded
+    """
+    if settings.GEOCODING_BACKEND == GEOCODING_BACKEND_LOCAL:
+        return call_local_geocoding(address, post_code=post_code)
+
+    key = get_geocoding_cache_key(address, post_code)
+    geocoded_address = GeocodedAddress.objects.filter(key=key).first()
+    if geocoded_address:
+        return geocoded_address.feature
 
     try:
-        return r.json()["features"][0]
-    except IndexError:
-        # try again without the post_code, sometimes it's a strange CEDEX
-        if post_code:
-            return call_ban_geocoding_api(address)
-        else:
-            logger.info("Geocoding error, no result found for `%s`", url)
-            return None
-    except KeyError as e:
-        logger.info("Error key missing for `%s`: %s", url, e)
-    except json.decoder.JSONDecodeError as e:
-        logger.info("Error decoding json for `%s`: %s", url, e)
+        feature = call_ban_geocoding_api(address, post_code=post_code, limit=limit)
+    except GeocodingError as e:
+        logger.info(e)
         return None
+    GeocodedAddress.objects.update_or_create(key=key, defaults={"feature": feature})
+    return feature
+
+
+def geocode_addresses(addresses):
+    """
+    Batch mode (imports): geocode the addresses not cached yet with the CSV endpoint of the API,
+    the following get_geocoding_data() calls then use the cache.
+    addresses: list of (address, post_code)
+    """
+    if settings.GEOCODING_BACKEND == GEOCODING_BACKEND_LOCAL:
+        return
+
+    rows_by_key = {
+        get_geocoding_cache_key(address, post_code): (address, post_code or "") for (address, post_code) in addresses
+    }
+    cached_keys = set(GeocodedAddress.objects.filter(key__in=rows_by_key).values_list("key", flat=True))
+    rows = [(key, address, post_code) for key, (address, post_code) in rows_by_key.items() if key not in cached_keys]
+
+    for rows_chunk in batched(rows, GEOCODING_CSV_CHUNK_SIZE):
+        try:
+            features = call_ban_geocoding_api_csv(rows_chunk)
+        except GeocodingError as e:
+            logger.info(e)
+            continue
+        # the addresses not found are not cached: get_geocoding_data() will try again without the post code
+        GeocodedAddress.objects.bulk_create(
+            [GeocodedAddress(key=key, feature=feature) for key, feature in features.items()], ignore_conflicts=True
+        )
 
 
 def process_geocoding_data(data):
@@ -83,6 +221,6 @@ def get_geocoding_data(address, post_code=None, limit=1):
     Return a dict containing info about the given `address` or None if no result found.
     """
 
-    geocoding_data = call_ban_geocoding_api(address, post_code=post_code, limit=limit)
+    geocoding_data = get_geocoding_feature(address, post_code=post_code, limit=limit)
 
     return process_geocoding_data(geocoding_data)
@@ -0,0 +1,128 @@
+# Shared HTTP client of the external APIs (lemarche.utils.apis):
+# - one requests.Session per host, shared by all the threads: the connections are kept alive between the calls
+# - a default timeout (settings.API_HTTP_TIMEOUT)
+# - an optional cache of the JSON responses (django cache), for the idempotent lookups (e.g. SIREN/SIRET details)
+# - metrics per host: number of requests & errors, latency, cache hits & misses (see get_stats), reported at the
+#   end of the sync commands (see get_stats_messages)
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "api_http_client"
+
+_sessions = dict()
+_sessions_lock = threading.Lock()
+
+_stats = defaultdict(lambda: defaultdict(float))
+_stats_lock = threading.Lock()
+
+
+def get_session(url) -> requests.Session:
+    """
+    The requests.Session of the host of the url (created on the first call)
+    """
+    host = urlsplit(url).netloc
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=settings.API_HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[host] = session
+    return session
+
+
+def _add_stats(host, **values):
+    with _stats_lock:
+        for name, value in values.items():
+            _stats[host][name] += value
+
+
+def get_stats() -> dict:
+    """
+    {host: {"requests", "errors", "duration" (total, in seconds), "cache_hits", "cache_misses"}} since the start
+    of the process
+    """
+    with _stats_lock:
+        return {host: dict(host_stats) for host, host_stats in _stats.items()}
+
+
+def get_stats_messages() -> list:
+    """
+    The metrics, one line per host (e.g. appended to the summary of the sync commands)
+    """
+    messages = []
+    for host, host_stats in sorted(get_stats().items()):
+        request_count = int(host_stats.get("requests", 0))
+        average_duration = host_stats.get("duration", 0) / request_count if request_count else 0
+        message = f"API {host} : {request_count} requêtes, {int(host_stats.get('errors', 0))} erreurs, "
+        message += f"{average_duration * 1000:.0f} ms en moyenne"
+        cache_hits, cache_misses = int(host_stats.get("cache_hits", 0)), int(host_stats.get("cache_misses", 0))
+        if cache_hits or cache_misses:
+            message += f", cache : {cache_hits}/{cache_hits + cache_misses}"
+        messages.append(message)
+    return messages
+
+
+def request(method, url, session=None, timeout=None, **kwargs) -> requests.Response:
+    """
+    Send the request with the shared session of the host (or the given session).
+    Raise requests.exceptions.RequestException (HTTPError if the status code is 4xx/5xx).
+    """
+    session = session or get_session(url)
+    host = urlsplit(url).netloc
+    start = time.monotonic()
+    try:
+        response = session.request(method, url, timeout=timeout or settings.API_HTTP_TIMEOUT, **kwargs)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        _add_stats(host, requests=1, errors=1, duration=time.monotonic() - start)
+        raise
+    duration = time.monotonic() - start
+    _add_stats(host, requests=1, duration=duration)
+    logger.debug("%s %s: %s in %.3fs", method, url, response.status_code, duration)
+    return response
+
+
+def get_cache_key(url, params=None) -> str:
+    """
+    The endpoint & its parameters (not the headers: they contain the tokens)
+    """
+    url_with_params = json.dumps([url, sorted((params or {}).items())], default=str)
+    return f"{CACHE_KEY_PREFIX}:{hashlib.sha256(url_with_params.encode()).hexdigest()}"
+
+
+def get_json(url, params=None, cache_timeout=None, **kwargs):
+    """
+    GET the JSON of the url.
+    cache_timeout (seconds): the response is cached (the errors are not), for the idempotent lookups only.
+    """
+    if not cache_timeout:
+        return request("GET", url, params=params, **kwargs).json()
+
+    host = urlsplit(url).netloc
+    cache_key = get_cache_key(url, params)
+    data = cache.get(cache_key)
+    if data is not None:
+        _add_stats(host, cache_hits=1)
+        return data
+    _add_stats(host, cache_misses=1)
+    data = request("GET", url, params=params, **kwargs).json()
+    cache.set(cache_key, data, cache_timeout)
+    return data
@@ -0,0 +1,71 @@
+# Versioned caches: the cached values are keyed by a version number (stored in the shared cache),
+# which is bumped when their source changes (see the post_save/post_delete receivers),
+# so the stale values of every process are ignored at the next request.
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# the perimeters autocomplete index is only kept in-process (see lemarche/perimeters/autocomplete.py)
+PERIMETER_AUTOCOMPLETE_VERSION_CACHE_KEY = "perimeter_autocomplete_version"
+# the inclusive potential aggregates depend on the siaes (see lemarche/api/inclusive_potential/utils.py)
+INCLUSIVE_POTENTIAL_VERSION_CACHE_KEY = "inclusive_potential_version"
+# the transactional templates are fetched for every email sent (see TemplateTransactionalQuerySet.get_by_code)
+TEMPLATE_TRANSACTIONAL_VERSION_CACHE_KEY = "template_transactional_version"
+# the ETags of the API responses depend on the versions of the models they serve (see lemarche/api/caching.py)
+API_MODEL_VERSION_CACHE_KEY = "api_model_version:{label}"
+
+
+def get_cache_version(version_cache_key, timeout=None):
+    version = cache.get(version_cache_key)
+    if version is None:
+        # unique initial version (the key may have been evicted: the previous versions must not match)
+        cache.add(version_cache_key, time.time_ns(), timeout=timeout)
+        version = cache.get(version_cache_key) or time.time_ns()
+    return version
+
+
+def get_cache_versions(version_cache_keys, timeout=None):
+    versions = cache.get_many(version_cache_keys)
+    return [versions.get(key) or get_cache_version(key, timeout=timeout) for key in version_cache_keys]
+
+
+def bump_cache_version(version_cache_key, timeout=None):
+    try:
+        cache.incr(version_cache_key)
+    except ValueError:  # key not in the cache
+        cache.set(version_cache_key, time.time_ns(), timeout=timeout)
+
+
+def invalidate_perimeter_autocomplete(**kwargs):
+    bump_cache_version(PERIMETER_AUTOCOMPLETE_VERSION_CACHE_KEY)
+
+
+def invalidate_inclusive_potential(**kwargs):
+    bump_cache_version(INCLUSIVE_POTENTIAL_VERSION_CACHE_KEY)
+
+
+def invalidate_template_transactionals(**kwargs):
+    bump_cache_version(TEMPLATE_TRANSACTIONAL_VERSION_CACHE_KEY)
+
+
+def get_api_model_versions(models):
+    """
+    The versions expire (API_MODEL_VERSION_TIMEOUT): the bulk updates (queryset.update()...) don't send signals
+    """
+    return get_cache_versions(
+        [API_MODEL_VERSION_CACHE_KEY.format(label=model._meta.label) for model in models],
+        timeout=settings.API_MODEL_VERSION_TIMEOUT,
+    )
+
+
+def invalidate_api_model_version(model, **kwargs):
+    """
+    Bump the API version of the model.
+    Can be connected directly to the post_save/post_delete signals (the model is the sender).
+    """
+    bump_cache_version(
+        API_MODEL_VERSION_CACHE_KEY.format(label=model._meta.label), timeout=settings.API_MODEL_VERSION_TIMEOUT
+    )
@@ -0,0 +1,95 @@
+# Run a function on many items in a pool of threads, for the I/O bound commands (API syncs):
+# the threads wait on the network instead of the whole command (within the rate limit of the API, see RateLimiter).
+
+import logging
+import queue
+import threading
+import time
+
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def run_concurrently(func, items, max_workers=1):
+    """
+    Call func(item) for each item, in max_workers threads (in the current thread if max_workers <= 1).
+    - items can be a (large) iterator, e.g. queryset.iterator(): it is consumed as the threads progress
+    - func should handle its errors: an unexpected exception is logged, and the item skipped
+    - each thread closes its database connections when done
+
+    Warning: the threads have their own database connections (they do not see the current transaction).
+    """
+    if max_workers <= 1:
+        for item in items:
+            _call(func, item)
+        return
+
+    items_queue = queue.Queue(maxsize=max_workers * 2)
+
+    def worker():
+        try:
+            while (item := items_queue.get()) is not _DONE:
+                _call(func, item)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for item in items:
+            items_queue.put(item)
+    finally:
+        for _ in threads:
+            items_queue.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all the threads of the process: at most `rate` requests per second
+    (bursts of `rate`, at least 1: a rate below 1 means one request every 1/rate seconds).
+    When the API answers 429, the whole bucket can be paused (see pause()).
+    rate = 0: no limit.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait (if needed) until a request can be sent"""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait_time)
+
+    def pause(self, seconds: float):
+        """No request for the next `seconds` (rate limit reached)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+def _call(func, item):
+    try:
+        func(item)
+    except Exception:
+        logger.exception(f"Error while processing {item!r}")
@@ -1,8 +1,16 @@
-import xlwt
+import csv
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
 
 from lemarche.siaes.models import Siae
 
 
+# iterate the Siae by chunks (the prefetch_related are done per chunk)
+EXPORT_CHUNK_SIZE = 2_000
+
+
 SIAE_FIELDS_TO_EXPORT = [
     "name",
     "brand",
@@ -70,6 +78,14 @@ def generate_siae_row(siae: Siae, siae_field_list):
     return siae_row
 
 
+def iterate_siae_queryset(siae_queryset):
+    """
+    Iterate the queryset by chunks, without caching the whole list in memory
+    (the prefetch_related, e.g. the client_references, are done for each chunk)
+    """
+    return siae_queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
 def export_siae_to_csv(csv_writer, siae_queryset, with_contact_info=False):
     # columns
     field_list = get_siae_fields(with_contact_info)
@@ -78,35 +94,69 @@ def export_siae_to_csv(csv_writer, siae_queryset, with_contact_info=False):
     csv_writer.writerow(generate_header(field_list))
 
     # rows
-    for siae in siae_queryset:
+    for siae in iterate_siae_queryset(siae_queryset):
         siae_row = generate_siae_row(siae, field_list)
         csv_writer.writerow(siae_row)
 
     return csv_writer
 
 
-def export_siae_to_excel(siae_queryset, with_contact_info=False):
-    wb = xlwt.Workbook(encoding="utf-8")
-    ws = wb.add_sheet("Structures")
+class Echo:
+    """
+    Pseudo-buffer for csv.writer: the line is returned instead of being written
+    https://docs.djangoproject.com/en/5.2/howto/outputting-csv/#streaming-large-csv-files
+    """
+
+    def write(self, value):
+        return value
 
-    row_number = 0
+
+def stream_siae_to_csv(siae_queryset, with_contact_info=False):
+    """
+    Same as export_siae_to_csv, but yields the CSV lines (for a StreamingHttpResponse)
+    """
+    csv_writer = csv.writer(Echo())
 
     # columns
     field_list = get_siae_fields(with_contact_info)
 
     # header
-    font_style = xlwt.XFStyle()
-    font_style.font.bold = True
-    for index, header_item in enumerate(generate_header(field_list)):
-        ws.write(row_number, index, header_item, font_style)
+    yield csv_writer.writerow(generate_header(field_list))
 
     # rows
-    font_style = xlwt.XFStyle()
-    font_style.alignment.wrap = 1
-    for siae in siae_queryset:
-        row_number += 1
-        siae_row = generate_siae_row(siae, field_list)
-        for index, row_item in enumerate(siae_row):
-            ws.write(row_number, index, row_item, font_style)
+    for siae in iterate_siae_queryset(siae_queryset):
+        yield csv_writer.writerow(generate_siae_row(siae, field_list))
 
-    return wb
+
+def export_siae_to_xlsx(siae_queryset, with_contact_info=False):
+    """
+    Write-only workbook: the rows are written to a temporary file instead of being kept in memory
+    Returns the workbook & the number of rows
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Structures")
+
+    # columns
+    field_list = get_siae_fields(with_contact_info)
+
+    # header
+    header_row = []
+    for header_item in generate_header(field_list):
+        cell = WriteOnlyCell(ws, value=str(header_item))
+        cell.font = Font(bold=True)
+        header_row.append(cell)
+    ws.append(header_row)
+
+    # rows
+    row_count = 0
+    alignment = Alignment(wrap_text=True)
+    for siae in iterate_siae_queryset(siae_queryset):
+        siae_row = []
+        for row_item in generate_siae_row(siae, field_list):
+            cell = WriteOnlyCell(ws, value=row_item)
+            cell.alignment = alignment
+            siae_row.append(cell)
+        ws.append(siae_row)
+        row_count += 1
+
+    return wb, row_count
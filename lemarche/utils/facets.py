@@ -0,0 +1,50 @@
+# The search facets (sectors, networks, labels...) are reference tables that rarely change,
+# but they are needed to build the search forms on every request.
+# They are cached twice: in the shared cache (Redis), and in-process.
+# Both caches are keyed by a version number (see lemarche/utils/cache_versions.py),
+# which is bumped when one of the reference tables changes (see the post_save/post_delete receivers),
+# so the stale facets of every process are ignored at the next request.
+
+from django.conf import settings
+from django.core.cache import cache
+
+from lemarche.utils.cache_versions import bump_cache_version, get_cache_version
+
+
+SEARCH_FACETS_VERSION_CACHE_KEY = "search_facets_version"
+SEARCH_FACETS_CACHE_KEY = "search_facets:{version}:{name}"
+
+# {name: (version, value)}
+_search_facets = dict()
+
+
+def get_search_facets_version():
+    return get_cache_version(SEARCH_FACETS_VERSION_CACHE_KEY)
+
+
+def invalidate_search_facets(**kwargs):
+    """
+    Bump the search facets version.
+    Can be connected directly to the post_save/post_delete signals.
+    """
+    bump_cache_version(SEARCH_FACETS_VERSION_CACHE_KEY)
+
+
+def get_search_facet(name, build):
+    """
+    Return the (current version of the) facet, built with build() on a cache miss.
+    The value must be picklable: prefer lists of tuples over model instances.
+    """
+    version = get_search_facets_version()
+
+    local_version, value = _search_facets.get(name, (None, None))
+    if local_version == version:
+        return value
+
+    cache_key = SEARCH_FACETS_CACHE_KEY.format(version=version, name=name)
+    value = cache.get(cache_key)
+    if value is None:
+        value = build()
+        cache.set(cache_key, value, settings.SEARCH_FACETS_CACHE_TIMEOUT)
+    _search_facets[name] = (version, value)
+    return value
@@ -63,3 +63,21 @@ class S3Upload:
         config["allowed_mime_types"] = ",".join(config["allowed_mime_types"])
 
         return config
+
+
+def upload_file(file, key_path, content_type):
+    """
+    Upload a (private) file object
+    """
+    client = boto3.client("s3", **API_CONNECTION_DICT)
+    client.upload_fileobj(file, settings.S3_STORAGE_BUCKET_NAME, key_path, ExtraArgs={"ContentType": content_type})
+
+
+def get_download_url(key_path, expiration):
+    """
+    Temporary (presigned) download url of a private file
+    """
+    client = boto3.client("s3", **API_CONNECTION_DICT)
+    return client.generate_presigned_url(
+        "get_object", Params={"Bucket": settings.S3_STORAGE_BUCKET_NAME, "Key": key_path}, ExpiresIn=expiration
+    )
@@ -13,15 +13,18 @@ Statuts retournés :
   ERROR      → aucune correspondance acceptable, ligne ignorée de l'analyse
 """
 
-import unicodedata
+from collections import Counter, defaultdict
 
 from django.contrib.postgres.search import TrigramSimilarity
 from django.db.models import F
+from django.db.models.functions import Lower
 
+from lemarche.perimeters.autocomplete import get_perimeter_autocomplete_index
 from lemarche.perimeters.models import Perimeter
 from lemarche.purchases import constants as purchases_constants
 from lemarche.purchases.models import SlugMappingCache
 from lemarche.sectors.models import Sector
+from lemarche.utils.trigrams import TrigramIndex, normalize
 
 
 FRANCE_ENTIERE_VARIANTS = {"france_entiere", "france entiere", "france entière", "france", "national", "nationale"}
@@ -117,18 +120,6 @@ COLUMN_HEADER_ALIASES = {
 }
 
 
-def normalize(text: str) -> str:
-    """
-    Normalise une chaîne pour comparaison : minuscules, sans accents, sans tirets superflus.
-    Retourne "" si text est None ou vide.
-    """
-    if not text:
-        return ""
-    text = str(text).strip().lower()
-    text = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode()
-    return text
-
-
 def is_france_entiere(raw_value: str) -> bool:
     """Retourne True si la valeur correspond à une variante de 'france_entiere'."""
     return normalize(raw_value) in FRANCE_ENTIERE_VARIANTS
@@ -147,189 +138,251 @@ def resolve_column_header(raw_header: str) -> str | None:
     return None
 
 
-def _get_validated_cache(raw_value: str, kind: str) -> SlugMappingCache | None:
-    """Cherche une entrée admin_validated dans le cache pour cette valeur."""
-    normalized = normalize(raw_value)
-    return SlugMappingCache.objects.filter(
-        raw_value__iexact=normalized,
-        kind=kind,
-        source=purchases_constants.SLUG_MAPPING_SOURCE_ADMIN_VALIDATED,
-    ).first()
+def _get_validated_caches(normalized_values: set[str], kind: str) -> dict[str, SlugMappingCache]:
+    """Cherche en une requête les entrées admin_validated dans le cache pour ces valeurs."""
+    caches = (
+        SlugMappingCache.objects.validated()
+        .for_kind(kind)
+        .annotate(raw_value_lower=Lower("raw_value"))
+        .filter(raw_value_lower__in=normalized_values)
+    )
+    validated_caches = dict()
+    for cache in caches:
+        validated_caches.setdefault(cache.raw_value_lower, cache)
+    return validated_caches
 
 
-def _increment_cache_usage(cache: SlugMappingCache) -> None:
-    """Incrémente le compteur d'usage de manière atomique."""
-    SlugMappingCache.objects.filter(pk=cache.pk).update(usage_count=F("usage_count") + 1)
+def _increment_cache_usages(usage_counts: dict[int, int]) -> None:
+    """
+    Incrémente les compteurs d'usage de manière atomique.
+    usage_counts est un dict {pk: incrément} (une requête par valeur d'incrément).
+    """
+    pks_by_increment = defaultdict(list)
+    for pk, increment in usage_counts.items():
+        pks_by_increment[increment].append(pk)
+    for increment, pks in pks_by_increment.items():
+        SlugMappingCache.objects.filter(pk__in=pks).update(usage_count=F("usage_count") + increment)
 
 
-def _save_to_cache(raw_value: str, kind: str, resolved_slug: str, source: str, confidence: float, user) -> None:
+def _save_many_to_cache(entries: list[dict]) -> None:
     """
-    Enregistre ou met à jour une correspondance dans le cache.
-    Utilise get_or_create pour éviter les IntegrityError en concurrence.
+    Enregistre ou met à jour des correspondances dans le cache, en bulk.
+    entries est une liste de {"raw_value", "kind", "resolved_slug", "source", "confidence", "user"}
+    (une entrée par utilisation : les doublons incrémentent le compteur d'usage).
+    Les correspondances existantes ne sont pas modifiées, seul leur compteur d'usage est incrémenté.
     """
-    normalized = normalize(raw_value)
-    cache, created = SlugMappingCache.objects.get_or_create(
-        raw_value=normalized,
-        kind=kind,
-        defaults={
-            "resolved_slug": resolved_slug,
-            "source": source,
-            "confidence": confidence,
-            "proposed_by": user,
-            "usage_count": 1,
-        },
-    )
-    if not created:
-        SlugMappingCache.objects.filter(pk=cache.pk).update(usage_count=F("usage_count") + 1)
+    if not entries:
+        return
+
+    usage_counts = Counter((normalize(entry["raw_value"]), entry["kind"]) for entry in entries)
+    existing_caches = SlugMappingCache.objects.filter(
+        raw_value__in={raw_value for (raw_value, _) in usage_counts},
+        kind__in={kind for (_, kind) in usage_counts},
+    ).values_list("raw_value", "kind", "pk")
+    existing_pks = {(raw_value, kind): pk for (raw_value, kind, pk) in existing_caches}
+
+    new_caches = dict()
+    for entry in entries:
+        key = (normalize(entry["raw_value"]), entry["kind"])
+        if key not in existing_pks and key not in new_caches:
+            new_caches[key] = SlugMappingCache(
+                raw_value=key[0],
+                kind=key[1],
+                resolved_slug=entry["resolved_slug"],
+                source=entry["source"],
+                confidence=entry["confidence"],
+                proposed_by=entry["user"],
+                usage_count=usage_counts[key],
+            )
+    # ignore_conflicts: évite les IntegrityError en concurrence
+    SlugMappingCache.objects.bulk_create(new_caches.values(), ignore_conflicts=True)
+    _increment_cache_usages({pk: usage_counts[key] for key, pk in existing_pks.items() if key in usage_counts})
+
+
+def _get_sector_candidates_search():
+    """
+    Recherche trigram en mémoire sur Sector.name (une seule requête pour tout l'import).
+    """
+    sectors = list(Sector.objects.values("slug", "name"))
+    sector_name_index = TrigramIndex()
+    for sector in sectors:
+        sector_name_index.add(normalize(sector["name"]))
 
+    def search(normalized: str) -> list[dict]:
+        return [
+            {"slug": sectors[position]["slug"], "name": sectors[position]["name"], "score": score}
+            for (score, position) in sector_name_index.search(
+                normalized, threshold=purchases_constants.SLUG_MAPPING_CONFIDENCE_MIN, limit=5
+            )
+        ]
 
-def resolve_sector(raw_value: str, user=None) -> dict:
-    """
-    Résout une valeur texte libre vers un slug de secteur.
+    return search
 
-    Retourne un dict :
-      {"status": RESOLUTION_STATUS_*, "slug": str|None, "candidates": list, "source": str}
 
-    candidates est une liste de {"slug", "name", "score"} pour la page de validation.
+def _get_perimeter_candidates_search():
     """
-    if not raw_value or not raw_value.strip():
-        return {"status": RESOLUTION_STATUS_ERROR, "slug": None, "candidates": [], "source": ""}
+    Recherche trigram en mémoire sur Perimeter.name (toutes mailles), avec l'index de l'autocomplete.
+    """
+    perimeter_index = get_perimeter_autocomplete_index()
 
-    # Couche 1 — exact match slug
-    if Sector.objects.filter(slug=raw_value.strip()).exists():
-        return {"status": RESOLUTION_STATUS_RESOLVED, "slug": raw_value.strip(), "candidates": [], "source": "exact"}
+    def search(normalized: str) -> list[dict]:
+        return [
+            {"slug": perimeter["slug"], "name": perimeter["name"], "kind": perimeter["kind"], "score": score}
+            for (perimeter, score) in perimeter_index.similar_names(
+                normalized, threshold=purchases_constants.SLUG_MAPPING_CONFIDENCE_MIN, limit=5
+            )
+        ]
 
-    normalized = normalize(raw_value)
+    return search
 
-    # Couche 2 — cache validé par admin
-    cache = _get_validated_cache(normalized, purchases_constants.SLUG_MAPPING_KIND_SECTOR)
-    if cache:
-        _increment_cache_usage(cache)
-        return {"status": RESOLUTION_STATUS_RESOLVED, "slug": cache.resolved_slug, "candidates": [], "source": "cache"}
-
-    # Couche 3 — trigram sur Sector.name
-    candidates = (
-        Sector.objects.annotate(score=TrigramSimilarity("name", normalized))
-        .filter(score__gte=purchases_constants.SLUG_MAPPING_CONFIDENCE_MIN)
-        .order_by("-score")
-        .values("slug", "name", "score")[:5]
-    )
-    candidates = list(candidates)
 
-    if not candidates:
-        return {"status": RESOLUTION_STATUS_ERROR, "slug": None, "candidates": [], "source": ""}
+def _resolve_slugs(raw_values: list[str], kind: str, model, get_candidates_search, user) -> dict:
+    """
+    Résout une liste de valeurs texte libre (avec doublons) vers des slugs, couche par couche :
+    chaque couche traite toutes les valeurs (dédoublonnées) restantes en une seule fois.
 
-    best = candidates[0]
+    Retourne un dict {raw_value: {"status", "slug", "candidates", "source"}}.
+    """
+    usage_counts = Counter(raw_values)
+    results = dict()
+    for raw_value in usage_counts:
+        if not raw_value or not raw_value.strip():
+            results[raw_value] = {"status": RESOLUTION_STATUS_ERROR, "slug": None, "candidates": [], "source": ""}
+    pending_raw_values = [raw_value for raw_value in usage_counts if raw_value not in results]
+    if not pending_raw_values:
+        return results
 
-    if best["score"] >= purchases_constants.SLUG_MAPPING_CONFIDENCE_AUTO:
-        _save_to_cache(
-            normalized,
-            purchases_constants.SLUG_MAPPING_KIND_SECTOR,
-            best["slug"],
-            purchases_constants.SLUG_MAPPING_SOURCE_AUTO_TRIGRAM,
-            best["score"],
-            user,
+    # Couche 1 — exact match slug
+    exact_slugs = set(
+        model.objects.filter(slug__in={raw_value.strip() for raw_value in pending_raw_values}).values_list(
+            "slug", flat=True
         )
-        return {"status": RESOLUTION_STATUS_RESOLVED, "slug": best["slug"], "candidates": [], "source": "trigram_auto"}
+    )
+    for raw_value in pending_raw_values:
+        if raw_value.strip() in exact_slugs:
+            results[raw_value] = {
+                "status": RESOLUTION_STATUS_RESOLVED,
+                "slug": raw_value.strip(),
+                "candidates": [],
+                "source": "exact",
+            }
+    pending_raw_values = [raw_value for raw_value in pending_raw_values if raw_value not in results]
+    normalized_values = {raw_value: normalize(raw_value) for raw_value in pending_raw_values}
 
-    return {"status": RESOLUTION_STATUS_AMBIGUOUS, "slug": None, "candidates": candidates, "source": "trigram"}
+    # Couche 2 — cache validé par admin
+    validated_caches = _get_validated_caches(set(normalized_values.values()), kind) if pending_raw_values else {}
+    cache_usage_counts = Counter()
+    for raw_value in pending_raw_values:
+        cache = validated_caches.get(normalized_values[raw_value])
+        if cache:
+            cache_usage_counts[cache.pk] += usage_counts[raw_value]
+            results[raw_value] = {
+                "status": RESOLUTION_STATUS_RESOLVED,
+                "slug": cache.resolved_slug,
+                "candidates": [],
+                "source": "cache",
+            }
+    _increment_cache_usages(cache_usage_counts)
+    pending_raw_values = [raw_value for raw_value in pending_raw_values if raw_value not in results]
+
+    # Couche 3 — trigram (en mémoire) sur le nom
+    search_candidates = get_candidates_search() if pending_raw_values else None
+    cache_entries = []
+    for raw_value in pending_raw_values:
+        candidates = search_candidates(normalized_values[raw_value])
+        if not candidates:
+            results[raw_value] = {"status": RESOLUTION_STATUS_ERROR, "slug": None, "candidates": [], "source": ""}
+        elif candidates[0]["score"] >= purchases_constants.SLUG_MAPPING_CONFIDENCE_AUTO:
+            best = candidates[0]
+            cache_entries += [
+                {
+                    "raw_value": normalized_values[raw_value],
+                    "kind": kind,
+                    "resolved_slug": best["slug"],
+                    "source": purchases_constants.SLUG_MAPPING_SOURCE_AUTO_TRIGRAM,
+                    "confidence": best["score"],
+                    "user": user,
+                }
+            ] * usage_counts[raw_value]
+            results[raw_value] = {
+                "status": RESOLUTION_STATUS_RESOLVED,
+                "slug": best["slug"],
+                "candidates": [],
+                "source": "trigram_auto",
+            }
+        else:
+            results[raw_value] = {
+                "status": RESOLUTION_STATUS_AMBIGUOUS,
+                "slug": None,
+                "candidates": candidates,
+                "source": "trigram",
+            }
+    _save_many_to_cache(cache_entries)
+
+    return results
+
+
+def resolve_sectors(raw_values: list[str], user=None) -> dict:
+    """
+    Résout une liste de valeurs texte libre (ex : les lignes d'un import Excel) vers des slugs de secteur.
 
+    Retourne un dict {raw_value: résultat}, chaque résultat étant :
+      {"status": RESOLUTION_STATUS_*, "slug": str|None, "candidates": list, "source": str}
 
-def resolve_perimeter(raw_value: str, user=None) -> dict:
+    candidates est une liste de {"slug", "name", "score"} pour la page de validation.
     """
-    Résout une valeur texte libre vers un slug de périmètre.
-    Gère le cas spécial 'france_entiere'.
+    return _resolve_slugs(
+        raw_values, purchases_constants.SLUG_MAPPING_KIND_SECTOR, Sector, _get_sector_candidates_search, user
+    )
 
-    Retourne un dict :
-      {"status": RESOLUTION_STATUS_*, "slug": str|None, "france_entiere": bool, "candidates": list, "source": str}
+
+def resolve_sector(raw_value: str, user=None) -> dict:
+    """
+    Résout une valeur texte libre vers un slug de secteur (voir resolve_sectors).
     """
-    if not raw_value or not raw_value.strip():
-        return {
-            "status": RESOLUTION_STATUS_ERROR,
-            "slug": None,
-            "france_entiere": False,
-            "candidates": [],
-            "source": "",
-        }
-
-    # Interception france_entiere avant toute recherche
-    if is_france_entiere(raw_value):
-        return {
-            "status": RESOLUTION_STATUS_RESOLVED,
-            "slug": None,
-            "france_entiere": True,
-            "candidates": [],
-            "source": "france_entiere",
-        }
+    return resolve_sectors([raw_value], user=user)[raw_value]
 
-    # Couche 1 — exact match slug
-    if Perimeter.objects.filter(slug=raw_value.strip()).exists():
-        return {
-            "status": RESOLUTION_STATUS_RESOLVED,
-            "slug": raw_value.strip(),
-            "france_entiere": False,
-            "candidates": [],
-            "source": "exact",
-        }
 
-    normalized = normalize(raw_value)
+def resolve_perimeters(raw_values: list[str], user=None) -> dict:
+    """
+    Résout une liste de valeurs texte libre vers des slugs de périmètre.
+    Gère le cas spécial 'france_entiere'.
 
-    # Couche 2 — cache validé par admin
-    cache = _get_validated_cache(normalized, purchases_constants.SLUG_MAPPING_KIND_PERIMETER)
-    if cache:
-        _increment_cache_usage(cache)
-        return {
-            "status": RESOLUTION_STATUS_RESOLVED,
-            "slug": cache.resolved_slug,
-            "france_entiere": False,
-            "candidates": [],
-            "source": "cache",
-        }
-
-    # Couche 3 — trigram sur Perimeter.name (toutes mailles)
-    candidates = (
-        Perimeter.objects.annotate(score=TrigramSimilarity("name", normalized))
-        .filter(score__gte=purchases_constants.SLUG_MAPPING_CONFIDENCE_MIN)
-        .order_by("-score")
-        .values("slug", "name", "kind", "score")[:5]
+    Retourne un dict {raw_value: résultat}, chaque résultat étant :
+      {"status": RESOLUTION_STATUS_*, "slug": str|None, "france_entiere": bool, "candidates": list, "source": str}
+    """
+    results = dict()
+    other_raw_values = []
+    for raw_value in raw_values:
+        # Interception france_entiere avant toute recherche
+        if raw_value and raw_value.strip() and is_france_entiere(raw_value):
+            results[raw_value] = {
+                "status": RESOLUTION_STATUS_RESOLVED,
+                "slug": None,
+                "france_entiere": True,
+                "candidates": [],
+                "source": "france_entiere",
+            }
+        else:
+            other_raw_values.append(raw_value)
+
+    other_results = _resolve_slugs(
+        other_raw_values,
+        purchases_constants.SLUG_MAPPING_KIND_PERIMETER,
+        Perimeter,
+        _get_perimeter_candidates_search,
+        user,
     )
-    candidates = list(candidates)
+    for raw_value, result in other_results.items():
+        results[raw_value] = {**result, "france_entiere": False}
+    return results
 
-    if not candidates:
-        return {
-            "status": RESOLUTION_STATUS_ERROR,
-            "slug": None,
-            "france_entiere": False,
-            "candidates": [],
-            "source": "",
-        }
-
-    best = candidates[0]
-
-    if best["score"] >= purchases_constants.SLUG_MAPPING_CONFIDENCE_AUTO:
-        _save_to_cache(
-            normalized,
-            purchases_constants.SLUG_MAPPING_KIND_PERIMETER,
-            best["slug"],
-            purchases_constants.SLUG_MAPPING_SOURCE_AUTO_TRIGRAM,
-            best["score"],
-            user,
-        )
-        return {
-            "status": RESOLUTION_STATUS_RESOLVED,
-            "slug": best["slug"],
-            "france_entiere": False,
-            "candidates": [],
-            "source": "trigram_auto",
-        }
-
-    return {
-        "status": RESOLUTION_STATUS_AMBIGUOUS,
-        "slug": None,
-        "france_entiere": False,
-        "candidates": candidates,
-        "source": "trigram",
-    }
+
+def resolve_perimeter(raw_value: str, user=None) -> dict:
+    """
+    Résout une valeur texte libre vers un slug de périmètre (voir resolve_perimeters).
+    """
+    return resolve_perimeters([raw_value], user=user)[raw_value]
 
 
 def resolve_sector_from_title(title: str, description: str = "") -> dict:
@@ -364,12 +417,16 @@ def record_user_choices(choices: list[dict], user) -> None:
 
     choices est une liste de {"raw_value", "kind", "resolved_slug", "confidence"}.
     """
-    for choice in choices:
-        _save_to_cache(
-            choice["raw_value"],
-            choice["kind"],
-            choice["resolved_slug"],
-            purchases_constants.SLUG_MAPPING_SOURCE_USER_PROPOSED,
-            choice.get("confidence", 1.0),
-            user,
-        )
+    _save_many_to_cache(
+        [
+            {
+                "raw_value": choice["raw_value"],
+                "kind": choice["kind"],
+                "resolved_slug": choice["resolved_slug"],
+                "source": purchases_constants.SLUG_MAPPING_SOURCE_USER_PROPOSED,
+                "confidence": choice.get("confidence", 1.0),
+                "user": user,
+            }
+            for choice in choices
+        ]
+    )
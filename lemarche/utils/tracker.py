@@ -3,16 +3,18 @@
 # Not used that much :
 # - adopt (adoption event) / already have adopt_search...
 
-# TODO: Make Async / non-blocking.
-# But unless the whole application becomes async,
-# the only way would be to use threads, which is another problem in itself.
-# However, nothing keeps the Django app from writing
-# to the tracking database directly, which would be magnitudes faster.
+# Non-blocking: the trackers are not saved during the request/response cycle,
+# they are buffered in-process and saved in batches by a background thread (see TrackerBuffer).
+# The buffer can be disabled with TRACKER_BUFFER_ENABLED (synchronous save, e.g. in tests).
 
+import atexit
 import logging
+import threading
+from collections import deque
 
 from crawlerdetect import CrawlerDetect
 from django.conf import settings
+from django.db import close_old_connections
 from django.http import HttpRequest, HttpResponse
 from django.urls import reverse
 from django.utils import timezone
@@ -22,9 +24,6 @@ from lemarche.stats.models import Tracker
 from lemarche.users.models import User
 
 
-# from huey.contrib.djhuey import task
-
-
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
@@ -87,11 +86,95 @@ def track(page: str = "", action: str = "load", meta: dict = {}):  # noqa B006
         }
         payload = DEFAULT_PAYLOAD | set_payload
 
-        try:
-            Tracker.objects.create(**payload)
-        except Exception as e:
-            logger.exception(e)
-            logger.warning("Failed to save tracker")
+        if settings.TRACKER_BUFFER_ENABLED:
+            tracker_buffer.add(payload)
+        else:
+            try:
+                Tracker.objects.create(**payload)
+            except Exception as e:
+                logger.exception(e)
+                logger.warning("Failed to save tracker")
+
+
+class TrackerBuffer:
+    """
+    In-process buffer of tracker payloads, saved with bulk_create by a background (daemon) thread
+    - the thread saves the buffer every `flush_interval` seconds, or as soon as a batch is full
+    - the buffer is bounded: when it is full, the new payloads are dropped (and counted)
+    - the buffer is also saved when the process exits
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: int):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.flush_event = threading.Event()
+        self.worker = None
+        # counters
+        self.saved_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+
+    def add(self, payload: dict) -> bool:
+        with self.lock:
+            if len(self.queue) >= self.max_size:
+                self.dropped_count += 1
+                if self.dropped_count % self.batch_size == 1:
+                    logger.warning(f"Tracker buffer is full: {self.dropped_count} tracker(s) dropped")
+                return False
+            self.queue.append(payload)
+            queue_size = len(self.queue)
+        self.start_worker()
+        if queue_size >= self.batch_size:
+            self.flush_event.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Save all the buffered payloads (by batches)
+        """
+        saved_count = 0
+        while True:
+            with self.lock:
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+            if not batch:
+                return saved_count
+            try:
+                Tracker.objects.bulk_create([Tracker(**payload) for payload in batch])
+                saved_count += len(batch)
+                self.saved_count += len(batch)
+            except Exception as e:
+                self.failed_count += len(batch)
+                logger.exception(e)
+                logger.warning(f"Failed to save {len(batch)} tracker(s)")
+
+    def start_worker(self):
+        # the worker is (re)started lazily: it doesn't survive a fork of the process
+        if self.worker and self.worker.is_alive():
+            return
+        with self.lock:
+            if self.worker and self.worker.is_alive():
+                return
+            if self.worker is None:
+                atexit.register(self.flush)
+            self.worker = threading.Thread(target=self.run, name="tracker-buffer", daemon=True)
+            self.worker.start()
+
+    def run(self):
+        while True:
+            self.flush_event.wait(self.flush_interval)
+            self.flush_event.clear()
+            self.flush()
+            close_old_connections()
+
+
+tracker_buffer = TrackerBuffer(
+    max_size=settings.TRACKER_BUFFER_MAX_SIZE,
+    batch_size=settings.TRACKER_BUFFER_BATCH_SIZE,
+    flush_interval=settings.TRACKER_BUFFER_FLUSH_INTERVAL,
+)
 
 
 class TrackerMiddleware:
@@ -102,9 +185,19 @@ class TrackerMiddleware:
         response = self.get_response(request)
         page = request.path
         if self.tracking_this_page(page, request):
-            self.track_page(page, request, response)
+            if response.streaming:
+                # track once the content is streamed (e.g. the results count of a CSV export)
+                response.streaming_content = self.stream_and_track_page(
+                    response.streaming_content, page, request, response
+                )
+            else:
+                self.track_page(page, request, response)
         return response
 
+    def stream_and_track_page(self, streaming_content, page, request: HttpRequest, response: HttpResponse):
+        yield from streaming_content
+        self.track_page(page, request, response)
+
     def tracking_this_page(self, page, request: HttpRequest) -> bool:
         request_ua = request.META.get("HTTP_USER_AGENT", "")
         # Final checks before calling the track() function
@@ -133,7 +226,7 @@ class TrackerMiddleware:
                 extra_data["results_count"] = (
                     int(response.headers.get("Context-Data-Results-Count"))
                     if response.headers.get("Context-Data-Results-Count", None)
-                    else None
+                    else getattr(response, "results_count", None)
                 )
 
             elif page == reverse("dashboard_siaes:siae_search_by_siret"):  # adopted search action
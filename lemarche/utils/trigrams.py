@@ -0,0 +1,84 @@
+# In-memory equivalent of the Postgres pg_trgm similarity, for the small reference tables
+# (sectors, perimeters...) that are searched many times in a row.
+
+import heapq
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+
+WORD_REGEX = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Normalise une chaîne pour comparaison : minuscules, sans accents, sans tirets superflus.
+    Retourne "" si text est None ou vide.
+    """
+    if not text:
+        return ""
+    text = str(text).strip().lower()
+    text = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode()
+    return text
+
+
+def get_trigrams(normalized_value):
+    """
+    Same trigrams as the Postgres pg_trgm extension:
+    each word is padded with 2 spaces before & 1 space after
+    """
+    trigrams = set()
+    for word in WORD_REGEX.findall(normalized_value):
+        padded_word = f"  {word} "
+        trigrams.update(padded_word[i : i + 3] for i in range(len(padded_word) - 2))
+    return trigrams
+
+
+class TrigramIndex:
+    """
+    Index of normalized values (see normalize), by position.
+    similarity = shared trigrams / (trigrams of the value + trigrams of the query - shared trigrams)
+    """
+
+    def __init__(self):
+        self.trigram_counts = []
+        self.trigram_index = defaultdict(list)  # {trigram: [position, ...]}
+
+    def __len__(self):
+        return len(self.trigram_counts)
+
+    def add(self, normalized_value):
+        position = len(self.trigram_counts)
+        trigrams = get_trigrams(normalized_value)
+        self.trigram_counts.append(len(trigrams))
+        for trigram in trigrams:
+            self.trigram_index[trigram].append(position)
+        return position
+
+    def get_similarities(self, normalized_value):
+        """
+        Return {position: similarity} (only the values sharing at least one trigram with the query)
+        """
+        query_trigrams = get_trigrams(normalized_value)
+        shared_trigram_counts = Counter()
+        for trigram in query_trigrams:
+            shared_trigram_counts.update(self.trigram_index.get(trigram, ()))
+        return {
+            position: shared_count / max(len(query_trigrams) + self.trigram_counts[position] - shared_count, 1)
+            for position, shared_count in shared_trigram_counts.items()
+        }
+
+    def search(self, normalized_value, threshold=0, limit=5):
+        """
+        Return the [(similarity, position), ...] of the most similar values (similarity >= threshold)
+        """
+        similarities = self.get_similarities(normalized_value)
+        return heapq.nlargest(
+            limit,
+            (
+                (similarity, position)
+                for position, similarity in similarities.items()
+                if similarity >= threshold and similarity > 0
+            ),
+            key=lambda item: (item[0], -item[1]),  # same similarity: first added first
+        )
@@ -43,7 +43,7 @@ def notify_team_new_user(user):
 
 
 def send_new_user_password_reset_link(user: User, template_code: str = "NEW_USER_PASSWORD_RESET"):
-    email_template = TemplateTransactional.objects.get(code=template_code)
+    email_template = TemplateTransactional.objects.get_by_code(template_code)
     recipient_list = whitelist_recipient_list([user.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
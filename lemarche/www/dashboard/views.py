@@ -19,7 +19,11 @@ from django_filters.views import FilterView
 
 from content_manager.models import ContentPage, Tag
 from lemarche.api.inclusive_potential.constants import PRESTA_MODE_DEFAULT, PRESTA_MODE_TO_SIAE_KINDS, RECOMMENDATIONS
-from lemarche.api.inclusive_potential.utils import get_inclusive_potential_data
+from lemarche.api.inclusive_potential.utils import (
+    PotentialData,
+    get_inclusive_potential_data,
+    get_inclusive_potential_data_list,
+)
 from lemarche.cms.models import ArticleList
 from lemarche.perimeters.models import Perimeter
 from lemarche.purchases.models import Purchase, get_sector_group_chart_data
@@ -34,9 +38,9 @@ from lemarche.utils.slug_matching import (
     RESOLUTION_STATUS_RESOLVED,
     record_user_choices,
     resolve_column_header,
-    resolve_perimeter,
-    resolve_sector,
+    resolve_perimeters,
     resolve_sector_from_title,
+    resolve_sectors,
 )
 from lemarche.www.dashboard.filters import PurchaseFilterSet
 from lemarche.www.dashboard.forms import DisabledEmailEditForm, ProfileEditForm, PurchaseProjectFormSet
@@ -472,11 +476,27 @@ def _analyze_purchase_project(
         potential_data, analysis_data = get_inclusive_potential_data(sector, perimeter, budget, presta_mode)
     except Exception:
         logger.exception("Erreur lors de l'analyse du potentiel inclusif pour '%s'", titre)
-        return {
-            "titre": titre,
-            "error": "Une erreur technique s'est produite lors de l'analyse. Veuillez réessayer.",
-        }
+        return _build_purchase_project_error(titre)
+
+    return _build_purchase_project_result(titre, sector, perimeter, budget, presta_mode, potential_data, analysis_data)
+
+
+def _build_purchase_project_error(titre: str) -> dict:
+    return {
+        "titre": titre,
+        "error": "Une erreur technique s'est produite lors de l'analyse. Veuillez réessayer.",
+    }
 
+
+def _build_purchase_project_result(
+    titre: str,
+    sector: Sector,
+    perimeter: Perimeter | None,
+    budget: int | None,
+    presta_mode: str,
+    potential_data: PotentialData,
+    analysis_data: dict,
+) -> dict:
     search_urls = _build_search_urls(sector, perimeter, presta_mode)
     result = {
         "titre": titre,
@@ -522,34 +542,54 @@ def _run_excel_analysis(
     if presta_mode not in PRESTA_MODE_TO_SIAE_KINDS:
         presta_mode = PRESTA_MODE_DEFAULT
 
-    results = []
-    raw_projects_session = []
+    # fetch all the sectors & perimeters at once
+    sectors_by_slug = Sector.objects.in_bulk(
+        [project["sector_slug"] for project in resolved_projects], field_name="slug"
+    )
+    perimeters_by_slug = Perimeter.objects.in_bulk(
+        [
+            project["perimeter_result"]["slug"]
+            for project in resolved_projects
+            if project["perimeter_result"].get("slug")
+        ],
+        field_name="slug",
+    )
 
+    analysed_projects = []
     for project in resolved_projects:
-        sector_slug = project["sector_slug"]
         perimeter_result = project["perimeter_result"]
-        montant = project["montant"]
-        titre = project["titre"]
-
-        try:
-            sector = Sector.objects.get(slug=sector_slug)
-        except Sector.DoesNotExist:
+        sector = sectors_by_slug.get(project["sector_slug"])
+        if not sector:
             continue
-
         perimeter = None
         if not perimeter_result.get("france_entiere") and perimeter_result.get("slug"):
-            try:
-                perimeter = Perimeter.objects.get(slug=perimeter_result["slug"])
-            except Perimeter.DoesNotExist:
+            perimeter = perimeters_by_slug.get(perimeter_result["slug"])
+            if not perimeter:
                 continue
+        analysed_projects.append((project, sector, perimeter))
 
-        result = _analyze_purchase_project(titre, sector, perimeter, montant, presta_mode)
+    # the projects with the same sector & perimeter are analysed only once
+    potential_data_list = get_inclusive_potential_data_list(
+        [(sector, perimeter, project["montant"]) for (project, sector, perimeter) in analysed_projects], presta_mode
+    )
+
+    results = []
+    raw_projects_session = []
+    for (project, sector, perimeter), potential_data in zip(analysed_projects, potential_data_list):
+        titre = project["titre"]
+        perimeter_result = project["perimeter_result"]
+        if potential_data is None:
+            result = _build_purchase_project_error(titre)
+        else:
+            result = _build_purchase_project_result(
+                titre, sector, perimeter, project["montant"], presta_mode, *potential_data
+            )
         results.append(result)
         raw_projects_session.append(
             {
                 "titre": titre,
-                "montant": montant,
-                "secteur_slug": sector_slug,
+                "montant": project["montant"],
+                "secteur_slug": project["sector_slug"],
                 "perimeter_slug": perimeter_result.get("slug"),
                 "france_entiere": perimeter_result.get("france_entiere", False),
                 "input_mode": "excel",
@@ -939,6 +979,15 @@ class InclusivePotentialAnalysisView(LoginRequiredMixin, View):
         ambiguous_items = []
         unresolvable_count = 0
 
+        # resolve all the sectors & perimeters at once
+        sector_results = resolve_sectors(
+            [project["secteur_raw"] for project in projects if project["titre"]], user=request.user
+        )
+        perimeter_results = resolve_perimeters(
+            [project["perimetre_raw"] for project in projects if project["titre"] and project["perimetre_raw"]],
+            user=request.user,
+        )
+
         for project in projects:
             titre = project["titre"]
             row_num = project["row"]
@@ -947,7 +996,7 @@ class InclusivePotentialAnalysisView(LoginRequiredMixin, View):
                 unresolvable_count += 1
                 continue
 
-            sector_result = resolve_sector(project["secteur_raw"], user=request.user)
+            sector_result = sector_results[project["secteur_raw"]]
 
             # Si le secteur est introuvable, tenter l'inférence depuis le titre/description
             if sector_result["status"] == RESOLUTION_STATUS_ERROR and titre:
@@ -963,7 +1012,7 @@ class InclusivePotentialAnalysisView(LoginRequiredMixin, View):
                     "source": "",
                 }
             else:
-                perimeter_result = resolve_perimeter(project["perimetre_raw"], user=request.user)
+                perimeter_result = perimeter_results[project["perimetre_raw"]]
 
             sector_status = sector_result["status"]
             perimeter_status = perimeter_result["status"]
@@ -9,7 +9,7 @@ def send_siae_user_request_email_to_assignee(siae_user_request):
     """
     Send request to the assignee
     """
-    email_template = TemplateTransactional.objects.get(code="SIAEUSERREQUEST_ASSIGNEE")
+    email_template = TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_ASSIGNEE")
     recipient_list = whitelist_recipient_list([siae_user_request.assignee.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -41,9 +41,9 @@ def send_siae_user_request_response_email_to_initiator(siae_user_request):
     """
     if siae_user_request.response is not None:
         email_template = (
-            TemplateTransactional.objects.get(code="SIAEUSERREQUEST_INITIATOR_RESPONSE_POSITIVE")
+            TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_INITIATOR_RESPONSE_POSITIVE")
             if siae_user_request.response
-            else TemplateTransactional.objects.get(code="SIAEUSERREQUEST_INITIATOR_RESPONSE_NEGATIVE")
+            else TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_INITIATOR_RESPONSE_NEGATIVE")
         )
         recipient_list = whitelist_recipient_list([siae_user_request.initiator.email])
         if len(recipient_list):
@@ -81,7 +81,7 @@ def send_siae_user_request_reminder_3_days_emails(siae_user_request):
 
 
 def send_siae_user_request_reminder_3_days_email_to_assignee(siae_user_request):
-    email_template = TemplateTransactional.objects.get(code="SIAEUSERREQUEST_REMINDER_1_ASSIGNEE")
+    email_template = TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_REMINDER_1_ASSIGNEE")
     recipient_list = whitelist_recipient_list([siae_user_request.assignee.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -108,7 +108,7 @@ def send_siae_user_request_reminder_3_days_email_to_assignee(siae_user_request):
 
 
 def send_siae_user_request_reminder_3_days_email_to_initiator(siae_user_request):
-    email_template = TemplateTransactional.objects.get(code="SIAEUSERREQUEST_REMINDER_1_INITIATOR")
+    email_template = TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_REMINDER_1_INITIATOR")
     recipient_list = whitelist_recipient_list([siae_user_request.initiator.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -144,7 +144,7 @@ def send_siae_user_request_reminder_8_days_emails(siae_user_request):
 
 
 def send_siae_user_request_reminder_8_days_email_to_assignee(siae_user_request):
-    email_template = TemplateTransactional.objects.get(code="SIAEUSERREQUEST_REMINDER_2_ASSIGNEE")
+    email_template = TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_REMINDER_2_ASSIGNEE")
     recipient_list = whitelist_recipient_list([siae_user_request.assignee.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -171,7 +171,7 @@ def send_siae_user_request_reminder_8_days_email_to_assignee(siae_user_request):
 
 
 def send_siae_user_request_reminder_8_days_email_to_initiator(siae_user_request):
-    email_template = TemplateTransactional.objects.get(code="SIAEUSERREQUEST_REMINDER_2_INITIATOR")
+    email_template = TemplateTransactional.objects.get_by_code("SIAEUSERREQUEST_REMINDER_2_INITIATOR")
     recipient_list = whitelist_recipient_list([siae_user_request.initiator.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -0,0 +1,61 @@
+from lemarche.labels.models import Label
+from lemarche.networks.models import Network
+from lemarche.sectors.models import Sector, SectorGroup
+from lemarche.utils.facets import get_search_facet
+
+
+def build_sector_facet():
+    """
+    Same order as Sector.objects.form_filter_queryset()
+    [(id, slug, name, group_id, group_slug, group_name), ...]
+    """
+    return list(
+        Sector.objects.form_filter_queryset().values_list(
+            "id", "slug", "name", "group_id", "group__slug", "group__name"
+        )
+    )
+
+
+def build_network_facet():
+    return list(Network.objects.order_by("name").values_list("slug", "name"))
+
+
+def build_label_facet():
+    return list(Label.objects.order_by("name").values_list("slug", "name"))
+
+
+def get_sector_facet():
+    return get_search_facet("sectors", build_sector_facet)
+
+
+def get_sector_choices():
+    """
+    Sectors grouped by SectorGroup (see GroupedModelMultipleChoiceField)
+    """
+    choices = []
+    for _, sector_slug, sector_name, group_id, _, group_name in get_sector_facet():
+        if not choices or choices[-1][0] != group_id:
+            choices.append((group_id, group_name, []))
+        choices[-1][2].append((sector_slug, sector_name))
+    return [(group_name, sector_choices) for _, group_name, sector_choices in choices]
+
+
+def get_current_sectors(sector_slugs):
+    """
+    Return the searched sectors (same format as .values("id", "slug", "name")) and their groups
+    """
+    current_sectors = []
+    current_sector_groups = dict()
+    for sector_id, sector_slug, sector_name, group_id, group_slug, group_name in get_sector_facet():
+        if sector_slug in sector_slugs:
+            current_sectors.append({"id": sector_id, "slug": sector_slug, "name": sector_name})
+            current_sector_groups.setdefault(group_id, SectorGroup(id=group_id, slug=group_slug, name=group_name))
+    return current_sectors, list(current_sector_groups.values())
+
+
+def get_network_choices():
+    return get_search_facet("networks", build_network_facet)
+
+
+def get_label_choices():
+    return get_search_facet("labels", build_label_facet)
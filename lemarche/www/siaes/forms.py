@@ -14,6 +14,7 @@ from lemarche.tenders.models import Tender
 from lemarche.users.validators import professional_email_validator
 from lemarche.utils.fields import GroupedModelMultipleChoiceField
 from lemarche.utils.widgets import CustomSelectMultiple
+from lemarche.www.siaes.facets import get_label_choices, get_network_choices, get_sector_choices
 from lemarche.www.siaes.widgets import CustomLocationWidget
 
 
@@ -207,6 +208,10 @@ class SiaeFilterForm(forms.Form):
         # these fields are autocompletes
         self.fields["perimeters"].choices = []
         self.fields["locations"].choices = []
+        # the choices of these fields are cached (the querysets are only used to validate the submitted values)
+        self.fields["sectors"].choices = get_sector_choices()
+        self.fields["networks"].choices = get_network_choices()
+        self.fields["labels"].choices = get_label_choices()
         # manage disabled fields
         if not advanced_search:
             for field in self.ADVANCED_SEARCH_FIELDS:
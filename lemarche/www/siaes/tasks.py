@@ -1,15 +1,37 @@
+import csv
+import hashlib
+import io
+import json
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import QueryDict
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from huey.contrib.djhuey import task
 
 from lemarche.conversations.models import TemplateTransactional
-from lemarche.utils.emails import whitelist_recipient_list
+from lemarche.siaes.models import SiaeClientReference, full_text_similarity_threshold
+from lemarche.utils import s3
+from lemarche.utils.emails import send_mail_async, whitelist_recipient_list
+from lemarche.utils.export import export_siae_to_csv, export_siae_to_xlsx
 from lemarche.utils.urls import get_domain_url
+from lemarche.www.siaes.forms import SiaeFilterForm
+
+
+SIAE_EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
 
 
 def send_user_invite_colleagues_email(email):
     """
     Send an email to a user inviting them to invite their colleagues.
     """
-    email_template = TemplateTransactional.objects.get(code="USER_INVITE_COLLEAGUES")
+    email_template = TemplateTransactional.objects.get_by_code("USER_INVITE_COLLEAGUES")
     recipient_list = whitelist_recipient_list([email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -27,3 +49,131 @@ def send_user_invite_colleagues_email(email):
         )
 
     return True
+
+
+def get_siae_export_queryset(query_dict: QueryDict):
+    filter_form = SiaeFilterForm(data=query_dict)
+    results = filter_form.filter_queryset()
+    # Prefetch the client references already ordered so export_siae_to_xlsx/csv reuse the cache
+    # instead of firing an extra query per Siae (N+1 that would time out on the full list export)
+    return results.prefetch_related(
+        Prefetch("client_references", queryset=SiaeClientReference.objects.order_by("order"))
+    )
+
+
+def get_siae_export_format(query_dict: QueryDict) -> str:
+    # "xls" kept for the existing links
+    return "csv" if query_dict.get("format") == "csv" else "xlsx"
+
+
+def get_siae_export_hash(query_dict: QueryDict) -> str:
+    """
+    Identical filter sets (whatever the order of the parameters) share the same export
+    """
+    query_params = {key: sorted(value for value in values if value) for key, values in query_dict.lists()}
+    query_params["format"] = [get_siae_export_format(query_dict)]
+    query_params = {key: values for key, values in query_params.items() if values}
+    return hashlib.sha256(json.dumps(query_params, sort_keys=True).encode()).hexdigest()
+
+
+def get_siae_export_cache_key(export_hash: str) -> str:
+    return f"siae_export:{export_hash}"
+
+
+def get_siae_export_pending_cache_key(export_hash: str) -> str:
+    return f"siae_export:{export_hash}:pending"
+
+
+def get_siae_export_url(export_hash: str):
+    """
+    The download url of the export, if it was already generated (and is still cached)
+    """
+    return cache.get(get_siae_export_cache_key(export_hash))
+
+
+def enqueue_siae_export(query_dict: QueryDict, recipient_email: str):
+    """
+    Generate the export in the background, the user is notified by email with the download link
+    - an identical export already in progress is not enqueued twice: the user is added to its recipients
+    - the pending key is claimed atomically (cache.add), and expires quickly if the task never ends
+    """
+    export_hash = get_siae_export_hash(query_dict)
+    pending_cache_key = get_siae_export_pending_cache_key(export_hash)
+    while not cache.add(pending_cache_key, [recipient_email], settings.SIAE_EXPORT_PENDING_TIMEOUT):
+        recipient_email_list = cache.get(pending_cache_key)
+        if recipient_email_list is not None:
+            cache.set(
+                pending_cache_key, recipient_email_list + [recipient_email], settings.SIAE_EXPORT_PENDING_TIMEOUT
+            )
+            return
+        # the export just ended: claim the key again
+    export_siae_search_results(dict(query_dict.lists()), recipient_email)
+
+
+@task()
+def export_siae_search_results(query_params: dict, recipient_email: str):
+    """
+    Generate the export, store it on S3, cache its download url & notify the user(s)
+    (also if the export failed: the pending key is always released)
+    """
+    query_dict = QueryDict(mutable=True)
+    for key, values in query_params.items():
+        query_dict.setlist(key, values)
+    export_hash = get_siae_export_hash(query_dict)
+    format = get_siae_export_format(query_dict)
+    with_contact_info = True if query_dict.get("tender", None) else False
+    siae_list = get_siae_export_queryset(query_dict)
+    key_path = f"{settings.SIAE_EXPORT_FOLDER_NAME}/{export_hash}.{format}"
+
+    export_url = None
+    try:
+        with tempfile.TemporaryFile() as file, full_text_similarity_threshold():
+            if format == "csv":
+                with io.TextIOWrapper(file, encoding="utf-8", newline="", write_through=True) as text_file:
+                    export_siae_to_csv(csv.writer(text_file), siae_list, with_contact_info)
+                    file.seek(0)
+                    s3.upload_file(file, key_path, SIAE_EXPORT_CONTENT_TYPES[format])
+            else:
+                wb, _ = export_siae_to_xlsx(siae_list, with_contact_info)
+                wb.save(file)
+                file.seek(0)
+                s3.upload_file(file, key_path, SIAE_EXPORT_CONTENT_TYPES[format])
+
+        export_url = s3.get_download_url(key_path, settings.SIAE_EXPORT_CACHE_TIMEOUT)
+        cache.set(get_siae_export_cache_key(export_hash), export_url, settings.SIAE_EXPORT_CACHE_TIMEOUT)
+    finally:
+        # notify the user(s) who requested this export
+        pending_cache_key = get_siae_export_pending_cache_key(export_hash)
+        recipient_email_list = set(cache.get(pending_cache_key) or []) | {recipient_email}
+        cache.delete(pending_cache_key)
+        for recipient_email in whitelist_recipient_list(list(recipient_email_list)):
+            if export_url:
+                send_siae_export_ready_email(recipient_email, export_url)
+            else:
+                send_siae_export_failed_email(recipient_email)
+
+
+def send_siae_export_ready_email(email, export_url):
+    email_subject = "Votre export de la liste des structures est prêt"
+    email_body = render_to_string(
+        "siaes/export_ready_email_body.txt",
+        {
+            "EXPORT_URL": export_url,
+            "EXPORT_URL_VALIDITY_IN_HOURS": settings.SIAE_EXPORT_CACHE_TIMEOUT // (60 * 60),
+        },
+    )
+    send_mail_async(
+        email_subject=email_subject,
+        email_body=email_body,
+        recipient_list=[email],
+    )
+
+
+def send_siae_export_failed_email(email):
+    email_subject = "Votre export de la liste des structures a échoué"
+    email_body = render_to_string("siaes/export_failed_email_body.txt")
+    send_mail_async(
+        email_subject=email_subject,
+        email_body=email_body,
+        recipient_list=[email],
+    )
@@ -1,5 +1,5 @@
-import csv
 import json
+import tempfile
 from datetime import date
 from urllib.parse import quote
 
@@ -10,8 +10,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.paginator import Paginator
 from django.core.serializers import serialize
-from django.db.models import F, Prefetch
-from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils.html import format_html
@@ -22,16 +22,23 @@ from django.views.generic.edit import FormMixin
 from lemarche.conversations.models import Conversation
 from lemarche.favorites.models import FavoriteList
 from lemarche.siaes import constants as siae_constants
-from lemarche.siaes.models import Siae, SiaeClientReference, SiaeESUS
+from lemarche.siaes.models import Siae, SiaeESUS, full_text_similarity_threshold
 from lemarche.utils import settings_context_processors
 from lemarche.utils.apis.api_recherche_entreprises import (
     RechercheEntreprisesAPIException,
     recherche_entreprises_get_or_error,
 )
-from lemarche.utils.export import export_siae_to_csv, export_siae_to_excel
+from lemarche.utils.export import export_siae_to_xlsx, stream_siae_to_csv
 from lemarche.www.conversations.forms import ContactForm
+from lemarche.www.siaes.facets import get_current_sectors
 from lemarche.www.siaes.forms import InviteColleaguesFormSet, SiaeFavoriteForm, SiaeFilterForm, SiaeSiretFilterForm
-from lemarche.www.siaes.tasks import send_user_invite_colleagues_email
+from lemarche.www.siaes.tasks import (
+    enqueue_siae_export,
+    get_siae_export_hash,
+    get_siae_export_queryset,
+    get_siae_export_url,
+    send_user_invite_colleagues_email,
+)
 
 
 CURRENT_SEARCH_QUERY_COOKIE_NAME = "current_search"
@@ -62,6 +69,11 @@ class SiaeSearchResultsView(FormMixin, ListView):
             self.filter_form = SiaeFilterForm(data=self.request.GET)
         return self.filter_form
 
+    def get(self, request, *args, **kwargs):
+        # the results are evaluated while rendering the template
+        with full_text_similarity_threshold():
+            return super().get(request, *args, **kwargs).render()
+
     def get_queryset(self):
         """
         Filter results.
@@ -89,16 +101,24 @@ class SiaeSearchResultsView(FormMixin, ListView):
         if len(self.request.GET.keys()):
             context["is_advanced_search"] = siae_search_form.is_advanced_search()
             if siae_search_form.is_valid():
+                # the perimeter querysets were already evaluated by the filter_queryset
                 current_perimeters = siae_search_form.cleaned_data.get("perimeters")
                 if current_perimeters:
-                    context["current_perimeters"] = list(current_perimeters.values("id", "slug", "name"))
+                    context["current_perimeters"] = [
+                        {"id": perimeter.id, "slug": perimeter.slug, "name": perimeter.name}
+                        for perimeter in current_perimeters
+                    ]
                 current_locations = siae_search_form.cleaned_data.get("locations")
                 if current_locations:
-                    context["current_locations"] = list(current_locations.values("id", "slug", "name"))
-                current_sectors = siae_search_form.cleaned_data.get("sectors")
+                    context["current_locations"] = [
+                        {"id": perimeter.id, "slug": perimeter.slug, "name": perimeter.name}
+                        for perimeter in current_locations
+                    ]
+                # the sectors are taken from the cached facet
+                current_sectors, current_sector_groups = get_current_sectors(siae_search_form.data.getlist("sectors"))
                 if current_sectors:
-                    context["current_sectors"] = list(current_sectors.values("id", "slug", "name"))
-                    context["current_sector_groups"] = list(set(sector.group for sector in current_sectors))
+                    context["current_sectors"] = current_sectors
+                    context["current_sector_groups"] = current_sector_groups
 
         # store the current search query in the session
         current_search_query = self.request.GET.urlencode()
@@ -126,43 +146,76 @@ class SiaeSearchResultsDownloadView(LoginRequiredMixin, View):
         """
         Filter results.
         """
-        filter_form = SiaeFilterForm(data=self.request.GET)
-        results = filter_form.filter_queryset()
-        # Prefetch the client references already ordered so export_siae_to_excel/csv reuse the cache
-        # instead of firing an extra query per Siae (N+1 that would time out on the full list export)
-        return results.prefetch_related(
-            Prefetch("client_references", queryset=SiaeClientReference.objects.order_by("order"))
-        )
+        return get_siae_export_queryset(self.request.GET)
 
     def get(self, request, *args, **kwargs):
         """
-        Build and return a CSV or XLS.
-        The whole list (no search filter) is generated on the fly, like a filtered export.
+        Build and return a CSV or XLSX.
+        The whole list (no search filter) is generated on the fly, like a filtered export:
+        - CSV: streamed, line by line
+        - XLSX: write-only workbook saved in a temporary file, then streamed
+        The Siae are iterated by chunks (see iterate_siae_queryset), and counted while being exported.
+
+        The big exports (e.g. the whole list) are generated in the background and stored on S3:
+        the user is notified by email, and the identical exports are served from the cache.
         """
+        export_url = get_siae_export_url(get_siae_export_hash(self.request.GET))
+        if export_url:
+            return HttpResponseRedirect(export_url)
+
+        with full_text_similarity_threshold():
+            return self.get_export_response()
+
+    def get_export_response(self):
         siae_list = self.get_queryset()
-        format = self.request.GET.get("format", "xls")
+        if siae_list.count() > settings.SIAE_EXPORT_ASYNC_THRESHOLD:
+            enqueue_siae_export(self.request.GET, self.request.user.email)
+            messages.add_message(
+                self.request,
+                messages.INFO,
+                "L'export est en cours de préparation : vous recevrez le lien de téléchargement par e-mail.",
+            )
+            return HttpResponseRedirect(f"{reverse_lazy('siae:search_results')}?{self.request.GET.urlencode()}")
+
+        format = self.request.GET.get("format", "xlsx")
         with_contact_info = True if self.request.GET.get("tender", None) else False
         filename = f"liste_structures_{date.today()}"
-        filename_with_extension = f"{filename}.{format}"
 
         if format == "csv":
-            response = HttpResponse(content_type="text/csv", charset="utf-8")
-            response["Content-Disposition"] = f'attachment; filename="{filename_with_extension}"'
-
-            writer = csv.writer(response)
-            export_siae_to_csv(writer, siae_list, with_contact_info)
-
-        else:  # "xls"
-            response = HttpResponse(content_type="application/ms-excel")
-            response["Content-Disposition"] = f'attachment; filename="{filename_with_extension}"'
+            response = StreamingHttpResponse(content_type="text/csv", charset="utf-8")
+            response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+            response.results_count = 0
+            response.streaming_content = self.count_csv_lines(
+                response, stream_siae_to_csv(siae_list, with_contact_info)
+            )
 
-            wb = export_siae_to_excel(siae_list, with_contact_info)
-            wb.save(response)
+        else:  # "xlsx" (or "xls", for the existing links)
+            wb, results_count = export_siae_to_xlsx(siae_list, with_contact_info)
+            file = tempfile.TemporaryFile()
+            wb.save(file)
+            file.seek(0)
+            response = FileResponse(
+                file,
+                as_attachment=True,
+                filename=f"{filename}.xlsx",
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+            # HttpResponse doesn't have a context. so we pass the data via the response header
+            response["Context-Data-Results-Count"] = results_count
 
-        # HttpResponse doesn't have a context. so we pass the data via the response header
-        response["Context-Data-Results-Count"] = siae_list.count()
         return response
 
+    def count_csv_lines(self, response, csv_lines):
+        """
+        The results count is only known once the CSV is streamed (see TrackerMiddleware)
+        """
+        # streamed after get() returned
+        with full_text_similarity_threshold():
+            for index, csv_line in enumerate(csv_lines):
+                if index:  # header
+                    response.results_count += 1
+                yield csv_line
+
 
 class SiaeContactDetailsView(View):
     http_method_names = ["get"]
@@ -1,14 +1,17 @@
 import logging
 from datetime import timedelta
+from itertools import batched
 
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from huey.contrib.djhuey import lock_task, task
+from huey.exceptions import TaskLockedException
 from sesame.utils import get_query_string as sesame_get_query_string
 
 from lemarche.conversations.models import TemplateTransactional
-from lemarche.siaes.models import Siae
+from lemarche.siaes.models import Siae, SiaeActivity
 from lemarche.tenders.enums import TenderSourcesChoices
 from lemarche.tenders.models import PartnerShareTender, ReferentRegional, Tender, TenderSiae
 from lemarche.users.models import User
@@ -26,14 +29,21 @@ from lemarche.utils.urls import (
 logger = logging.getLogger(__name__)
 
 
+TENDER_EMAIL_TO_SIAES_CHUNK_SIZE = 500
+
+
 def send_validated_tender(tender: Tender):
     # find the matching Siaes? done in Tender post_save signal
-    # notify author
+    # notify author (only once, even if the send is resumed after an interruption)
     # TODO: we still notify author for each send ?
-    send_confirmation_published_email_to_author(tender)
+    if "email_author_confirmation" not in get_tender_send_checkpoints(tender):
+        send_confirmation_published_email_to_author(tender)
+        tender.logs.append({"action": "email_author_confirmation", "date": timezone.now().isoformat()})
+        tender.save()
     # send the tender to all matching Siaes & Partners
-    send_tender_emails_to_siaes(tender)
-    send_tender_emails_to_partners(tender)
+    send_tender_emails_to_siaes(tender, resume=True)
+    if "email_partners_matched" not in get_tender_send_checkpoints(tender):
+        send_tender_emails_to_partners(tender)
     # set first_sent_at & last_sent_at, log
     tender.set_sent()
 
@@ -41,11 +51,56 @@ def send_validated_tender(tender: Tender):
 def send_validated_sent_batch_tender(tender: Tender):
     # the tender has already been sent a first time with send_validated_tender
     # this is the second/third/... iteration
-    send_tender_emails_to_siaes(tender)
+    send_tender_emails_to_siaes(tender, resume=True)
     # update last_sent_at, log
     tender.set_sent()
 
 
+def get_tender_send_checkpoints(tender: Tender) -> set:
+    """
+    The log actions of the current send (i.e. since the last "send" log)
+    """
+    checkpoints = set()
+    for log_item in reversed(tender.logs):
+        if log_item.get("action") == "send":
+            break
+        checkpoints.add(log_item.get("action"))
+    return checkpoints
+
+
+@task()
+def send_validated_tender_task(tender_id: int):
+    """
+    Send a newly validated tender (enqueued by the send_validated_tenders command)
+    - a lock per tender avoids sending the same tender twice at the same time
+    - the send is resumable: the TenderSiae already emailed are skipped
+    """
+    try:
+        with lock_task(f"send_tender_{tender_id}"):
+            tender = Tender.objects.validated_but_not_sent().filter(id=tender_id).first()
+            # the tender might have been sent in the meantime
+            if tender:
+                send_validated_tender(tender)
+    except TaskLockedException:
+        logger.info(f"Tender {tender_id} is already being sent")
+
+
+@task()
+def send_validated_sent_batch_tender_task(tender_id: int):
+    """
+    Send a new batch of an already sent tender (enqueued by the send_validated_tenders command)
+    - same lock & resume logic as send_validated_tender_task
+    """
+    try:
+        with lock_task(f"send_tender_{tender_id}"):
+            tender = Tender.objects.validated_sent_batch().filter(id=tender_id).first()
+            # the batch might have been sent in the meantime
+            if tender:
+                send_validated_sent_batch_tender(tender)
+    except TaskLockedException:
+        logger.info(f"Tender {tender_id} is already being sent")
+
+
 def restart_send_tender_task(tender: Tender):
     # send the tender to all matching Siaes & Partners
     send_tender_emails_to_siaes(tender)
@@ -60,12 +115,17 @@ def restart_send_tender_task(tender: Tender):
 
 
 # @task()
-def send_tender_emails_to_siaes(tender: Tender):
+def send_tender_emails_to_siaes(tender: Tender, resume: bool = False):
     """
     All corresponding Siae will be contacted
     - we send emails to both the Siae's 'contact_email' & the Siae's users 'email'
     - but we avoid sending duplicate emails
 
+    Batched: the TenderSiae (& their Siae users) are fetched at once, the emails are sent with Brevo batch sends,
+    and the TenderSiae 'email_send_date' are set after each chunk (checkpoint).
+
+    resume: the TenderSiae already emailed during the current send (interrupted run) count in the batch limit
+
     previous email_subject: f"{tender.get_kind_display()} : {tender.title} ({tender.author.company_name})"
     """
     if tender.source == TenderSourcesChoices.SOURCE_TALLY:
@@ -74,30 +134,76 @@ def send_tender_emails_to_siaes(tender: Tender):
     else:
         email_subject = "J'ai une opportunité commerciale pour vous sur le Marché de l'inclusion"
 
-    # queryset
-    all_siaes = tender.siaes.filter(tendersiae__email_send_date=None).order_by_super_siaes()
-    logger.info(f"total siaes {all_siaes.count()}")
-    siaes = all_siaes[: tender.limit_send_to_siae_batch]
+    # queryset (same order as order_by_super_siaes)
+    all_tendersiaes = (
+        TenderSiae.objects.filter(tender=tender, email_send_date=None)
+        .select_related("siae")
+        .prefetch_related("siae__users")
+        .order_by(
+            "-siae__super_badge",
+            "-siae__tender_detail_contact_click_count",
+            "-siae__tender_detail_display_count",
+            "-siae__completion_rate",
+        )
+    )
+    logger.info(f"total siaes {all_tendersiaes.count()}")
+    limit_send_to_siae_batch = tender.limit_send_to_siae_batch
+    if resume:
+        tendersiaes_already_sent = TenderSiae.objects.filter(tender=tender, email_send_date__isnull=False)
+        if tender.last_sent_at:
+            tendersiaes_already_sent = tendersiaes_already_sent.filter(email_send_date__gt=tender.last_sent_at)
+        limit_send_to_siae_batch = max(limit_send_to_siae_batch - tendersiaes_already_sent.count(), 0)
+    tendersiaes = list(all_tendersiaes[:limit_send_to_siae_batch])
+
+    # render the recipients variables in bulk
+    tender_variables = get_tender_email_to_siae_variables(tender)
+    siae_sector_group_names = SiaeActivity.objects.filter(
+        siae__in=[tendersiae.siae for tendersiae in tendersiaes]
+    ).sector_group_names_by_siae()
+    email_template = None
 
     siae_users_count = 0
     siae_users_send_count = 0
 
-    for siae in siaes:
-        tendersiae = TenderSiae.objects.get(tender=tender, siae=siae)
-        # send to siae 'contact_email'
-        send_tender_email_to_siae(tendersiae, email_subject)
-        # also send to the siae's user(s) 'email' (if its value is different)
-        for user in siae.users.all():
-            siae_users_count += 1
-            if user.email != siae.contact_email:
-                send_tender_email_to_siae(tendersiae, email_subject, recipient_to_override=user)
-                siae_users_send_count += 1
+    for tendersiaes_chunk in batched(tendersiaes, TENDER_EMAIL_TO_SIAES_CHUNK_SIZE):
+        recipients = []
+        for tendersiae in tendersiaes_chunk:
+            tendersiae.tender = tender  # avoid a query per tendersiae
+            siae = tendersiae.siae
+            siae_sectors = siae.sector_groups_list_string(sectors_name_list=list(siae_sector_group_names[siae.id]))
+            # send to siae 'contact_email'
+            if len(whitelist_recipient_list([siae.contact_email])):
+                recipients.append(get_tender_email_to_siae_recipient(tendersiae, tender_variables, siae_sectors))
+            # also send to the siae's user(s) 'email' (if its value is different)
+            for user in siae.users.all():
+                siae_users_count += 1
+                if user.email != siae.contact_email:
+                    siae_users_send_count += 1
+                    if len(whitelist_recipient_list([user.email])):
+                        recipients.append(
+                            get_tender_email_to_siae_recipient(
+                                tendersiae, tender_variables, siae_sectors, recipient_to_override=user
+                            )
+                        )
+
+        if len(recipients):
+            if not email_template:
+                email_template = TemplateTransactional.objects.get_by_code(
+                    get_tender_email_to_siae_template_code(tender)
+                )
+            email_template.send_transactional_emails(recipients, subject=email_subject)
+
+            # update tendersiaes with the email send date (checkpoint: a resumed send skips them)
+            # and the tender siae_email_send_count
+            TenderSiae.objects.filter(
+                id__in={recipient["parent_content_object"].id for recipient in recipients}
+            ).set_funnel_date("email_send_date")
 
     # log email batch
     siaes_log_item = {
         "action": "email_siaes_matched",
         "email_subject": email_subject,
-        "email_count": siaes.count(),
+        "email_count": len(tendersiaes),
         "email_timestamp": timezone.now().isoformat(),
     }
     tender.logs.append(siaes_log_item)
@@ -116,60 +222,84 @@ def send_tender_emails_to_siaes(tender: Tender):
     tender.save()
 
 
-# @task()
-def send_tender_email_to_siae(tendersiae: TenderSiae, email_subject: str, recipient_to_override: User = None):
-    template_code = (
+def get_tender_email_to_siae_template_code(tender: Tender) -> str:
+    return (
         "TENDERS_SIAE_PRESENTATION"
-        if tendersiae.tender.source != TenderSourcesChoices.SOURCE_TALLY
+        if tender.source != TenderSourcesChoices.SOURCE_TALLY
         else "TALLY_TENDERS_SIAE_PRESENTATION"
     )
 
-    email_template = TemplateTransactional.objects.get(code=template_code)
+
+def get_tender_email_to_siae_variables(tender: Tender) -> dict:
+    """
+    The email variables that only depend on the tender (computed once per batch)
+    """
+    return {
+        "TENDER_ID": tender.id,
+        "TENDER_TITLE": tender.title,
+        "TENDER_AUTHOR_COMPANY": tender.author.company_name,
+        "TENDER_KIND": tender.get_kind_display(),
+        "TENDER_KIND_LOWER": tender.get_kind_display().lower(),
+        "TENDER_SECTORS": tender.sectors_list_string(),
+        "TENDER_PERIMETERS": tender.location_display,
+        "TENDER_AMOUNT": tender.amount_display,
+        "TENDER_DEADLINE_DATE": date_to_string(tender.deadline_date),
+    }
+
+
+def get_tender_email_to_siae_recipient(
+    tendersiae: TenderSiae, tender_variables: dict, siae_sectors: str, recipient_to_override: User = None
+) -> dict:
+    # override siae.contact_email if email_to_override is provided
+    recipient_email = recipient_to_override.email if recipient_to_override else tendersiae.siae.contact_email
+
+    tender_url = f"{get_object_share_url(tendersiae.tender)}?tender_siae_uuid={tendersiae.uuid}"
+    tender_not_interested_url = (
+        f"{get_object_share_url(tendersiae.tender)}?tender_siae_uuid={tendersiae.uuid}&not_interested=True"
+    )
+    if recipient_to_override:
+        tender_url += f"&user_id={recipient_to_override.id}"
+        tender_not_interested_url += f"&user_id={recipient_to_override.id}"
+
+    variables = {
+        "SIAE_ID": tendersiae.siae.id,
+        "SIAE_CONTACT_FIRST_NAME": tendersiae.siae.contact_first_name,
+        "SIAE_SECTORS": siae_sectors,
+        **tender_variables,
+        "TENDER_URL": tender_url,
+        "TENDER_NOT_INTERESTED_URL": tender_not_interested_url,
+        "TENDERSIAE_ID": tendersiae.id,
+    }
+
+    return {
+        "recipient_email": recipient_email,
+        "recipient_name": tendersiae.siae.contact_email_name_display,
+        "variables": variables,
+        "recipient_content_object": recipient_to_override if recipient_to_override else tendersiae.siae,
+        "parent_content_object": tendersiae,
+    }
+
+
+# @task()
+def send_tender_email_to_siae(tendersiae: TenderSiae, email_subject: str, recipient_to_override: User = None):
+    email_template = TemplateTransactional.objects.get_by_code(
+        get_tender_email_to_siae_template_code(tendersiae.tender)
+    )
     # override siae.contact_email if email_to_override is provided
     email_to = recipient_to_override.email if recipient_to_override else tendersiae.siae.contact_email
     recipient_list = whitelist_recipient_list([email_to])
     if len(recipient_list):
-        recipient_email = recipient_list[0]
-        recipient_name = tendersiae.siae.contact_email_name_display
-
-        tender_url = f"{get_object_share_url(tendersiae.tender)}?tender_siae_uuid={tendersiae.uuid}"
-        tender_not_interested_url = (
-            f"{get_object_share_url(tendersiae.tender)}?tender_siae_uuid={tendersiae.uuid}&not_interested=True"
+        recipient = get_tender_email_to_siae_recipient(
+            tendersiae,
+            get_tender_email_to_siae_variables(tendersiae.tender),
+            tendersiae.siae.sector_groups_list_string(),
+            recipient_to_override=recipient_to_override,
         )
-        if recipient_to_override:
-            tender_url += f"&user_id={recipient_to_override.id}"
-            tender_not_interested_url += f"&user_id={recipient_to_override.id}"
 
-        variables = {
-            "SIAE_ID": tendersiae.siae.id,
-            "SIAE_CONTACT_FIRST_NAME": tendersiae.siae.contact_first_name,
-            "SIAE_SECTORS": tendersiae.siae.sector_groups_list_string(),
-            "TENDER_ID": tendersiae.tender.id,
-            "TENDER_TITLE": tendersiae.tender.title,
-            "TENDER_AUTHOR_COMPANY": tendersiae.tender.author.company_name,
-            "TENDER_KIND": tendersiae.tender.get_kind_display(),
-            "TENDER_KIND_LOWER": tendersiae.tender.get_kind_display().lower(),
-            "TENDER_SECTORS": tendersiae.tender.sectors_list_string(),
-            "TENDER_PERIMETERS": tendersiae.tender.location_display,
-            "TENDER_AMOUNT": tendersiae.tender.amount_display,
-            "TENDER_DEADLINE_DATE": date_to_string(tendersiae.tender.deadline_date),
-            "TENDER_URL": tender_url,
-            "TENDER_NOT_INTERESTED_URL": tender_not_interested_url,
-            "TENDERSIAE_ID": tendersiae.id,
-        }
+        email_template.send_transactional_email(subject=email_subject, **recipient)
 
-        email_template.send_transactional_email(
-            recipient_email=recipient_email,
-            recipient_name=recipient_name,
-            variables=variables,
-            subject=email_subject,
-            recipient_content_object=recipient_to_override if recipient_to_override else tendersiae.siae,
-            parent_content_object=tendersiae,
-        )
-
-        # update tendersiae with the email send date
-        tendersiae.email_send_date = timezone.now()
-        tendersiae.save()
+        # update tendersiae with the email send date (if not already sent) & the tender siae_email_send_count
+        TenderSiae.objects.filter(id=tendersiae.id).set_funnel_date("email_send_date")
 
 
 def send_tender_emails_to_partners(tender: Tender):
@@ -196,7 +326,7 @@ def send_tender_emails_to_partners(tender: Tender):
 
 
 def send_tender_email_to_partner(tender: Tender, partner: PartnerShareTender, email_subject: str):
-    email_template = TemplateTransactional.objects.get(code="TENDERS_PARTNER_PRESENTATION")
+    email_template = TemplateTransactional.objects.get_by_code("TENDERS_PARTNER_PRESENTATION")
     recipient_list = whitelist_recipient_list(partner.contact_email_list)
     if recipient_list:
         variables = {
@@ -209,13 +339,13 @@ def send_tender_email_to_partner(tender: Tender, partner: PartnerShareTender, em
             "TENDER_DEADLINE_DATE": date_to_string(tender.deadline_date),
             "TENDER_URL": get_object_share_url(tender),
         }
-        for recipient_email in recipient_list:
-            email_template.send_transactional_email(
-                recipient_email=recipient_email,
-                recipient_name=partner.name,
-                variables=variables,
-                subject=email_subject,
-            )
+        email_template.send_transactional_emails(
+            [
+                {"recipient_email": recipient_email, "recipient_name": partner.name, "variables": variables}
+                for recipient_email in recipient_list
+            ],
+            subject=email_subject,
+        )
         # log email
         log_item = {
             "action": "email_tender",
@@ -237,11 +367,11 @@ def send_tender_contacted_reminder_email_to_siaes(
     tender: Tender, days_since_email_send_date=2, send_on_weekends=False
 ):
     if days_since_email_send_date == 2:
-        email_template = TemplateTransactional.objects.get(code="TENDERS_SIAE_CONTACTED_REMINDER_2D")
+        email_template = TemplateTransactional.objects.get_by_code("TENDERS_SIAE_CONTACTED_REMINDER_2D")
     elif days_since_email_send_date == 3:
-        email_template = TemplateTransactional.objects.get(code="TENDERS_SIAE_CONTACTED_REMINDER_3D")
+        email_template = TemplateTransactional.objects.get_by_code("TENDERS_SIAE_CONTACTED_REMINDER_3D")
     elif days_since_email_send_date == 4:
-        email_template = TemplateTransactional.objects.get(code="TENDERS_SIAE_CONTACTED_REMINDER_4D")
+        email_template = TemplateTransactional.objects.get_by_code("TENDERS_SIAE_CONTACTED_REMINDER_4D")
     else:
         error_message = f"send_tender_contacted_reminder_email_to_siaes: days_since_email_send_date has a non-managed value ({days_since_email_send_date})"  # noqa
         raise Exception(error_message)
@@ -254,13 +384,20 @@ def send_tender_contacted_reminder_email_to_siaes(
     if current_weekday == 0 and not send_on_weekends:
         # Monday: special case (need to account for Saturday & Sunday)
         gte_days_ago = timezone.now() - timedelta(days=days_since_email_send_date + 1 + 2)
-    tendersiae_contacted_reminder_list = TenderSiae.objects.filter(tender_id=tender.id).email_click_reminder(
-        gte_days_ago=gte_days_ago, lt_days_ago=lt_days_ago
+    tendersiae_contacted_reminder_list = (
+        TenderSiae.objects.filter(tender_id=tender.id)
+        .email_click_reminder(gte_days_ago=gte_days_ago, lt_days_ago=lt_days_ago)
+        .select_related("siae", "tender__author")
     )
 
-    for tendersiae in tendersiae_contacted_reminder_list:
-        # send to siae 'contact_email'
-        send_tender_contacted_reminder_email_to_siae(tendersiae, email_template, days_since_email_send_date)
+    # send to siae 'contact_email' (single batch)
+    recipients = [
+        get_tender_contacted_reminder_recipient(tendersiae, days_since_email_send_date)
+        for tendersiae in tendersiae_contacted_reminder_list
+    ]
+    recipients = [recipient for recipient in recipients if recipient]
+    if recipients:
+        email_template.send_transactional_emails(recipients)
 
     # log email batch
     log_item = {
@@ -273,7 +410,10 @@ def send_tender_contacted_reminder_email_to_siaes(
     tender.save()
 
 
-def send_tender_contacted_reminder_email_to_siae(tendersiae: TenderSiae, email_template, days_since_email_send_date):
+def get_tender_contacted_reminder_recipient(tendersiae: TenderSiae, days_since_email_send_date):
+    """
+    Return the recipient (see TemplateTransactional.send_transactional_emails), or None if not whitelisted
+    """
     recipient_list = whitelist_recipient_list([tendersiae.siae.contact_email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -297,19 +437,20 @@ def send_tender_contacted_reminder_email_to_siae(tendersiae: TenderSiae, email_t
             "DAYS_SINCE_EMAIL_SEND_DATE": days_since_email_send_date,
         }
 
-        email_template.send_transactional_email(
-            recipient_email=recipient_email,
-            recipient_name=recipient_name,
-            variables=variables,
-            recipient_content_object=tendersiae.siae,
-            parent_content_object=tendersiae,
-        )
+        return {
+            "recipient_email": recipient_email,
+            "recipient_name": recipient_name,
+            "variables": variables,
+            "recipient_content_object": tendersiae.siae,
+            "parent_content_object": tendersiae,
+        }
+    return None
 
 
 def send_tender_interested_reminder_email_to_siaes(
     tender: Tender, days_since_detail_contact_click_date=2, send_on_weekends=False
 ):
-    email_template = TemplateTransactional.objects.get(code="TENDERS_SIAE_INTERESTED_REMINDER_2D")
+    email_template = TemplateTransactional.objects.get_by_code("TENDERS_SIAE_INTERESTED_REMINDER_2D")
 
     current_weekday = timezone.now().weekday()
 
@@ -319,13 +460,20 @@ def send_tender_interested_reminder_email_to_siaes(
     if current_weekday == 0 and not send_on_weekends:
         # Monday: special case (need to account for Saturday & Sunday)
         gte_days_ago = timezone.now() - timedelta(days=days_since_detail_contact_click_date + 1 + 2)
-    tendersiae_interested_reminder_list = TenderSiae.objects.filter(
-        tender_id=tender.id
-    ).detail_contact_click_post_reminder(gte_days_ago=gte_days_ago, lt_days_ago=lt_days_ago)
+    tendersiae_interested_reminder_list = (
+        TenderSiae.objects.filter(tender_id=tender.id)
+        .detail_contact_click_post_reminder(gte_days_ago=gte_days_ago, lt_days_ago=lt_days_ago)
+        .select_related("siae", "tender__author")
+    )
 
-    for tendersiae in tendersiae_interested_reminder_list:
-        # send to siae 'contact_email'
-        send_tender_interested_reminder_email_to_siae(tendersiae, email_template, days_since_detail_contact_click_date)
+    # send to siae 'contact_email' (single batch)
+    recipients = [
+        get_tender_interested_reminder_recipient(tendersiae, days_since_detail_contact_click_date)
+        for tendersiae in tendersiae_interested_reminder_list
+    ]
+    recipients = [recipient for recipient in recipients if recipient]
+    if recipients:
+        email_template.send_transactional_emails(recipients)
 
     # log email batch
     log_item = {
@@ -338,9 +486,10 @@ def send_tender_interested_reminder_email_to_siaes(
     tender.save()
 
 
-def send_tender_interested_reminder_email_to_siae(
-    tendersiae: TenderSiae, email_template, days_since_detail_contact_click_date
-):
+def get_tender_interested_reminder_recipient(tendersiae: TenderSiae, days_since_detail_contact_click_date):
+    """
+    Return the recipient (see TemplateTransactional.send_transactional_emails), or None if not whitelisted
+    """
     recipient_list = whitelist_recipient_list([tendersiae.siae.contact_email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -364,13 +513,14 @@ def send_tender_interested_reminder_email_to_siae(
             "DAYS_SINCE_DETAIL_CONTACT_SEND_DATE": days_since_detail_contact_click_date,
         }
 
-        email_template.send_transactional_email(
-            recipient_email=recipient_email,
-            recipient_name=recipient_name,
-            variables=variables,
-            recipient_content_object=tendersiae.siae,
-            parent_content_object=tendersiae,
-        )
+        return {
+            "recipient_email": recipient_email,
+            "recipient_name": recipient_name,
+            "variables": variables,
+            "recipient_content_object": tendersiae.siae,
+            "parent_content_object": tendersiae,
+        }
+    return None
 
 
 def send_confirmation_published_email_to_author(tender: Tender):
@@ -383,7 +533,7 @@ def send_confirmation_published_email_to_author(tender: Tender):
         if tender.send_to_commercial_partners_only
         else "TENDERS_AUTHOR_CONFIRMATION_VALIDATED"
     )
-    email_template = TemplateTransactional.objects.get(code=template_code)
+    email_template = TemplateTransactional.objects.get_by_code(template_code)
     recipient_list = whitelist_recipient_list([tender.author.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -458,7 +608,7 @@ def send_siae_interested_email_to_author(tender: Tender):
         else:
             return
 
-        email_template = TemplateTransactional.objects.get(code=email_template_name)
+        email_template = TemplateTransactional.objects.get_by_code(email_template_name)
         recipient_list = whitelist_recipient_list([tender.author.email])  # tender.contact_email ?
         if len(recipient_list):
             recipient_email = recipient_list[0]
@@ -531,7 +681,7 @@ def send_tenders_author_feedback_or_survey(tender: Tender, kind="feedback_30d"):
                 email_template_name = "TALLY_TENDERS_AUTHOR_TRANSACTIONED_QUESTION_7D"
             else:
                 email_template_name = "TENDERS_AUTHOR_TRANSACTIONED_QUESTION_7D"
-            email_template = TemplateTransactional.objects.get(code=email_template_name)
+            email_template = TemplateTransactional.objects.get_by_code(email_template_name)
             user_sesame_query_string = sesame_get_query_string(tender.author)  # TODO: sesame scope parameter
             answer_url_with_sesame_token = (
                 f"https://{get_domain_url()}"
@@ -548,7 +698,7 @@ def send_tenders_author_feedback_or_survey(tender: Tender, kind="feedback_30d"):
                 email_template_name = "TALLY_TENDERS_AUTHOR_FEEDBACK_30D"
             else:
                 email_template_name = "TENDERS_AUTHOR_FEEDBACK_30D"
-            email_template = TemplateTransactional.objects.get(code=email_template_name)
+            email_template = TemplateTransactional.objects.get_by_code(email_template_name)
 
         if not tender.contact_notifications_disabled:
             email_template.send_transactional_email(
@@ -587,7 +737,7 @@ def send_tender_author_modification_request(tender: Tender):
     else:
         email_template_name = "TENDERS_AUTHOR_MODIFICATION_REQUEST"
 
-    email_template = TemplateTransactional.objects.get(code=email_template_name)
+    email_template = TemplateTransactional.objects.get_by_code(email_template_name)
 
     if not tender.contact_notifications_disabled:
         email_template.send_transactional_email(
@@ -621,7 +771,7 @@ def send_tender_author_reject_message(tender: Tender):
         email_template_name = "TALLY_TENDERS_AUTHOR_REJECT_MESSAGE"
     else:
         email_template_name = "TENDERS_AUTHOR_REJECT_MESSAGE"
-    email_template = TemplateTransactional.objects.get(code=email_template_name)
+    email_template = TemplateTransactional.objects.get_by_code(email_template_name)
 
     if not tender.contact_notifications_disabled:
         email_template.send_transactional_email(
@@ -642,8 +792,19 @@ def send_tenders_siaes_survey(tender: Tender, kind="transactioned_question_7d"):
         # siae must not have received the survey yet
         tendersiae_qs = tendersiae_qs.filter(survey_transactioned_answer=None, survey_transactioned_send_date=None)
 
-        for tendersiae in tendersiae_qs:
-            send_tenders_siae_survey(tendersiae, kind=kind)
+        # send to the siae users (single batch)
+        email_template = TemplateTransactional.objects.get_by_code("TENDERS_SIAE_TRANSACTIONED_QUESTION_7D")
+        recipients = []
+        for tendersiae in tendersiae_qs.select_related("siae", "tender__author").prefetch_related("siae__users"):
+            recipients += get_tenders_siae_survey_recipients(tendersiae)
+        if recipients:
+            email_template.send_transactional_emails(recipients)
+
+        # update tendersiaes
+        now = timezone.now()
+        TenderSiae.objects.filter(id__in={recipient["parent_content_object"].id for recipient in recipients}).update(
+            survey_transactioned_send_date=now, updated_at=now
+        )
 
         # log email batch
         log_item = {
@@ -655,9 +816,11 @@ def send_tenders_siaes_survey(tender: Tender, kind="transactioned_question_7d"):
         tender.save()
 
 
-def send_tenders_siae_survey(tendersiae: TenderSiae, kind="transactioned_question_7d"):
-    email_template = TemplateTransactional.objects.get(code="TENDERS_SIAE_TRANSACTIONED_QUESTION_7D")
-
+def get_tenders_siae_survey_recipients(tendersiae: TenderSiae):
+    """
+    Return the recipients (see TemplateTransactional.send_transactional_emails): the whitelisted siae users
+    """
+    recipients = []
     for user in tendersiae.siae.users.all():
         recipient_list = whitelist_recipient_list([user.email])
         if len(recipient_list):
@@ -688,17 +851,16 @@ def send_tenders_siae_survey(tendersiae: TenderSiae, kind="transactioned_questio
             variables["ANSWER_YES_URL"] = answer_url_with_sesame_token + "&answer=True"
             variables["ANSWER_NO_URL"] = answer_url_with_sesame_token + "&answer=False"
 
-            email_template.send_transactional_email(
-                recipient_email=recipient_email,
-                recipient_name=recipient_name,
-                variables=variables,
-                recipient_content_object=user,
-                parent_content_object=tendersiae,
+            recipients.append(
+                {
+                    "recipient_email": recipient_email,
+                    "recipient_name": recipient_name,
+                    "variables": variables,
+                    "recipient_content_object": user,
+                    "parent_content_object": tendersiae,
+                }
             )
-
-            # update tendersiae
-            tendersiae.survey_transactioned_send_date = timezone.now()
-            tendersiae.save()
+    return recipients
 
 
 def send_super_siaes_email_to_author(tender: Tender, top_siaes: list[Siae]):
@@ -707,7 +869,7 @@ def send_super_siaes_email_to_author(tender: Tender, top_siaes: list[Siae]):
     else:
         email_template_name = "TENDERS_AUTHOR_SUPER_SIAES"
 
-    email_template = TemplateTransactional.objects.get(code=email_template_name)
+    email_template = TemplateTransactional.objects.get_by_code(email_template_name)
     recipient_list = whitelist_recipient_list([tender.author.email])
     if len(recipient_list):
         recipient_email = recipient_list[0]
@@ -761,7 +923,7 @@ def notify_referents_for_groupement(tender: Tender, initiating_siae: Siae):
     from lemarche.utils.apis.api_brevo import BrevoTransactionalEmailApiClient
 
     try:
-        email_template = TemplateTransactional.objects.get(code=GROUPEMENT_REFERENT_TEMPLATE_CODE)
+        email_template = TemplateTransactional.objects.get_by_code(GROUPEMENT_REFERENT_TEMPLATE_CODE)
     except TemplateTransactional.DoesNotExist:
         logger.warning(
             "Template %s not found — groupement referent notification skipped", GROUPEMENT_REFERENT_TEMPLATE_CODE
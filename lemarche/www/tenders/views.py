@@ -520,13 +520,13 @@ class TenderDetailView(TenderAuthorOrAdminRequiredIfNotSentMixin, DetailView):
         # update 'email_link_click_date'
         if self.tender_siae:
             if self.user_from_get:
-                TenderSiae.objects.filter(
-                    id=self.tender_siae.id, tender=self.object, email_link_click_date=None
-                ).update(user=self.user_from_get, email_link_click_date=timezone.now(), updated_at=timezone.now())
+                TenderSiae.objects.filter(id=self.tender_siae.id, tender=self.object).set_funnel_date(
+                    "email_link_click_date", user=self.user_from_get
+                )
             else:
-                TenderSiae.objects.filter(
-                    id=self.tender_siae.id, tender=self.object, email_link_click_date=None
-                ).update(email_link_click_date=timezone.now(), updated_at=timezone.now())
+                TenderSiae.objects.filter(id=self.tender_siae.id, tender=self.object).set_funnel_date(
+                    "email_link_click_date"
+                )
         # update 'detail_display_date'
         if user.is_authenticated:
             if user.kind == User.KIND_SIAE:
@@ -539,9 +539,9 @@ class TenderDetailView(TenderAuthorOrAdminRequiredIfNotSentMixin, DetailView):
                             tender=self.object, siae=siae, source=tender_constants.TENDER_SIAE_SOURCE_LINK
                         )
                 # update stats
-                TenderSiae.objects.filter(
-                    tender=self.object, siae__in=user.siaes.all(), detail_display_date__isnull=True
-                ).update(user=user, detail_display_date=timezone.now(), updated_at=timezone.now())
+                TenderSiae.objects.filter(tender=self.object, siae__in=user.siaes.all()).set_funnel_date(
+                    "detail_display_date", user=user
+                )
         return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
@@ -695,13 +695,13 @@ class TenderDetailContactClickStatView(SiaeUserRequiredOrTenderSiaeUUIDParamMixi
 
         # update detail_contact_click_date
         if user.is_authenticated:
-            TenderSiae.objects.filter(
-                tender=self.object, siae__in=siae_qs, detail_contact_click_date__isnull=True
-            ).update(user=user, detail_contact_click_date=timezone.now(), updated_at=timezone.now())
+            TenderSiae.objects.filter(tender=self.object, siae__in=siae_qs).set_funnel_date(
+                "detail_contact_click_date", user=user
+            )
         else:
-            TenderSiae.objects.filter(
-                tender=self.object, siae__in=siae_qs, detail_contact_click_date__isnull=True
-            ).update(detail_contact_click_date=timezone.now(), updated_at=timezone.now())
+            TenderSiae.objects.filter(tender=self.object, siae__in=siae_qs).set_funnel_date(
+                "detail_contact_click_date"
+            )
 
         # notify the tender author
         send_siae_interested_email_to_author(self.object)
@@ -753,21 +753,15 @@ class TenderDetailNotInterestedClickView(SiaeUserRequiredOrTenderSiaeUUIDParamMi
         tender_siae_uuid = request.GET.get("tender_siae_uuid", None)
 
         if user.is_authenticated:
-            TenderSiae.objects.filter(
-                tender=self.object, siae__in=user.siaes.all(), detail_not_interested_click_date__isnull=True
-            ).update(
+            TenderSiae.objects.filter(tender=self.object, siae__in=user.siaes.all()).set_funnel_date(
+                "detail_not_interested_click_date",
                 user=user,
                 detail_not_interested_feedback=self.request.POST.get("detail_not_interested_feedback", ""),
-                detail_not_interested_click_date=timezone.now(),
-                updated_at=timezone.now(),
             )
         else:
-            TenderSiae.objects.filter(
-                uuid=tender_siae_uuid, tender=self.object, detail_not_interested_click_date__isnull=True
-            ).update(
+            TenderSiae.objects.filter(uuid=tender_siae_uuid, tender=self.object).set_funnel_date(
+                "detail_not_interested_click_date",
                 detail_not_interested_feedback=self.request.POST.get("detail_not_interested_feedback", ""),
-                detail_not_interested_click_date=timezone.now(),
-                updated_at=timezone.now(),
             )
         # redirect
         return HttpResponseRedirect(self.get_success_url(tender_siae_uuid))
@@ -1,7 +1,9 @@
+import pytest
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 
+from lemarche.api.inclusive_potential.utils import get_inclusive_potential_data, get_inclusive_potential_data_list
 from lemarche.perimeters.models import Perimeter
 from lemarche.siaes.constants import KIND_HANDICAP_LIST, KIND_INSERTION_LIST
 from tests.perimeters.factories import PerimeterFactory
@@ -185,3 +187,58 @@ class InclusivePotentialViewTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["potential_siaes"], 0)
         self.assertEqual(response.data["recommendation"]["title"], "Aucun potentiel inclusif identifié")
+
+
+class InclusivePotentialUtilsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sector = SectorFactory()
+        cls.other_sector = SectorFactory(group=cls.sector.group)
+        cls.perimeter_department = PerimeterFactory(
+            name="Paris", kind=Perimeter.KIND_DEPARTMENT, insee_code="75", region_code="11"
+        )
+        siae_1 = SiaeFactory(kind=KIND_INSERTION_LIST[0], department="75", ca=100000, c2_etp_count=10)
+        siae_2 = SiaeFactory(kind=KIND_HANDICAP_LIST[0], api_entreprise_ca=300000, employees_insertion_count=4)
+        for siae in [siae_1, siae_2]:
+            siae_activity = SiaeActivityFactory(siae=siae, sector=cls.sector, with_zones_perimeter=True)
+            siae_activity.locations.set([cls.perimeter_department])
+            # the siae are counted only once, even with multiple matching activities
+            siae_activity = SiaeActivityFactory(siae=siae, sector=cls.sector, with_country_perimeter=True)
+
+    def test_get_inclusive_potential_data_single_query(self):
+        with self.assertNumQueries(1):
+            potential_data, analysis_data = get_inclusive_potential_data(self.sector, self.perimeter_department, 20000)
+        self.assertEqual(potential_data.potential_siaes, 2)
+        self.assertEqual(potential_data.insertion_siaes, 1)
+        self.assertEqual(potential_data.handicap_siaes, 1)
+        self.assertEqual(potential_data.local_siaes, 1)
+        self.assertEqual(potential_data.employees_insertion_average, 7)
+        self.assertEqual(analysis_data["ca_average"], 200000)
+        self.assertEqual(analysis_data["eco_dependency"], 10)
+
+    @pytest.mark.usefixtures("locmem_cache")
+    def test_get_inclusive_potential_data_cached(self):
+        potential_data, _ = get_inclusive_potential_data(self.sector, self.perimeter_department, None)
+        self.assertEqual(potential_data.potential_siaes, 2)
+        with self.assertNumQueries(0):
+            get_inclusive_potential_data(self.sector, self.perimeter_department, 10000)
+        # invalidated when a siae changes
+        siae = SiaeFactory(kind=KIND_INSERTION_LIST[0])
+        SiaeActivityFactory(siae=siae, sector=self.sector, with_country_perimeter=True)
+        potential_data, _ = get_inclusive_potential_data(self.sector, self.perimeter_department, None)
+        self.assertEqual(potential_data.potential_siaes, 3)
+
+    def test_get_inclusive_potential_data_list(self):
+        projects = [
+            (self.sector, self.perimeter_department, 20000),
+            (self.sector, self.perimeter_department, 40000),
+            (self.other_sector, None, None),
+        ]
+        with self.assertNumQueries(2):
+            results = get_inclusive_potential_data_list(projects)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0].potential_siaes, 2)
+        self.assertEqual(results[0][1]["eco_dependency"], 10)
+        self.assertEqual(results[1][1]["eco_dependency"], 20)
+        self.assertEqual(results[2][0].potential_siaes, 0)
+        self.assertEqual(results[2][1], {})
@@ -119,6 +119,19 @@ class PerimetersAutocompleteFilterApiTest(TestCase):
         response = self.client.get(url)
         self.assertEqual(len(response.data), 0)
 
+    def test_should_filter_perimeters_autocomplete_by_q_name_without_accents(self):
+        url = reverse("api:perimeters-autocomplete-list") + "?q=isere"  # anonymous user
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["name"], "Isère")
+        self.assertEqual(response.data[0]["insee_code"], "38")
+
+    def test_should_filter_perimeters_autocomplete_by_q_and_result_count(self):
+        url = reverse("api:perimeters-autocomplete-list") + "?q=38&results=1"  # anonymous user
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["name"], "Isère")
+
     def test_should_filter_perimeters_autocomplete_by_result_count(self):
         url = reverse("api:perimeters-autocomplete-list") + "?results=1"  # anonymous user
         response = self.client.get(url)
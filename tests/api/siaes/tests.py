@@ -1,3 +1,7 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -150,6 +154,95 @@ class SiaeListFilterApiTest(TestCase):
         self.assertEqual(len(response.data["results"]), 1 + 1)
 
 
+class SiaeListKeysetPaginationApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.siae_old = SiaeFactory(name="Ancienne")
+        cls.siae_recent_1 = SiaeFactory(name="Récente 1")
+        cls.siae_recent_2 = SiaeFactory(name="Récente 2")
+        cls.siae_recent_3 = SiaeFactory(name="Récente 3")
+        SiaeFactory(kind="OPCS")
+        cls.recent_date = timezone.now()
+        Siae.objects.filter(id=cls.siae_old.id).update(updated_at=cls.recent_date - timedelta(days=30))
+        # same updated_at: ordered by id
+        Siae.objects.filter(id__in=[cls.siae_recent_1.id, cls.siae_recent_2.id, cls.siae_recent_3.id]).update(
+            updated_at=cls.recent_date
+        )
+        cls.user_token = generate_random_string()
+        UserFactory(api_key=cls.user_token)
+        cls.authenticated_client = cls.client_class(headers={"authorization": f"Bearer {cls.user_token}"})
+
+    def test_should_paginate_with_cursor(self):
+        url = reverse("api:siae-list") + "?cursor=&limit=2"
+        response = self.authenticated_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertEqual([siae["id"] for siae in response.data["results"]], [self.siae_old.id, self.siae_recent_1.id])
+        self.assertIsNotNone(response.data["next"])
+        # next page (the siaes with the same updated_at are not skipped)
+        response = self.authenticated_client.get(response.data["next"])
+        self.assertEqual(
+            [siae["id"] for siae in response.data["results"]], [self.siae_recent_2.id, self.siae_recent_3.id]
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_should_return_404_if_cursor_invalid(self):
+        url = reverse("api:siae-list") + "?cursor=invalid"
+        response = self.authenticated_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_should_keep_limit_offset_pagination_without_cursor(self):
+        url = reverse("api:siae-list") + "?limit=2"
+        response = self.authenticated_client.get(url)
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_should_filter_siae_list_by_updated_since(self):
+        updated_since = (self.recent_date - timedelta(days=1)).isoformat()
+        response = self.authenticated_client.get(
+            reverse("api:siae-list"), {"cursor": "", "updated_since": updated_since}
+        )
+        self.assertEqual(
+            [siae["id"] for siae in response.data["results"]],
+            [self.siae_recent_1.id, self.siae_recent_2.id, self.siae_recent_3.id],
+        )
+
+
+class SiaeStreamApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.siae_1 = SiaeFactory(department="38")
+        cls.siae_2 = SiaeFactory(department="38")
+        cls.siae_3 = SiaeFactory(department="01")
+        SiaeActivityFactory(siae=cls.siae_1, sector=SectorFactory(), presta_type=[siae_constants.PRESTA_BUILD])
+        SiaeFactory(kind="OPCS", department="38")
+        for index, siae in enumerate([cls.siae_1, cls.siae_2, cls.siae_3]):
+            Siae.objects.filter(id=siae.id).update(updated_at=timezone.now() - timedelta(days=3 - index))
+        cls.user_token = generate_random_string()
+        UserFactory(api_key=cls.user_token)
+        cls.authenticated_client = cls.client_class(headers={"authorization": f"Bearer {cls.user_token}"})
+
+    def test_should_return_401_to_anonymous_users(self):
+        response = self.client.get(reverse("api:siae-stream"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_should_stream_siaes_as_ndjson(self):
+        with mock.patch("lemarche.api.siaes.views.SiaeViewSet.stream_chunk_size", 2):
+            response = self.authenticated_client.get(reverse("api:siae-stream"))
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("X-Next-Updated-Since", response)
+        siaes = [json.loads(line) for line in lines]
+        self.assertEqual([siae["id"] for siae in siaes], [self.siae_1.id, self.siae_2.id, self.siae_3.id])
+        self.assertEqual(siaes[0]["presta_types"], [siae_constants.PRESTA_BUILD])
+
+    def test_should_filter_the_stream(self):
+        response = self.authenticated_client.get(reverse("api:siae-stream"), {"department": "01"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [self.siae_3.id])
+
+
 class SiaeDetailApiTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -200,7 +293,7 @@ class SiaeDetailApiTest(TestCase):
 
     def test_should_return_detailed_siae_object_to_authenticated_users(self):
         url = reverse("api:siae-detail", args=[self.siae.id])
-        with self.assertNumQueries(8):
+        with self.assertNumQueries(7):
             response = self.authenticated_client.get(url)
         self.assertTrue("id" in response.data)
         self.assertTrue("name" in response.data)
@@ -0,0 +1,77 @@
+import pytest
+from django.test import TestCase
+from django.urls import reverse
+
+from lemarche.api.utils import generate_random_string
+from tests.sectors.factories import SectorFactory
+from tests.siaes.factories import SiaeFactory, SiaeOfferFactory
+from tests.users.factories import UserFactory
+
+
+@pytest.mark.usefixtures("locmem_cache")
+class ConditionalResponseApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sector = SectorFactory(name="Sector 1")
+        cls.siae = SiaeFactory()
+        cls.user_token = generate_random_string()
+        UserFactory(api_key=cls.user_token)
+        cls.authenticated_client = cls.client_class(headers={"authorization": f"Bearer {cls.user_token}"})
+
+    def test_should_return_etag_and_304_if_not_modified(self):
+        url = reverse("api:sectors-list")
+        response = self.authenticated_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertNumQueries(1):  # authentication only
+            response = self.authenticated_client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        # weak ETag (GZip middleware)
+        response = self.authenticated_client.get(url, headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(response.status_code, 304)
+        # other parameters: other ETag
+        response = self.authenticated_client.get(url + "?limit=1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_should_change_when_the_model_changes(self):
+        url = reverse("api:sectors-list")
+        etag = self.authenticated_client.get(url)["ETag"]
+
+        self.sector.name = "Sector 1 (renamed)"
+        self.sector.save()
+
+        response = self.authenticated_client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["results"][0]["name"], "Sector 1 (renamed)")
+
+    def test_should_cache_the_static_lists(self):
+        url = reverse("api:siae-kinds-list")
+        response = self.authenticated_client.get(url)
+        with self.assertNumQueries(1):  # authentication only
+            cached_response = self.authenticated_client.get(url)
+        self.assertEqual(cached_response.status_code, 200)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cached_response["ETag"], response["ETag"])
+
+    def test_siae_detail_etag_should_change_when_its_offers_change(self):
+        url = reverse("api:siae-detail", args=[self.siae.id])
+        etag = self.authenticated_client.get(url)["ETag"]
+        response = self.authenticated_client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        SiaeOfferFactory(siae=self.siae)
+
+        response = self.authenticated_client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["offers"]), 1)
+
+    def test_should_not_return_etag_on_errors(self):
+        response = self.client.get(reverse("api:sectors-list"))  # anonymous
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn("ETag", response)
@@ -52,6 +52,19 @@ def _uses_db(item):
     return "db" in names or "transactional_db" in names
 
 
+@pytest.fixture
+def locmem_cache(settings):
+    """
+    A real (and empty) cache instead of the DummyCache of the tests
+    """
+    from django.core.cache import cache
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
 def pytest_runtest_setup(item):
     path = _snapshot.get("path")
     if not path or not _uses_db(item):
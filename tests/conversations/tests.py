@@ -1,6 +1,7 @@
 from datetime import UTC, datetime
 from unittest.mock import patch
 
+import pytest
 from django.core.exceptions import ValidationError
 from django.core.management import call_command
 from django.test import TestCase, TransactionTestCase, override_settings
@@ -155,6 +156,74 @@ class TemplateTransactionalModelTest(TestCase):
         self.tt_active_brevo.send_transactional_email(recipient_email=email_test, recipient_name="test", variables={})
         mock_instance.send_transactional_email_with_template.assert_not_called()
 
+    @patch("lemarche.conversations.tasks.api_brevo.BrevoTransactionalEmailApiClient")
+    def test_send_transactional_emails_brevo(self, mock_brevo_client_class):
+        mock_instance = mock_brevo_client_class.return_value
+        email_disabled = "disabled@example.com"
+        DisabledEmail.objects.create(user=UserFactory(email=email_disabled), group=self.email_group)
+        user = UserFactory(email="test2@example.com")
+
+        self.tt_active_brevo.save()
+        recipients = self.tt_active_brevo.send_transactional_emails(
+            [
+                {"recipient_email": "test1@example.com", "recipient_name": "test 1", "variables": {}},
+                {
+                    "recipient_email": user.email,
+                    "recipient_name": "test 2",
+                    "variables": {"ID": user.id},
+                    "recipient_content_object": user,
+                },
+                {"recipient_email": email_disabled, "recipient_name": "disabled", "variables": {}},
+            ]
+        )
+        self.assertEqual(len(recipients), 2)
+        # a single batch task
+        mock_instance.send_transactional_emails_with_template.assert_called_once()
+        _, kwargs = mock_instance.send_transactional_emails_with_template.call_args
+        self.assertEqual(
+            [recipient["recipient_email"] for recipient in kwargs["recipients"]],
+            ["test1@example.com", "test2@example.com"],
+        )
+        # one log per recipient
+        self.assertEqual(self.tt_active_brevo.send_logs.count(), 2)
+        self.assertEqual(self.tt_active_brevo.send_logs.filter(recipient_object_id=user.id).count(), 1)
+
+    @patch("lemarche.conversations.tasks.api_brevo.BrevoTransactionalEmailApiClient")
+    def test_send_transactional_emails_inactive(self, mock_brevo_client_class):
+        mock_instance = mock_brevo_client_class.return_value
+        self.tt_inactive.save()
+        self.tt_inactive.send_transactional_emails(
+            [{"recipient_email": "test@example.com", "recipient_name": "test", "variables": {}}]
+        )
+        mock_instance.send_transactional_emails_with_template.assert_not_called()
+        self.assertEqual(self.tt_inactive.send_logs.count(), 0)
+
+
+@pytest.mark.usefixtures("locmem_cache")
+class TemplateTransactionalQuerysetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.email_group = EmailGroupFactory()
+        cls.template = TemplateTransactionalFactory(code="CODE_1", brevo_id=1, group=cls.email_group)
+
+    def test_get_by_code(self):
+        template = TemplateTransactional.objects.get_by_code("CODE_1")
+        self.assertEqual(template, self.template)
+        with self.assertNumQueries(0):
+            template = TemplateTransactional.objects.get_by_code("CODE_1")
+            self.assertEqual(template.group, self.email_group)
+        self.assertRaises(TemplateTransactional.DoesNotExist, TemplateTransactional.objects.get_by_code, "UNKNOWN")
+
+    def test_get_by_code_invalidated_on_change(self):
+        self.assertFalse(TemplateTransactional.objects.get_by_code("CODE_1").is_active)
+        self.template.is_active = True
+        self.template.save()
+        self.assertTrue(TemplateTransactional.objects.get_by_code("CODE_1").is_active)
+
+        self.email_group.can_be_unsubscribed = True
+        self.email_group.save()
+        self.assertTrue(TemplateTransactional.objects.get_by_code("CODE_1").group.can_be_unsubscribed)
+
 
 class TemplateTransactionalModelSaveTest(TransactionTestCase):
     def test_template_transactional_validation_on_save(self):
@@ -7,6 +7,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from lemarche.crm.management.commands.crm_brevo_sync_companies import Command
+from lemarche.utils.apis import api_brevo
 from tests.companies.factories import CompanyFactory
 from tests.siaes.factories import SiaeFactory
 
@@ -136,6 +137,10 @@ class CrmBrevoSyncCompaniesCommandTest(TestCase):
                     "tender_interest": 0,  # No annotated stats
                 }
             }
+            # and the fingerprint of their last synchronization
+            siae.extra_data[api_brevo.BREVO_COMPANY_FINGERPRINT_KEY] = api_brevo.get_company_body_fingerprint(
+                api_brevo.get_siae_company_body(siae)
+            )
             siae.save()
 
         out = StringIO()
@@ -143,6 +148,15 @@ class CrmBrevoSyncCompaniesCommandTest(TestCase):
 
         # Verify API was not called because data didn't change
         self.assertEqual(mock_client.create_or_update_company.call_count, 0)
+
+        # the name of a SIAE changed (but not its stats): only this SIAE is sent again
+        self.siae1.name = "Company 1 (renamed)"
+        self.siae1.save()
+
+        call_command("crm_brevo_sync_companies", company_type="siae", stdout=out)
+
+        mock_client.create_or_update_company.assert_called_once()
+        self.assertEqual(mock_client.create_or_update_company.call_args.args[0], self.siae1)
         output = out.getvalue()
         self.assertNotIn("Processing buyer companies", output)
         self.assertIn("Synchronization completed", output)
@@ -1,7 +1,12 @@
 import json
+from unittest import mock
 
+import httpx
+from django.core.management import call_command
 from django.utils import timezone
 
+from lemarche.nexus.models import NexusSyncOutbox
+from lemarche.nexus.sync import serialize_user
 from lemarche.siaes.models import Siae, SiaeUser
 from lemarche.users.models import User
 from lemarche.utils.urls import get_object_share_url
@@ -626,3 +631,124 @@ class TestSiaeUserSync:
         assert call.request.method == "DELETE"
         assert call.request.url == "http://nexus/api/memberships"
         assert_call_content(call, [{"id": str(siae_user_1.pk)}, {"id": str(siae_user_2.pk)}])
+
+
+class TestSyncOutbox:
+    def test_changes_are_coalesced(
+        self, db, django_capture_on_commit_callbacks, mock_nexus_api, settings, locmem_cache
+    ):
+        settings.HUEY = settings.HUEY | {"immediate": False}
+        siae_1 = SiaeFactory()
+        siae_2 = SiaeFactory()
+
+        with mock.patch("lemarche.nexus.tasks.async_drain_sync_outbox.schedule") as mock_schedule:
+            with django_capture_on_commit_callbacks(execute=True):
+                siae_1.email = "first@email.com"
+                siae_1.save()
+            with django_capture_on_commit_callbacks(execute=True):
+                siae_1.email = "second@email.com"
+                siae_1.save()
+                siae_2.is_active = False
+                siae_2.save()
+        # a single drain, after the debounce delay
+        mock_schedule.assert_called_once_with(delay=settings.NEXUS_SYNC_DEBOUNCE_DELAY)
+        assert mock_nexus_api.calls == []
+        assert NexusSyncOutbox.objects.filter(kind=NexusSyncOutbox.KIND_SIAE).count() == 2
+
+        call_command("nexus_drain_sync_outbox")
+
+        [call_1, call_2] = mock_nexus_api.calls
+        assert call_1.request.method == "POST"
+        assert call_1.request.url == "http://nexus/api/structures"
+        [data] = json.loads(call_1.request.content.decode())
+        assert data["id"] == str(siae_1.pk)
+        assert data["email"] == "second@email.com"
+        assert call_2.request.method == "DELETE"
+        assert call_2.request.url == "http://nexus/api/structures"
+        assert_call_content(call_2, [{"id": str(siae_2.pk)}])
+        assert not NexusSyncOutbox.objects.exists()
+
+    def test_deleted_objects_are_deleted(self, db, django_capture_on_commit_callbacks, mock_nexus_api, settings):
+        settings.HUEY = settings.HUEY | {"immediate": False}
+        user = UserFactory()
+        user_id = user.pk
+
+        with mock.patch("lemarche.nexus.tasks.async_drain_sync_outbox.schedule"):
+            with django_capture_on_commit_callbacks(execute=True):
+                user.first_name = "John"
+                user.save()
+                user.delete()
+
+        call_command("nexus_drain_sync_outbox")
+
+        [call] = mock_nexus_api.calls
+        assert call.request.method == "DELETE"
+        assert call.request.url == "http://nexus/api/users"
+        assert_call_content(call, [{"id": str(user_id)}])
+
+    def test_objects_stay_in_the_outbox_if_nexus_fails(
+        self, db, django_capture_on_commit_callbacks, mock_nexus_api, settings
+    ):
+        settings.HUEY = settings.HUEY | {"immediate": False}
+        user = UserFactory()
+        with mock.patch("lemarche.nexus.tasks.async_drain_sync_outbox.schedule"):
+            with django_capture_on_commit_callbacks(execute=True):
+                user.first_name = "John"
+                user.save()
+        mock_nexus_api.post("http://nexus/api/users").mock(
+            side_effect=[httpx.Response(500, json={}), httpx.Response(200, json={})]
+        )
+
+        call_command("nexus_drain_sync_outbox")
+        assert NexusSyncOutbox.objects.filter(kind=NexusSyncOutbox.KIND_USER, object_id=user.pk).exists()
+
+        # sent by the next drain
+        call_command("nexus_drain_sync_outbox")
+        [_, call] = mock_nexus_api.calls
+        assert call.request.url == "http://nexus/api/users"
+        assert_call_content(call, [serialize_user(user)])
+        assert not NexusSyncOutbox.objects.exists()
+
+    def test_rejected_objects_do_not_block_the_outbox(
+        self, db, django_capture_on_commit_callbacks, mock_nexus_api, settings
+    ):
+        settings.HUEY = settings.HUEY | {"immediate": False}
+        settings.NEXUS_SYNC_OUTBOX_MAX_RETRIES = 1
+        users = UserFactory.create_batch(4)
+        rejected_user = users[1]
+        with mock.patch("lemarche.nexus.tasks.async_drain_sync_outbox.schedule"):
+            with django_capture_on_commit_callbacks(execute=True):
+                for user in users:
+                    user.first_name = "John"
+                    user.save()
+
+        def send_users(request):
+            ids = {data["id"] for data in json.loads(request.content.decode())}
+            return httpx.Response(400 if str(rejected_user.pk) in ids else 200, json={})
+
+        mock_nexus_api.post("http://nexus/api/users").mock(side_effect=send_users)
+
+        # the whole batch fails
+        call_command("nexus_drain_sync_outbox")
+        assert NexusSyncOutbox.objects.filter(kind=NexusSyncOutbox.KIND_USER, retry_count=1).count() == 4
+
+        # then the rejected user is isolated: the other ones are sent
+        call_command("nexus_drain_sync_outbox")
+        entry = NexusSyncOutbox.objects.get(kind=NexusSyncOutbox.KIND_USER)
+        assert entry.object_id == rejected_user.pk
+        assert entry.retry_count == 2
+        assert entry.last_error
+        sent_ids = {
+            data["id"]
+            for call in mock_nexus_api.calls
+            if call.response.status_code == 200
+            for data in json.loads(call.request.content.decode())
+        }
+        assert sent_ids == {str(user.pk) for user in users if user != rejected_user}
+
+    def test_nothing_recorded_without_nexus(self, db, django_capture_on_commit_callbacks, settings):
+        settings.NEXUS_API_BASE_URL = None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            UserFactory()
+        assert not NexusSyncOutbox.objects.exists()
@@ -1,10 +1,14 @@
 import json
 
-from django.core.management import call_command
+import httpx
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
 from django.utils import timezone
 from freezegun import freeze_time
 from itoutils.django.testing import assertSnapshotQueries
 
+from lemarche.nexus.management.commands import nexus_full_sync
 from lemarche.nexus.management.commands.populate_metabase_nexus import create_table, get_connection
 from lemarche.users.models import User
 from lemarche.utils.urls import get_object_share_url
@@ -188,3 +192,39 @@ def test_full_sync(db, mock_nexus_api, snapshot):
     assert call_completed.request.method == "POST"
     assert call_completed.request.url == "http://nexus/api/sync-completed"
     assert json.loads(call_completed.request.content.decode()) == {"started_at": started_at}
+
+
+@freeze_time()
+def test_full_sync_resume(db, mock_nexus_api, settings, monkeypatch, locmem_cache):
+    monkeypatch.setattr(nexus_full_sync.Command, "CHUNK_SIZE", 1)
+    user_1 = UserFactory()
+    user_2 = UserFactory()
+    siae = SiaeFactory()
+    siaeuser = SiaeUserFactory(user=user_1, siae=siae)
+    mock_nexus_api.post("http://nexus/api/users").mock(
+        side_effect=[httpx.Response(200, json={}), httpx.Response(500, json={}), httpx.Response(200, json={})]
+    )
+    mock_nexus_api.reset()
+
+    with pytest.raises(CommandError):
+        call_command("nexus_full_sync", max_workers=1)
+    [call_init, call_sync_structures, call_sync_user_1, _] = mock_nexus_api.calls
+    started_at = call_init.response.json()["started_at"]
+    assert [data["id"] for data in json.loads(call_sync_user_1.request.content)] == [str(user_1.pk)]
+    assert cache.get(nexus_full_sync.CHECKPOINT_CACHE_KEY) == {
+        "started_at": started_at,
+        "structures": siae.pk,
+        "users": user_1.pk,
+    }
+
+    # only the objects not sent yet, in the same sync
+    mock_nexus_api.reset()
+    call_command("nexus_full_sync", max_workers=1, resume=True)
+    [call_sync_user_2, call_sync_memberships, call_completed] = mock_nexus_api.calls
+    assert call_sync_user_2.request.url == "http://nexus/api/users"
+    assert [data["id"] for data in json.loads(call_sync_user_2.request.content)] == [str(user_2.pk)]
+    assert call_sync_memberships.request.url == "http://nexus/api/memberships"
+    assert [data["id"] for data in json.loads(call_sync_memberships.request.content)] == [str(siaeuser.pk)]
+    assert call_completed.request.url == "http://nexus/api/sync-completed"
+    assert json.loads(call_completed.request.content.decode()) == {"started_at": started_at}
+    assert cache.get(nexus_full_sync.CHECKPOINT_CACHE_KEY) is None
@@ -1,5 +1,7 @@
+import pytest
 from django.test import TestCase
 
+from lemarche.perimeters.autocomplete import PerimeterAutocompleteIndex, get_perimeter_autocomplete_index
 from lemarche.perimeters.models import Perimeter
 from tests.perimeters.factories import PerimeterFactory
 
@@ -91,3 +93,94 @@ class PerimeterQuerysetTest(TestCase):
         qs = Perimeter.objects.post_code_search("38185", include_insee_code=True)
         self.assertEqual(qs.count(), 1)
         self.assertEqual(qs.first(), self.perimeter_city)
+
+
+class PerimeterAutocompleteIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.perimeter_city = PerimeterFactory(
+            name="Grenoble",
+            kind=Perimeter.KIND_CITY,
+            insee_code="38185",
+            department_code="38",
+            region_code="84",
+            post_codes=["38000", "38100", "38700"],
+            population=150000,
+        )
+        cls.perimeter_city_2 = PerimeterFactory(
+            name="Saint-Martin-d'Hères",
+            kind=Perimeter.KIND_CITY,
+            insee_code="38421",
+            department_code="38",
+            region_code="84",
+            post_codes=["38400"],
+            population=38000,
+        )
+        cls.perimeter_department = PerimeterFactory(
+            name="Isère", kind=Perimeter.KIND_DEPARTMENT, insee_code="38", region_code="84"
+        )
+        cls.perimeter_region = PerimeterFactory(
+            name="Auvergne-Rhône-Alpes", kind=Perimeter.KIND_REGION, insee_code="R84"
+        )
+
+    def setUp(self):
+        self.index = PerimeterAutocompleteIndex.build()
+
+    def test_build(self):
+        self.assertEqual(len(self.index), 4)
+        with self.assertNumQueries(0):
+            self.index.search("grenoble")
+
+    def test_name_search(self):
+        self.assertEqual([p["id"] for p in self.index.search("grenob")], [self.perimeter_city.id])
+        # accents are ignored
+        self.assertEqual([p["id"] for p in self.index.search("isere")], [self.perimeter_department.id])
+        self.assertEqual([p["id"] for p in self.index.search("rhône")], [self.perimeter_region.id])
+        # fuzzy
+        self.assertEqual([p["id"] for p in self.index.search("martin heres")], [self.perimeter_city_2.id])
+        self.assertEqual(self.index.search("xyz"), [])
+
+    def test_name_search_prefix_first(self):
+        self.assertEqual(
+            [p["id"] for p in self.index.search("gre")], [self.perimeter_city.id, self.perimeter_department.id]
+        )
+        self.assertEqual([p["id"] for p in self.index.search("gre", limit=1)], [self.perimeter_city.id])
+
+    def test_post_code_search(self):
+        self.assertEqual(
+            [p["id"] for p in self.index.search("38")],
+            [self.perimeter_department.id, self.perimeter_city.id, self.perimeter_city_2.id],
+        )
+        self.assertEqual(
+            [p["id"] for p in self.index.search("38", kind=Perimeter.KIND_CITY)],
+            [self.perimeter_city.id, self.perimeter_city_2.id],
+        )
+        self.assertEqual([p["id"] for p in self.index.search("38100")], [self.perimeter_city.id])
+        self.assertEqual([p["id"] for p in self.index.search("3800")], [self.perimeter_city.id])
+        # only the first post_code is used for incomplete post codes (same as PerimeterQuerySet.post_code_search)
+        self.assertEqual(self.index.search("3810"), [])
+
+    def test_search_result_fields(self):
+        self.assertEqual(
+            self.index.search("grenoble")[0],
+            {
+                "id": self.perimeter_city.id,
+                "name": "Grenoble",
+                "slug": self.perimeter_city.slug,
+                "kind": Perimeter.KIND_CITY,
+                "insee_code": "38185",
+                "post_codes": ["38000", "38100", "38700"],
+                "department_code": "38",
+                "region_code": "84",
+            },
+        )
+
+    @pytest.mark.usefixtures("locmem_cache")
+    def test_get_perimeter_autocomplete_index(self):
+        index = get_perimeter_autocomplete_index()
+        with self.assertNumQueries(0):
+            self.assertIs(get_perimeter_autocomplete_index(), index)
+        # rebuilt when a perimeter changes
+        PerimeterFactory(name="Grenade", kind=Perimeter.KIND_CITY, insee_code="31232", post_codes=["31330"])
+        index = get_perimeter_autocomplete_index()
+        self.assertEqual(len(index), 5)
@@ -1,5 +1,6 @@
 from django.test import TestCase
 
+from lemarche.perimeters.models import Perimeter
 from lemarche.purchases import constants as purchases_constants
 from lemarche.purchases.models import SlugMappingCache
 from lemarche.utils.slug_matching import (
@@ -11,9 +12,12 @@ from lemarche.utils.slug_matching import (
     record_user_choices,
     resolve_column_header,
     resolve_perimeter,
+    resolve_perimeters,
     resolve_sector,
     resolve_sector_from_title,
+    resolve_sectors,
 )
+from tests.perimeters.factories import PerimeterFactory
 from tests.sectors.factories import SectorFactory
 from tests.users.factories import UserFactory
 
@@ -242,3 +246,85 @@ class RecordUserChoicesTest(TestCase):
         )
         cache = SlugMappingCache.objects.get(raw_value="espaces verts", kind="sector")
         self.assertEqual(cache.usage_count, 2)
+
+
+class ResolveSectorsBatchTest(TestCase):
+    """Tests de resolve_sectors — résolution en lot (import Excel)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        cls.sector = SectorFactory(slug="nettoyage-des-locaux", name="Nettoyage des locaux")
+        SectorFactory(slug="espaces-verts", name="Espaces verts")
+        cls.cache_entry = SlugMappingCache.objects.create(
+            raw_value="nettoyage batiment",
+            kind=purchases_constants.SLUG_MAPPING_KIND_SECTOR,
+            resolved_slug="nettoyage-des-locaux",
+            source=purchases_constants.SLUG_MAPPING_SOURCE_ADMIN_VALIDATED,
+            confidence=0.85,
+            usage_count=1,
+        )
+
+    def test_resolve_sectors(self):
+        raw_values = [
+            "nettoyage-des-locaux",
+            "Nettoyage Bâtiment",
+            "nettoyage bâtiment",
+            "Nettoyage Bâtiment",
+            "nettoyage locaux",
+            "nettoyage locaux",
+            "verts",
+            "",
+            "xyz",
+        ]
+        # exact, cache, cache usage, sectors, existing auto caches, new auto caches
+        with self.assertNumQueries(6):
+            results = resolve_sectors(raw_values, user=self.user)
+
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results["nettoyage-des-locaux"]["source"], "exact")
+        self.assertEqual(results["Nettoyage Bâtiment"]["source"], "cache")
+        self.assertEqual(results["nettoyage bâtiment"]["slug"], "nettoyage-des-locaux")
+        self.assertEqual(results["nettoyage locaux"]["status"], RESOLUTION_STATUS_RESOLVED)
+        self.assertEqual(results["nettoyage locaux"]["source"], "trigram_auto")
+        self.assertEqual(results["nettoyage locaux"]["slug"], "nettoyage-des-locaux")
+        self.assertEqual(results["verts"]["status"], RESOLUTION_STATUS_AMBIGUOUS)
+        self.assertEqual(results["verts"]["candidates"][0]["slug"], "espaces-verts")
+        self.assertEqual(results[""]["status"], RESOLUTION_STATUS_ERROR)
+        self.assertEqual(results["xyz"]["status"], RESOLUTION_STATUS_ERROR)
+
+        # usage counts
+        self.cache_entry.refresh_from_db()
+        self.assertEqual(self.cache_entry.usage_count, 1 + 3)
+        auto_cache = SlugMappingCache.objects.get(raw_value="nettoyage locaux", kind="sector")
+        self.assertEqual(auto_cache.source, purchases_constants.SLUG_MAPPING_SOURCE_AUTO_TRIGRAM)
+        self.assertEqual(auto_cache.proposed_by, self.user)
+        self.assertEqual(auto_cache.usage_count, 2)
+
+        # a new import increments the usage of the existing auto cache
+        resolve_sectors(["nettoyage locaux"])
+        auto_cache.refresh_from_db()
+        self.assertEqual(auto_cache.usage_count, 3)
+
+
+class ResolvePerimetersBatchTest(TestCase):
+    """Tests de resolve_perimeters — résolution en lot (import Excel)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.perimeter = PerimeterFactory(name="Grenoble", kind=Perimeter.KIND_CITY, department_code="38")
+
+    def test_resolve_perimeters(self):
+        results = resolve_perimeters(["grenoble-38", "Grenoble", "France entière", "grenobel", "Grenoble"])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results["grenoble-38"]["source"], "exact")
+        self.assertTrue(results["France entière"]["france_entiere"])
+        self.assertFalse(results["Grenoble"]["france_entiere"])
+        self.assertEqual(results["Grenoble"]["source"], "trigram_auto")
+        self.assertEqual(results["Grenoble"]["slug"], "grenoble-38")
+        self.assertEqual(results["grenobel"]["status"], RESOLUTION_STATUS_AMBIGUOUS)
+        self.assertEqual(
+            results["grenobel"]["candidates"],
+            [{"slug": "grenoble-38", "name": "Grenoble", "kind": Perimeter.KIND_CITY, "score": 0.5}],
+        )
+        self.assertEqual(SlugMappingCache.objects.get(raw_value="grenoble", kind="perimeter").usage_count, 2)
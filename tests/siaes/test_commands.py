@@ -6,13 +6,17 @@ from unittest.mock import patch
 
 import factory
 from django.core.management import call_command
+from django.db import connection
 from django.db.models import signals
 from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from lemarche.siaes import constants as siae_constants
 from lemarche.siaes.models import Siae
 from tests.networks.factories import NetworkFactory
 from tests.siaes.factories import SiaeActivityFactory, SiaeFactory
+from tests.tenders.factories import TenderSiaeFactory
 from tests.users.factories import UserFactory
 
 
@@ -68,7 +72,10 @@ class SyncWithEmploisInclusionCommandTest(TransactionTestCase):
     @patch("lemarche.utils.apis.api_emplois_inclusion.get_siae_list")
     def test_sync_with_emplois_inclusion_update_existing_siae(self, mock_get_siae_list):
         # Create existing SIAE
-        existing_siae = SiaeFactory(c1_id=123, siret="12345678901234", kind=siae_constants.KIND_EI)
+        existing_siae = SiaeFactory(
+            c1_id=123, siret="12345678901234", kind=siae_constants.KIND_EI, post_code="38000", department="38"
+        )
+        activity = SiaeActivityFactory(siae=existing_siae, geo_range=siae_constants.GEO_RANGE_CUSTOM)
 
         return_value = [
             {
@@ -113,6 +120,9 @@ class SyncWithEmploisInclusionCommandTest(TransactionTestCase):
         self.assertEqual(updated_siae.post_code, "69001")
         self.assertEqual(updated_siae.city, "Lyon")
         self.assertEqual(updated_siae.department, "69")
+        # bulk_update: the matches are rebuilt by the command
+        post_code_matches = activity.matches.filter(perimeter_code__startswith="post_code:")
+        self.assertEqual(set(post_code_matches.values_list("perimeter_code", flat=True)), {"post_code:69001"})
 
         # Mock API response with updated data for the same SIAE with different brand name
         return_value[0]["brand"] = "Other Name"
@@ -407,6 +417,34 @@ class SiaeUpdateCountFieldsCommandTest(TransactionTestCase):
         self.assertEqual(siae_not_updated.user_count, 0)
         self.assertEqual(siae_not_updated.sector_count, 0)
 
+    @factory.django.mute_signals(signals.post_save, signals.m2m_changed)
+    def test_update_count_fields_from_related_objects(self):
+        siae = SiaeFactory(siret="12345678900012", is_active=True)
+        SiaeFactory(siret="12345678900020", is_active=True)  # same siren
+        SiaeFactory(siret="12345678900038", is_active=False)
+        siae.networks.add(NetworkFactory())
+        TenderSiaeFactory(siae=siae, email_send_date=timezone.now(), detail_display_date=timezone.now())
+        TenderSiaeFactory(siae=siae, email_send_date=timezone.now())
+        siae_without_related_objects = SiaeFactory(siret="98765432100012", user_count=2, tender_count=1)
+
+        call_command("update_siae_count_fields", stdout=StringIO())
+        siae.refresh_from_db()
+        self.assertEqual(siae.network_count, 1)
+        self.assertEqual(siae.etablissement_count, 2)
+        self.assertEqual(siae.tender_count, 2)
+        self.assertEqual(siae.tender_email_send_count, 2)
+        self.assertEqual(siae.tender_detail_display_count, 1)
+        self.assertEqual(siae.tender_detail_contact_click_count, 0)
+        siae_without_related_objects.refresh_from_db()
+        self.assertEqual(siae_without_related_objects.user_count, 0)
+        self.assertEqual(siae_without_related_objects.tender_count, 0)
+        self.assertEqual(siae_without_related_objects.etablissement_count, 1)
+
+        # nothing changed: no update
+        with CaptureQueriesContext(connection) as queries:
+            call_command("update_siae_count_fields", stdout=StringIO())
+        self.assertFalse([query for query in queries if query["sql"].startswith("UPDATE")])
+
 
 class SiaeUpdateApiEntrepriseFieldsCommandTest(TestCase):
     def setUp(self):
@@ -1,8 +1,10 @@
-from datetime import date
+from datetime import date, timedelta
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import ANY, MagicMock, patch
 
+import requests
 from django.test import TestCase
+from freezegun import freeze_time
 
 from lemarche.siaes.management.commands.sync_siaes_decp_details import _select_unique_markets
 from lemarche.siaes.models import SiaePublicMarket
@@ -12,7 +14,7 @@ from tests.siaes.factories import SiaeFactory
 class ApiDecpFetchContractsCountTest(TestCase):
     """Tests du wrapper api_decp.fetch_contracts_count."""
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_retourne_le_total_par_siret(self, mocked_get):
         mocked_get.return_value.json.return_value = {"meta": {"total": 5}}
         mocked_get.return_value.raise_for_status.return_value = None
@@ -24,7 +26,7 @@ class ApiDecpFetchContractsCountTest(TestCase):
         # Un seul appel : SIRET exact a trouvé des résultats, pas de fallback SIREN
         self.assertEqual(mocked_get.call_count, 1)
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_fallback_siren_si_siret_vide(self, mocked_get):
         # Premier appel (SIRET) → 0, deuxième appel (SIREN) → 3
         mocked_get.return_value.raise_for_status.return_value = None
@@ -39,7 +41,7 @@ class ApiDecpFetchContractsCountTest(TestCase):
         self.assertEqual(result, 3)
         self.assertEqual(mocked_get.call_count, 2)
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_retourne_zero_si_siret_et_siren_vides(self, mocked_get):
         mocked_get.return_value.raise_for_status.return_value = None
         mocked_get.return_value.json.return_value = {"meta": {"total": 0}}
@@ -49,7 +51,7 @@ class ApiDecpFetchContractsCountTest(TestCase):
         result = fetch_contracts_count("12345678901234", "2023-01-01")
         self.assertEqual(result, 0)
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_retourne_zero_si_meta_absent(self, mocked_get):
         mocked_get.return_value.raise_for_status.return_value = None
         mocked_get.return_value.json.return_value = {}
@@ -60,10 +62,44 @@ class ApiDecpFetchContractsCountTest(TestCase):
         self.assertEqual(result, 0)
 
 
+class ApiDecpRetryTest(TestCase):
+    """Tests des nouveaux essais de api_decp._get."""
+
+    @patch("lemarche.utils.apis.api_decp.time.sleep")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
+    def test_reessaie_si_erreur_serveur(self, mocked_get, mocked_sleep):
+        error_response = MagicMock(status_code=503)
+        error_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+        ok_response = MagicMock()
+        ok_response.json.return_value = {"meta": {"total": 2}}
+        mocked_get.side_effect = [requests.exceptions.ConnectionError(), error_response, ok_response]
+
+        from lemarche.utils.apis.api_decp import fetch_contracts_count
+
+        self.assertEqual(fetch_contracts_count("12345678901234", "2023-01-01"), 2)
+        self.assertEqual(mocked_get.call_count, 3)
+        # backoff exponentiel
+        self.assertEqual([call.args[0] for call in mocked_sleep.call_args_list], [2, 4])
+
+    @patch("lemarche.utils.apis.api_decp.time.sleep")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
+    def test_ne_reessaie_pas_si_erreur_client(self, mocked_get, mocked_sleep):
+        error_response = MagicMock(status_code=400)
+        error_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+        mocked_get.return_value = error_response
+
+        from lemarche.utils.apis.api_decp import fetch_contracts_count
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fetch_contracts_count("12345678901234", "2023-01-01")
+        self.assertEqual(mocked_get.call_count, 1)
+        mocked_sleep.assert_not_called()
+
+
 class ApiDecpFetchRecentContractsTest(TestCase):
     """Tests du wrapper api_decp.fetch_recent_contracts."""
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_retourne_la_liste_data_par_siret(self, mocked_get):
         mocked_get.return_value.json.return_value = {"data": [{"uid": "abc"}, {"uid": "def"}]}
         mocked_get.return_value.raise_for_status.return_value = None
@@ -75,7 +111,7 @@ class ApiDecpFetchRecentContractsTest(TestCase):
         # SIRET a trouvé des résultats, pas de fallback
         self.assertEqual(mocked_get.call_count, 1)
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_fallback_siren_si_siret_vide(self, mocked_get):
         mocked_get.return_value.raise_for_status.return_value = None
         mocked_get.return_value.json.side_effect = [
@@ -89,7 +125,7 @@ class ApiDecpFetchRecentContractsTest(TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(mocked_get.call_count, 2)
 
-    @patch("lemarche.utils.apis.api_decp.requests.get")
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
     def test_retourne_liste_vide_si_siret_et_siren_vides(self, mocked_get):
         mocked_get.return_value.raise_for_status.return_value = None
         mocked_get.return_value.json.return_value = {"data": []}
@@ -168,6 +204,46 @@ class SyncSiaesDecpCommandTest(TestCase):
         self.assertFalse(self.siae.has_won_contract_last_3_years)
         self.assertEqual(self.siae.decp_contracts_count_last_3_years, 0)
 
+    @patch("lemarche.utils.apis.api_slack.send_message_to_channel")
+    @patch("lemarche.utils.apis.api_decp.fetch_contracts_count")
+    def test_siae_synchronisee_recemment_est_ignoree(self, mocked_fetch, mocked_slack):
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        mocked_fetch.return_value = 1
+        siae_to_sync = SiaeFactory(
+            siret="98765432109876",
+            siret_is_valid=True,
+            is_active=True,
+            is_delisted=False,
+            decp_last_sync_date=timezone.now() - timedelta(days=2),
+        )
+        self.siae.decp_last_sync_date = timezone.now()
+        self.siae.save(update_fields=["decp_last_sync_date"])
+
+        call_command("sync_siaes_decp", wet_run=True, max_age_hours=20, stdout=StringIO())
+
+        mocked_fetch.assert_called_once_with(siae_to_sync.siret, ANY)
+        siae_to_sync.refresh_from_db()
+        self.assertEqual(siae_to_sync.decp_contracts_count_last_3_years, 1)
+
+    @patch("lemarche.utils.apis.api_slack.send_message_to_channel")
+    @patch("lemarche.utils.apis.api_decp.fetch_contracts_count")
+    def test_cron_quotidien_traite_toutes_les_siaes(self, mocked_fetch, mocked_slack):
+        from django.core.management import call_command
+
+        mocked_fetch.return_value = 1
+        # le 2e run démarre un peu plus tôt que le 1er (24h moins quelques secondes)
+        with freeze_time("2025-03-10 02:30:10"):
+            call_command("sync_siaes_decp", wet_run=True, stdout=StringIO())
+        with freeze_time("2025-03-11 02:30:00"):
+            mocked_fetch.return_value = 2
+            call_command("sync_siaes_decp", wet_run=True, stdout=StringIO())
+
+        self.assertEqual(mocked_fetch.call_count, 2)
+        self.siae.refresh_from_db()
+        self.assertEqual(self.siae.decp_contracts_count_last_3_years, 2)
+
     @patch("lemarche.utils.apis.api_decp.fetch_contracts_count")
     def test_dry_run_ne_modifie_pas_la_base(self, mocked_fetch):
         mocked_fetch.return_value = 5
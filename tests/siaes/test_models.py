@@ -1,10 +1,19 @@
+from django.contrib.postgres.search import SearchQuery
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 
 from lemarche.perimeters.models import Perimeter
 from lemarche.siaes import constants as siae_constants, utils as siae_utils
-from lemarche.siaes.models import Siae, SiaeGroup, SiaeLabel, SiaeUser
+from lemarche.siaes.models import (
+    FULL_TEXT_SIMILARITY_THRESHOLD,
+    Siae,
+    SiaeGroup,
+    SiaeLabel,
+    SiaeUser,
+    full_text_similarity_threshold,
+)
 from lemarche.utils.history import HISTORY_TYPE_CREATE, HISTORY_TYPE_UPDATE
 from tests.labels.factories import LabelFactory
 from tests.networks.factories import NetworkFactory
@@ -97,6 +106,27 @@ class SiaeModelTest(TestCase):
         siae = SiaeFactory(name="Ma boite")
         self.assertEqual(str(siae), "Ma boite")
 
+    def test_search_vector_is_updated(self):
+        siae = SiaeFactory(name="Ma boite")
+        self.assertTrue(Siae.objects.filter(id=siae.id, search_vector=SearchQuery("boite", config="french")).exists())
+        siae.name = "La menuiserie"
+        siae.save()
+        self.assertFalse(Siae.objects.filter(id=siae.id, search_vector=SearchQuery("boite", config="french")).exists())
+        self.assertTrue(
+            Siae.objects.filter(id=siae.id, search_vector=SearchQuery("menuiserie", config="french")).exists()
+        )
+
+    def test_filter_full_text(self):
+        siae = SiaeFactory(name="Ethicofil", brand="Ma boite", siret="12345678900011")
+        SiaeFactory(name="La menuiserie")
+        with full_text_similarity_threshold():
+            with connection.cursor() as cursor:
+                cursor.execute("SHOW pg_trgm.similarity_threshold")
+                self.assertEqual(float(cursor.fetchone()[0]), FULL_TEXT_SIMILARITY_THRESHOLD)
+            for full_text_string in ["ethicofl", "boites", "123456789"]:
+                with self.subTest(full_text_string=full_text_string):
+                    self.assertQuerySetEqual(Siae.objects.filter_full_text(full_text_string), [siae])
+
     def test_is_live(self):
         siae_live = SiaeFactory(is_active=True, is_delisted=False)
         siae_not_live_1 = SiaeFactory(is_active=True, is_delisted=True)
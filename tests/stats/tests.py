@@ -3,11 +3,15 @@ from io import StringIO
 
 from dateutil.relativedelta import relativedelta
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 from freezegun import freeze_time
 
-from lemarche.stats.models import Tracker
+from lemarche.stats.models import SiaeViewStat, Tracker
+from lemarche.stats.partitions import get_tracker_partition_name, get_tracker_partitions
+from lemarche.users import constants as user_constants
+from tests.siaes.factories import SiaeFactory
 from tests.stats.factories import TrackerFactory
 
 
@@ -21,10 +25,80 @@ class TrackerDeletionTestCase(TestCase):
         std_out = StringIO()
         call_command("delete_old_trackers", dry_run=True, stdout=std_out)
         self.assertEqual(Tracker.objects.count(), 2)
-        assert std_out.getvalue() == "Dry-run: suppression des anciens trackers: 1 auraient été supprimés\n"
+        assert "Dry-run: suppression des anciens trackers: 1 auraient été supprimés\n" in std_out.getvalue()
 
         std_out = StringIO()
         call_command("delete_old_trackers", dry_run=False, stdout=std_out)
         self.assertEqual(Tracker.objects.count(), 1)
-        assert std_out.getvalue() == "Suppression des anciens trackers: 1 ont été supprimés ({'stats.Tracker': 1})\n"
+        assert "Suppression des anciens trackers: 1 ont été supprimés ({'stats.Tracker': 1})\n" in std_out.getvalue()
         self.assertEqual(Tracker.objects.get(), recent_tracker)
+
+
+class TrackerPartitionTestCase(TestCase):
+    def test_create_and_drop_partitions(self):
+        # far in the future: after the partitions created by the migration
+        future_date = timezone.now() + relativedelta(years=3)
+        future_month_name = get_tracker_partition_name(future_date)
+
+        with freeze_time(future_date):
+            call_command("delete_old_trackers", stdout=StringIO())
+        partition_names = [partition.name for partition in get_tracker_partitions()]
+        self.assertIn(future_month_name, partition_names)
+        self.assertIn(get_tracker_partition_name(future_date + relativedelta(months=3)), partition_names)
+        self.assertIn("trackers_default", partition_names)
+
+        old_tracker = TrackerFactory(date_created=future_date)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id_internal FROM "{future_month_name}"')
+            self.assertEqual(cursor.fetchall(), [(old_tracker.id_internal,)])
+
+        # the partition expires: dropped (with its trackers)
+        with freeze_time(future_date + relativedelta(months=13)):
+            std_out = StringIO()
+            call_command("delete_old_trackers", stdout=std_out)
+        self.assertIn(future_month_name, std_out.getvalue())
+        self.assertNotIn(future_month_name, [partition.name for partition in get_tracker_partitions()])
+        self.assertFalse(Tracker.objects.filter(id_internal=old_tracker.id_internal).exists())
+
+
+class SiaeViewStatTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.siae = SiaeFactory()
+        siae_page = f"/prestataires/{cls.siae.slug}/"
+        for user_kind in [user_constants.KIND_BUYER, user_constants.KIND_BUYER, user_constants.KIND_PARTNER, ""]:
+            TrackerFactory(
+                env="prod",
+                page=siae_page,
+                action="load",
+                siae_id=cls.siae.id,
+                user_kind=user_kind,
+                date_created=timezone.now(),
+            )
+        # not counted: too old, admin, other page
+        TrackerFactory(
+            env="prod",
+            page=siae_page,
+            action="load",
+            siae_id=cls.siae.id,
+            date_created=timezone.now() - relativedelta(days=100),
+        )
+        TrackerFactory(env="prod", page=siae_page, action="load", siae_id=cls.siae.id, isadmin=True)
+        TrackerFactory(env="prod", page="/prestataires/", action="load", siae_id=cls.siae.id)
+
+    def test_update_siae_view_stats(self):
+        call_command("update_siae_view_stats", days=120, stdout=StringIO())
+        self.assertEqual(SiaeViewStat.objects.filter(siae_id=self.siae.id).count(), 4)
+        self.assertEqual(
+            SiaeViewStat.objects.get(siae_id=self.siae.id, user_kind=user_constants.KIND_BUYER).view_count, 2
+        )
+        # idempotent
+        call_command("update_siae_view_stats", days=120, stdout=StringIO())
+        self.assertEqual(SiaeViewStat.objects.filter(siae_id=self.siae.id).count(), 4)
+
+    def test_siae_stat_view_counts_last_3_months(self):
+        call_command("update_siae_view_stats", days=120, stdout=StringIO())
+        with self.assertNumQueries(1):
+            self.assertEqual(self.siae.stat_view_count_last_3_months, 4)
+            self.assertEqual(self.siae.stat_buyer_view_count_last_3_months, 2)
+            self.assertEqual(self.siae.stat_partner_view_count_last_3_months, 1)
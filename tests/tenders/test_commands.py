@@ -343,7 +343,7 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         cls.siae2 = SiaeFactory(contact_email="siae2@example.com")
         cls.siae3 = SiaeFactory(contact_email="siae3@example.com")
 
-    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_email")
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
     @patch(
         "lemarche.www.tenders.tasks.whitelist_recipient_list",
         return_value=["siae1@example.com", "siae2@example.com", "siae3@example.com"],
@@ -394,17 +394,18 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         self.assertIn(f"Tender {self.tender.id}: 1 TenderSiaes to remind", output)
         self.assertIn("Emails sent", output)
 
-        # Verify that send_transactional_email was called once
+        # Verify that send_transactional_emails was called once
         mock_send_email.assert_called_once()
 
-        # Verify the call arguments
-        call_args = mock_send_email.call_args
-        self.assertIn("recipient_email", call_args.kwargs)
-        self.assertIn("recipient_name", call_args.kwargs)
-        self.assertIn("variables", call_args.kwargs)
-        self.assertEqual(call_args.kwargs["recipient_email"], "siae1@example.com")
+        # Verify the call arguments (a single batch)
+        (recipients,) = mock_send_email.call_args.args
+        self.assertEqual(len(recipients), 1)
+        self.assertIn("recipient_email", recipients[0])
+        self.assertIn("recipient_name", recipients[0])
+        self.assertIn("variables", recipients[0])
+        self.assertEqual(recipients[0]["recipient_email"], "siae1@example.com")
 
-    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_email")
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
     @patch(
         "lemarche.www.tenders.tasks.whitelist_recipient_list",
         return_value=["siae1@example.com", "siae2@example.com", "siae3@example.com"],
@@ -422,10 +423,10 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         self.assertIn("Weekend... Stopping. Come back on Monday :)", output)
         self.assertNotIn("Step 1: Find TenderSiae", output)
 
-        # Verify that send_transactional_email was NOT called
+        # Verify that send_transactional_emails was NOT called
         mock_send_email.assert_not_called()
 
-    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_email")
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
     @patch(
         "lemarche.www.tenders.tasks.whitelist_recipient_list",
         return_value=["siae1@example.com", "siae2@example.com", "siae3@example.com"],
@@ -455,10 +456,10 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         self.assertIn("Step 1: Find TenderSiae", output)
         self.assertIn("Found 1 TenderSiaes to remind", output)
 
-        # Verify that send_transactional_email was called
+        # Verify that send_transactional_emails was called
         mock_send_email.assert_called_once()
 
-    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_email")
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
     @patch(
         "lemarche.www.tenders.tasks.whitelist_recipient_list",
         return_value=["siae1@example.com", "siae2@example.com", "siae3@example.com"],
@@ -489,10 +490,10 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         self.assertNotIn("Step 2: Send emails for each tender", output)
         self.assertNotIn("Emails sent", output)
 
-        # Verify that send_transactional_email was NOT called
+        # Verify that send_transactional_emails was NOT called
         mock_send_email.assert_not_called()
 
-    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_email")
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
     @patch(
         "lemarche.www.tenders.tasks.whitelist_recipient_list",
         return_value=["siae1@example.com", "siae2@example.com", "siae3@example.com"],
@@ -535,10 +536,10 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         self.assertIn(f"Tender {self.tender.id}: 1 TenderSiaes to remind", output)
         self.assertNotIn(f"Tender {tender2.id}", output)
 
-        # Verify that send_transactional_email was called only once (for the specified tender)
+        # Verify that send_transactional_emails was called only once (for the specified tender)
         mock_send_email.assert_called_once()
 
-    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_email")
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
     @patch(
         "lemarche.www.tenders.tasks.whitelist_recipient_list",
         return_value=["siae2@example.com"],
@@ -580,12 +581,12 @@ class SiaeInterestReminderEmailCommandTest(TestCase):
         self.assertIn(f"Tender {self.tender.id}: 1 TenderSiaes to remind", output)
         self.assertNotIn(f"Tender {tender_past_deadline.id}", output)
 
-        # Verify that send_transactional_email was called only once
+        # Verify that send_transactional_emails was called only once
         mock_send_email.assert_called_once()
 
-        # Verify the call arguments
-        call_args = mock_send_email.call_args
-        self.assertEqual(call_args.kwargs["recipient_email"], "siae2@example.com")
+        # Verify the call arguments (a single batch)
+        (recipients,) = mock_send_email.call_args.args
+        self.assertEqual([recipient["recipient_email"] for recipient in recipients], ["siae2@example.com"])
 
 
 @freeze_time(datetime(year=2024, month=1, day=1, tzinfo=UTC))
@@ -1,11 +1,13 @@
+from io import StringIO
 from timeit import default_timer as timer
 
 from django.contrib.gis.geos import Point
+from django.core.management import call_command
 from django.test import TestCase
 
 from lemarche.perimeters.models import Perimeter
 from lemarche.siaes import constants as siae_constants
-from lemarche.siaes.models import Siae, SiaeActivity
+from lemarche.siaes.models import Siae, SiaeActivity, SiaeActivityMatch
 from tests.perimeters.factories import PerimeterFactory
 from tests.sectors.factories import SectorFactory
 from tests.siaes.factories import SiaeActivityFactory, SiaeFactory
@@ -383,14 +385,84 @@ class TenderMatchingActivitiesTest(TestCase):
         Siae.objects.bulk_create(siaes)
         SiaeActivity.objects.bulk_create(siae_activities)
         SiaeActivity.locations.through.objects.bulk_create(locations)
+        # bulk_create doesn't call the signals
+        SiaeActivityMatch.objects.rebuild(SiaeActivity.objects.filter(siae__in=siaes))
 
         tender = TenderFactory(sectors=self.sectors, perimeters=self.perimeters)
 
         start_time = timer()
-        with self.assertNumQueries(6):
+        with self.assertNumQueries(3):
             siae_found_list = Siae.objects.filter_with_tender_through_activities(tender)
             self.assertEqual(len(siae_found_list), 100 + 3)
 
         end_time = timer()
         duration = end_time - start_time
         self.assertLess(duration, 0.6, f"Performance issue: took {duration:.4f} seconds")
+
+
+class SiaeActivityMatchIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sector = SectorFactory()
+        cls.perimeter_department = PerimeterFactory(
+            name="Paris", kind=Perimeter.KIND_DEPARTMENT, insee_code="75", region_code="11"
+        )
+        cls.perimeter_paris = PerimeterFactory(department_code="75", region_code="11", post_codes=["75018"])
+        cls.siae = SiaeFactory(is_active=True, post_code="35000", department="35", region="Bretagne")
+
+    def test_index_is_updated_on_activity_save(self):
+        siae_activity = SiaeActivityFactory(
+            siae=self.siae,
+            sector=self.sector,
+            presta_type=[siae_constants.PRESTA_PREST, siae_constants.PRESTA_BUILD],
+            with_country_perimeter=True,
+        )
+        self.assertEqual(
+            set(siae_activity.matches.values_list("presta_type", "perimeter_code")),
+            {
+                (siae_constants.PRESTA_PREST, SiaeActivityMatch.PERIMETER_CODE_ALL),
+                (siae_constants.PRESTA_PREST, SiaeActivityMatch.PERIMETER_CODE_COUNTRY),
+                (siae_constants.PRESTA_BUILD, SiaeActivityMatch.PERIMETER_CODE_ALL),
+                (siae_constants.PRESTA_BUILD, SiaeActivityMatch.PERIMETER_CODE_COUNTRY),
+            },
+        )
+
+        siae_activity.geo_range = siae_constants.GEO_RANGE_CUSTOM
+        siae_activity.presta_type = [siae_constants.PRESTA_PREST]
+        siae_activity.save()
+        self.assertEqual(
+            set(siae_activity.matches.values_list("perimeter_code", flat=True)),
+            {SiaeActivityMatch.PERIMETER_CODE_ALL, "post_code:35000", "department:35", "region:Bretagne"},
+        )
+
+        siae_activity.delete()
+        self.assertFalse(SiaeActivityMatch.objects.exists())
+
+    def test_index_is_updated_on_locations_change(self):
+        siae_activity = SiaeActivityFactory(siae=self.siae, sector=self.sector, with_zones_perimeter=True)
+        siae_activity.locations.set([self.perimeter_department])
+        self.assertTrue(siae_activity.matches.filter(perimeter_code="zone:DEPARTMENT:75").exists())
+
+        tender = TenderFactory(sectors=[self.sector], perimeters=[self.perimeter_paris])
+        self.assertIn(self.siae, Siae.objects.filter_with_tender_through_activities(tender))
+
+        siae_activity.locations.clear()
+        self.assertFalse(siae_activity.matches.filter(perimeter_code="zone:DEPARTMENT:75").exists())
+        self.assertNotIn(self.siae, Siae.objects.filter_with_tender_through_activities(tender))
+
+    def test_index_is_updated_on_siae_address_change(self):
+        SiaeActivityFactory(siae=self.siae, sector=self.sector, with_zones_perimeter=True)
+        tender = TenderFactory(sectors=[self.sector], perimeters=[self.perimeter_paris])
+        self.assertNotIn(self.siae, Siae.objects.filter_with_tender_through_activities(tender))
+
+        siae = Siae.objects.get(id=self.siae.id)
+        siae.post_code = "75018"
+        siae.save()
+        self.assertIn(siae, Siae.objects.filter_with_tender_through_activities(tender))
+
+    def test_rebuild_command(self):
+        siae_activity = SiaeActivityFactory(siae=self.siae, sector=self.sector, with_country_perimeter=True)
+        SiaeActivityMatch.objects.all().delete()
+
+        call_command("rebuild_siae_activity_match_index", stdout=StringIO())
+        self.assertEqual(siae_activity.matches.count(), 2)
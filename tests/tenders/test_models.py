@@ -837,6 +837,33 @@ class TenderSiaeModelAndQuerysetTest(TestCase):
             tender_constants.TENDER_SIAE_STATUS_DETAIL_CONTACT_CLICK_DATE_DISPLAY,
         )
 
+    def test_set_funnel_date(self):
+        tender = TenderFactory(deadline_date=date_tomorrow)
+        TenderSiae.objects.create(tender=tender, siae=self.siae_with_tender_1, detail_display_date=date_last_week)
+        tendersiae = TenderSiae.objects.create(tender=tender, siae=self.siae_without_tender)
+        stale_tender = Tender.objects.get(id=tender.id)
+
+        updated_count = TenderSiae.objects.filter(tender=tender).set_funnel_date(
+            "email_link_click_date", user=self.user_siae
+        )
+        self.assertEqual(updated_count, 2)
+        tendersiae.refresh_from_db()
+        self.assertIsNotNone(tendersiae.email_link_click_date)
+        self.assertEqual(tendersiae.user, self.user_siae)
+        tender.refresh_from_db()
+        self.assertEqual(tender.siae_email_link_click_count, 2)
+        self.assertEqual(tender.siae_email_link_click_or_detail_display_count, 1)  # the other one was displayed
+        self.assertEqual(tender.siae_detail_display_count, 0)
+
+        # only counted the first time
+        self.assertEqual(TenderSiae.objects.filter(tender=tender).set_funnel_date("email_link_click_date"), 0)
+        # saving a stale tender does not overwrite the counters
+        stale_tender.title = "Nouveau titre"
+        stale_tender.save()
+        tender.refresh_from_db()
+        self.assertEqual(tender.title, "Nouveau titre")
+        self.assertEqual(tender.siae_email_link_click_count, 2)
+
 
 class TenderAdminTest(TestCase):
     @classmethod
@@ -188,6 +188,64 @@ class BrevoBaseApiClientTest(TestCase):
         # Verify that the final error is raised with the correct message
         self.assertIn("Failed to test operation after 4 attempts", str(context.exception))
 
+    def test_handle_api_retry_rate_limit_reset_header(self, mock_sleep):
+        """Test handle_api_retry waits until the reset of the Brevo quota, and pauses the other calls"""
+        exception = ApiException(status=429, reason="Rate Limit")
+        exception.headers = {"x-sib-ratelimit-reset": "3"}
+        client = api_brevo.BrevoBaseApiClient()
+
+        with patch.object(client.rate_limiter, "pause") as mock_pause:
+            should_retry, wait_time = client.handle_api_retry(exception, 0, "test operation")
+
+        self.assertTrue(should_retry)
+        self.assertEqual(wait_time, 3)
+        mock_pause.assert_called_once_with(3)
+
+    def test_api_client_is_shared(self, mock_sleep):
+        """Test the clients share the same brevo_python.ApiClient (connection pool)"""
+        self.assertIs(api_brevo.BrevoBaseApiClient().api_client, api_brevo.BrevoCompanyApiClient().api_client)
+
+
+@patch("lemarche.utils.apis.api_brevo.time.sleep")
+class BrevoRateLimiterTest(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch("lemarche.utils.apis.api_brevo.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def test_acquire_within_the_rate(self, mock_sleep):
+        rate_limiter = api_brevo.BrevoRateLimiter(rate=5)
+        for _ in range(5):
+            rate_limiter.acquire()
+        mock_sleep.assert_not_called()
+
+    def test_acquire_waits_for_a_token(self, mock_sleep):
+        mock_sleep.side_effect = self.advance
+        rate_limiter = api_brevo.BrevoRateLimiter(rate=5)
+        for _ in range(6):
+            rate_limiter.acquire()
+        # the 6th call waits for a new token (1/5s)
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 0.2)
+
+    def test_acquire_waits_for_the_end_of_the_pause(self, mock_sleep):
+        mock_sleep.side_effect = self.advance
+        rate_limiter = api_brevo.BrevoRateLimiter(rate=5)
+        rate_limiter.pause(10)
+        rate_limiter.acquire()
+        self.assertEqual(sum(call.args[0] for call in mock_sleep.call_args_list), 10)
+
+    def test_no_rate_limit(self, mock_sleep):
+        rate_limiter = api_brevo.BrevoRateLimiter(rate=0)
+        rate_limiter.pause(10)
+        for _ in range(100):
+            rate_limiter.acquire()
+        mock_sleep.assert_not_called()
+
 
 @patch("lemarche.utils.apis.api_brevo.time.sleep")
 @patch("lemarche.utils.apis.api_brevo.BrevoBaseApiClient.is_production_env", True)
@@ -809,7 +867,7 @@ class BrevoCompanyApiClientTest(TestCase):
         )
 
     def test_build_siae_attributes(self, mock_sleep):
-        """Test _build_siae_attributes method"""
+        """Test build_siae_company_attributes function"""
         siae = SiaeFactory(
             name="Test SIAE",
             website="https://test.com",
@@ -823,9 +881,7 @@ class BrevoCompanyApiClientTest(TestCase):
         )
         siae.extra_data = {"brevo_company_data": {"completion_rate": 85, "tender_received": 10, "tender_interest": 5}}
         siae.save()
-        clientContactsBrevo = api_brevo.BrevoCompanyApiClient()
-
-        attributes = clientContactsBrevo._build_siae_attributes(siae)
+        attributes = api_brevo.build_siae_company_attributes(siae)
 
         self.assertEqual(attributes["domain"], "https://test.com")
         self.assertEqual(attributes["app_id"], siae.id)
@@ -883,14 +939,12 @@ class BrevoCompanyApiClientTest(TestCase):
         self.assertEqual(self.company.logs[-1]["brevo_sync"]["status"], "success")
 
     def test_build_buyer_attributes(self, mock_sleep):
-        """Test _build_buyer_attributes method"""
+        """Test build_buyer_company_attributes function"""
         self.company.extra_data = {"brevo_company_data": {"user_count": 8, "user_tender_count": 15}}
         self.company.email_domain_list = ["company.com", "subsidiary.com"]
         self.company.save()
 
-        clientCompanyBrevo = api_brevo.BrevoCompanyApiClient()
-
-        attributes = clientCompanyBrevo._build_buyer_attributes(self.company)
+        attributes = api_brevo.build_buyer_company_attributes(self.company)
 
         self.assertEqual(attributes["domain"], "https://company.com")
         self.assertEqual(attributes["app_id"], self.company.id)
@@ -1018,6 +1072,30 @@ class BrevoCompanyApiClientTest(TestCase):
         self.assertTrue(len(self.company.logs) > 0)
         self.assertEqual(self.company.logs[-1]["brevo_sync"]["status"], "success")
 
+    def test_create_or_update_buyer_company_stores_the_fingerprint(self, mock_sleep):
+        """Test the fingerprint of the payload is stored after a successful sync"""
+        self.company.brevo_company_id = 77777
+        self.company.save()
+        self.assertTrue(
+            api_brevo.has_company_body_changed(self.company, api_brevo.get_buyer_company_body(self.company))
+        )
+
+        with patch("brevo_python.CompaniesApi", return_value=MagicMock()):
+            api_brevo.BrevoCompanyApiClient().create_or_update_buyer_company(self.company)
+
+        self.company.refresh_from_db()
+        company_body = api_brevo.get_buyer_company_body(self.company)
+        self.assertEqual(
+            self.company.extra_data[api_brevo.BREVO_COMPANY_FINGERPRINT_KEY],
+            api_brevo.get_company_body_fingerprint(company_body),
+        )
+        self.assertFalse(api_brevo.has_company_body_changed(self.company, company_body))
+        # the payload changes
+        self.company.name = "Renamed Company"
+        self.assertTrue(
+            api_brevo.has_company_body_changed(self.company, api_brevo.get_buyer_company_body(self.company))
+        )
+
     def test_create_or_update_buyer_company_verify_attributes(self, mock_sleep):
         """Test that buyer company attributes are correctly set"""
 
@@ -1515,6 +1593,30 @@ class BrevoTransactionalEmailApiClientTest(TestCase):
         self.assertEqual(mock_api_instance.send_transac_email.call_count, 2)  # 1 initial + 1 retry
         mock_sleep.assert_called_once()
 
+    @patch("lemarche.utils.apis.api_brevo.BrevoBaseApiClient.is_production_env", True)
+    def test_send_transactional_emails_with_template_batches(self, mock_sleep):
+        """Test batch email sending: one API call per batch of recipients"""
+        client = api_brevo.BrevoTransactionalEmailApiClient(api_brevo.BrevoConfig(transactional_email_batch_size=2))
+        recipients = [
+            {"recipient_email": f"test{i}@example.com", "recipient_name": f"Test {i}", "variables": {"ID": i}}
+            for i in range(3)
+        ]
+        with patch.object(client, "_send_email_with_retry", return_value={"messageIds": []}) as mock_send:
+            result = client.send_transactional_emails_with_template(
+                template_id=1, recipients=recipients, subject="Test Subject"
+            )
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(mock_send.call_count, 2)
+        first_batch = mock_send.call_args_list[0][0][0]
+        self.assertEqual(len(first_batch["message_versions"]), 2)
+        self.assertEqual(
+            first_batch["message_versions"][0],
+            {"to": [{"email": "test0@example.com", "name": "Test 0"}], "params": {"ID": 0}},
+        )
+        self.assertIn("Test Subject", first_batch["subject"])
+        self.assertEqual(len(mock_send.call_args_list[1][0][0]["message_versions"]), 1)
+
 
 @patch("lemarche.utils.apis.api_brevo.time.sleep")
 class BrevoUtilityFunctionsTest(TestCase):
@@ -0,0 +1,58 @@
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from lemarche.utils.concurrency import RateLimiter, run_concurrently
+
+
+class RunConcurrentlyTest(SimpleTestCase):
+    def test_run_concurrently(self):
+        results = []
+        thread_ids = set()
+        lock = threading.Lock()
+
+        def func(item):
+            with lock:
+                results.append(item * 2)
+                thread_ids.add(threading.get_ident())
+
+        run_concurrently(func, iter(range(100)), max_workers=4)
+        self.assertEqual(sorted(results), [item * 2 for item in range(100)])
+        self.assertNotIn(threading.get_ident(), thread_ids)
+
+    def test_run_in_the_current_thread(self):
+        thread_ids = set()
+        run_concurrently(lambda item: thread_ids.add(threading.get_ident()), range(10), max_workers=1)
+        self.assertEqual(thread_ids, {threading.get_ident()})
+
+    def test_errors_do_not_stop_the_processing(self):
+        results = []
+
+        def func(item):
+            if item % 2:
+                raise ValueError(item)
+            results.append(item)
+
+        run_concurrently(func, range(10), max_workers=3)
+        self.assertEqual(sorted(results), [0, 2, 4, 6, 8])
+
+
+@patch("lemarche.utils.concurrency.time.sleep")
+class RateLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch("lemarche.utils.concurrency.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def test_rate_below_one(self, mock_sleep):
+        mock_sleep.side_effect = self.advance
+        rate_limiter = RateLimiter(rate=0.5)
+        for _ in range(3):
+            rate_limiter.acquire()
+        # one request every 2 seconds
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [2, 2])
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from lemarche.perimeters.models import GeocodedAddress
+from lemarche.siaes.models import Siae
+from lemarche.utils.apis.geocoding import geocode_addresses, get_geocoding_cache_key, get_geocoding_data
+from tests.perimeters.factories import PerimeterFactory
+from tests.siaes.factories import SiaeFactory
+
+
+FEATURE = {
+    "type": "Feature",
+    "geometry": {"type": "Point", "coordinates": [-1.68, 48.11]},
+    "properties": {
+        "score": 0.9,
+        "name": "1 Rue de la Paix",
+        "housenumber": "1",
+        "street": "Rue de la Paix",
+        "postcode": "35000",
+        "citycode": "35238",
+        "city": "Rennes",
+    },
+}
+
+
+class GeocodingCacheKeyTest(TestCase):
+    def test_get_geocoding_cache_key(self):
+        self.assertEqual(
+            get_geocoding_cache_key("1, Rue de l'Église  Rennes", "35000"), "1 rue de l eglise rennes|35000"
+        )
+        self.assertEqual(
+            get_geocoding_cache_key("1 rue de l'eglise RENNES", "35000"), "1 rue de l eglise rennes|35000"
+        )
+        self.assertEqual(get_geocoding_cache_key("Rennes", None), "rennes|")
+
+
+@override_settings(GEOCODING_BACKEND="api")
+class GeocodingApiTest(TestCase):
+    @patch("lemarche.utils.apis.geocoding.call_ban_geocoding_api", return_value=FEATURE)
+    def test_results_are_cached(self, mock_call_api):
+        geocoding_data = get_geocoding_data("1 rue de la paix Rennes", post_code="35000")
+        self.assertEqual(geocoding_data["post_code"], "35000")
+        self.assertEqual(geocoding_data["coords"].coords, (-1.68, 48.11))
+        # same address (normalized): from the cache
+        get_geocoding_data("1, Rue de la Paix RENNES", post_code="35000")
+        self.assertEqual(mock_call_api.call_count, 1)
+        self.assertTrue(GeocodedAddress.objects.filter(key="1 rue de la paix rennes|35000").exists())
+
+    @patch("lemarche.utils.apis.geocoding.call_ban_geocoding_api_csv")
+    def test_geocode_addresses(self, mock_call_api_csv):
+        GeocodedAddress.objects.create(key="rennes|35000", feature=FEATURE)
+        mock_call_api_csv.return_value = {"1 rue de la paix rennes|35000": FEATURE}
+        geocode_addresses(
+            [("1 rue de la paix Rennes", "35000"), ("Rennes", "35000"), ("1 rue inconnue Rennes", "35000")]
+        )
+        # only the addresses not cached yet are sent, only the addresses found are cached
+        rows = mock_call_api_csv.call_args.args[0]
+        self.assertEqual([row[0] for row in rows], ["1 rue de la paix rennes|35000", "1 rue inconnue rennes|35000"])
+        self.assertEqual(GeocodedAddress.objects.count(), 2)
+        with patch("lemarche.utils.apis.geocoding.call_ban_geocoding_api") as mock_call_api:
+            self.assertEqual(get_geocoding_data("1 rue de la paix Rennes", post_code="35000")["city"], "Rennes")
+            mock_call_api.assert_not_called()
+
+
+class GeocodingLocalTest(TestCase):
+    def test_local_backend(self):
+        PerimeterFactory(name="Rennes", insee_code="35238", post_codes=["35000", "35200"])
+        geocoding_data = get_geocoding_data("1 rue de la paix Rennes", post_code="35200")
+        self.assertEqual(geocoding_data["city"], "Rennes")
+        self.assertEqual(geocoding_data["insee_code"], "35238")
+        self.assertIsNone(get_geocoding_data("1 rue de la paix Paris", post_code="75001"))
+        self.assertFalse(GeocodedAddress.objects.exists())
+
+    def test_siae_coords_are_set_after_commit(self):
+        city = PerimeterFactory(name="Rennes", insee_code="35238", post_codes=["35000"])
+        with self.captureOnCommitCallbacks(execute=True):
+            siae = SiaeFactory(address="1 rue de la paix", city="Rennes", post_code="35000")
+            self.assertIsNone(Siae.objects.get(id=siae.id).coords)
+        self.assertEqual(Siae.objects.get(id=siae.id).coords.coords, city.coords.coords)
@@ -0,0 +1,73 @@
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from lemarche.utils.apis import api_qpv, http_client
+
+
+class GetSessionTest(SimpleTestCase):
+    def test_one_session_per_host(self):
+        session = http_client.get_session("https://api.example.com/a")
+        self.assertIs(http_client.get_session("https://api.example.com/b?q=1"), session)
+        self.assertIsNot(http_client.get_session("https://other.example.com/a"), session)
+
+    @patch("lemarche.utils.apis.http_client.requests.Session.request")
+    def test_api_calls_use_the_shared_session(self, mocked_request):
+        mocked_request.return_value.json.return_value = {"records": []}
+        for _ in range(2):
+            self.assertEqual(api_qpv.is_in_qpv(48.11, -1.68), {api_qpv.IS_QPV_KEY: False})
+        self.assertEqual(mocked_request.call_count, 2)
+        # the default params of the dataset are sent with each request
+        self.assertEqual(mocked_request.call_args.kwargs["params"]["dataset"], api_qpv.DATASET_QPV)
+        self.assertEqual(http_client._sessions["equipements.sports.gouv.fr"].params, {})
+
+
+@pytest.mark.usefixtures("locmem_cache")
+@override_settings(API_HTTP_TIMEOUT=3)
+@patch("lemarche.utils.apis.http_client.requests.Session.request")
+class GetJsonTest(SimpleTestCase):
+    def test_default_timeout(self, mocked_request):
+        http_client.get_json("https://api.example.com/search", params={"q": "1"})
+        self.assertEqual(mocked_request.call_args.kwargs["timeout"], 3)
+
+    def test_cache(self, mocked_request):
+        mocked_request.return_value.json.return_value = {"total_results": 1}
+        stats_before = http_client.get_stats().get("api.example.com", {})
+
+        for _ in range(3):
+            data = http_client.get_json("https://api.example.com/search", params={"q": "1"}, cache_timeout=60)
+            self.assertEqual(data, {"total_results": 1})
+        http_client.get_json("https://api.example.com/search", params={"q": "2"}, cache_timeout=60)
+
+        self.assertEqual(mocked_request.call_count, 2)
+        stats = http_client.get_stats()["api.example.com"]
+        self.assertEqual(stats["cache_hits"] - stats_before.get("cache_hits", 0), 2)
+        self.assertEqual(stats["cache_misses"] - stats_before.get("cache_misses", 0), 2)
+
+    @patch.object(http_client, "_stats", new_callable=lambda: defaultdict(lambda: defaultdict(float)))
+    def test_stats_messages(self, mocked_stats, mocked_request):
+        http_client.get_json("https://api.example.com/search", params={"q": "1"}, cache_timeout=60)
+        http_client.get_json("https://api.example.com/search", params={"q": "1"}, cache_timeout=60)
+        http_client.request("GET", "https://other.example.com/search")
+        messages = http_client.get_stats_messages()
+        self.assertEqual(len(messages), 2)
+        self.assertRegex(
+            messages[0], r"^API api\.example\.com : 1 requêtes, 0 erreurs, \d+ ms en moyenne, cache : 1/2$"
+        )
+        self.assertRegex(messages[1], r"^API other\.example\.com : 1 requêtes, 0 erreurs, \d+ ms en moyenne$")
+
+    def test_errors_are_not_cached(self, mocked_request):
+        error_response = MagicMock(status_code=502)
+        error_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+        ok_response = MagicMock()
+        ok_response.json.return_value = {"total_results": 1}
+        mocked_request.side_effect = [error_response, ok_response]
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            http_client.get_json("https://api.example.com/search", params={"q": "1"}, cache_timeout=60)
+        data = http_client.get_json("https://api.example.com/search", params={"q": "1"}, cache_timeout=60)
+        self.assertEqual(data, {"total_results": 1})
+        self.assertEqual(mocked_request.call_count, 2)
@@ -1,9 +1,12 @@
 from unittest import mock
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+from lemarche.stats.models import Tracker
 from lemarche.utils.emails import whitelist_recipient_list
+from lemarche.utils.tracker import TrackerBuffer, track
 
 
 def mock_track(path, action, **kargs):
@@ -37,6 +40,60 @@ class TrackerTest(TestCase):
         self.assertEqual(mock_track.call_count, 0)
 
 
+class TrackTest(TestCase):
+    @override_settings(TRACKER_ENABLED=True, TRACKER_BUFFER_ENABLED=False)
+    def test_track_sync(self):
+        track(page="/prestataires/", meta={"user_id": "1", "siae_id": ["2"]})
+        tracker = Tracker.objects.get()
+        self.assertEqual(tracker.page, "/prestataires/")
+        self.assertEqual(tracker.user_id, 1)
+        self.assertEqual(tracker.siae_id, 2)
+
+    @override_settings(TRACKER_ENABLED=True, TRACKER_BUFFER_ENABLED=True)
+    @mock.patch("lemarche.utils.tracker.tracker_buffer")
+    def test_track_buffered(self, mock_tracker_buffer):
+        track(page="/prestataires/", meta={})
+        mock_tracker_buffer.add.assert_called_once()
+        self.assertEqual(mock_tracker_buffer.add.call_args[0][0]["page"], "/prestataires/")
+        self.assertEqual(Tracker.objects.count(), 0)
+
+
+@mock.patch.object(TrackerBuffer, "start_worker")
+class TrackerBufferTest(TestCase):
+    def get_payload(self, page="/"):
+        return {
+            "version": 3,
+            "env": "test",
+            "source": "tracker",
+            "date_created": timezone.now(),
+            "page": page,
+            "action": "load",
+            "data": {},
+        }
+
+    def test_flush(self, mock_start_worker):
+        tracker_buffer = TrackerBuffer(max_size=10, batch_size=2, flush_interval=5)
+        for i in range(3):
+            tracker_buffer.add(self.get_payload(page=f"/{i}"))
+        self.assertEqual(Tracker.objects.count(), 0)
+        # the worker is woken up as soon as a batch is full
+        self.assertTrue(tracker_buffer.flush_event.is_set())
+
+        with self.assertNumQueries(2):
+            self.assertEqual(tracker_buffer.flush(), 3)
+        self.assertEqual(Tracker.objects.count(), 3)
+        self.assertEqual(tracker_buffer.saved_count, 3)
+        self.assertEqual(len(tracker_buffer.queue), 0)
+
+    def test_bounded(self, mock_start_worker):
+        tracker_buffer = TrackerBuffer(max_size=2, batch_size=10, flush_interval=5)
+        self.assertTrue(tracker_buffer.add(self.get_payload()))
+        self.assertTrue(tracker_buffer.add(self.get_payload()))
+        self.assertFalse(tracker_buffer.add(self.get_payload()))
+        self.assertEqual(tracker_buffer.dropped_count, 1)
+        self.assertEqual(tracker_buffer.flush(), 2)
+
+
 class EmailTest(TestCase):
     def should_filter_out_non_betagouv_emails_when_not_in_prod(self):
         email_list = ["test@inclusion.gouv.fr", "test@example.com"]
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+
+from lemarche.utils.trigrams import TrigramIndex, get_trigrams
+
+
+class TrigramsTest(SimpleTestCase):
+    def test_get_trigrams(self):
+        self.assertEqual(get_trigrams("cat"), {"  c", " ca", "cat", "at "})
+        self.assertEqual(get_trigrams("a-b"), {"  a", " a ", "  b", " b "})
+        self.assertEqual(get_trigrams(""), set())
+
+    def test_trigram_index_search(self):
+        index = TrigramIndex()
+        for value in ["grenoble", "grenade", "lyon"]:
+            index.add(value)
+        self.assertEqual(len(index), 3)
+        # same similarity as pg_trgm: 6 shared trigrams / (9 + 9 - 6)
+        self.assertEqual([position for (_, position) in index.search("grenobel", threshold=0.1)], [0, 1])
+        self.assertEqual(index.search("grenobel", threshold=0.4), [(0.5, 0)])
+        self.assertEqual(index.search("grenobel", limit=1), [(0.5, 0)])
+        self.assertEqual(index.search("xyz"), [])
@@ -352,10 +352,10 @@ class InclusivePotentialPrestaModeTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertIn("analyse-potentiel-inclusif", response.url)
 
-    @patch("lemarche.www.dashboard.views.get_inclusive_potential_data")
+    @patch("lemarche.www.dashboard.views.get_inclusive_potential_data_list")
     def test_reanalyze_excel_depuis_session_ne_redirige_pas(self, mock_analysis):
         """Après import Excel, changer le presta_mode doit relancer l'analyse — pas rediriger."""
-        mock_analysis.return_value = (MOCK_POTENTIAL_DATA, MOCK_ANALYSIS_DATA)
+        mock_analysis.return_value = [(MOCK_POTENTIAL_DATA, MOCK_ANALYSIS_DATA)]
         self.client.force_login(self.user)
         session = self.client.session
         session["ipa_raw_projects"] = [
@@ -376,3 +376,4 @@ class InclusivePotentialPrestaModeTest(TestCase):
         self.assertEqual(response.context["presta_mode"], "mise_a_disposition")
         self.assertEqual(response.context["mode"], "excel")
         self.assertIsNotNone(response.context["results"])
+        self.assertEqual(mock_analysis.call_args[0][0], [(self.sector, self.perimeter, 50000)])
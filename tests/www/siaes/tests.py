@@ -1,8 +1,13 @@
+import io
 from unittest.mock import patch
 
+import openpyxl
+import pytest
 from django.contrib.gis.geos import Point
 from django.contrib.sites.models import Site
-from django.test import TestCase
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from requests.exceptions import RequestException
 
@@ -10,6 +15,12 @@ from lemarche.perimeters.models import Perimeter
 from lemarche.siaes import constants as siae_constants
 from lemarche.siaes.models import Siae, SiaeESUS
 from lemarche.www.siaes.forms import SiaeFilterForm, SiaeSiretFilterForm
+from lemarche.www.siaes.tasks import (
+    enqueue_siae_export,
+    export_siae_search_results,
+    get_siae_export_hash,
+    get_siae_export_pending_cache_key,
+)
 from lemarche.www.siaes.views import SiaeSiretSearchView
 from tests.conversations.factories import TemplateTransactionalFactory
 from tests.favorites.factories import FavoriteListFactory
@@ -1069,6 +1080,22 @@ class SiaeFullTextSearchTest(TestCase):
         siaes = list(response.context["siaes"])
         self.assertEqual(len(siaes), 1)
 
+    def test_search_by_siae_offer(self):
+        SiaeOfferFactory(siae=self.siae_1, name="Nettoyage de locaux")
+        url = self.url + "?q=nettoyage"
+        response = self.client.get(url)
+        siaes = list(response.context["siaes"])
+        self.assertEqual(len(siaes), 1)
+        self.assertEqual(siaes[0].name, self.siae_1.name)
+
+    def test_search_by_siae_sector(self):
+        SiaeActivityFactory(siae=self.siae_2, sector=SectorFactory(name="Menuiserie"))
+        url = self.url + "?q=menuiserie"
+        response = self.client.get(url)
+        siaes = list(response.context["siaes"])
+        self.assertEqual(len(siaes), 1)
+        self.assertEqual(siaes[0].name, self.siae_2.name)
+
 
 class SiaeClientReferenceTextSearchTest(TestCase):
     @classmethod
@@ -1636,6 +1663,96 @@ class SiaeSearchResultsDownloadAuthTest(TestCase):
         self.assertIn("text/csv", response["Content-Type"])
         self.assertIn("attachment", response["Content-Disposition"])
 
+    def test_authenticated_download_csv_is_streamed(self):
+        SiaeFactory(is_active=True, kind=siae_constants.KIND_EI, name="Structure CSV")
+        self.client.force_login(self.user)
+        response = self.client.get(self.download_url + f"?format=csv&kind={siae_constants.KIND_EI}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        csv_lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(csv_lines), 1 + 2)  # header + 2 siaes
+        self.assertIn("Structure CSV", "".join(csv_lines))
+        self.assertEqual(response.results_count, 2)
+
+    def test_authenticated_download_xlsx(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.download_url + f"?format=xls&kind={siae_constants.KIND_EI}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("spreadsheetml", response["Content-Type"])
+        self.assertIn(".xlsx", response["Content-Disposition"])
+        self.assertEqual(response["Context-Data-Results-Count"], "1")
+        workbook = openpyxl.load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(workbook["Structures"].max_row, 1 + 1)  # header + 1 siae
+
+    @override_settings(SIAE_EXPORT_ASYNC_THRESHOLD=0)
+    @patch("lemarche.www.siaes.tasks.whitelist_recipient_list", side_effect=lambda recipient_list: recipient_list)
+    @patch("lemarche.www.siaes.tasks.send_mail_async")
+    @patch("lemarche.www.siaes.tasks.s3.get_download_url", return_value="https://s3.example.com/export.xlsx")
+    @patch("lemarche.www.siaes.tasks.s3.upload_file")
+    def test_big_download_is_generated_in_background(
+        self, mock_upload_file, mock_get_download_url, mock_send_mail, mock_whitelist
+    ):
+        self.client.force_login(self.user)
+        response = self.client.get(self.download_url + f"?kind={siae_constants.KIND_EI}&format=xls")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("siae:search_results"), response["Location"])
+
+        mock_upload_file.assert_called_once()
+        key_path = mock_upload_file.call_args[0][1]
+        self.assertTrue(key_path.startswith("siae_export/"))
+        self.assertTrue(key_path.endswith(".xlsx"))
+        mock_send_mail.assert_called_once()
+        self.assertIn("https://s3.example.com/export.xlsx", mock_send_mail.call_args.kwargs["email_body"])
+        self.assertEqual(mock_send_mail.call_args.kwargs["recipient_list"], [self.user.email])
+
+    @pytest.mark.usefixtures("locmem_cache")
+    @override_settings(SIAE_EXPORT_ASYNC_THRESHOLD=0)
+    @patch("lemarche.www.siaes.tasks.send_mail_async")
+    @patch("lemarche.www.siaes.tasks.s3.get_download_url", return_value="https://s3.example.com/export.csv")
+    @patch("lemarche.www.siaes.tasks.s3.upload_file")
+    def test_big_download_is_cached(self, mock_upload_file, mock_get_download_url, mock_send_mail):
+        self.client.force_login(self.user)
+        self.client.get(self.download_url + f"?format=csv&kind={siae_constants.KIND_EI}")
+        mock_upload_file.assert_called_once()
+
+        # same filters (different order): the cached export is served
+        response = self.client.get(self.download_url + f"?kind={siae_constants.KIND_EI}&format=csv")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], "https://s3.example.com/export.csv")
+        mock_upload_file.assert_called_once()
+
+    @pytest.mark.usefixtures("locmem_cache")
+    @patch("lemarche.www.siaes.tasks.whitelist_recipient_list", side_effect=lambda recipient_list: recipient_list)
+    @patch("lemarche.www.siaes.tasks.send_mail_async")
+    @patch("lemarche.www.siaes.tasks.s3.upload_file", side_effect=OSError("S3 unavailable"))
+    def test_big_download_failure_releases_the_pending_export(self, mock_upload_file, mock_send_mail, mock_whitelist):
+        query_dict = QueryDict(f"kind={siae_constants.KIND_EI}&format=csv")
+        pending_cache_key = get_siae_export_pending_cache_key(get_siae_export_hash(query_dict))
+        # an identical export is in progress, requested by another user
+        cache.add(pending_cache_key, ["other@example.com"])
+
+        enqueue_siae_export(query_dict, self.user.email)
+        self.assertEqual(cache.get(pending_cache_key), ["other@example.com", self.user.email])
+        with self.assertRaises(OSError):
+            export_siae_search_results.call_local(dict(query_dict.lists()), "other@example.com")
+
+        # the users are notified of the failure, and a new request can be enqueued
+        self.assertIsNone(cache.get(pending_cache_key))
+        self.assertEqual(
+            sorted(call.kwargs["recipient_list"][0] for call in mock_send_mail.call_args_list),
+            sorted(["other@example.com", self.user.email]),
+        )
+        self.assertIn("échoué", mock_send_mail.call_args.kwargs["email_subject"])
+
+    def test_siae_export_hash(self):
+        self.assertEqual(
+            get_siae_export_hash(QueryDict("kind=EI&kind=ETTI&format=xls")),
+            get_siae_export_hash(QueryDict("format=xlsx&kind=ETTI&kind=EI&perimeters=")),
+        )
+        self.assertNotEqual(
+            get_siae_export_hash(QueryDict("kind=EI&format=csv")), get_siae_export_hash(QueryDict("kind=EI"))
+        )
+
     def test_download_button_visible_for_anonymous(self):
         response = self.client.get(self.search_url)
         self.assertEqual(response.status_code, 200)
@@ -1787,3 +1904,47 @@ class SiaeContactDetailsViewTest(TestCase):
         response = self.client.get(self.detail_url)
         self.assertContains(response, "contact_details_buyer_modal")
         self.assertContains(response, "Coordonnées de la structure")
+
+
+@pytest.mark.usefixtures("locmem_cache")
+class SiaeSearchFacetsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sector = SectorFactory(name="Entretien")
+        cls.network = NetworkFactory(name="Réseau")
+        cls.label = LabelFactory(name="Label")
+
+    def test_form_choices_are_cached(self):
+        form = SiaeFilterForm()
+        self.assertEqual(form.fields["sectors"].choices, [(self.sector.group.name, [(self.sector.slug, "Entretien")])])
+        self.assertEqual(form.fields["networks"].choices, [(self.network.slug, "Réseau")])
+        self.assertEqual(form.fields["labels"].choices, [(self.label.slug, "Label")])
+        with self.assertNumQueries(0):
+            SiaeFilterForm()
+
+    def test_form_choices_are_invalidated_on_change(self):
+        SiaeFilterForm()
+        self.network.name = "Nouveau réseau"
+        self.network.save()
+        NetworkFactory(name="Autre réseau")
+        form = SiaeFilterForm()
+        self.assertEqual([name for _, name in form.fields["networks"].choices], ["Autre réseau", "Nouveau réseau"])
+        self.label.delete()
+        form = SiaeFilterForm()
+        self.assertEqual(form.fields["labels"].choices, [])
+
+    def test_form_validation_with_cached_choices(self):
+        form = SiaeFilterForm(data={"sectors": [self.sector.slug], "networks": [self.network.slug]})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(list(form.cleaned_data["sectors"]), [self.sector])
+        form = SiaeFilterForm(data={"sectors": ["unknown"]})
+        self.assertFalse(form.is_valid())
+
+    def test_search_results_current_sectors(self):
+        url = reverse("siae:search_results")
+        response = self.client.get(url, {"sectors": [self.sector.slug]})
+        self.assertEqual(
+            response.context["current_sectors"],
+            [{"id": self.sector.id, "slug": self.sector.slug, "name": "Entretien"}],
+        )
+        self.assertEqual([group.slug for group in response.context["current_sector_groups"]], [self.sector.group.slug])
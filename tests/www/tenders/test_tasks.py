@@ -1,11 +1,19 @@
 from unittest.mock import patch
 
 from django.test import TestCase
+from django.utils import timezone
+from huey.contrib.djhuey import lock_task
 
 from lemarche.tenders.enums import TenderSourcesChoices
-from lemarche.www.tenders.tasks import send_tender_email_to_siae
+from lemarche.tenders.models import Tender
+from lemarche.www.tenders.tasks import (
+    get_tender_send_checkpoints,
+    send_tender_email_to_siae,
+    send_tender_emails_to_siaes,
+    send_validated_tender_task,
+)
 from tests.conversations.factories import TemplateTransactionalFactory
-from tests.siaes.factories import SiaeFactory
+from tests.siaes.factories import SiaeFactory, SiaeUserFactory
 from tests.tenders.factories import TenderFactory, TenderSiaeFactory
 from tests.users.factories import UserFactory
 
@@ -70,3 +78,97 @@ class TenderEmailTasksTest(TestCase):
 
         # Verify that recipient_content_object is the override user
         self.assertEqual(kwargs["recipient_content_object"], override_user)
+
+    @patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
+    @patch("lemarche.www.tenders.tasks.whitelist_recipient_list", side_effect=lambda recipient_list: recipient_list)
+    def test_send_tender_emails_to_siaes_batch(self, mock_whitelist, mock_send_emails):
+        """Test sending the tender to all its siaes (& their users) with a single batch send"""
+        siae_2 = SiaeFactory(contact_email="siae2@example.com")
+        siae_2_user = SiaeUserFactory(siae=siae_2, user=UserFactory(email="siae2_user@example.com")).user
+        SiaeUserFactory(siae=siae_2, user=UserFactory(email="siae2@example.com"))  # same email: not sent twice
+        tender = TenderFactory(author=self.user, limit_send_to_siae_batch=10)
+        tender_siae_1 = TenderSiaeFactory(tender=tender, siae=self.siae)
+        tender_siae_2 = TenderSiaeFactory(tender=tender, siae=siae_2)
+
+        send_tender_emails_to_siaes(tender)
+
+        mock_send_emails.assert_called_once()
+        recipients = mock_send_emails.call_args[0][0]
+        self.assertEqual(
+            sorted(recipient["recipient_email"] for recipient in recipients),
+            ["siae2@example.com", "siae2_user@example.com", "siae@example.com"],
+        )
+        siae_2_user_recipient = next(r for r in recipients if r["recipient_email"] == "siae2_user@example.com")
+        self.assertEqual(siae_2_user_recipient["recipient_content_object"], siae_2_user)
+        self.assertIn(f"user_id={siae_2_user.id}", siae_2_user_recipient["variables"]["TENDER_URL"])
+        self.assertEqual(siae_2_user_recipient["variables"]["TENDER_TITLE"], tender.title)
+
+        # the send dates are set
+        for tender_siae in [tender_siae_1, tender_siae_2]:
+            tender_siae.refresh_from_db()
+            self.assertIsNotNone(tender_siae.email_send_date)
+        tender.refresh_from_db()
+        self.assertEqual(tender.logs[-2]["email_count"], 2)
+        self.assertEqual(tender.logs[-1]["siae_users_count"], 2)
+
+
+@patch("lemarche.www.tenders.tasks.send_tender_emails_to_partners")
+@patch("lemarche.www.tenders.tasks.send_confirmation_published_email_to_author")
+@patch("lemarche.conversations.models.TemplateTransactional.send_transactional_emails")
+@patch("lemarche.www.tenders.tasks.whitelist_recipient_list", side_effect=lambda recipient_list: recipient_list)
+class SendValidatedTenderTaskTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TemplateTransactionalFactory(code="TENDERS_SIAE_PRESENTATION", is_active=True)
+        cls.tender = TenderFactory(
+            status=Tender.StatusChoices.STATUS_VALIDATED, first_sent_at=None, limit_send_to_siae_batch=2
+        )
+        cls.tender_siaes = [
+            TenderSiaeFactory(tender=cls.tender, siae=SiaeFactory(contact_email=f"siae{i}@example.com"))
+            for i in range(3)
+        ]
+
+    def test_send_validated_tender_task(self, mock_whitelist, mock_send_emails, mock_send_author, mock_partners):
+        send_validated_tender_task(self.tender.id)
+
+        mock_send_author.assert_called_once()
+        mock_partners.assert_called_once()
+        self.assertEqual(len(mock_send_emails.call_args[0][0]), 2)
+        self.tender.refresh_from_db()
+        self.assertIsNotNone(self.tender.first_sent_at)
+        self.assertEqual(self.tender.tendersiae_set.filter(email_send_date__isnull=False).count(), 2)
+
+        # already sent: nothing happens
+        send_validated_tender_task(self.tender.id)
+        mock_send_author.assert_called_once()
+        mock_send_emails.assert_called_once()
+
+    def test_send_validated_tender_task_resume(
+        self, mock_whitelist, mock_send_emails, mock_send_author, mock_partners
+    ):
+        # interrupted send: the author was notified & 1 TenderSiae was emailed
+        self.tender.logs.append({"action": "email_author_confirmation"})
+        self.tender.save()
+        self.tender_siaes[0].email_send_date = timezone.now()
+        self.tender_siaes[0].save()
+        self.assertEqual(get_tender_send_checkpoints(self.tender), {"email_author_confirmation"})
+
+        send_validated_tender_task(self.tender.id)
+
+        mock_send_author.assert_not_called()
+        # only the remaining TenderSiae of the batch
+        self.assertEqual(len(mock_send_emails.call_args[0][0]), 1)
+        self.assertEqual(self.tender.tendersiae_set.filter(email_send_date__isnull=False).count(), 2)
+        self.tender.refresh_from_db()
+        self.assertEqual(get_tender_send_checkpoints(self.tender), set())
+
+    def test_send_validated_tender_task_locked(
+        self, mock_whitelist, mock_send_emails, mock_send_author, mock_partners
+    ):
+        with lock_task(f"send_tender_{self.tender.id}"):
+            send_validated_tender_task(self.tender.id)
+
+        mock_send_author.assert_not_called()
+        mock_send_emails.assert_not_called()
+        self.tender.refresh_from_db()
+        self.assertIsNone(self.tender.first_sent_at)